@@ -0,0 +1,127 @@
+import pandas as pd
+
+import archive
+import db
+
+# --- ANALİZ SORGULARI ---
+# Her fonksiyon yalnızca ilgili grafiğin ihtiyaç duyduğu toplanmış veriyi döner.
+# Toplamalar SQL GROUP BY ile özet tablolar üzerinde yapılır; oranlar pandas'taki
+# eski hesapla aynı işlem sırasıyla hesaplanır.
+
+
+def study_totals(student_id):
+    row = db.query_one("""
+        SELECT COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0), COALESCE(SUM(q_empty), 0),
+               COALESCE(SUM(duration), 0), COUNT(*)
+        FROM study_unit_rollup
+        WHERE student_id = ?
+    """, (int(student_id),))
+    total_q, total_wrong, total_empty, total_duration, unit_count = row
+    if total_q > 0:
+        success_rate = ((total_q - total_wrong - total_empty) / total_q) * 100
+        gap_to_100 = 100 - success_rate
+    else:
+        success_rate = 0
+        gap_to_100 = 100
+    return {
+        'total_q': total_q,
+        'total_wrong': total_wrong,
+        'total_empty': total_empty,
+        'total_duration': total_duration,
+        'success_rate': success_rate,
+        'gap_to_100': gap_to_100,
+        'has_data': unit_count > 0,
+    }
+
+
+def subject_totals(student_id):
+    return db.query_df("""
+        SELECT s.subject_name, SUM(r.q_solved) AS q_solved
+        FROM study_unit_rollup r
+        JOIN subjects s ON r.subject_id = s.id
+        WHERE r.student_id = ?
+        GROUP BY r.subject_id, s.subject_name
+        ORDER BY s.subject_name
+    """, (int(student_id),))
+
+
+def unit_success(student_id):
+    # Ünite kimliği ile gruplama; katalogda ders+ünite adı tekil olduğundan eski
+    # groupby(['subject_name','unit_name']) ile aynı sonucu verir
+    return db.query_df("""
+        SELECT subject_name, unit_name, q_solved, q_wrong, q_empty, duration, is_repeated,
+               COALESCE(CAST(q_solved - q_wrong - q_empty AS REAL) / NULLIF(q_solved, 0) * 100, 0) AS success_rate
+        FROM (
+            SELECT s.subject_name, u.unit_name, SUM(r.q_solved) AS q_solved, SUM(r.q_wrong) AS q_wrong,
+                   SUM(r.q_empty) AS q_empty, SUM(r.duration) AS duration, SUM(r.is_repeated) AS is_repeated
+            FROM study_unit_rollup r
+            JOIN units u ON r.unit_id = u.id
+            JOIN subjects s ON u.subject_id = s.id
+            WHERE r.student_id = ?
+            GROUP BY r.unit_id, s.subject_name, u.unit_name
+        ) totals
+        ORDER BY subject_name, unit_name
+    """, (int(student_id),))
+
+
+def daily_trend(student_id):
+    df = db.query_df("""
+        SELECT date, q_solved, q_wrong, q_empty, duration,
+               COALESCE(CAST(q_solved - q_wrong - q_empty AS REAL) / NULLIF(q_solved, 0) * 100, 0) AS daily_success
+        FROM study_daily_rollup
+        WHERE student_id = ?
+        ORDER BY date
+    """, (int(student_id),))
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def exam_nets(student_id):
+    return db.query_df("""
+        SELECT subject_name, q_solved, q_wrong, q_empty, duration,
+               (q_solved - q_wrong) - (q_wrong / 4.0) AS net
+        FROM (
+            SELECT s.subject_name, SUM(r.q_solved) AS q_solved, SUM(r.q_wrong) AS q_wrong,
+                   SUM(r.q_empty) AS q_empty, SUM(r.duration) AS duration
+            FROM exam_subject_rollup r
+            JOIN subjects s ON r.subject_id = s.id
+            WHERE r.student_id = ?
+            GROUP BY r.subject_id, s.subject_name
+        ) totals
+        ORDER BY subject_name
+    """, (int(student_id),))
+
+
+# --- HAM KAYITLAR (sadece rapor indirme için) ---
+# {logs}: güncel tablo ya da bir arşiv bölümü; aralık arşive değiyorsa sorgu bölümlerde de çalışır
+
+STUDY_ROWS_SQL = """
+    SELECT s.subject_name, u.unit_name, l.date, l.q_solved, l.q_wrong, l.q_empty, l.duration, l.is_repeated
+    FROM {logs} l
+    JOIN units u ON l.unit_id = u.id
+    JOIN subjects s ON l.subject_id = s.id
+    WHERE l.student_id = ?
+"""
+
+EXAM_ROWS_SQL = """
+    SELECT s.subject_name, l.date, l.q_solved, l.q_wrong, l.q_empty, l.duration
+    FROM {logs} l
+    JOIN subjects s ON l.subject_id = s.id
+    WHERE l.student_id = ?
+"""
+
+
+def study_row_queries(student_id, start=None, end=None):
+    return archive.queries(STUDY_ROWS_SQL, 'study_logs', student_id, start, end)
+
+
+def exam_row_queries(student_id, start=None, end=None):
+    return archive.queries(EXAM_ROWS_SQL, 'exam_logs', student_id, start, end)
+
+
+def study_rows(student_id, start=None, end=None):
+    return archive.query_df(study_row_queries(student_id, start, end))
+
+
+def exam_rows(student_id, start=None, end=None):
+    return archive.query_df(exam_row_queries(student_id, start, end))
@@ -0,0 +1,146 @@
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import db
+
+# --- ÖĞRENCİ ANALİZ ÖNBELLEĞİ ---
+# Sonuçlar (tür, öğrenci_id) anahtarıyla tutulur ve öğrencinin veri sürümüyle
+# eşleştirilir. Kayıt ekleyen/silen her yazma yolu bump() ile sürümü artırır;
+# sürüm değişince önbellekteki eski sonuç kullanılmaz.
+
+MAX_BYTES = int(float(os.environ.get('OGRENCI_TAKIP_CACHE_MB', '256')) * 1024 * 1024)
+TTL_SECONDS = float(os.environ.get('OGRENCI_TAKIP_CACHE_TTL', '900'))
+
+# Tüm okulu etkileyen işlemler için genel sürüm (cache_generations satırı)
+GLOBAL_KEY = 'analysis'
+
+
+def bump(conn, student_id):
+    conn.execute("""INSERT INTO student_data_versions (student_id, version) VALUES (?, 1)
+                    ON CONFLICT(student_id) DO UPDATE SET version = student_data_versions.version + 1""", (int(student_id),))
+
+
+def bump_generation(conn, key):
+    conn.execute("""INSERT INTO cache_generations (key, version) VALUES (?, 1)
+                    ON CONFLICT(key) DO UPDATE SET version = cache_generations.version + 1""", (key,))
+
+
+def generation(key):
+    row = db.query_one("SELECT version FROM cache_generations WHERE key = ?", (key,))
+    return row[0] if row else 0
+
+
+def bump_all(conn):
+    bump_generation(conn, GLOBAL_KEY)
+
+
+def data_version(student_id):
+    row = db.query_one("""SELECT (SELECT version FROM cache_generations WHERE key = ?),
+                                 (SELECT version FROM student_data_versions WHERE student_id = ?)""",
+                       (GLOBAL_KEY, int(student_id)))
+    return row[0] or 0, row[1] or 0
+
+
+def _sizeof(obj, seen=None):
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=True).sum()) if isinstance(obj, pd.DataFrame) else int(obj.memory_usage(deep=True))
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (bytes, bytearray, str)):
+        return sys.getsizeof(obj)
+    if hasattr(obj, 'to_plotly_json'):
+        return _sizeof(obj.to_plotly_json(), seen)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(_sizeof(k, seen) + _sizeof(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(_sizeof(v, seen) for v in obj)
+    return sys.getsizeof(obj)
+
+
+class AnalysisCache:
+    def __init__(self, max_bytes=MAX_BYTES, ttl=TTL_SECONDS):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()   # anahtar -> (sürüm, değer, boyut, zaman)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expired': 0, 'stale': 0}
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[2]
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            if entry[0] != version:
+                self._drop(key)
+                self._stats['stale'] += 1
+                self._stats['misses'] += 1
+                return None
+            if time.monotonic() - entry[3] > self.ttl:
+                self._drop(key)
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (version, value, size, time.monotonic())
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self._stats['evictions'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            result = dict(self._stats)
+            result['entries'] = len(self._entries)
+            result['bytes'] = self._bytes
+        result['max_bytes'] = self.max_bytes
+        result['ttl_seconds'] = self.ttl
+        return result
+
+
+_cache = AnalysisCache()
+
+
+def get_cache():
+    return _cache
+
+
+def get_or_compute(kind, student_id, compute):
+    version = data_version(student_id)
+    key = (kind, int(student_id))
+    value = _cache.get(key, version)
+    if value is None:
+        value = compute()
+        _cache.put(key, version, value)
+    return value
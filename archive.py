@@ -0,0 +1,411 @@
+import argparse
+import os
+import re
+import sqlite3
+from contextlib import closing
+from datetime import date, datetime
+
+import pandas as pd
+
+import db
+
+# --- GEÇMİŞ DÖNEM ARŞİVİ ---
+# Kesim tarihinden eski çalışma/deneme kayıtları eğitim-öğretim yılı başına ayrı
+# SQLite dosyalarına (arşiv bölümü, örn. arsiv/ogrenci_takip_2023-2024.db) taşınır;
+# ana dosya ve yedekleri büyümez. Taşınan kayıtların toplamları özet tablolarda
+# kalır: analiz paneli, ilerleme motoru ve okul raporu arşivden etkilenmez.
+# Ham kayıt gereken okumalar (rapor indirme, get_student_analysis) queries() ile
+# çalışır: istenen tarih aralığına değen bölümler o bağlantıya ATTACH edilip aynı
+# sorgu sırayla bölümlerde ve güncel tabloda çalıştırılır; aralık yalnızca güncel
+# dönemdeyse arşive hiç dokunulmaz. Katalog ana veritabanındadır (archive_partitions).
+# Yalnızca dosya tabanlı SQLite kurulumunda kullanılır; PostgreSQL'de tablolar olduğu
+# gibi kalır (sunucu tarafı bölümleme sunucunun işidir).
+#   python archive.py --list | --before 2024-09-01 | --vacuum
+
+TERM_START_MONTH = 9     # eğitim-öğretim yılı Eylül'de başlar
+KEEP_TERMS = int(os.environ.get('OGRENCI_TAKIP_ARCHIVE_KEEP_TERMS', '1'))
+ARCHIVE_DIR = os.environ.get('OGRENCI_TAKIP_ARCHIVE_DIR', '')
+COPY_CHUNK = 5000
+ATTACH_LIMIT = 8         # SQLite bağlantı başına en fazla 10 ek veritabanı açar
+
+TABLES = {
+    'study_logs': ('id', 'student_id', 'subject_id', 'unit_id', 'date', 'q_solved', 'q_wrong', 'q_empty', 'duration', 'is_repeated'),
+    'exam_logs': ('id', 'student_id', 'subject_id', 'date', 'q_solved', 'q_wrong', 'q_empty', 'duration'),
+}
+
+# Özet tablolarla aynı gruplama (rollups.rebuild); taşıma ve silmede toplamlar bunlarla düzeltilir
+SUMS_SQL = {
+    'study_unit_rollup': """SELECT student_id, unit_id, MIN(subject_id), COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0),
+                                   COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COALESCE(SUM(is_repeated), 0), COUNT(*)
+                            FROM study_logs WHERE {where} GROUP BY student_id, unit_id""",
+    'study_daily_rollup': """SELECT student_id, date, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0),
+                                    COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                             FROM study_logs WHERE {where} GROUP BY student_id, date""",
+    'exam_subject_rollup': """SELECT student_id, subject_id, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0),
+                                     COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                              FROM exam_logs WHERE {where} GROUP BY student_id, subject_id""",
+}
+
+ADD_SQL = {
+    'study_unit_rollup': """INSERT INTO study_unit_rollup (student_id, unit_id, subject_id, q_solved, q_wrong, q_empty, duration, is_repeated, log_count)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                            ON CONFLICT(student_id, unit_id) DO UPDATE SET
+                                q_solved = q_solved + excluded.q_solved, q_wrong = q_wrong + excluded.q_wrong,
+                                q_empty = q_empty + excluded.q_empty, duration = duration + excluded.duration,
+                                is_repeated = is_repeated + excluded.is_repeated, log_count = log_count + excluded.log_count""",
+    'study_daily_rollup': """INSERT INTO study_daily_rollup (student_id, date, q_solved, q_wrong, q_empty, duration, log_count)
+                             VALUES (?, ?, ?, ?, ?, ?, ?)
+                             ON CONFLICT(student_id, date) DO UPDATE SET
+                                 q_solved = q_solved + excluded.q_solved, q_wrong = q_wrong + excluded.q_wrong,
+                                 q_empty = q_empty + excluded.q_empty, duration = duration + excluded.duration,
+                                 log_count = log_count + excluded.log_count""",
+    'exam_subject_rollup': """INSERT INTO exam_subject_rollup (student_id, subject_id, q_solved, q_wrong, q_empty, duration, exam_count)
+                              VALUES (?, ?, ?, ?, ?, ?, ?)
+                              ON CONFLICT(student_id, subject_id) DO UPDATE SET
+                                  q_solved = q_solved + excluded.q_solved, q_wrong = q_wrong + excluded.q_wrong,
+                                  q_empty = q_empty + excluded.q_empty, duration = duration + excluded.duration,
+                                  exam_count = exam_count + excluded.exam_count""",
+}
+
+# Grup anahtarı kolon sayısı ve sayaç kolonu (sıfırlanan satırlar silinir)
+ROLLUP_KEYS = {'study_unit_rollup': (('student_id', 'unit_id'), 'log_count'),
+               'study_daily_rollup': (('student_id', 'date'), 'log_count'),
+               'exam_subject_rollup': (('student_id', 'subject_id'), 'exam_count')}
+
+
+def supported():
+    pool = db.get_pool()
+    return pool.dialect == 'sqlite' and 'mode=memory' not in pool.path
+
+
+def term_of(day):
+    day = date.fromisoformat(str(day)[:10])
+    first = day.year if day.month >= TERM_START_MONTH else day.year - 1
+    return f"{first}-{first + 1}"
+
+
+def term_bounds(term):
+    first = int(term[:4])
+    return date(first, TERM_START_MONTH, 1).isoformat(), date(first + 1, TERM_START_MONTH, 1).isoformat()
+
+
+def default_cutoff(today=None, keep_terms=KEEP_TERMS):
+    # İçinde bulunulan dönem dahil son keep_terms dönem güncel tablolarda kalır
+    first = int(term_of(today or date.today())[:4]) - (max(keep_terms, 1) - 1)
+    return date(first, TERM_START_MONTH, 1).isoformat()
+
+
+def archive_dir():
+    return ARCHIVE_DIR or os.path.join(os.path.dirname(os.path.abspath(db.get_pool().path)), 'arsiv')
+
+
+def _path(file):
+    return os.path.join(archive_dir(), file)
+
+
+def _open(path, create=False):
+    # Arşiv dosyaları tek dosyalık (rollback günlüğü) ve kalıcı commit'li yazılır
+    if not create and not os.path.exists(path):
+        raise FileNotFoundError(f"Arşiv dosyası bulunamadı: {path}")
+    if create:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA synchronous=FULL")
+    if create:
+        for table, columns in TABLES.items():
+            conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {', '.join(columns[1:])})")
+            conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_student_date ON {table} (student_id, date)")
+    return conn
+
+
+def partitions(start=None, end=None):
+    # Tarih aralığına ([start, end], açık uçlar serbest) değen bölümler, eskiden yeniye
+    if not supported():
+        return []
+    sql = "SELECT term, file, date_from, date_to, study_rows, exam_rows, archived_at FROM archive_partitions WHERE 1 = 1"
+    params = []
+    if start:
+        sql += " AND date_to >= ?"
+        params.append(str(start))
+    if end:
+        sql += " AND date_from <= ?"
+        params.append(str(end))
+    return db.query_all(sql + " ORDER BY term", params)
+
+
+# --- OKUMA ---
+
+def _attach(conn, term, file):
+    alias = 'arsiv_' + re.sub(r'\W', '_', term)
+    attached = [row[1] for row in conn.execute("PRAGMA database_list").fetchall()]
+    if alias not in attached:
+        path = _path(file)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Arşiv dosyası bulunamadı: {path}")
+        archived = [name for name in attached if name.startswith('arsiv_')]
+        if len(archived) >= ATTACH_LIMIT:
+            for name in archived:
+                conn.execute(f"DETACH DATABASE {name}")
+        conn.execute(f"ATTACH DATABASE ? AS {alias}", (path,))
+    return alias
+
+
+def queries(template, table, student_id, start=None, end=None):
+    # template: {logs} yerine tablo adı gelen ve "WHERE l.student_id = ?" ile biten sorgu.
+    # Bölüm, (sql, params) üretilirken bu thread'in okuma bağlantısına bağlanır; bu yüzden
+    # üretilen sorgular aynı db.read() bloğu içinde çalıştırılmalıdır (export, query_df).
+    student_id = int(student_id)
+    bounds, params = "", []
+    if start:
+        bounds += " AND l.date >= ?"
+        params.append(str(start))
+    if end:
+        bounds += " AND l.date <= ?"
+        params.append(str(end))
+    for term, file, *_ in partitions(start, end):
+        with db.read() as conn:
+            alias = _attach(conn, term, file)
+        # Taşıma yarıda kaldıysa (arşive yazıldı, ana dosyadan silinmedi) kayıt bir kez sayılır
+        yield (template.format(logs=f"{alias}.{table}") + bounds +
+               f" AND l.id NOT IN (SELECT id FROM main.{table} WHERE student_id = ?)", [student_id] + params + [student_id])
+    yield template.format(logs=table) + bounds, [student_id] + params
+
+
+def query_df(sql_queries):
+    with db.read():
+        frames = [db.query_df(sql, params) for sql, params in sql_queries]
+    return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+
+def unit_day_sums(student_id):
+    # Arşivdeki çalışma kayıtlarının ünite×gün toplamları (progress.rebuild)
+    rows = []
+    for term, file, *_ in partitions():
+        with closing(_open(_path(file))) as source:
+            rows += source.execute("""SELECT unit_id, date, COALESCE(SUM(q_solved), 0),
+                                             COALESCE(SUM(COALESCE(q_solved, 0) - COALESCE(q_wrong, 0) - COALESCE(q_empty, 0)), 0)
+                                      FROM study_logs WHERE student_id = ? GROUP BY unit_id, date""", (int(student_id),)).fetchall()
+    return rows
+
+
+# --- ÖZET TOPLAMLARI ---
+
+def _sums(conn, filters):
+    # filters: {tablo: (where, params)}; filtre verilmeyen tablonun toplamı alınmaz
+    sums = {}
+    for rollup, sql in SUMS_SQL.items():
+        table = 'exam_logs' if rollup == 'exam_subject_rollup' else 'study_logs'
+        if table in filters:
+            where, params = filters[table]
+            sums[rollup] = conn.execute(sql.format(where=where), params).fetchall()
+    return sums
+
+
+def _add_sums(conn, sums, sign=1):
+    for rollup, rows in sums.items():
+        if not rows:
+            continue
+        keys, counter = ROLLUP_KEYS[rollup]
+        width = len(keys)
+        if rollup == 'study_unit_rollup':
+            width += 1   # subject_id toplanmaz
+        conn.executemany(ADD_SQL[rollup], [tuple(row[:width]) + tuple(sign * value for value in row[width:]) for row in rows])
+        if sign < 0:
+            conn.executemany(f"DELETE FROM {rollup} WHERE {keys[0]} = ? AND {keys[1]} = ? AND {counter} <= 0",
+                             [row[:2] for row in rows])
+
+
+def restore_rollups(conn):
+    # rollups.rebuild sonrası: arşivdeki kayıtların toplamları özetlere geri eklenir
+    for term, file, *_ in partitions():
+        with closing(_open(_path(file))) as source:
+            _add_sums(conn, _sums(source, {table: ("1 = 1", ()) for table in TABLES}))
+
+
+# --- TAŞIMA ---
+
+def _refresh_catalog(conn, term, file, source):
+    counts = {table: source.execute(f"SELECT COUNT(*), MIN(date), MAX(date) FROM {table}").fetchone() for table in TABLES}
+    if not any(count for count, _, _ in counts.values()):
+        conn.execute("DELETE FROM archive_partitions WHERE term = ?", (term,))
+        return
+    dates = [d for _, low, high in counts.values() for d in (low, high) if d]
+    conn.execute("""INSERT INTO archive_partitions (term, file, date_from, date_to, study_rows, exam_rows, archived_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(term) DO UPDATE SET
+                        file = excluded.file, date_from = excluded.date_from, date_to = excluded.date_to,
+                        study_rows = excluded.study_rows, exam_rows = excluded.exam_rows, archived_at = excluded.archived_at""",
+                 (term, file, min(dates), max(dates), counts['study_logs'][0], counts['exam_logs'][0],
+                  datetime.now().isoformat(timespec='seconds')))
+
+
+def _archive_term(term, start, end):
+    # Tek dönem, tek yazma transaction'ı: kopyala (arşiv commit) -> toplamları al -> sil -> toplamları geri ekle.
+    # Arşiv commit'i ile ana commit arasında kesilirse kayıt iki yerde olur; okumalar tekrarı
+    # eler (queries) ve taşıma yeniden çalıştırıldığında (INSERT OR REPLACE) tamamlanır.
+    file = f"{os.path.splitext(os.path.basename(db.get_pool().path))[0]}_{term}.db"
+    where, params = "date >= ? AND date < ?", (start, end)
+    moved = {}
+    with db.write(durable=True) as conn:
+        # Yarıda kalmış silme istekleri önce: yeni taşınan kayıtlara uygulanmasınlar
+        _purge(conn, _pending())
+        with closing(_open(_path(file), create=True)) as target:
+            target.execute("BEGIN IMMEDIATE")
+            try:
+                for table, columns in TABLES.items():
+                    cursor = conn.execute(f"SELECT {', '.join(columns)} FROM {table} WHERE {where}", params)
+                    insert = f"INSERT OR REPLACE INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                    moved[table] = 0
+                    while rows := cursor.fetchmany(COPY_CHUNK):
+                        target.executemany(insert, rows)
+                        moved[table] += len(rows)
+                target.execute("COMMIT")
+            except BaseException:
+                target.execute("ROLLBACK")
+                raise
+            if not any(moved.values()):
+                return moved
+            sums = _sums(conn, {table: (where, params) for table in TABLES})
+            for table in TABLES:
+                conn.execute(f"DELETE FROM {table} WHERE {where}", params)
+            _add_sums(conn, sums)
+            _refresh_catalog(conn, term, file, target)
+    return moved
+
+
+def cutoff_options(today=None):
+    # Güncel tablolardaki en eski kaydın dönem sonundan bugünkü dönemin başına kadar dönem başları
+    oldest = db.query_one("SELECT MIN(d) FROM (SELECT MIN(date) AS d FROM study_logs UNION ALL SELECT MIN(date) FROM exam_logs)")[0]
+    if not oldest:
+        return []
+    last = int(term_of(today or date.today())[:4])
+    return [date(year, TERM_START_MONTH, 1).isoformat() for year in range(int(term_of(oldest)[:4]) + 1, last + 1)]
+
+
+def archive_logs(cutoff=None, on_term=None):
+    # Döner: {dönem: {tablo: taşınan kayıt}}
+    if not supported():
+        raise RuntimeError("Arşivleme yalnızca dosya tabanlı SQLite veritabanında kullanılabilir.")
+    cutoff = str(cutoff or default_cutoff())
+    if cutoff > default_cutoff(keep_terms=1):
+        raise ValueError("İçinde bulunulan dönemin kayıtları arşivlenemez.")
+    oldest = db.query_one("SELECT MIN(d) FROM (SELECT MIN(date) AS d FROM study_logs WHERE date < ? "
+                          "UNION ALL SELECT MIN(date) FROM exam_logs WHERE date < ?)", (cutoff, cutoff))[0]
+    result = {}
+    if not oldest:
+        return result
+    for year in range(int(term_of(oldest)[:4]), int(term_of(cutoff)[:4]) + 1):
+        term = f"{year}-{year + 1}"
+        start, end = term_bounds(term)
+        if start >= cutoff:
+            break
+        result[term] = _archive_term(term, start, min(end, cutoff))
+        if on_term:
+            on_term(term, result[term])
+    return result
+
+
+# --- SİLME ---
+
+def _filters(student_id=None, unit_id=None):
+    if student_id is None:
+        return {table: ("1 = 1", ()) for table in TABLES}
+    if unit_id is None:
+        return {table: ("student_id = ?", (int(student_id),)) for table in TABLES}
+    return {'study_logs': ("student_id = ? AND unit_id = ?", (int(student_id), int(unit_id)))}
+
+
+def _pending():
+    # Okuma bağlantısı yazıcının açık transaction'ını görmez: yalnızca commit edilmiş istekler
+    return db.query_all("SELECT id, student_id, unit_id FROM archive_forget_queue ORDER BY id")
+
+
+def _purge(conn, queued):
+    # Arşivden silme tekrarlanabilir (aynı DELETE); yarıda kalırsa istek kuyrukta kalır
+    if not queued:
+        return
+    for term, file in conn.execute("SELECT term, file FROM archive_partitions ORDER BY term").fetchall():
+        path = _path(file)
+        if not os.path.exists(path):
+            continue
+        with closing(_open(path)) as source:
+            source.execute("BEGIN IMMEDIATE")
+            for _, student_id, unit_id in queued:
+                for table, (where, params) in _filters(student_id, unit_id).items():
+                    source.execute(f"DELETE FROM {table} WHERE {where}", params)
+            source.execute("COMMIT")
+            _refresh_catalog(conn, term, file, source)
+    conn.executemany("DELETE FROM archive_forget_queue WHERE id = ?", [(row[0],) for row in queued])
+
+
+def purge_forgotten():
+    # Silme transaction'ı commit edildikten sonra çalışır (db.after_commit)
+    if not supported():
+        return 0
+    with db.write() as conn:
+        queued = _pending()
+        _purge(conn, queued)
+    return len(queued)
+
+
+def forget(conn, student_id=None, unit_id=None):
+    # Silme yollarından, ana silmeyle aynı yazma transaction'ında çağrılır: arşivdeki eşleşen
+    # kayıtların toplamları özetlerden düşülür ve silme isteği kuyruğa (archive_forget_queue)
+    # yazılır. Kayıtlar arşiv dosyalarından ancak ana transaction commit edilince silinir;
+    # geri alınırsa istek de toplamlar da geri alınır, arşiv dosyalarına dokunulmamış olur.
+    # Commit ile arşivden silme arasında kesilen istek bir sonraki silme veya taşımada,
+    # toplamlar yeniden düşülmeden önce tamamlanır.
+    # student_id verilmezse tüm arşiv boşaltılır. Boşalan dosya silinmez: okuma bağlantılarına
+    # ATTACH edilmiş olabilir; dönem yeniden taşınırsa aynı dosyaya yazılır.
+    if not supported():
+        return
+    _purge(conn, _pending())
+    filters = _filters(student_id, unit_id)
+    for term, file, *_ in partitions():
+        path = _path(file)
+        if not os.path.exists(path):
+            continue
+        with closing(_open(path)) as source:
+            _add_sums(conn, _sums(source, filters), sign=-1)
+    conn.execute("INSERT INTO archive_forget_queue (student_id, unit_id) VALUES (?, ?)",
+                 (None if student_id is None else int(student_id), None if unit_id is None else int(unit_id)))
+    db.after_commit(purge_forgotten)
+
+
+# --- DURUM ---
+
+def summary():
+    rows = []
+    for term, file, date_from, date_to, study_rows, exam_rows, archived_at in partitions():
+        path = _path(file)
+        size = os.path.getsize(path) / 1024 / 1024 if os.path.exists(path) else None
+        rows.append((term, study_rows, exam_rows, date_from, date_to, size, archived_at))
+    return pd.DataFrame(rows, columns=['Dönem', 'Çalışma Kaydı', 'Deneme Kaydı', 'İlk Tarih', 'Son Tarih', 'Dosya (MB)', 'Arşivlenme'])
+
+
+def hot_counts():
+    return db.query_one("SELECT (SELECT COUNT(*) FROM study_logs), (SELECT COUNT(*) FROM exam_logs)")
+
+
+def vacuum():
+    # Taşımadan sonra ana dosyanın diskte küçülmesi için; tüm veritabanını kilitler
+    with closing(db.connect(db.get_pool().path)) as conn:
+        conn.execute("VACUUM")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Geçmiş dönem kayıtlarını arşiv dosyalarına taşı")
+    parser.add_argument("--before", help=f"Bu tarihten eski kayıtlar taşınır (varsayılan: {default_cutoff()})")
+    parser.add_argument("--list", action="store_true", help="Arşiv bölümlerini listele")
+    parser.add_argument("--vacuum", action="store_true", help="Taşımadan sonra ana dosyayı küçült (VACUUM)")
+    args = parser.parse_args()
+
+    import migrations
+    migrations.ensure_schema()
+    if not args.list:
+        archive_logs(args.before, on_term=lambda term, moved: print(
+            f"{term}: {moved.get('study_logs', 0)} çalışma, {moved.get('exam_logs', 0)} deneme kaydı taşındı"))
+        if args.vacuum:
+            vacuum()
+    print(summary().to_string(index=False))
+    print("Güncel tablolarda: {} çalışma, {} deneme kaydı".format(*hot_counts()))
@@ -0,0 +1,261 @@
+import base64
+import hashlib
+import hmac
+import os
+import random
+import string
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+
+# --- KİMLİK VE ŞİFRE YARDIMCILARI ---
+
+UNIQUE_ID_CHARS = string.ascii_uppercase + string.digits
+
+
+def generate_unique_id():
+    return ''.join(random.choices(UNIQUE_ID_CHARS, k=6))
+
+
+def allocate_unique_ids(count, taken):
+    # Toplu kayıt için: mevcut kimlikler bir kez okunur, çakışma kontrolü bellekte yapılır
+    taken = set(taken)
+    allocated = []
+    while len(allocated) < count:
+        unique_id = generate_unique_id()
+        if unique_id not in taken:
+            taken.add(unique_id)
+            allocated.append(unique_id)
+    return allocated
+
+
+def generate_password(length=8):
+    return ''.join(random.SystemRandom().choices(string.ascii_letters + string.digits, k=length))
+
+
+# --- ŞİFRE ÖZETLEME (KDF) ---
+# Şifreler tuzlu ve sürümlü saklanır: "scrypt$n$r$p$tuz$özet" veya
+# "pbkdf2_sha256$tekrar$tuz$özet". Eski tuzsuz SHA-256 özetleri (64 hex) hâlâ
+# doğrulanır ve girişte yeni biçime çevrilir. Maliyet ortam değişkenleriyle
+# ayarlanır; ayar değişince eski parametreli özetler de girişte yenilenir.
+# KDF işi sınırlı bir thread havuzunda çalışır (hashlib GIL'i bırakır), böylece
+# yoğun giriş anlarında CPU kullanımı sınırlanır ve diğer oturumlar beklemez.
+
+KDF_SCHEME = os.environ.get('OGRENCI_TAKIP_KDF', 'scrypt')
+SCRYPT_N = int(os.environ.get('OGRENCI_TAKIP_SCRYPT_N', str(2 ** 14)))
+SCRYPT_R = int(os.environ.get('OGRENCI_TAKIP_SCRYPT_R', '8'))
+SCRYPT_P = int(os.environ.get('OGRENCI_TAKIP_SCRYPT_P', '1'))
+PBKDF2_ITERATIONS = int(os.environ.get('OGRENCI_TAKIP_PBKDF2_ITER', '600000'))
+KDF_WORKERS = int(os.environ.get('OGRENCI_TAKIP_KDF_WORKERS', str(min(4, os.cpu_count() or 1))))
+KDF_QUEUE = int(os.environ.get('OGRENCI_TAKIP_KDF_QUEUE', '64'))
+KDF_TIMEOUT = float(os.environ.get('OGRENCI_TAKIP_KDF_TIMEOUT', '15'))
+# Toplu kayıt (hash_many) ayrı ve daha küçük bir havuzda: girişlerin kuyruğuna binlerce iş eklenmez
+KDF_BULK_WORKERS = int(os.environ.get('OGRENCI_TAKIP_KDF_BULK_WORKERS', str(max(1, KDF_WORKERS // 2))))
+
+SALT_BYTES = 16
+KEY_BYTES = 32
+
+
+class KdfBusy(Exception):
+    pass
+
+
+def _b64(data):
+    return base64.b64encode(data).decode('ascii')
+
+
+def _scrypt(password, salt, n, r, p):
+    # scrypt bellek ihtiyacı ~128*n*r bayt; varsayılan sınır (32 MB) yüksek n için yetmez
+    return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, dklen=KEY_BYTES,
+                          maxmem=256 * n * r * p + 1024 * 1024)
+
+
+def _pbkdf2(password, salt, iterations):
+    return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, iterations, dklen=KEY_BYTES)
+
+
+def _hash(password):
+    salt = os.urandom(SALT_BYTES)
+    if KDF_SCHEME == 'pbkdf2_sha256':
+        return f"pbkdf2_sha256${PBKDF2_ITERATIONS}${_b64(salt)}${_b64(_pbkdf2(password, salt, PBKDF2_ITERATIONS))}"
+    return f"scrypt${SCRYPT_N}${SCRYPT_R}${SCRYPT_P}${_b64(salt)}${_b64(_scrypt(password, salt, SCRYPT_N, SCRYPT_R, SCRYPT_P))}"
+
+
+def _verify(password, hashed):
+    if not hashed:
+        return False
+    parts = hashed.split('$')
+    try:
+        if parts[0] == 'scrypt' and len(parts) == 6:
+            n, r, p = int(parts[1]), int(parts[2]), int(parts[3])
+            expected = base64.b64decode(parts[5])
+            return hmac.compare_digest(_scrypt(password, base64.b64decode(parts[4]), n, r, p), expected)
+        if parts[0] == 'pbkdf2_sha256' and len(parts) == 4:
+            expected = base64.b64decode(parts[3])
+            return hmac.compare_digest(_pbkdf2(password, base64.b64decode(parts[2]), int(parts[1])), expected)
+    except (ValueError, TypeError):
+        return False
+    # Eski biçim: tuzsuz tek tur SHA-256
+    return hmac.compare_digest(hashlib.sha256(password.encode()).hexdigest(), hashed)
+
+
+def needs_rehash(hashed):
+    parts = (hashed or '').split('$')
+    if KDF_SCHEME == 'pbkdf2_sha256':
+        return parts[:2] != ['pbkdf2_sha256', str(PBKDF2_ITERATIONS)]
+    return parts[:4] != ['scrypt', str(SCRYPT_N), str(SCRYPT_R), str(SCRYPT_P)]
+
+
+_executor = None
+_bulk_executor = None
+_slots = threading.BoundedSemaphore(KDF_QUEUE)
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=KDF_WORKERS, thread_name_prefix='kdf')
+    return _executor
+
+
+def get_bulk_executor():
+    global _bulk_executor
+    if _bulk_executor is None:
+        with _executor_lock:
+            if _bulk_executor is None:
+                _bulk_executor = ThreadPoolExecutor(max_workers=KDF_BULK_WORKERS, thread_name_prefix='kdf-bulk')
+    return _bulk_executor
+
+
+def _run(func, *args):
+    # Kuyruk sınırı: aşırı yükte istekler sonsuz birikmez, KdfBusy ile reddedilir
+    if not _slots.acquire(timeout=KDF_TIMEOUT):
+        raise KdfBusy("Şifre doğrulama servisi yoğun")
+    try:
+        return get_executor().submit(func, *args).result(timeout=KDF_TIMEOUT)
+    finally:
+        _slots.release()
+
+
+def hash_password(password):
+    return _run(_hash, password)
+
+
+def check_password(password, hashed):
+    return _run(_verify, password, hashed)
+
+
+def hash_many(passwords):
+    # Toplu kayıt: giriş/şifre doğrulama havuzunu ve kuyruk sınırını (_slots) kullanmaz;
+    # ayrı havuzun işçi sayısı kadar paralel çalışır, girişler arkasında beklemez
+    return list(get_bulk_executor().map(_hash, passwords))
+
+
+# --- GİRİŞ DENEMESİ SINIRLAMA ---
+# Hesap (e-mail) ve IP başına kayan pencere: pencere içinde izin verilen
+# başarısız deneme sayısı aşılırsa giriş geçici olarak reddedilir. Her deneme
+# farklı e-mail/IP ile gelse de bellek sınırlı kalır: süresi dolan anahtarlar
+# her başarısız denemede atılır, izlenen anahtar sayısı MAX_KEYS'i aşamaz.
+
+ACCOUNT_ATTEMPTS = int(os.environ.get('OGRENCI_TAKIP_LOGIN_ATTEMPTS', '5'))
+IP_ATTEMPTS = int(os.environ.get('OGRENCI_TAKIP_LOGIN_IP_ATTEMPTS', '30'))
+ATTEMPT_WINDOW = float(os.environ.get('OGRENCI_TAKIP_LOGIN_WINDOW', '300'))
+MAX_KEYS = int(os.environ.get('OGRENCI_TAKIP_LOGIN_MAX_KEYS', '10000'))
+
+
+class LoginThrottled(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Çok fazla başarısız deneme, {int(retry_after) + 1} sn sonra tekrar deneyin")
+        self.retry_after = retry_after
+
+
+class RateLimiter:
+    def __init__(self, window=ATTEMPT_WINDOW, max_keys=MAX_KEYS):
+        self.window = window
+        self.max_keys = max_keys
+        # Anahtarlar son başarısız denemeye göre sıralı (en eskisi başta)
+        self._failures = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, key, now):
+        failures = self._failures.get(key)
+        while failures and failures[0] <= now - self.window:
+            failures.popleft()
+        if failures is not None and not failures:
+            del self._failures[key]
+        return self._failures.get(key, ())
+
+    def retry_after(self, key, limit):
+        # Sınır aşılmışsa kalan bekleme süresi (sn), değilse 0
+        now = time.monotonic()
+        with self._lock:
+            failures = self._prune(key, now)
+            if len(failures) < limit:
+                return 0
+            return failures[len(failures) - limit] + self.window - now
+
+    def _sweep(self, now):
+        # Baştaki anahtarların son denemesi en eskidir: süresi dolanlar, sınır
+        # aşılmışsa da en uzun süredir deneme gelmeyenler atılır
+        while self._failures:
+            key, failures = next(iter(self._failures.items()))
+            if failures[-1] > now - self.window and len(self._failures) <= self.max_keys:
+                break
+            del self._failures[key]
+
+    def fail(self, key):
+        now = time.monotonic()
+        with self._lock:
+            failures = self._failures.pop(key, None) or deque()
+            failures.append(now)
+            self._failures[key] = failures
+            self._sweep(now)
+
+    def reset(self, key):
+        with self._lock:
+            self._failures.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._failures.clear()
+
+
+limiter = RateLimiter()
+
+# Kullanıcı yokken de aynı süre harcanır (e-mail varlığı zamanlamadan anlaşılmasın)
+_dummy_hash = None
+
+
+def _dummy():
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = hash_password(generate_password(16))
+    return _dummy_hash
+
+
+def authenticate(email, password, ip=None):
+    keys = [(('email', (email or '').strip().lower()), ACCOUNT_ATTEMPTS)]
+    if ip:
+        keys.append((('ip', ip), IP_ATTEMPTS))
+    wait = max(limiter.retry_after(key, limit) for key, limit in keys)
+    if wait > 0:
+        raise LoginThrottled(wait)
+
+    user = db.query_one("SELECT * FROM users WHERE email=?", (email,))
+    if not check_password(password, user[5] if user else _dummy()):
+        for key, _ in keys:
+            limiter.fail(key)
+        return None
+    limiter.reset(keys[0][0])
+
+    if needs_rehash(user[5]):
+        # Eski/zayıf özet: doğru şifre elimizdeyken yeni biçimle değiştir
+        new_hash = hash_password(password)
+        db.execute("UPDATE users SET password=? WHERE id=? AND password=?", (new_hash, user[0], user[5]))
+    return user
@@ -0,0 +1,334 @@
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+import archive
+import db
+import migrations
+
+# --- ÇEVRİMİÇİ YEDEK VE GERİ YÜKLEME ---
+# Yedek, uygulama çalışırken sqlite3 backup API'siyle alınır: sayfalar STEP_PAGES'lik
+# adımlarla kopyalanır, adımlar arasındaki kısa bekleme okuyuculara ve yazıcılara sıra
+# verir. Kaynak bağlantı kopya boyunca tek bir okuma transaction'ı tutar; WAL modunda
+# bu, yazıcıları durdurmadan başlangıç anının tutarlı görüntüsünü verir (tutulmazsa her
+# commit kopyayı baştan başlatır ve yoğun yazmada kopya hiç bitmez). Arşiv dosyaları
+# (archive.py) yalnızca yazıcı kilidi altında değiştiğinden, okuma görüntüsü ve arşiv
+# kopyaları kısa bir yazma duraklamasıyla (db writes_paused) aynı anda alınır.
+# Her yedek yedek/<zaman>_<tür>/ klasörüdür: ana dosyanın kopyası, arsiv/ altında arşiv
+# bölümleri ve bilgi.json (neden, süre, boyut, bütünlük sonucu, kayıt sayıları). Klasör
+# önce .tmp uzantısıyla yazılır, bütünlük kontrolü geçince yeniden adlandırılır; yarım
+# kalan yedek listede görünmez. En yeni KEEP yedek tutulur.
+# Yıkıcı işlemler (demo verilerini/öğrenci verilerini silme, geri yükleme) önce yedek
+# alır. Zamanlı yedek: INTERVAL_HOURS saatte bir arka plan thread'i (start_schedule).
+# Geri yükleme yazmaları durdurup yedeği aynı API ile ana dosyanın üzerine yazar; açık
+# okuma bağlantıları yeni içeriği bir sonraki sorguda görür, uygulama kapatılmaz.
+# Yalnızca dosya tabanlı SQLite kurulumunda kullanılır; PostgreSQL yedeği sunucunun işidir.
+#   python backup.py --snapshot | --list | --verify AD | --restore AD | --prune
+
+BACKUP_DIR = os.environ.get('OGRENCI_TAKIP_BACKUP_DIR', '')
+KEEP = int(os.environ.get('OGRENCI_TAKIP_BACKUP_KEEP', '14'))
+INTERVAL_HOURS = float(os.environ.get('OGRENCI_TAKIP_BACKUP_INTERVAL_HOURS', '24'))
+STEP_PAGES = int(os.environ.get('OGRENCI_TAKIP_BACKUP_STEP_PAGES', '1024'))   # 4 KB sayfayla ~4 MB
+STEP_PAUSE = float(os.environ.get('OGRENCI_TAKIP_BACKUP_STEP_PAUSE_MS', '5')) / 1000
+INFO_FILE = 'bilgi.json'
+
+KINDS = {'elle': 'Elle', 'zamanli': 'Zamanlı', 'silme-oncesi': 'Silme öncesi', 'geri-yukleme-oncesi': 'Geri yükleme öncesi'}
+
+_lock = threading.RLock()       # aynı anda tek yedek / geri yükleme
+_schedule = None
+_schedule_lock = threading.Lock()
+_status = {'last_error': None, 'last_run': None}
+
+
+def supported():
+    pool = db.get_pool()
+    return pool.dialect == 'sqlite' and 'mode=memory' not in pool.path
+
+
+def backup_dir():
+    return BACKUP_DIR or os.path.join(os.path.dirname(os.path.abspath(db.get_pool().path)), 'yedek')
+
+
+def _path(name):
+    return os.path.join(backup_dir(), name)
+
+
+def _new_name(kind):
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    name, n = f"{stamp}_{kind}", 1
+    while os.path.exists(_path(name)) or os.path.exists(_path(name) + '.tmp'):
+        n += 1
+        name = f"{stamp}-{n}_{kind}"
+    return name
+
+
+# --- KOPYALAMA ---
+
+def _copy_file(source_path, target_path):
+    # Küçük ve seyrek değişen dosyalar (arşiv bölümleri) tek adımda
+    with closing(sqlite3.connect(source_path)) as source, closing(sqlite3.connect(target_path)) as target:
+        source.backup(target)
+
+
+def _copy(directory):
+    pool = db.get_pool()
+    file = os.path.basename(pool.path)
+    steps = []
+
+    def pause(status, remaining, total):
+        steps.append(total)
+        if remaining:
+            time.sleep(STEP_PAUSE)
+
+    with closing(db.connect(pool.path)) as source:
+        with pool.writes_paused():
+            # Okuma görüntüsü burada sabitlenir; arşiv kopyaları aynı ana ait
+            source.execute("BEGIN")
+            source.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+            files = [row[1] for row in archive.partitions()]
+            if files:
+                os.makedirs(os.path.join(directory, 'arsiv'))
+            for name in files:
+                _copy_file(os.path.join(archive.archive_dir(), name), os.path.join(directory, 'arsiv', name))
+        start = time.perf_counter()
+        try:
+            with closing(sqlite3.connect(os.path.join(directory, file))) as target:
+                source.backup(target, pages=STEP_PAGES, progress=pause)
+        finally:
+            source.execute("COMMIT")
+        seconds = time.perf_counter() - start
+    size = os.path.getsize(os.path.join(directory, file))
+    return {'file': file, 'archive': files, 'bytes': size, 'pages': steps[-1] if steps else 0, 'steps': len(steps),
+            'seconds': round(seconds, 3), 'mb_per_s': round(size / 1024 / 1024 / seconds, 1) if seconds else None}
+
+
+def _check(path):
+    with closing(sqlite3.connect(path)) as conn:
+        return [row[0] for row in conn.execute("PRAGMA integrity_check").fetchall() if row[0] != 'ok']
+
+
+def _verify_dir(directory, info):
+    problems = [f"{info['file']}: {p}" for p in _check(os.path.join(directory, info['file']))]
+    for name in info['archive']:
+        path = os.path.join(directory, 'arsiv', name)
+        if not os.path.exists(path):
+            problems.append(f"{name}: dosya yok")
+        else:
+            problems += [f"{name}: {p}" for p in _check(path)]
+    return problems
+
+
+def _counts(path):
+    with closing(sqlite3.connect(path)) as conn:
+        version = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0]
+        users, study, exam = conn.execute("SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM study_logs), "
+                                          "(SELECT COUNT(*) FROM exam_logs)").fetchone()
+        archived = conn.execute("SELECT COALESCE(SUM(study_rows), 0), COALESCE(SUM(exam_rows), 0) FROM archive_partitions"
+                                ).fetchone() if db.table_exists(conn, 'archive_partitions') else (0, 0)
+    return {'schema_version': version, 'users': users, 'study_logs': study + archived[0], 'exam_logs': exam + archived[1]}
+
+
+def _take(reason, kind):
+    # Kopya .tmp klasörüne alınır; döner: (klasör, bilgiler)
+    name = _new_name(kind)
+    directory = _path(name) + '.tmp'
+    os.makedirs(directory)
+    try:
+        info = {'name': name, 'kind': kind, 'reason': reason, 'created_at': datetime.now().isoformat(timespec='seconds')}
+        info.update(_copy(directory))
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    return directory, info
+
+
+def _finish(directory, info, protect=()):
+    # Bütünlük kontrolü kopya üzerinde, uygulamayı bekletmeden; geçerse yedek listeye girer.
+    # protect: saklama sınırı aşılsa da silinmeyecek yedekler (geri yüklenen yedek)
+    try:
+        problems = _verify_dir(directory, info)
+        if problems:
+            raise RuntimeError("Yedek bütünlük kontrolünden geçmedi: " + "; ".join(problems[:5]))
+        info['integrity'] = 'ok'
+        info.update(_counts(os.path.join(directory, info['file'])))
+        with open(os.path.join(directory, INFO_FILE), 'w', encoding='utf-8') as f:
+            json.dump(info, f, ensure_ascii=False, indent=1)
+        os.replace(directory, _path(info['name']))
+    except BaseException:
+        shutil.rmtree(directory, ignore_errors=True)
+        raise
+    _prune(KEEP, protect)
+    return info
+
+
+def snapshot(reason, kind='elle'):
+    # Döner: yedeğin bilgileri (bilgi.json içeriği)
+    if not supported():
+        raise RuntimeError("Yedekleme yalnızca dosya tabanlı SQLite veritabanında kullanılabilir.")
+    with _lock:
+        return _finish(*_take(reason, kind))
+
+
+# --- LİSTE / SAKLAMA ---
+
+def _info(name):
+    with open(os.path.join(_path(name), INFO_FILE), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def snapshots():
+    # En yeniden eskiye; bilgi.json'u olmayan (yarım) klasörler sayılmaz
+    if not os.path.isdir(backup_dir()):
+        return []
+    files = [os.path.join(_path(name), INFO_FILE) for name in os.listdir(backup_dir())]
+    files = sorted((f for f in files if os.path.exists(f)), key=lambda f: os.stat(f).st_mtime_ns, reverse=True)
+    return [_info(os.path.basename(os.path.dirname(f))) for f in files]
+
+
+def _prune(keep=KEEP, protect=()):
+    # _lock altında çağrılır: yarım kalmış .tmp klasörleri de temizlenir
+    for name in os.listdir(backup_dir()):
+        if name.endswith('.tmp'):
+            shutil.rmtree(_path(name), ignore_errors=True)
+    for info in snapshots()[max(keep, 1):]:
+        if info['name'] not in protect:
+            shutil.rmtree(_path(info['name']), ignore_errors=True)
+
+
+def prune(keep=KEEP):
+    with _lock:
+        if os.path.isdir(backup_dir()):
+            _prune(keep)
+
+
+def summary():
+    rows = [(info['name'], KINDS.get(info['kind'], info['kind']), info['reason'], info['created_at'],
+             info['bytes'] / 1024 / 1024, info['study_logs'], info['exam_logs'], info['seconds'], info['integrity'])
+            for info in snapshots()]
+    return pd.DataFrame(rows, columns=['Yedek', 'Tür', 'Neden', 'Tarih', 'Boyut (MB)', 'Çalışma Kaydı',
+                                       'Deneme Kaydı', 'Süre (sn)', 'Bütünlük'])
+
+
+def verify(name):
+    # Yedeği yeniden kontrol eder; döner: sorun listesi (boş = sağlam)
+    return _verify_dir(_path(name), _info(name))
+
+
+# --- GERİ YÜKLEME ---
+
+def restore(name):
+    # Döner: geri yüklemeden önce alınan yedeğin bilgileri (geri yükleme de geri alınabilir)
+    info = _info(name)
+    directory = _path(name)
+    problems = _verify_dir(directory, info)
+    if problems:
+        raise ValueError("Yedek bozuk, geri yüklenmedi: " + "; ".join(problems[:5]))
+    pool = db.get_pool()
+    with _lock:
+        with pool.writes_paused():
+            # Önceki durumun kopyası yazmalar durmuşken alınır; arada kayıt kaybolmaz
+            taken = _take(f"{name} geri yüklenmeden önce", 'geri-yukleme-oncesi')
+            versions = db.query_all("SELECT student_id, version FROM student_data_versions")
+            generations = db.query_all("SELECT key, version FROM cache_generations")
+            current = [row[1] for row in archive.partitions()]
+            with closing(sqlite3.connect(os.path.join(directory, info['file']))) as source, \
+                    closing(db.connect(pool.path)) as target:
+                source.backup(target)
+            # Arşiv dosyaları yerinde yazılır; okuma bağlantılarına ATTACH edilmiş olabilirler
+            os.makedirs(archive.archive_dir(), exist_ok=True)
+            for file in info['archive']:
+                _copy_file(os.path.join(directory, 'arsiv', file), os.path.join(archive.archive_dir(), file))
+            for file in set(current) - set(info['archive']):
+                path = os.path.join(archive.archive_dir(), file)
+                if os.path.exists(path):
+                    with closing(sqlite3.connect(path, isolation_level=None)) as conn:
+                        for table in archive.TABLES:
+                            conn.execute(f"DELETE FROM {table}")
+            # Yedek eski bir şemadaysa güncellenir
+            migrations.migrate()
+            # Veri sürümleri yedekteki değerlere döndü; önbellekte o numaralarla duran sonuçlar
+            # kullanılmasın diye her sürüm geri yükleme öncesinin de ötesine taşınır
+            with db.write() as conn:
+                conn.executemany("""INSERT INTO student_data_versions (student_id, version) VALUES (?, ?)
+                                    ON CONFLICT(student_id) DO UPDATE SET version = MAX(version, excluded.version)""",
+                                 [(key, version + 1) for key, version in versions])
+                conn.executemany("""INSERT INTO cache_generations (key, version) VALUES (?, ?)
+                                    ON CONFLICT(key) DO UPDATE SET version = MAX(version, excluded.version)""",
+                                 [(key, version + 1) for key, version in generations])
+        # Geri yüklenen yedek en eskiler arasında olabilir; saklama sınırı onu silmez
+        return _finish(*taken, protect=(name,))
+
+
+# --- ZAMANLI YEDEK ---
+
+def _due(interval):
+    latest = snapshots()
+    if not latest:
+        return 0
+    due = datetime.fromisoformat(latest[0]['created_at']) + interval
+    return max(0.0, (due - datetime.now()).total_seconds())
+
+
+def _run_schedule(interval):
+    while True:
+        wait = _due(interval)
+        if wait <= 0:
+            try:
+                snapshot("Zamanlı yedek", kind='zamanli')
+                _status['last_error'] = None
+            except Exception as e:
+                _status['last_error'] = str(e)
+            _status['last_run'] = datetime.now().isoformat(timespec='seconds')
+            wait = interval.total_seconds()
+        # Elle alınan yedekler de sayılır; sıradaki zaman uyanınca yeniden hesaplanır
+        time.sleep(min(wait, 3600))
+
+
+def start_schedule(interval_hours=INTERVAL_HOURS):
+    # Süreç başına bir kez; interval_hours <= 0 ise kapalı
+    global _schedule
+    if interval_hours <= 0 or not supported() or _schedule is not None:
+        return
+    with _schedule_lock:
+        if _schedule is None:
+            _schedule = threading.Thread(target=_run_schedule, args=(timedelta(hours=interval_hours),),
+                                         name='backup-schedule', daemon=True)
+            _schedule.start()
+
+
+def schedule_status():
+    return {'interval_hours': INTERVAL_HOURS, 'running': _schedule is not None, 'keep': KEEP, **_status}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Çevrimiçi yedek al, listele, doğrula, geri yükle")
+    parser.add_argument("--snapshot", action="store_true", help="Şimdi yedek al")
+    parser.add_argument("--reason", default="Komut satırından yedek")
+    parser.add_argument("--list", action="store_true", help="Yedekleri listele")
+    parser.add_argument("--verify", metavar="AD", help="Yedeğin bütünlüğünü kontrol et")
+    parser.add_argument("--restore", metavar="AD", help="Yedeği geri yükle (önce mevcut durumun yedeği alınır)")
+    parser.add_argument("--prune", action="store_true", help=f"En yeni {KEEP} yedek dışındakileri sil")
+    args = parser.parse_args()
+
+    migrations.ensure_schema()
+    if args.snapshot:
+        info = snapshot(args.reason)
+        print(f"{info['name']}: {info['bytes'] / 1024 / 1024:.1f} MB, {info['seconds']} sn ({info['mb_per_s']} MB/sn, "
+              f"{info['steps']} adım), bütünlük {info['integrity']}")
+    if args.verify:
+        problems = verify(args.verify)
+        print("\n".join(problems) if problems else f"{args.verify}: sağlam")
+    if args.restore:
+        print(f"Geri yüklendi: {args.restore} (önceki durum: {restore(args.restore)['name']})")
+    if args.prune:
+        prune()
+    if args.list or not (args.snapshot or args.verify or args.restore):
+        print(summary().to_string(index=False))
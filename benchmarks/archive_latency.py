@@ -0,0 +1,101 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import results, synthetic
+
+# --- GEÇMİŞ DÖNEM ARŞİVİ ---
+# Çok yıllık geçmişte eski dönemler arşiv dosyalarına taşınmadan önce ve sonra:
+# ana dosya boyutu, özet paneller (arşivden etkilenmemeli), ham kayıt okuması
+# (get_student_analysis) güncel dönem aralığında (arşive dokunmaz) ve tüm
+# geçmişte (bölümler ATTACH edilir). Taşıma süresi ve kayıtların aynı kaldığı da raporlanır.
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Geçmiş dönem arşivi: taşıma öncesi/sonrası okuma maliyeti")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--study-logs", type=int, default=300000)
+    parser.add_argument("--exam-logs", type=int, default=30000)
+    parser.add_argument("--days", type=int, default=1095, help="Geçmişin gün sayısı")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", action="store_true", help="Sonucu benchmarks/results altına kaydet")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        synthetic.create(path, students=args.students, teachers=1, parents=0, study_logs=args.study_logs,
+                         exam_logs=args.exam_logs, days=args.days, seed=args.seed)
+        import analysis
+        import archive
+        import db
+
+        student_id = db.query_one("SELECT student_id FROM study_logs GROUP BY student_id ORDER BY COUNT(*) DESC LIMIT 1")[0]
+        recent = (date.today() - timedelta(days=92)).isoformat()
+
+        def rows(start=None):
+            return analysis.study_rows(student_id, start), analysis.exam_rows(student_id, start)
+
+        cases = {
+            'ham kayıt: Son 3 Ay': lambda: timed(lambda: rows(recent), args.repeat),
+            'ham kayıt: Tümü': lambda: timed(rows, args.repeat),
+            'özet: ünite başarısı': lambda: timed(lambda: analysis.unit_success(student_id), args.repeat),
+            'özet: günlük seri': lambda: timed(lambda: analysis.daily_trend(student_id), args.repeat),
+        }
+        summary = {}
+
+        def measure(phase):
+            # WAL'e düşen sayfalar dahil, boş sayfalar hariç kullanılan boyut
+            pages = db.query_one("SELECT p.page_count - f.freelist_count, s.page_size "
+                                 "FROM pragma_page_count() p, pragma_freelist_count() f, pragma_page_size() s")
+            print(f"\n{phase}: ana dosya {pages[0] * pages[1] / 1024 / 1024:.1f} MB, "
+                  "güncel tablolarda {} çalışma / {} deneme kaydı".format(*archive.hot_counts()))
+            print(f"{'Ölçüm':<30}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+            for name, run in cases.items():
+                key = f"{phase}: {name}"
+                summary[key] = results.summarize(run())
+                print(f"{name:<30}{summary[key]['p50_ms']:>10.2f}{summary[key]['p95_ms']:>10.2f}")
+
+        before = [frame.sort_values(list(frame.columns)).reset_index(drop=True) for frame in rows()]
+        measure("taşıma öncesi")
+
+        start = time.perf_counter()
+        moved = archive.archive_logs()
+        print(f"\nTaşıma: {(time.perf_counter() - start) * 1000:.0f} ms")
+        for term, counts in moved.items():
+            print(f"  {term}: {counts['study_logs']} çalışma, {counts['exam_logs']} deneme")
+        measure("taşıma sonrası")
+
+        after = [frame.sort_values(list(frame.columns)).reset_index(drop=True) for frame in rows()]
+        same = all(a.astype(str).equals(b.astype(str)) for a, b in zip(before, after))
+        print(f"\nHam kayıtlar taşıma öncesiyle {'aynı' if same else 'FARKLI'}")
+        import rollups
+        problems = rollups.verify(student_id)
+        print(f"Özetler ham kayıtlarla: {', '.join(problems) if problems else 'uyuşmazlık yok'}")
+
+        params = {k: v for k, v in vars(args).items() if k not in ('save', 'compare')}
+        if args.save:
+            print(f"\nKaydedildi: {results.save('archive_latency', params, summary)}")
+        if args.compare:
+            results.compare(summary, args.compare)
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import results, synthetic
+
+# --- ÇEVRİMİÇİ YEDEK ---
+# Uygulama yükü altında yedek alınırken (backup.snapshot) kayıt ekleme ve analiz
+# okuması gecikmeleri, yedeksiz aynı yükle karşılaştırılır. Adım boyutu
+# (--step-pages) ve adımlar arası bekleme (--pause-ms) için yedek hızı (MB/sn) ile
+# uygulama gecikmesi arasındaki denge ölçülür; geri yükleme süresi de raporlanır.
+
+
+def load(stop, write_ms, read_ms, student_id, subject_id, unit_id):
+    import analysis
+    import db
+    import logs
+    row = (student_id, subject_id, unit_id, time.strftime('%Y-%m-%d'), 10, 2, 0, 20, 0)
+
+    def writer():
+        while not stop.is_set():
+            start = time.perf_counter()
+            with db.write() as conn:
+                conn.executemany(logs.STUDY_INSERT_SQL, [row])
+            write_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    def reader():
+        while not stop.is_set():
+            start = time.perf_counter()
+            analysis.unit_success(student_id)
+            analysis.daily_trend(student_id)
+            read_ms.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.005)
+
+    threads = [threading.Thread(target=writer), threading.Thread(target=reader)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Çevrimiçi yedek: yedek hızı ve yedek sırasında uygulama gecikmesi")
+    parser.add_argument("--students", type=int, default=100)
+    parser.add_argument("--study-logs", type=int, default=500000)
+    parser.add_argument("--exam-logs", type=int, default=50000)
+    parser.add_argument("--step-pages", type=int, nargs='+', default=[-1, 4096, 1024, 256])
+    parser.add_argument("--pause-ms", type=float, default=5)
+    parser.add_argument("--baseline-seconds", type=float, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", action="store_true", help="Sonucu benchmarks/results altına kaydet")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['OGRENCI_TAKIP_BACKUP_DIR'] = os.path.join(tmp, 'yedek')
+        synthetic.create(os.path.join(tmp, "bench.db"), students=args.students, teachers=1, parents=0,
+                         study_logs=args.study_logs, exam_logs=args.exam_logs, seed=args.seed)
+        import backup
+        import db
+
+        backup.STEP_PAUSE = args.pause_ms / 1000
+        ids = db.query_one("SELECT student_id, subject_id, unit_id FROM study_logs GROUP BY student_id ORDER BY COUNT(*) DESC LIMIT 1")
+        summary = {}
+
+        def run(name, during):
+            stop, write_ms, read_ms = threading.Event(), [], []
+            threads = load(stop, write_ms, read_ms, *ids)
+            time.sleep(0.5)
+            write_ms.clear()
+            read_ms.clear()
+            extra = during()
+            stop.set()
+            for thread in threads:
+                thread.join()
+            summary[f"{name}: kayıt ekleme"] = results.summarize(write_ms)
+            summary[f"{name}: analiz okuma"] = results.summarize(read_ms)
+            w, r = summary[f"{name}: kayıt ekleme"], summary[f"{name}: analiz okuma"]
+            print(f"{name:<26}{w['p50_ms']:>9.2f}{w['p95_ms']:>9.2f}{w['max_ms']:>9.1f}"
+                  f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['max_ms']:>9.1f}  {extra or ''}")
+
+        def snapshot(step_pages):
+            def during():
+                backup.STEP_PAGES = step_pages
+                info = backup.snapshot("ölçüm")
+                summary[f"yedek {step_pages}: süre"] = {'seconds': info['seconds'], 'mb_per_s': info['mb_per_s'], 'steps': info['steps']}
+                return f"{info['bytes'] / 1024 / 1024:.0f} MB, {info['seconds']:.2f} sn, {info['mb_per_s']} MB/sn, {info['steps']} adım"
+            return during
+
+        print(f"{'':<26}{'ekleme (ms) p50/p95/max':>27}{'okuma (ms) p50/p95/max':>27}")
+        run("yedeksiz", lambda: time.sleep(args.baseline_seconds))
+        for step_pages in args.step_pages:
+            run(f"yedek, adım {step_pages if step_pages > 0 else 'tek'}", snapshot(step_pages))
+
+        def restore():
+            start = time.perf_counter()
+            name = backup.snapshots()[-1]['name']
+            backup.restore(name)
+            seconds = time.perf_counter() - start
+            summary["geri yükleme: süre"] = {'seconds': seconds}
+            return f"{seconds:.2f} sn (önce alınan yedek dahil)"
+        run("geri yükleme", restore)
+
+        params = {k: v for k, v in vars(args).items() if k not in ('save', 'compare')}
+        if args.save:
+            print(f"\nKaydedildi: {results.save('backup_latency', params, summary)}")
+        if args.compare:
+            results.compare(summary, args.compare)
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
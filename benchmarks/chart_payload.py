@@ -0,0 +1,75 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import plotly.express as px
+
+import downsample
+
+# --- GRAFİK VERİ BOYUTU ---
+# Geçmiş uzunluğuna göre tarayıcıya giden Plotly JSON boyutu ve üretim süresi:
+# ham günlük seri / ham ünite listesi ile downsample katmanından geçmiş hali.
+
+
+def synthetic_daily(days, rnd):
+    solved = rnd.integers(5, 80, days)
+    wrong = (solved * rnd.uniform(0, 0.4, days)).astype(int)
+    df = pd.DataFrame({'date': pd.date_range('2015-01-01', periods=days), 'q_solved': solved,
+                       'q_wrong': wrong, 'q_empty': 0, 'duration': rnd.integers(10, 120, days)})
+    df['daily_success'] = (df['q_solved'] - df['q_wrong'] - df['q_empty']) / df['q_solved'] * 100
+    return df
+
+
+def synthetic_units(count, rnd):
+    solved = rnd.integers(1, 2000, count)
+    wrong = (solved * rnd.uniform(0, 0.4, count)).astype(int)
+    df = pd.DataFrame({'subject_name': [f"Ders {i % 12}" for i in range(count)],
+                       'unit_name': [f"Ünite {i}" for i in range(count)], 'q_solved': solved,
+                       'q_wrong': wrong, 'q_empty': 0, 'duration': 0, 'is_repeated': 0})
+    df['success_rate'] = (df['q_solved'] - df['q_wrong'] - df['q_empty']) / df['q_solved'] * 100
+    return df
+
+
+def measure(build):
+    start = time.perf_counter()
+    payload = len(build().to_json())
+    return payload / 1024, (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grafik veri boyutu (geçmiş uzunluğuna göre)")
+    parser.add_argument("--years", default="1,3,5,10,20", help="Günlük geçmiş uzunlukları (yıl)")
+    parser.add_argument("--units", default="50,200,1000", help="Ünite sayıları")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    rnd = np.random.default_rng(args.seed)
+
+    print(f"{'Yıl':>4}{'Ham (KB)':>10}{'Ham (ms)':>10}{'Küçük (KB)':>12}{'Küçük (ms)':>12}{'Nokta':>8}")
+    for years in [int(x) for x in args.years.split(",")]:
+        daily = synthetic_daily(years * 365, rnd)
+        raw_kb, raw_ms = measure(lambda: px.line(daily, x='date', y='daily_success'))
+        series = {}
+
+        def small():
+            series['df'] = downsample.trend_series(daily, None, 'D')[0]
+            return px.line(series['df'], x='date', y='daily_success')
+        small_kb, small_ms = measure(small)
+        print(f"{years:>4}{raw_kb:>10.1f}{raw_ms:>10.1f}{small_kb:>12.1f}{small_ms:>12.1f}{len(series['df']):>8}")
+
+    print(f"\n{'Ünite':>6}{'Ham (KB)':>10}{'Ham (ms)':>10}{'Top-N (KB)':>12}{'Top-N (ms)':>12}")
+    for count in [int(x) for x in args.units.split(",")]:
+        units = synthetic_units(count, rnd)
+        raw_kb, raw_ms = measure(lambda: px.bar(units, x='unit_name', y='success_rate', color='subject_name'))
+        small_kb, small_ms = measure(lambda: px.bar(downsample.top_units(units), x='unit_name', y='success_rate', color='subject_name'))
+        print(f"{count:>6}{raw_kb:>10.1f}{raw_ms:>10.1f}{small_kb:>12.1f}{small_ms:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
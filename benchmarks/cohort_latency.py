@@ -0,0 +1,75 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.index_latency import populate
+
+# --- SINIF ÖZETİ GECİKMESİ ---
+# cohort.class_overview() (sabit sayıda toplu sorgu + vektörel hesap) ile öğrenci
+# başına analiz fonksiyonlarını döngüde çağırmayı farklı sınıf büyüklüklerinde karşılaştırır.
+
+
+def per_student_loop(student_ids):
+    import analysis
+    for sid in student_ids:
+        analysis.study_totals(sid)
+        analysis.unit_success(sid)
+        analysis.daily_trend(sid)
+        analysis.exam_nets(sid)
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sınıf özeti gecikmesi (sınıf büyüklüğüne göre)")
+    parser.add_argument("--rows", type=int, default=500_000, help="Çalışma kaydı sayısı")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--sizes", default="25,50,100,200,400,800", help="Ölçülecek sınıf büyüklükleri")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    sizes = [int(x) for x in args.sizes.split(",")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['OGRENCI_TAKIP_DB'] = os.path.join(tmp, "bench.db")
+        import cohort
+        import db
+        import migrations
+
+        migrations.migrate(target=2)
+        conn = db.connect()
+        student_ids, _, _ = populate(conn, args.students, 10, args.rows, args.seed)
+        conn.close()
+        migrations.migrate()
+
+        rnd = random.Random(args.seed)
+        print(f"{'Sınıf':>6}{'class_overview (ms)':>22}{'Öğrenci döngüsü (ms)':>24}")
+        for size in sizes:
+            members = rnd.sample(student_ids, min(size, len(student_ids)))
+            with db.write() as c:
+                teacher = c.execute("INSERT INTO users (name, role, email, unique_id) VALUES (?, 'Öğretmen', ?, ?)",
+                                    (f"Sınıf {size}", f"sinif{size}@okul", f"C{size:05d}")).lastrowid
+                c.executemany("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'ogretmen')",
+                              ((teacher, sid) for sid in members))
+            overview = timed(lambda: cohort.class_overview(teacher), args.repeat)
+            loop = timed(lambda: per_student_loop(members), max(1, args.repeat // 2))
+            print(f"{size:>6}{overview:>22.1f}{loop:>24.1f}")
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
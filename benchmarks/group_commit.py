@@ -0,0 +1,105 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import results, synthetic
+
+# --- EŞZAMANLI KAYIT: DOĞRUDAN YAZMA VE GRUP COMMIT ---
+# Aynı anda "Kaydet"e basan öğrencileri taklit eder: her thread tek ünitelik
+# kayıtlar gönderir. Üç yol karşılaştırılır:
+#   doğrudan        logs.insert_study_logs, her kayıt kendi commit'i (synchronous=NORMAL)
+#   doğrudan+fsync  her kayıt kendi kalıcı commit'i (synchronous=FULL)
+#   kuyruk          logs.save_study_logs, grup commit, kalıcı onay (synchronous=FULL)
+# Thread sayısına göre iş hacmi (kayıt/sn) ve onay gecikmesi p50/p95 yazdırılır.
+
+
+def durable_insert(logs, db, rows):
+    with db.write(durable=True) as conn:
+        return logs._insert(conn, logs.STUDY_INSERT_SQL, rows)
+
+
+def run(save, targets, threads, saves, seed):
+    samples, errors = [], []
+    lock = threading.Lock()
+
+    def worker(number):
+        rnd = random.Random(seed + number)
+        own = []
+        for _ in range(saves):
+            sid, subject_id, unit_id = rnd.choice(targets)
+            row = (sid, subject_id, unit_id, '2024-05-01', rnd.randint(1, 40), 0, 0, rnd.randint(5, 60), 0)
+            start = time.perf_counter()
+            try:
+                save([row])
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+                continue
+            own.append((time.perf_counter() - start) * 1000)
+        with lock:
+            samples.extend(own)
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    start = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    return samples, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eşzamanlı kayıt: doğrudan yazma ve grup commit")
+    parser.add_argument("--threads", default="1,8,32", help="Virgülle ayrılmış eşzamanlı kullanıcı sayıları")
+    parser.add_argument("--saves", type=int, default=100, help="Thread başına kayıt")
+    parser.add_argument("--students", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", action="store_true", help="Sonucu benchmarks/results altına kaydet")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic.create(os.path.join(tmp, "bench.db"), students=args.students, teachers=max(1, args.students // 25),
+                         parents=0, study_logs=args.students * 20, exam_logs=0, seed=args.seed)
+        import db
+        import logs
+        import write_queue
+
+        targets = db.query_all("SELECT student_id, subject_id, unit_id FROM student_units")
+        modes = {
+            'doğrudan': logs.insert_study_logs,
+            'doğrudan+fsync': lambda rows: durable_insert(logs, db, rows),
+            'kuyruk': logs.save_study_logs,
+        }
+        summary = {}
+        print(f"{'Yol':<16}{'thread':>7}{'kayıt/sn':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+        for threads in (int(t) for t in args.threads.split(",")):
+            for mode, save in modes.items():
+                samples, errors, elapsed = run(save, targets, threads, args.saves, args.seed)
+                name = f"{mode} ({threads} thread)"
+                summary[name] = dict(results.summarize(samples), saves_per_sec=len(samples) / elapsed, errors=len(errors))
+                print(f"{mode:<16}{threads:>7}{len(samples) / elapsed:>10.0f}"
+                      f"{summary[name]['p50_ms']:>10.2f}{summary[name]['p95_ms']:>10.2f}"
+                      + (f"  HATA x{len(errors)}: {errors[0]}" if errors else ""))
+        stats = write_queue.stats()
+        print(f"\nKuyruk: {stats['batches']} grup commit, ortalama {stats['avg_batch_rows']:.1f} kayıt/grup, "
+              f"en büyük grup {stats['max_batch_requests']} istek, reddedilen {stats['rejected']}")
+
+        params = {k: v for k, v in vars(args).items() if k not in ('save', 'compare')}
+        if args.save:
+            print(f"\nKaydedildi: {results.save('group_commit', params, summary)}")
+        if args.compare:
+            results.compare(summary, args.compare)
+        write_queue.get_queue().close()
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- İNDEKS ÖNCESİ / SONRASI SORGU GECİKMESİ ---
+# Geçici bir veritabanını milyonlarca çalışma kaydıyla doldurur, sıcak sorguları
+# indekssiz şemada (sürüm 2) ve indeks göçü uygulandıktan sonra ölçer.
+
+QUERIES = {
+    "Analiz (çalışma)": ("""
+        SELECT s.subject_name, u.unit_name, l.date, l.q_solved, l.q_wrong, l.q_empty, l.duration, l.is_repeated
+        FROM study_logs l
+        JOIN units u ON l.unit_id = u.id
+        JOIN subjects s ON l.subject_id = s.id
+        WHERE l.student_id = ?""", lambda ctx: (ctx['student'],)),
+    "Analiz (deneme)": ("""
+        SELECT s.subject_name, e.date, e.q_solved, e.q_wrong, e.q_empty, e.duration
+        FROM exam_logs e
+        JOIN subjects s ON e.subject_id = s.id
+        WHERE e.student_id = ?""", lambda ctx: (ctx['student'],)),
+    "Bugünün kayıtları": ("""
+        SELECT s.subject_name, u.unit_name, l.q_solved, l.q_wrong, l.duration
+        FROM study_logs l JOIN subjects s ON l.subject_id=s.id JOIN units u ON l.unit_id=u.id
+        WHERE l.student_id=? AND l.date=?""", lambda ctx: (ctx['student'], ctx['date'])),
+    "Öğretmenin öğrencileri": ("""
+        SELECT u.id, u.name, u.unique_id
+        FROM users u
+        JOIN relationships r ON u.id = r.student_id
+        WHERE r.supervisor_id = ? AND r.type='ogretmen'""", lambda ctx: (ctx['teacher'],)),
+}
+
+
+def populate(conn, students, teachers, rows, seed):
+    rnd = random.Random(seed)
+    conn.execute("BEGIN")
+    conn.executemany("INSERT INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
+                     ((f"Öğrenci {i}", "Öğrenci", f"ogr{i}@okul", "0", "x", f"S{i:05d}") for i in range(students)))
+    conn.executemany("INSERT INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
+                     ((f"Öğretmen {i}", "Öğretmen", f"ogt{i}@okul", "0", "x", f"T{i:05d}") for i in range(teachers)))
+    student_ids = [r[0] for r in conn.execute("SELECT id FROM users WHERE role='Öğrenci'")]
+    teacher_ids = [r[0] for r in conn.execute("SELECT id FROM users WHERE role='Öğretmen'")]
+    conn.executemany("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'ogretmen')",
+                     ((rnd.choice(teacher_ids), sid) for sid in student_ids))
+
+    units_of = {}
+    for sid in student_ids:
+        units_of[sid] = []
+        for s in range(6):
+            sub_id = conn.execute("INSERT INTO subjects (student_id, subject_name) VALUES (?, ?)", (sid, f"Ders {s}")).lastrowid
+            for u in range(8):
+                unit_id = conn.execute("INSERT INTO units (subject_id, unit_name) VALUES (?, ?)", (sub_id, f"Ünite {u}")).lastrowid
+                units_of[sid].append((sub_id, unit_id))
+
+    dates = [f"2023-{m:02d}-{d:02d}" for m in range(1, 13) for d in range(1, 29)]
+
+    def study_rows():
+        for _ in range(rows):
+            sid = rnd.choice(student_ids)
+            sub_id, unit_id = rnd.choice(units_of[sid])
+            solved = rnd.randint(5, 60)
+            wrong = rnd.randint(0, solved // 3)
+            yield (sid, sub_id, unit_id, rnd.choice(dates), solved, wrong, rnd.randint(0, 5), rnd.randint(10, 90), rnd.randint(0, 1))
+
+    def exam_rows():
+        for _ in range(rows // 4):
+            sid = rnd.choice(student_ids)
+            sub_id = rnd.choice(units_of[sid])[0]
+            yield (sid, sub_id, rnd.choice(dates), 40, rnd.randint(0, 15), rnd.randint(0, 10), 60)
+
+    conn.executemany("""INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration, is_repeated)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", study_rows())
+    conn.executemany("""INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)""", exam_rows())
+    conn.execute("COMMIT")
+    return student_ids, teacher_ids, dates
+
+
+def measure(conn, contexts):
+    results = {}
+    for label, (sql, params) in QUERIES.items():
+        samples = []
+        for ctx in contexts:
+            start = time.perf_counter()
+            conn.execute(sql, params(ctx)).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+        results[label] = statistics.median(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="İndeks öncesi/sonrası sorgu gecikmesi")
+    parser.add_argument("--rows", type=int, default=2_000_000, help="Çalışma kaydı sayısı (deneme kaydı = rows/4)")
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--teachers", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['OGRENCI_TAKIP_DB'] = os.path.join(tmp, "bench.db")
+        import db
+        import migrations
+
+        migrations.migrate(target=2)
+        start = time.perf_counter()
+        conn = db.connect()
+        student_ids, teacher_ids, dates = populate(conn, args.students, args.teachers, args.rows, args.seed)
+        print(f"{args.rows:,} çalışma + {args.rows // 4:,} deneme kaydı yüklendi ({time.perf_counter() - start:.1f} sn)")
+
+        rnd = random.Random(args.seed)
+        contexts = [{'student': rnd.choice(student_ids), 'teacher': rnd.choice(teacher_ids), 'date': rnd.choice(dates)}
+                    for _ in range(args.samples)]
+
+        before = measure(conn, contexts)
+        start = time.perf_counter()
+        migrations.migrate()
+        print(f"İndeksler oluşturuldu ({time.perf_counter() - start:.1f} sn)\n")
+        after = measure(conn, contexts)
+
+        print(f"{'Sorgu':<26}{'Önce (ms)':>12}{'Sonra (ms)':>12}{'Hızlanma':>10}")
+        for label in QUERIES:
+            speedup = before[label] / after[label] if after[label] else float('inf')
+            print(f"{label:<26}{before[label]:>12.2f}{after[label]:>12.2f}{speedup:>9.1f}x")
+
+        for label, (sql, params) in QUERIES.items():
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql, params(contexts[0])).fetchall()
+            print(f"\n{label}:")
+            for row in plan:
+                print(f"  {row[-1]}")
+        conn.close()
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
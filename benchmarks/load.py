@@ -0,0 +1,125 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import results, synthetic
+
+# --- ÇOK OTURUMLU YÜK TESTİ ---
+# Streamlit AppTest ile tarayıcısız oturumlar aynı süreçte eşzamanlı çalışır:
+# her oturum bir öğrenci/öğretmen/veli olarak giriş yapar ve menüler arasında
+# gezinir. Her yeniden çalıştırmanın (rerun) süresi ölçülür; rol ve menü
+# bazında p50/p95 gecikme ile toplam iş hacmi (rerun/sn) raporlanır.
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+
+SCENARIOS = {
+    'Öğrenci': ["Çalışma Analizi", "Çalışma Takibi", "Ünite Takip", "Günlük Giriş", "Deneme Sınavı"],
+    'Öğretmen': ["Sınıf Özeti", "Öğrencilerim", "Öğrenci Çalışma Takibi", "Öğrenci Çalışma Analizi"],
+    'Veli': ["Öğrencilerim", "Öğrenci Çalışma Takibi", "Öğrenci Çalışma Analizi"],
+}
+EMAIL_PREFIX = {'Öğrenci': "ogrenci", 'Öğretmen': "ogretmen", 'Veli': "veli"}
+
+
+def run_session(role, number, iterations, seed, timeout, samples, errors):
+    from streamlit.testing.v1 import AppTest
+    rnd = random.Random(seed)
+
+    def timed(at, label):
+        start = time.perf_counter()
+        at.run(timeout=timeout)
+        samples.append((role, label, (time.perf_counter() - start) * 1000))
+        if at.exception:
+            errors.append((role, label, at.exception[0].message))
+
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    timed(at, "Açılış")
+    at.text_input[0].input(f"{EMAIL_PREFIX[role]}{number}@okul")
+    at.text_input[1].input(synthetic.PASSWORD)
+    next(b for b in at.button if b.label == "Giriş Yap").click()
+    timed(at, "Giriş")
+    if 'user_id' not in at.session_state:
+        errors.append((role, "Giriş", "giriş başarısız"))
+        return
+    menus = SCENARIOS[role]
+    for _ in range(iterations):
+        menu = rnd.choice(menus)
+        at.sidebar.radio[0].set_value(menu)
+        timed(at, menu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AppTest ile çok oturumlu yük testi")
+    parser.add_argument("--db", help="Var olan sentetik veritabanı (yoksa geçici olarak üretilir)")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--study-logs", type=int, default=200_000)
+    parser.add_argument("--exam-logs", type=int, default=20_000)
+    parser.add_argument("--sessions", type=int, default=8, help="Eşzamanlı oturum sayısı")
+    parser.add_argument("--mix", default="Öğrenci:6,Öğretmen:1,Veli:1", help="Rol ağırlıkları")
+    parser.add_argument("--iterations", type=int, default=10, help="Oturum başına menü geçişi")
+    parser.add_argument("--timeout", type=float, default=120)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", action="store_true", help="Sonucu benchmarks/results altına kaydet")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+    mix = {role: float(weight) for role, weight in (item.split(":") for item in args.mix.split(","))}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            os.environ['OGRENCI_TAKIP_DB'] = args.db
+        else:
+            synthetic.create(os.path.join(tmp, "bench.db"), students=args.students, teachers=max(1, args.students // 25),
+                             parents=int(args.students * 0.8), study_logs=args.study_logs, exam_logs=args.exam_logs,
+                             seed=args.seed)
+        import db
+        counts = dict(db.query_all("SELECT role, COUNT(*) FROM users GROUP BY role"))
+
+        rnd = random.Random(args.seed)
+        roles = rnd.choices(list(mix), weights=list(mix.values()), k=args.sessions)
+        samples, errors = [], []
+        threads = [threading.Thread(target=run_session,
+                                    args=(role, rnd.randint(1, counts[role]), args.iterations, args.seed + i,
+                                          args.timeout, samples, errors))
+                   for i, role in enumerate(roles)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        summary = {}
+        groups = {}
+        for role, label, ms in samples:
+            groups.setdefault(f"{role} / {label}", []).append(ms)
+            groups.setdefault(f"{role} (tümü)", []).append(ms)
+        groups["Tüm rerunlar"] = [ms for _, _, ms in samples]
+        print(f"{args.sessions} oturum ({', '.join(f'{r}: {roles.count(r)}' for r in mix)}), "
+              f"{len(samples)} rerun, {elapsed:.1f} sn, CPU: {os.cpu_count()}\n")
+        print(f"{'Rerun':<44}{'n':>5}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+        for name in sorted(groups):
+            summary[name] = results.summarize(groups[name])
+            print(f"{name:<44}{summary[name]['n']:>5}{summary[name]['p50_ms']:>10.1f}{summary[name]['p95_ms']:>10.1f}")
+        summary["İş hacmi"] = {'reruns_per_sec': len(samples) / elapsed}
+        print(f"\nİş hacmi: {len(samples) / elapsed:.1f} rerun/sn")
+        for role, label, message in errors[:10]:
+            print(f"HATA {role} / {label}: {message}")
+
+        params = {k: v for k, v in vars(args).items() if k not in ('save', 'compare')}
+        if args.save:
+            print(f"\nKaydedildi: {results.save('load', params, summary)}")
+        if args.compare:
+            results.compare(summary, args.compare)
+        db.get_pool().close()
+        if errors:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- GİRİŞ İŞ HACMİ ---
+# Eşzamanlı oturumların aynı anda giriş yaptığı "sabah yoğunluğu" senaryosu:
+# KDF havuz boyutuna göre saniyedeki giriş sayısı, giriş gecikmesi ve bu sırada
+# başka bir oturumun basit sorgusunun ne kadar beklediği ölçülür.
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def login_rush(auth, db, users, sessions, workers):
+    auth._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='kdf')
+    auth.limiter.clear()
+    latencies = []
+    probe = []
+    stop = threading.Event()
+
+    def login(email):
+        start = time.perf_counter()
+        assert auth.authenticate(email, "sifre123") is not None
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    def other_session():
+        # Giriş yoğunluğu sırasında panel açan başka bir kullanıcı
+        while not stop.is_set():
+            start = time.perf_counter()
+            db.query_one("SELECT COUNT(*) FROM users")
+            probe.append((time.perf_counter() - start) * 1000)
+            time.sleep(0.01)
+
+    prober = threading.Thread(target=other_session)
+    prober.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions) as pool:
+        list(pool.map(login, users))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    prober.join()
+    auth._executor.shutdown()
+    return len(users) / elapsed, statistics.median(latencies), percentile(latencies, 0.95), percentile(probe, 0.95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Eşzamanlı giriş iş hacmi")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--sessions", type=int, default=32, help="Aynı anda giriş yapan oturum sayısı")
+    parser.add_argument("--workers", default="1,2,4,8", help="Denenecek KDF havuz boyutları")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['OGRENCI_TAKIP_DB'] = os.path.join(tmp, "bench.db")
+        import auth
+        import db
+        import migrations
+
+        migrations.migrate()
+        emails = [f"kullanici{i}@okul" for i in range(args.users)]
+        start = time.perf_counter()
+        hashes = auth.hash_many(["sifre123"] * args.users)
+        print(f"{args.users} şifre özeti ({auth.KDF_SCHEME}) {time.perf_counter() - start:.1f} sn, "
+              f"CPU: {os.cpu_count()}, oturum: {args.sessions}\n")
+        with db.write() as conn:
+            conn.executemany("INSERT INTO users (name, role, email, password, unique_id) VALUES (?, 'Öğrenci', ?, ?, ?)",
+                             ((email, email, hashed, f"L{i:05d}") for i, (email, hashed) in enumerate(zip(emails, hashes))))
+
+        print(f"{'Havuz':>6}{'Giriş/sn':>10}{'p50 (ms)':>10}{'p95 (ms)':>10}{'Diğer oturum p95 (ms)':>24}")
+        for workers in [int(x) for x in args.workers.split(",")]:
+            rate, p50, p95, probe = login_rush(auth, db, emails, args.sessions, workers)
+            print(f"{workers:>6}{rate:>10.1f}{p50:>10.1f}{p95:>10.1f}{probe:>24.2f}")
+
+        # Kaba kuvvet denemesi: hesap başına sınırdan sonrası reddedilir
+        auth._executor = None
+        auth.limiter.clear()
+        rejected = 0
+        for _ in range(20):
+            try:
+                auth.authenticate(emails[0], "yanlis")
+            except auth.LoginThrottled:
+                rejected += 1
+        print(f"\n20 hatalı denemeden {rejected} tanesi KDF çalıştırılmadan reddedildi "
+              f"(sınır: {auth.ACCOUNT_ATTEMPTS} / {int(auth.ATTEMPT_WINDOW)} sn)")
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import results, synthetic
+
+# --- MİKRO ÖLÇÜMLER ---
+# Sentetik veritabanında sık kullanılan yolların gecikmesi: öğrenci analizi ham
+# kayıtları, analiz paneli hesapları (önbelleksiz ve önbellekli), Excel/CSV
+# dışa aktarma, okul raporu, sınıf özeti ve giriş. Öğrenciler etkinliğe göre
+# üç gruptan (en yoğun, ortanca, en az) seçilir.
+
+
+def sample(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def pick_students(db):
+    rows = db.query_all("SELECT student_id FROM study_daily_rollup GROUP BY student_id ORDER BY SUM(log_count) DESC")
+    ids = [r[0] for r in rows]
+    return {'yoğun': ids[0], 'ortanca': ids[len(ids) // 2], 'az': ids[-1]}
+
+
+def dashboard(analysis, downsample, progress, student_id):
+    # Analiz panelinin önbelleğe almadan yaptığı hesaplar (main.py build_*_panel ile aynı çağrılar)
+    analysis.study_totals(student_id)
+    progress.forecast(student_id)
+    analysis.subject_totals(student_id)
+    downsample.top_units(analysis.unit_success(student_id))
+    downsample.trend_series(progress.trend(student_id))
+    progress.unit_mastery(student_id)
+    analysis.exam_nets(student_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mikro ölçümler (sentetik veri)")
+    parser.add_argument("--db", help="Var olan sentetik veritabanı (yoksa geçici olarak üretilir)")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--study-logs", type=int, default=200_000)
+    parser.add_argument("--exam-logs", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", action="store_true", help="Sonucu benchmarks/results altına kaydet")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.db:
+            os.environ['OGRENCI_TAKIP_DB'] = args.db
+        else:
+            start = time.perf_counter()
+            synthetic.create(os.path.join(tmp, "bench.db"), students=args.students, teachers=max(1, args.students // 25),
+                             parents=int(args.students * 0.8), study_logs=args.study_logs, exam_logs=args.exam_logs,
+                             seed=args.seed)
+            print(f"Sentetik veri: {time.perf_counter() - start:.1f} sn")
+        import analysis
+        import analysis_cache
+        import auth
+        import cohort
+        import db
+        import downsample
+        import export
+        import progress
+        import reports
+
+        students = pick_students(db)
+        teacher = db.query_one("SELECT supervisor_id FROM relationships WHERE type='ogretmen' AND student_id=?",
+                               (students['yoğun'],))[0]
+        email = db.query_one("SELECT email FROM users WHERE id=?", (students['yoğun'],))[0]
+        repeat = args.repeat
+        cases = {}
+        for group, sid in students.items():
+            cases[f"get_student_analysis ({group})"] = (lambda sid=sid: (analysis.study_rows(sid), analysis.exam_rows(sid)), repeat)
+            cases[f"dashboard hesap ({group})"] = (lambda sid=sid: dashboard(analysis, downsample, progress, sid), repeat)
+        sid = students['yoğun']
+        cases["dashboard önbellekli (yoğun)"] = (lambda: analysis_cache.get_or_compute(
+            'bench', sid, lambda: dashboard(analysis, downsample, progress, sid) or {}), repeat)
+        cases["export_to_excel (yoğun)"] = (lambda: export.query_to_excel(analysis.study_row_queries(sid)), repeat)
+        cases["export_to_csv (yoğun)"] = (lambda: export.query_to_csv(analysis.study_row_queries(sid)), repeat)
+        cases["class_overview"] = (lambda: cohort.class_overview(teacher), repeat)
+        cases["school_workbook"] = (reports.school_workbook, max(1, repeat // 10))
+        cases["login"] = (lambda: auth.limiter.clear() or auth.authenticate(email, synthetic.PASSWORD), max(3, repeat // 4))
+
+        summary = {}
+        print(f"{'Ölçüm':<36}{'n':>4}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+        for name, (func, count) in cases.items():
+            func()   # ısınma
+            summary[name] = results.summarize(sample(func, count))
+            print(f"{name:<36}{count:>4}{summary[name]['p50_ms']:>10.1f}{summary[name]['p95_ms']:>10.1f}")
+
+        params = {k: v for k, v in vars(args).items() if k not in ('save', 'compare')}
+        if args.save:
+            print(f"\nKaydedildi: {results.save('micro', params, summary)}")
+        if args.compare:
+            results.compare(summary, args.compare)
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import results, synthetic
+
+# --- ARTIMLI İLERLEME MOTORU ---
+# Uzun geçmişli öğrencilerde yeni kayıt başına durum güncelleme maliyeti
+# (progress.apply) ile tüm geçmişten baştan hesaplama (progress.rebuild) ve
+# eski pandas hesabı (günlük seri + rolling/ewm) karşılaştırılır. Geçmiş tarihli
+# kayıtta maliyet yalnızca o tarihten sonraki gün sayısıyla büyümelidir.
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def pandas_full(analysis, progress, student_id):
+    # Eski yol: her çizimde tüm günlük seriden kayan oran ve EMA
+    daily = analysis.daily_trend(student_id).set_index('date')
+    daily['correct'] = daily['q_solved'] - daily['q_wrong'] - daily['q_empty']
+    for window in progress.WINDOWS:
+        rolled = daily[['q_solved', 'correct']].rolling(f'{window}D').sum()
+        daily[f'roll_{window}'] = rolled['correct'] / rolled['q_solved'] * 100
+    ema = daily[['q_solved', 'correct']].ewm(alpha=progress.EMA_ALPHA, adjust=False).mean()
+    daily['ema'] = ema['correct'] / ema['q_solved'] * 100
+    return daily
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Artımlı ilerleme motoru: kayıt başına güncelleme ve tam hesap")
+    parser.add_argument("--students", type=int, default=20)
+    parser.add_argument("--logs-per-student", type=int, default=3000)
+    parser.add_argument("--days", type=int, default=1095, help="Geçmişin gün sayısı")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--save", action="store_true", help="Sonucu benchmarks/results altına kaydet")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki sonuç dosyası")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        synthetic.create(os.path.join(tmp, "bench.db"), students=args.students, teachers=1, parents=0,
+                         study_logs=args.students * args.logs_per_student, exam_logs=0, days=args.days, seed=args.seed)
+        import analysis
+        import db
+        import downsample
+        import logs
+        import progress
+
+        student_id, unit_id, subject_id = db.query_one(
+            "SELECT student_id, unit_id, subject_id FROM study_logs GROUP BY student_id ORDER BY COUNT(*) DESC LIMIT 1")
+        days = db.query_one("SELECT COUNT(*) FROM study_daily_rollup WHERE student_id = ?", (student_id,))[0]
+        progress.ensure(student_id)
+        rnd = random.Random(args.seed)
+
+        def apply_at(days_ago):
+            day = (date.today() - timedelta(days=days_ago)).isoformat()
+            row = (student_id, subject_id, unit_id, day, rnd.randint(1, 40), rnd.randint(0, 5), 0, 30, 0)
+            with db.write() as conn:
+                conn.executemany(logs.STUDY_INSERT_SQL, [row])
+                start = time.perf_counter()
+                progress.apply(conn, [row])
+                return (time.perf_counter() - start) * 1000
+
+        def rebuild():
+            with db.write() as conn:
+                progress.rebuild(conn, student_id)
+
+        cases = {
+            'apply: bugüne kayıt': lambda: [apply_at(0) for _ in range(args.repeat)],
+            'apply: 7 gün önceye kayıt': lambda: [apply_at(7) for _ in range(args.repeat)],
+            'apply: 90 gün önceye kayıt': lambda: [apply_at(90) for _ in range(args.repeat)],
+            'apply: 365 gün önceye kayıt': lambda: [apply_at(365) for _ in range(args.repeat)],
+            'rebuild: tüm geçmiş': lambda: timed(rebuild, args.repeat),
+            'okuma: trend (Son 3 Ay)': lambda: timed(lambda: progress.trend(student_id, 92), args.repeat),
+            'okuma: trend (Tümü)': lambda: timed(lambda: progress.trend(student_id), args.repeat),
+            'okuma: zaman grafiği paneli (Tümü)': lambda: timed(
+                lambda: downsample.trend_series(progress.trend(student_id)), args.repeat),
+            'okuma: eski pandas tam hesap': lambda: timed(lambda: pandas_full(analysis, progress, student_id), args.repeat),
+            'okuma: hedef tahmini': lambda: timed(lambda: progress.forecast(student_id), args.repeat),
+            'okuma: ünite hakimiyeti': lambda: timed(lambda: progress.unit_mastery(student_id), args.repeat),
+        }
+        print(f"Öğrenci {student_id}: {days} çalışma günü\n")
+        summary = {}
+        print(f"{'Ölçüm':<34}{'p50 (ms)':>10}{'p95 (ms)':>10}")
+        for name, run in cases.items():
+            summary[name] = results.summarize(run())
+            print(f"{name:<34}{summary[name]['p50_ms']:>10.2f}{summary[name]['p95_ms']:>10.2f}")
+
+        import rollups
+        problems = rollups.verify(student_id)
+        print(f"\nTam hesapla karşılaştırma: {', '.join(problems) if problems else 'uyuşmazlık yok'}")
+
+        params = {k: v for k, v in vars(args).items() if k not in ('save', 'compare')}
+        if args.save:
+            print(f"\nKaydedildi: {results.save('progress_engine', params, summary)}")
+        if args.compare:
+            results.compare(summary, args.compare)
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import json
+import os
+import platform
+import subprocess
+from datetime import datetime
+
+# --- ÖLÇÜM SONUÇLARI ---
+# Benchmark sonuçları ortam bilgisiyle (commit, Python, CPU) JSON olarak saklanır;
+# --compare ile önceki bir sonuç dosyasına göre değişim yüzdesi yazdırılır.
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+REGRESSION_PCT = 10.0
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def summarize(samples):
+    return {'n': len(samples), 'p50_ms': percentile(samples, 0.5), 'p95_ms': percentile(samples, 0.95),
+            'max_ms': max(samples)}
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(RESULTS_DIR), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def save(name, params, results, out_dir=None):
+    out_dir = out_dir or RESULTS_DIR
+    os.makedirs(out_dir, exist_ok=True)
+    now = datetime.now()
+    data = {'benchmark': name, 'created': now.isoformat(timespec='seconds'), 'commit': _commit(),
+            'python': platform.python_version(), 'cpu_count': os.cpu_count(), 'params': params,
+            'results': results}
+    path = os.path.join(out_dir, f"{name}_{now.strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def compare(results, baseline_path, metric='p50_ms'):
+    # Süre ölçümlerinde artış kötüleşmedir; eşik üstü değişimler işaretlenir
+    baseline = load(baseline_path)
+    print(f"\nKarşılaştırma: {os.path.basename(baseline_path)} (commit {baseline.get('commit')})")
+    print(f"{'Ölçüm':<36}{'Önce':>10}{'Şimdi':>10}{'Değişim':>10}")
+    regressions = 0
+    for name, current in results.items():
+        before = baseline['results'].get(name)
+        if not before or metric not in before or metric not in current:
+            continue
+        change = (current[metric] - before[metric]) / before[metric] * 100 if before[metric] else 0.0
+        flag = " ⚠" if change > REGRESSION_PCT else ""
+        regressions += bool(flag)
+        print(f"{name:<36}{before[metric]:>10.1f}{current[metric]:>10.1f}{change:>+9.1f}%{flag}")
+    return regressions
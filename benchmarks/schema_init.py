@@ -0,0 +1,72 @@
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- ESKİ init_db() İLE ŞEMA GÖÇÜ KARŞILAŞTIRMASI ---
+# Eski sürüm her Streamlit yeniden çalıştırmasında yeni bağlantı açıp 7 adet
+# CREATE TABLE IF NOT EXISTS, bir SELECT ve koşulsuz commit yapıyordu.
+
+LEGACY_TABLES = [
+    "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, role TEXT, email TEXT UNIQUE, phone TEXT, password TEXT, unique_id TEXT UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS relationships (id INTEGER PRIMARY KEY AUTOINCREMENT, supervisor_id INTEGER, student_id INTEGER, type TEXT)",
+    "CREATE TABLE IF NOT EXISTS subjects (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, subject_name TEXT)",
+    "CREATE TABLE IF NOT EXISTS units (id INTEGER PRIMARY KEY AUTOINCREMENT, subject_id INTEGER, unit_name TEXT, is_completed INTEGER DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS study_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, subject_id INTEGER, unit_id INTEGER, date TEXT, q_solved INTEGER, q_wrong INTEGER, q_empty INTEGER, duration INTEGER, is_repeated INTEGER DEFAULT 0)",
+    "CREATE TABLE IF NOT EXISTS exam_logs (id INTEGER PRIMARY KEY AUTOINCREMENT, student_id INTEGER, subject_id INTEGER, date TEXT, q_solved INTEGER, q_wrong INTEGER, q_empty INTEGER, duration INTEGER)",
+]
+
+
+def legacy_init_db(path):
+    conn = sqlite3.connect(path, check_same_thread=False)
+    c = conn.cursor()
+    for sql in LEGACY_TABLES:
+        c.execute(sql)
+    c.execute("SELECT * FROM users WHERE email='admin02'")
+    c.fetchone()
+    conn.commit()
+    conn.close()
+
+
+def timed(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:<28} ort: {statistics.mean(samples):8.4f} ms   p50: {statistics.median(samples):8.4f} ms   p95: {p95:8.4f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Yeniden çalıştırma başına şema kurulum maliyeti")
+    parser.add_argument("--repeat", type=int, default=500)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_path = os.path.join(tmp, "legacy.db")
+        legacy_init_db(legacy_path)
+        report("Eski init_db()", timed(lambda: legacy_init_db(legacy_path), args.repeat))
+
+        os.environ['OGRENCI_TAKIP_DB'] = os.path.join(tmp, "yeni.db")
+        import db
+        import migrations
+        report("İlk ensure_schema()", timed(migrations.ensure_schema, 1))
+        report("ensure_schema() (sonraki)", timed(migrations.ensure_schema, args.repeat))
+        report("migrate() (şema güncel)", timed(migrations.migrate, args.repeat))
+        db.get_pool().close()
+
+
+if __name__ == "__main__":
+    main()
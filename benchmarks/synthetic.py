@@ -0,0 +1,176 @@
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+# Depo kökünden çalıştırılabilmesi için
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# --- SENTETİK VERİ ÜRETİCİ ---
+# Güncel şemada (göçler uygulanmış) gerçekçi dağılımlarla okul verisi üretir:
+# ortak ders/ünite kataloğu, öğrenci/öğretmen/veli hesapları ve ilişkileri,
+# öğrenci başına etkinlik düzeyine (lognormal) göre dağıtılmış çalışma ve deneme
+# kayıtları. Başarı oranı öğrenci yeteneğinden (beta) türetilir, hafta sonu daha
+# az, dönem sonuna doğru daha çok çalışılır. Özet tabloları trigger'larla dolar.
+# Aynı tohum (seed) aynı veritabanını üretir.
+
+PASSWORD = "sifre123"
+
+SUBJECTS = ["Matematik", "Türkçe", "Fizik", "Kimya", "Biyoloji", "Tarih", "Coğrafya",
+            "Felsefe", "Din Kültürü", "İngilizce", "Geometri", "Edebiyat"]
+
+CHUNK_SIZE = 50_000
+
+
+def _chunks(rows, size=CHUNK_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _log_dates(rng, count, days, end):
+    # Hafta içi ağırlıklı, dönem sonuna doğru artan yoğunluk
+    offsets = np.arange(days)
+    weekday = np.array([(end - timedelta(days=int(days - 1 - o))).weekday() for o in offsets])
+    weights = np.where(weekday >= 5, 0.6, 1.0) * (0.5 + offsets / days)
+    picked = rng.choice(offsets, size=count, p=weights / weights.sum())
+    start = end - timedelta(days=days - 1)
+    calendar = np.array([(start + timedelta(days=int(o))).isoformat() for o in offsets])
+    return calendar[picked]
+
+
+def _outcomes(rng, ability, solved):
+    wrong = rng.binomial(solved, np.clip((1 - ability) * 0.8, 0, 1))
+    empty = rng.binomial(solved - wrong, np.clip((1 - ability) * 0.25, 0, 1))
+    return wrong, empty
+
+
+def generate(conn, students=1000, teachers=40, parents=800, study_logs=200_000, exam_logs=20_000,
+             subjects_per_student=6, units_per_subject=10, days=365, seed=42, end=None, password_hash=None):
+    rng = np.random.default_rng(seed)
+    end = end or date.today()
+    if password_hash is None:
+        import auth
+        password_hash = auth.hash_password(PASSWORD)   # tüm sentetik hesaplar aynı şifre
+    subjects_per_student = min(subjects_per_student, len(SUBJECTS))
+
+    conn.execute("BEGIN")
+    # Katalog
+    conn.executemany("INSERT OR IGNORE INTO subjects (subject_name) VALUES (?)", ((s,) for s in SUBJECTS))
+    subject_ids = dict(conn.execute("SELECT subject_name, id FROM subjects").fetchall())
+    conn.executemany("INSERT OR IGNORE INTO units (subject_id, unit_name) VALUES (?, ?)",
+                     ((subject_ids[s], f"{s} {u + 1}. Ünite") for s in SUBJECTS for u in range(units_per_subject)))
+    units_of = {}
+    for unit_id, sub_id in conn.execute("SELECT id, subject_id FROM units"):
+        units_of.setdefault(sub_id, []).append(unit_id)
+
+    # Kullanıcılar: e-mail ve unique_id sıra numarasından üretilir, boş veritabanı beklenir
+    def add_users(role, prefix, code, count):
+        conn.executemany("INSERT INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
+                         ((f"{role} {i + 1}", role, f"{prefix}{i + 1}@okul", f"05{i:09d}", password_hash,
+                           f"{code}{i + 1:05d}") for i in range(count)))
+        return [r[0] for r in conn.execute("SELECT id FROM users WHERE role=? ORDER BY id", (role,))]
+    student_ids = np.array(add_users("Öğrenci", "ogrenci", "S", students))
+    teacher_ids = add_users("Öğretmen", "ogretmen", "T", teachers)
+    parent_ids = add_users("Veli", "veli", "P", parents)
+
+    # İlişkiler: her öğrencinin bir sınıf öğretmeni ve (çoğunun) bir velisi; kardeşler aynı veliyi paylaşır
+    relations = [(int(teacher_ids[i % len(teacher_ids)]), int(sid), 'ogretmen') for i, sid in enumerate(student_ids)] if teacher_ids else []
+    if parent_ids:
+        with_parent = rng.random(len(student_ids)) < 0.9
+        relations += [(int(rng.choice(parent_ids)), int(sid), 'veli') for sid in student_ids[with_parent]]
+    conn.executemany("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, ?)", relations)
+
+    # Kayıtlar: öğrenci başına ders seçimi, tüm üniteler
+    all_subjects = np.array([subject_ids[s] for s in SUBJECTS])
+    enrolled = {int(sid): rng.choice(all_subjects, size=subjects_per_student, replace=False) for sid in student_ids}
+    conn.executemany("INSERT INTO student_subjects (student_id, subject_id) VALUES (?, ?)",
+                     ((sid, int(sub)) for sid, subs in enrolled.items() for sub in subs))
+    completed_share = rng.beta(2, 3, len(student_ids))
+    conn.executemany("INSERT INTO student_units (student_id, unit_id, subject_id, is_completed) VALUES (?, ?, ?, ?)",
+                     ((sid, unit, int(sub), int(rng.random() < share))
+                      for sid, share in zip(enrolled, completed_share)
+                      for sub in enrolled[sid] for unit in units_of[int(sub)]))
+
+    # Etkinlik ve yetenek
+    activity = rng.lognormal(0, 0.8, len(student_ids))
+    activity /= activity.sum()
+    ability = rng.beta(5, 2, len(student_ids))
+
+    # Çalışma kayıtları
+    owner = rng.choice(len(student_ids), size=study_logs, p=activity)
+    sub_pick = rng.integers(0, subjects_per_student, study_logs)
+    unit_pick = rng.integers(0, units_per_subject, study_logs)
+    subs = np.array([enrolled[int(student_ids[o])][s] for o, s in zip(owner, sub_pick)], dtype=np.int64)
+    units = np.array([units_of[int(sub)][u % len(units_of[int(sub)])] for sub, u in zip(subs, unit_pick)], dtype=np.int64)
+    solved = rng.negative_binomial(6, 0.2, study_logs) + 5
+    wrong, empty = _outcomes(rng, ability[owner], solved)
+    duration = np.maximum(5, (solved * rng.normal(1.5, 0.4, study_logs)).astype(int))
+    repeated = (rng.random(study_logs) < 0.15).astype(int)
+    dates = _log_dates(rng, study_logs, days, end)
+    rows = list(zip(student_ids[owner].tolist(), subs.tolist(), units.tolist(), dates.tolist(), solved.tolist(),
+                    wrong.tolist(), empty.tolist(), duration.tolist(), repeated.tolist()))
+    for chunk in _chunks(rows):
+        conn.executemany("""INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration, is_repeated)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", chunk)
+
+    # Deneme kayıtları: bir deneme = öğrencinin tüm dersleri için birer satır
+    exams = max(1, exam_logs // subjects_per_student) if exam_logs else 0
+    owner = rng.choice(len(student_ids), size=exams, p=activity)
+    dates = _log_dates(rng, exams, days, end)
+    rows = []
+    for o, day in zip(owner, dates):
+        sid = int(student_ids[o])
+        solved = rng.integers(15, 41, subjects_per_student)
+        wrong, empty = _outcomes(rng, np.full(subjects_per_student, ability[o]), solved)
+        rows += [(sid, int(sub), day, int(q), int(w), int(e), int(q * 1.2))
+                 for sub, q, w, e in zip(enrolled[sid], solved, wrong, empty)]
+    for chunk in _chunks(rows):
+        conn.executemany("""INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", chunk)
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    return {'students': student_ids.tolist(), 'teachers': teacher_ids, 'parents': parent_ids}
+
+
+def create(path, **kwargs):
+    # Yeni bir veritabanı dosyasını göçlerle oluşturup doldurur
+    os.environ['OGRENCI_TAKIP_DB'] = path
+    import db
+    import migrations
+    if db.get_pool().path != path:
+        raise RuntimeError("db modülü başka bir veritabanıyla yüklenmiş; create() önce çağrılmalı")
+    migrations.migrate()
+    conn = db.connect(path)
+    try:
+        return generate(conn, **kwargs)
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sentetik okul verisi üret")
+    parser.add_argument("db", help="Oluşturulacak veritabanı dosyası")
+    parser.add_argument("--students", type=int, default=1000)
+    parser.add_argument("--teachers", type=int, default=40)
+    parser.add_argument("--parents", type=int, default=800)
+    parser.add_argument("--study-logs", type=int, default=200_000)
+    parser.add_argument("--exam-logs", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if os.path.exists(args.db):
+        parser.error(f"{args.db} zaten var")
+
+    start = time.perf_counter()
+    ids = create(args.db, students=args.students, teachers=args.teachers, parents=args.parents,
+                 study_logs=args.study_logs, exam_logs=args.exam_logs, days=args.days, seed=args.seed)
+    print(f"{len(ids['students'])} öğrenci, {len(ids['teachers'])} öğretmen, {len(ids['parents'])} veli, "
+          f"{args.study_logs} çalışma / ~{args.exam_logs} deneme kaydı: {time.perf_counter() - start:.1f} sn")
+    print(f"Şifre (tüm hesaplar): {PASSWORD}")
+
+
+if __name__ == "__main__":
+    main()
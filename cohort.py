@@ -0,0 +1,158 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import db
+import perf
+
+# --- SINIF / ÖĞRETMEN GENELİ KARŞILAŞTIRMALI ANALİZ ---
+# Bir öğretmenin (veya velinin) tüm öğrencileri için özetler öğrenci başına sorgu
+# atmadan, sınıf büyüklüğünden bağımsız sayıda set tabanlı sorguyla özet
+# tablolardan okunur. Sıralama, yüzdelik, z-skoru ve eğilim hesapları
+# NumPy/pandas ile vektörel yapılır.
+
+TREND_DAYS = 30          # eğilim penceresi (gün)
+INACTIVE_DAYS = 7        # bu kadar gün kayıt yoksa "geride" sayılır
+BEHIND_Z = -1.0          # sınıf ortalamasının bu kadar std altı
+DECLINE_SLOPE = -0.5     # günlük başarı eğimi (% puan / gün)
+
+# Öğretmene bağlı öğrenciler (mükerrer ilişki satırları tek sayılır)
+COHORT_FILTER = "SELECT student_id FROM relationships WHERE supervisor_id = ? AND type = ?"
+
+STUDENTS_SQL = f"""
+    SELECT u.id AS student_id, u.name, u.unique_id,
+           COALESCE(st.q_solved, 0) AS q_solved, COALESCE(st.q_wrong, 0) AS q_wrong,
+           COALESCE(st.q_empty, 0) AS q_empty, COALESCE(st.duration, 0) AS duration,
+           COALESCE(ex.net, 0) AS exam_net, COALESCE(ex.exam_count, 0) AS exam_count,
+           COALESCE(un.unit_count, 0) AS unit_count, COALESCE(un.completed, 0) AS completed_units,
+           dy.last_date
+    FROM users u
+    LEFT JOIN (
+        SELECT student_id, SUM(q_solved) AS q_solved, SUM(q_wrong) AS q_wrong, SUM(q_empty) AS q_empty, SUM(duration) AS duration
+        FROM study_unit_rollup WHERE student_id IN ({COHORT_FILTER}) GROUP BY student_id
+    ) st ON st.student_id = u.id
+    LEFT JOIN (
+        SELECT student_id, SUM(exam_count) AS exam_count, SUM((q_solved - q_wrong) - (q_wrong / 4.0)) AS net
+        FROM exam_subject_rollup WHERE student_id IN ({COHORT_FILTER}) GROUP BY student_id
+    ) ex ON ex.student_id = u.id
+    LEFT JOIN (
+        SELECT student_id, COUNT(*) AS unit_count, SUM(is_completed) AS completed
+        FROM student_units WHERE student_id IN ({COHORT_FILTER}) GROUP BY student_id
+    ) un ON un.student_id = u.id
+    LEFT JOIN (
+        SELECT student_id, MAX(date) AS last_date
+        FROM study_daily_rollup WHERE student_id IN ({COHORT_FILTER}) GROUP BY student_id
+    ) dy ON dy.student_id = u.id
+    WHERE u.id IN ({COHORT_FILTER})
+    ORDER BY u.id
+"""
+
+# Öğrenci × ünite satırları sadece tamsayı kolonlarla gelir; adlar küçük katalogdan eşlenir
+UNITS_SQL = f"""
+    SELECT student_id, unit_id, q_solved, q_wrong, q_empty
+    FROM study_unit_rollup
+    WHERE student_id IN ({COHORT_FILTER})
+"""
+
+UNIT_NAMES_SQL = """
+    SELECT u.id AS unit_id, s.subject_name, u.unit_name
+    FROM units u JOIN subjects s ON u.subject_id = s.id
+"""
+
+DAILY_SQL = f"""
+    SELECT student_id, julianday(date) - julianday(?) AS day, q_solved, q_wrong, q_empty
+    FROM study_daily_rollup
+    WHERE student_id IN ({COHORT_FILTER}) AND date > ? AND date <= ?
+"""
+
+
+def _params(supervisor_id, rel_type, repeat):
+    return (int(supervisor_id), rel_type) * repeat
+
+
+def _success(solved, wrong, empty=0):
+    # Çözülen 0 ise oran 0 (tek öğrenci panelindeki hesapla aynı)
+    solved = np.asarray(solved, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = (solved - wrong - empty) / solved * 100
+    return np.where(solved > 0, rate, 0.0)
+
+
+def _trend_slopes(daily):
+    # Öğrenci başına en küçük kareler eğimi, groupby toplamlarıyla kapalı formda:
+    # eğim = (nΣxy − ΣxΣy) / (nΣx² − (Σx)²)
+    if daily.empty:
+        return pd.Series(dtype=float)
+    x = daily['day'].to_numpy(dtype=float)
+    y = _success(daily['q_solved'], daily['q_wrong'], daily['q_empty'])
+    parts = pd.DataFrame({'student_id': daily['student_id'].to_numpy(), 'n': 1.0, 'x': x, 'y': y, 'xy': x * y, 'xx': x * x})
+    sums = parts.groupby('student_id').sum()
+    denominator = sums['n'] * sums['xx'] - sums['x'] ** 2
+    slope = (sums['n'] * sums['xy'] - sums['x'] * sums['y']) / denominator.where(denominator != 0)
+    return slope
+
+
+@perf.timed()
+def class_overview(supervisor_id, rel_type='ogretmen', as_of=None, trend_days=TREND_DAYS):
+    as_of = as_of or date.today()
+    today = as_of.isoformat()
+    window_start = (as_of - timedelta(days=trend_days)).isoformat()
+
+    students = db.query_df(STUDENTS_SQL, _params(supervisor_id, rel_type, 5))
+    units = db.query_df(UNITS_SQL, _params(supervisor_id, rel_type, 1))
+    daily = db.query_df(DAILY_SQL, (today,) + _params(supervisor_id, rel_type, 1) + (window_start, today))
+
+    # Öğrenci düzeyi göstergeler
+    students['success_rate'] = _success(students['q_solved'], students['q_wrong'], students['q_empty'])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        students['completion_rate'] = np.where(students['unit_count'] > 0,
+                                               students['completed_units'] / students['unit_count'] * 100, 0.0)
+    active = students['q_solved'] > 0
+    rates = students.loc[active, 'success_rate']
+    std = rates.std(ddof=0)
+    students['percentile'] = rates.rank(pct=True) * 100
+    students['z_score'] = (rates - rates.mean()) / std if std > 0 else rates * 0.0
+    students['rank'] = rates.rank(ascending=False, method='min')
+    students['trend'] = students['student_id'].map(_trend_slopes(daily))
+
+    last = pd.to_datetime(students['last_date'])
+    students['days_idle'] = (pd.Timestamp(as_of) - last).dt.days
+
+    # Geride kalanlar: ilk uyan neden yazılır
+    conditions = [~active,
+                  students['z_score'] <= BEHIND_Z,
+                  students['trend'] <= DECLINE_SLOPE,
+                  students['days_idle'] > INACTIVE_DAYS]
+    reasons = ["Çalışma kaydı yok",
+               "Sınıf ortalamasının belirgin altında",
+               "Başarı düşüşte",
+               f"Son {INACTIVE_DAYS} günde çalışma yok"]
+    students['behind_reason'] = np.select(conditions, reasons, default='')
+    students = students.sort_values(['rank', 'name'], na_position='last').reset_index(drop=True)
+
+    # Öğrenci × ünite başarı matrisi (ısı haritası) ve ünite bazında sınıf ortalaması
+    units = units.merge(db.query_df(UNIT_NAMES_SQL), on='unit_id', how='inner')
+    units['success_rate'] = _success(units['q_solved'], units['q_wrong'], units['q_empty'])
+    # Aynı adlı öğrenciler karışmasın diye etikette öğrenci kodu da bulunur
+    students['label'] = students['name'].fillna('') + " (" + students['unique_id'].fillna('') + ")"
+    units['label'] = units['student_id'].map(students.set_index('student_id')['label'])
+    units['unit_label'] = units['subject_name'] + " / " + units['unit_name']
+    heatmap = units.pivot_table(index='label', columns='unit_label', values='success_rate', aggfunc='first')
+    heatmap = heatmap.reindex([n for n in students['label'] if n in heatmap.index])
+
+    unit_totals = units.groupby(['subject_name', 'unit_name'])[['q_solved', 'q_wrong', 'q_empty']].sum()
+    unit_summary = unit_totals.assign(
+        students=units.groupby(['subject_name', 'unit_name'])['student_id'].nunique(),
+        success_rate=_success(unit_totals['q_solved'], unit_totals['q_wrong'], unit_totals['q_empty']),
+        spread=units.groupby(['subject_name', 'unit_name'])['success_rate'].std(ddof=0),
+    ).reset_index().sort_values('success_rate')
+
+    return {
+        'students': students,
+        'heatmap': heatmap,
+        'units': unit_summary,
+        'behind': students[students['behind_reason'] != ''],
+        'class_mean': float(rates.mean()) if not rates.empty else 0.0,
+        'active': int(active.sum()),
+    }
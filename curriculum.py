@@ -0,0 +1,140 @@
+import analysis_cache
+import archive
+import db
+import progress
+
+# --- ORTAK MÜFREDAT KATALOĞU ---
+# subjects/units tüm okulun ortak ders ve ünite kataloğudur (ad başına tek satır).
+# Öğrencinin aldığı dersler student_subjects, üniteler ve tamamlama durumu
+# student_units tablosundadır. Okul geneli kıyaslamalar böylece metin yerine
+# tamsayı kimlikler üzerinden gruplanır.
+
+
+def subject_id(conn, name):
+    # Katalogda yoksa eklenir; her iki durumda da kimliği döner
+    name = name.strip()
+    conn.execute("INSERT OR IGNORE INTO subjects (subject_name) VALUES (?)", (name,))
+    return conn.execute("SELECT id FROM subjects WHERE subject_name=?", (name,)).fetchone()[0]
+
+
+def unit_id(conn, subject, name):
+    name = name.strip()
+    conn.execute("INSERT OR IGNORE INTO units (subject_id, unit_name) VALUES (?, ?)", (subject, name))
+    return conn.execute("SELECT id FROM units WHERE subject_id=? AND unit_name=?", (subject, name)).fetchone()[0]
+
+
+def enroll_subject(student_id, name):
+    with db.write() as conn:
+        sid = subject_id(conn, name)
+        conn.execute("INSERT OR IGNORE INTO student_subjects (student_id, subject_id) VALUES (?, ?)", (student_id, sid))
+    return sid
+
+
+def enroll_unit(student_id, subject, name):
+    with db.write() as conn:
+        uid = unit_id(conn, subject, name)
+        conn.execute("INSERT OR IGNORE INTO student_subjects (student_id, subject_id) VALUES (?, ?)", (student_id, subject))
+        conn.execute("INSERT OR IGNORE INTO student_units (student_id, unit_id, subject_id) VALUES (?, ?, ?)",
+                     (student_id, uid, subject))
+    return uid
+
+
+def drop_unit(student_id, unit):
+    # Öğrencinin bu üniteye ait çalışma kayıtları trigger ile silinir
+    with db.write() as conn:
+        deleted = conn.execute("DELETE FROM student_units WHERE student_id=? AND unit_id=?", (student_id, unit)).rowcount
+        if deleted:
+            archive.forget(conn, student_id, unit)
+            progress.invalidate(conn, student_id)
+            analysis_cache.bump(conn, student_id)
+    return deleted
+
+
+def set_completed(student_id, unit, done):
+    db.execute("UPDATE student_units SET is_completed=? WHERE student_id=? AND unit_id=?", (1 if done else 0, student_id, unit))
+
+
+def clear_student(conn, student_id):
+    conn.execute("DELETE FROM student_subjects WHERE student_id=?", (student_id,))
+
+
+def student_subjects(student_id):
+    return db.query_df("""
+        SELECT s.id, s.subject_name
+        FROM student_subjects ss JOIN subjects s ON ss.subject_id = s.id
+        WHERE ss.student_id = ?
+        ORDER BY s.subject_name
+    """, (int(student_id),))
+
+
+def student_units(student_id, subject):
+    return db.query_df("""
+        SELECT u.id, u.unit_name, su.is_completed
+        FROM student_units su JOIN units u ON su.unit_id = u.id
+        WHERE su.student_id = ? AND su.subject_id = ?
+        ORDER BY u.unit_name
+    """, (int(student_id), int(subject)))
+
+
+def enroll_curriculum(conn, student_ids, curriculum):
+    # Şablon (subject_name, unit_name) önce kataloğa, sonra öğrencilere küme tabanlı eklenir;
+    # dönen sayılar yeni ders ve ünite kayıtlarıdır (zaten olanlar sayılmaz)
+    if curriculum is None or curriculum.empty or not student_ids:
+        return 0, 0
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_curriculum (subject_name TEXT, unit_name TEXT)")
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS tmp_students (id INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM tmp_curriculum")
+    conn.execute("DELETE FROM tmp_students")
+    conn.executemany("INSERT INTO tmp_curriculum VALUES (?, ?)", curriculum.itertuples(index=False, name=None))
+    conn.executemany("INSERT INTO tmp_students VALUES (?)", ((int(sid),) for sid in student_ids))
+    conn.execute("INSERT OR IGNORE INTO subjects (subject_name) SELECT DISTINCT subject_name FROM tmp_curriculum")
+    conn.execute("""INSERT OR IGNORE INTO units (subject_id, unit_name)
+                    SELECT DISTINCT s.id, c.unit_name FROM tmp_curriculum c JOIN subjects s ON s.subject_name = c.subject_name
+                    WHERE c.unit_name != ''""")
+    subjects = conn.execute("""
+        INSERT OR IGNORE INTO student_subjects (student_id, subject_id)
+        SELECT st.id, s.id
+        FROM tmp_students st CROSS JOIN subjects s
+        WHERE s.subject_name IN (SELECT subject_name FROM tmp_curriculum)
+    """).rowcount
+    units = conn.execute("""
+        INSERT OR IGNORE INTO student_units (student_id, unit_id, subject_id)
+        SELECT st.id, u.id, u.subject_id
+        FROM tmp_students st
+        CROSS JOIN tmp_curriculum c
+        JOIN subjects s ON s.subject_name = c.subject_name
+        JOIN units u ON u.subject_id = s.id AND u.unit_name = c.unit_name
+    """).rowcount
+    conn.execute("DELETE FROM tmp_curriculum")
+    conn.execute("DELETE FROM tmp_students")
+    return subjects, units
+
+
+def school_unit_success(limit=None):
+    # Okul geneli ünite başarısı: tamsayı kimlikle gruplanır, adlar sonradan eklenir
+    sql = """
+        SELECT s.subject_name, u.unit_name, r.students, r.q_solved, r.q_wrong, r.q_empty,
+               COALESCE(CAST(r.q_solved - r.q_wrong - r.q_empty AS REAL) / NULLIF(r.q_solved, 0) * 100, 0) AS success_rate
+        FROM (
+            SELECT unit_id, COUNT(*) AS students, SUM(q_solved) AS q_solved, SUM(q_wrong) AS q_wrong, SUM(q_empty) AS q_empty
+            FROM study_unit_rollup GROUP BY unit_id
+        ) r
+        JOIN units u ON r.unit_id = u.id
+        JOIN subjects s ON u.subject_id = s.id
+        ORDER BY success_rate, r.q_solved DESC
+    """
+    if limit:
+        return db.query_df(sql + " LIMIT ?", (int(limit),))
+    return db.query_df(sql)
+
+
+def completion_overview():
+    return db.query_df("""
+        SELECT s.subject_name, u.unit_name, COUNT(*) AS students, SUM(su.is_completed) AS completed,
+               CAST(SUM(su.is_completed) AS REAL) / COUNT(*) * 100 AS completion_rate
+        FROM student_units su
+        JOIN units u ON su.unit_id = u.id
+        JOIN subjects s ON u.subject_id = s.id
+        GROUP BY su.unit_id, s.subject_name, u.unit_name
+        ORDER BY s.subject_name, u.unit_name
+    """)
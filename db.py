@@ -0,0 +1,323 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+import atexit
+from contextlib import contextmanager
+
+import pandas as pd
+
+import perf
+
+# --- VERİTABANI ERİŞİM KATMANI ---
+# Tüm sorgular bu modül üzerinden çalışır. Okumalar sınırlı bir bağlantı
+# havuzundan, yazmalar ise tek ve sıraya alınmış bir yazıcı bağlantısından yapılır.
+# Depolama arka ucu OGRENCI_TAKIP_DB_URL ile seçilir:
+#   sqlite:///yol.db        yerel dosya (varsayılan: OGRENCI_TAKIP_DB)
+#   postgresql://...        paylaşılan PostgreSQL (postgres.py), çok düğümlü kurulum;
+#                           DENEYSEL: yalnızca OGRENCI_TAKIP_EXPERIMENTAL_POSTGRES=1 ile açılır
+#   memory://ad             süreç içi paylaşılan bellek veritabanı (deneme/test)
+
+DB_PATH = os.environ.get('OGRENCI_TAKIP_DB', 'ogrenci_takip.db')
+DB_URL = os.environ.get('OGRENCI_TAKIP_DB_URL', '')
+EXPERIMENTAL_POSTGRES = os.environ.get('OGRENCI_TAKIP_EXPERIMENTAL_POSTGRES') == '1'
+POOL_SIZE = int(os.environ.get('OGRENCI_TAKIP_POOL_SIZE', '8'))
+POOL_TIMEOUT = float(os.environ.get('OGRENCI_TAKIP_POOL_TIMEOUT', '10'))
+
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",     # WAL modunda her commit'te fsync gerekmez
+    "PRAGMA cache_size=-16000",      # ~16 MB sayfa önbelleği
+    "PRAGMA mmap_size=134217728",    # 128 MB bellek eşlemeli okuma
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class TimedCursor(sqlite3.Cursor):
+    # Yardımcı fonksiyonlar dışından (conn.execute / imleç) çalışan sorguların ölçümü
+    def execute(self, sql, params=()):
+        if not perf.ENABLED or perf.in_query():
+            return super().execute(sql, params)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, params)
+        finally:
+            perf.record_query(sql, time.perf_counter() - start, self.connection, params)
+
+    def executemany(self, sql, seq_of_params):
+        if not perf.ENABLED or perf.in_query():
+            return super().executemany(sql, seq_of_params)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_params)
+        finally:
+            perf.record_query(sql, time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+def connect(path=None):
+    path = path or DB_PATH
+    shared_memory = path.startswith('file:') and 'mode=memory' in path
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, factory=TimedConnection,
+                           uri=path.startswith('file:'))
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    if shared_memory:
+        # Paylaşılan önbellekte tablo kilitleri busy_timeout beklemez; okuyucular kilide takılmasın
+        conn.execute("PRAGMA read_uncommitted=1")
+    return conn
+
+
+def sqlite_path(url):
+    if not url:
+        return DB_PATH
+    if url.startswith('sqlite:///'):
+        return url[len('sqlite:///'):]
+    if url.startswith('memory://'):
+        return f"file:{url[len('memory://'):] or 'ogrenci_takip'}?mode=memory&cache=shared"
+    raise ValueError(f"Desteklenmeyen veritabanı adresi: {url}")
+
+
+class ConnectionPool:
+    dialect = 'sqlite'
+
+    def __init__(self, path=None, size=POOL_SIZE, timeout=POOL_TIMEOUT):
+        self.path = path or DB_PATH
+        self.size = size
+        self.timeout = timeout
+        # Bellek veritabanı son bağlantı kapanınca silinir; havuz açık kaldıkça tutulur
+        self._keeper = connect(self.path) if 'mode=memory' in self.path else None
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._writer = None
+        self._closed = False
+        self._stats = {
+            'connections_created': 0,
+            'read_checkouts': 0,
+            'read_waits': 0,
+            'read_wait_seconds': 0.0,
+            'writes': 0,
+            'write_wait_seconds': 0.0,
+            'rollbacks': 0,
+        }
+
+    # Okuma bağlantıları: thread başına bir bağlantı, iç içe çağrılarda aynısı kullanılır
+    def _checkout(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Bağlantı havuzu kapatıldı.")
+            self._stats['read_checkouts'] += 1
+            try:
+                return self._idle.get_nowait()
+            except queue.Empty:
+                if self._stats['connections_created'] < self.size:
+                    self._stats['connections_created'] += 1
+                    create = True
+                else:
+                    create = False
+        if create:
+            return connect(self.path)
+
+        start = time.perf_counter()
+        try:
+            conn = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeout(f"{self.timeout} sn içinde boş bağlantı bulunamadı.")
+        with self._lock:
+            self._stats['read_waits'] += 1
+            self._stats['read_wait_seconds'] += time.perf_counter() - start
+        return conn
+
+    def _checkin(self, conn):
+        if self._closed:
+            conn.close()
+        else:
+            self._idle.put(conn)
+
+    @contextmanager
+    def read(self):
+        held = getattr(self._local, 'reader', None)
+        if held is not None:
+            yield held
+            return
+        conn = self._checkout()
+        self._local.reader = conn
+        try:
+            yield conn
+        finally:
+            self._local.reader = None
+            self._checkin(conn)
+
+    # Yazma bağlantısı: tek bağlantı, kilit ile sıraya alınır, her blok tek transaction.
+    # durable=True: commit WAL'e fsync edilerek döner (synchronous=FULL); güç kesintisinde
+    # bile kaybolmaması gereken onaylı yazmalar için (write_queue)
+    @contextmanager
+    def write(self, durable=False):
+        start = time.perf_counter()
+        with self._write_lock:
+            depth = getattr(self._local, 'write_depth', 0)
+            if depth == 0:
+                with self._lock:
+                    self._stats['write_wait_seconds'] += time.perf_counter() - start
+                if self._writer is None:
+                    self._writer = connect(self.path)
+                if durable:
+                    # Güvenlik seviyesi transaction içinde değiştirilemez
+                    self._writer.execute("PRAGMA synchronous=FULL")
+                self._writer.execute("BEGIN IMMEDIATE")
+                self._local.after_commit = []
+            self._local.write_depth = depth + 1
+            try:
+                yield self._writer
+            except BaseException:
+                self._local.write_depth = depth
+                if depth == 0:
+                    self._local.after_commit = []
+                    self._writer.execute("ROLLBACK")
+                    if durable:
+                        self._writer.execute("PRAGMA synchronous=NORMAL")
+                    with self._lock:
+                        self._stats['rollbacks'] += 1
+                raise
+            self._local.write_depth = depth
+            if depth == 0:
+                self._writer.execute("COMMIT")
+                if durable:
+                    self._writer.execute("PRAGMA synchronous=NORMAL")
+                with self._lock:
+                    self._stats['writes'] += 1
+                # Yazıcı kilidi hâlâ tutulurken: araya başka yazma girmez
+                callbacks, self._local.after_commit = self._local.after_commit, []
+                for func in callbacks:
+                    func()
+
+    # Transaction commit edildikten sonra çalışacak iş (geri alınırsa atılır); ana
+    # veritabanı dışındaki dosyalara yapılan ve geri alınamayan değişiklikler için (archive.forget)
+    def after_commit(self, func):
+        if not getattr(self._local, 'write_depth', 0):
+            raise RuntimeError("after_commit yalnızca bir yazma transaction'ı içinde kullanılabilir.")
+        self._local.after_commit.append(func)
+
+    # Yazıcı kilidi transaction açılmadan tutulur: uygulama yazmaları bekler, başka bir
+    # bağlantı dosyaya yazabilir (backup.restore) ya da o anın görüntüsünü alabilir (backup.snapshot)
+    @contextmanager
+    def writes_paused(self):
+        with self._write_lock:
+            yield
+
+    def table_exists(self, conn, name):
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (name,)).fetchone() is not None
+
+    def stats(self):
+        with self._lock:
+            result = dict(self._stats)
+        result['pool_size'] = self.size
+        result['idle'] = self._idle.qsize()
+        result['in_use'] = result['connections_created'] - result['idle']
+        result['writer_open'] = self._writer is not None
+        return result
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        if self._keeper is not None:
+            self._keeper.close()
+            self._keeper = None
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def open_pool(url=None):
+    url = DB_URL if url is None else url
+    if url.startswith(('postgres://', 'postgresql://')):
+        # Gerçek bir sunucuya karşı sürekli test edilmediği için bilinçli tercih ister
+        if not EXPERIMENTAL_POSTGRES:
+            raise ValueError("PostgreSQL arka ucu deneyseldir; kullanmak için OGRENCI_TAKIP_EXPERIMENTAL_POSTGRES=1 ayarlayın.")
+        import postgres
+        return postgres.PostgresPool(url)
+    return ConnectionPool(sqlite_path(url))
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = open_pool()
+                atexit.register(_pool.close)
+    return _pool
+
+
+def read():
+    return get_pool().read()
+
+
+def write(durable=False):
+    return get_pool().write(durable)
+
+
+def after_commit(func):
+    get_pool().after_commit(func)
+
+
+def pool_stats():
+    return get_pool().stats()
+
+
+# --- SORGU YARDIMCILARI ---
+
+def table_exists(conn, name):
+    return get_pool().table_exists(conn, name)
+
+
+# Süre okuma + fetch + DataFrame oluşturmayı kapsar; iki arka uçta da aynı yol
+# (pd.read_sql ile aynı: kolon adları imleçten, Decimal -> float)
+def query_df(sql, params=()):
+    with read() as conn, perf.query(sql, conn, params):
+        cursor = conn.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        return pd.DataFrame.from_records(cursor.fetchall(), columns=columns, coerce_float=True)
+
+
+def query_one(sql, params=()):
+    with read() as conn, perf.query(sql, conn, params):
+        return conn.execute(sql, params).fetchone()
+
+
+def query_all(sql, params=()):
+    with read() as conn, perf.query(sql, conn, params):
+        return conn.execute(sql, params).fetchall()
+
+
+def execute(sql, params=()):
+    with perf.query(sql), write() as conn:   # süreye commit de dahil
+        return conn.execute(sql, params)
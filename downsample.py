@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+
+# --- GRAFİK VERİSİ KÜÇÜLTME ---
+# Uzun çalışma geçmişlerinde tarayıcıya giden Plotly verisi sınırlandırılır:
+# günlük seri aralığa göre haftalık/aylık toplanır, yine de fazla nokta kalırsa
+# LTTB (Largest-Triangle-Three-Buckets) ile görsel şekli koruyarak seyreltilir.
+# Ünite grafiğinde en çok çalışılan N ünite gösterilir, kalanlar "Diğer" olur.
+
+MAX_POINTS = 400
+MAX_UNITS = 25
+
+RANGES = {"Son 3 Ay": 92, "Son 1 Yıl": 365, "Tümü": None}
+FREQUENCIES = {"Otomatik": None, "Günlük": 'D', "Haftalık": 'W', "Aylık": 'M'}
+FREQ_LABELS = {'D': "Günlük", 'W': "Haftalık", 'M': "Aylık"}
+
+SUM_COLUMNS = ['q_solved', 'q_correct', 'q_wrong', 'q_empty', 'duration']
+# Kayan oranlar ve üstel ortalama o güne kadarki durumdur: dönemin son değeri alınır
+LAST_COLUMNS = ['roll_7', 'roll_30', 'ema']
+
+
+def auto_freq(days):
+    if days <= 120:
+        return 'D'
+    if days <= 730:
+        return 'W'
+    return 'M'
+
+
+def resample_trend(daily, freq):
+    # Toplamlar dönem bazında toplanır, oran toplamlardan yeniden hesaplanır
+    if daily.empty or freq == 'D':
+        return daily
+    periods = daily['date'].dt.to_period(freq).dt.start_time
+    columns = {c: 'sum' for c in SUM_COLUMNS if c in daily}
+    columns.update({c: 'last' for c in LAST_COLUMNS if c in daily})
+    grp = daily.groupby(periods).agg(columns).reset_index()
+    solved = grp['q_solved'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # İlerleme serisi (progress.trend) net doğruyu taşır; ham günlük seride çözülen - yanlış - boş
+        correct = grp['q_correct'] if 'q_correct' in grp else solved - grp['q_wrong'] - grp['q_empty']
+        grp['daily_success'] = np.where(solved > 0, correct / solved * 100, 0.0)
+    return grp
+
+
+def lttb(x, y, threshold):
+    # Sıralı (x, y) serisinden görsel olarak en belirgin `threshold` noktanın indeksleri
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    selected = np.empty(threshold, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Sonraki kovanın ortalaması üçgenin üçüncü köşesi
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        areas = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        selected[i + 1] = a
+    return selected
+
+
+def trend_series(daily, range_days=None, freq=None, max_points=MAX_POINTS):
+    # Döner: (grafik verisi, kullanılan gruplama, ham nokta sayısı)
+    if range_days and not daily.empty:
+        daily = daily[daily['date'] > daily['date'].max() - pd.Timedelta(days=range_days)]
+    raw_points = len(daily)
+    if daily.empty:
+        return daily, 'D', raw_points
+    span = (daily['date'].max() - daily['date'].min()).days + 1
+    freq = freq or auto_freq(span)
+    series = resample_trend(daily, freq)
+    if len(series) > max_points:
+        x = series['date'].astype('int64').to_numpy()
+        series = series.iloc[lttb(x, series['daily_success'].to_numpy(), max_points)]
+    return series.reset_index(drop=True), freq, raw_points
+
+
+def top_units(unit_grp, n=MAX_UNITS):
+    # En çok soru çözülen n ünite; kalanlar tek "Diğer" çubuğunda toplanır
+    if len(unit_grp) <= n:
+        return unit_grp
+    ranked = unit_grp.sort_values('q_solved', ascending=False)
+    top, rest = ranked.iloc[:n], ranked.iloc[n:]
+    sums = rest[['q_solved', 'q_wrong', 'q_empty', 'duration', 'is_repeated']].sum()
+    solved = float(sums['q_solved'])
+    other = dict(sums)
+    other.update({'subject_name': "Diğer", 'unit_name': f"Diğer ({len(rest)} ünite)",
+                  'success_rate': (solved - sums['q_wrong'] - sums['q_empty']) / solved * 100 if solved > 0 else 0.0})
+    top = top.sort_values(['subject_name', 'unit_name'])
+    return pd.concat([top, pd.DataFrame([other])], ignore_index=True)
@@ -0,0 +1,85 @@
+import csv
+import io
+import os
+import tempfile
+
+import xlsxwriter
+
+import db
+import perf
+
+# --- RAPOR DIŞA AKTARMA ---
+# Büyük raporlar veritabanından parça parça okunur ve doğrudan geçici dosyaya
+# yazılır; bellekte aynı anda en fazla bir parça (CHUNK_SIZE satır) tutulur.
+# Streamlit indirme düğmesi veriyi bytes olarak istediği için sadece sonuç
+# dosyası (sıkıştırılmış xlsx) belleğe okunur.
+
+CHUNK_SIZE = int(os.environ.get('OGRENCI_TAKIP_EXPORT_CHUNK', '5000'))
+EXCEL_MAX_ROWS = 1048576
+
+
+def read_and_close(output):
+    output.seek(0)
+    data = output.read()
+    output.close()
+    return data
+
+
+def iter_chunks(sql, params=(), chunk_size=CHUNK_SIZE):
+    # sql: tek sorgu ya da aynı kolonları dönen (sql, params) dizisi (arşiv bölümleri, archive.queries);
+    # dizi aynı okuma bağlantısında sırayla tüketilir
+    sources = [(sql, params)] if isinstance(sql, str) else sql
+    header = False
+    with db.read() as conn:
+        for query, query_params in sources:
+            cursor = conn.execute(query, query_params)
+            if not header:
+                yield [col[0] for col in cursor.description]
+                header = True
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+
+def write_excel_sheet(workbook, sheet_name, sql, params=(), chunk_size=CHUNK_SIZE):
+    sheet = workbook.add_worksheet(sheet_name)
+    header_format = workbook.add_format({'bold': True})
+    chunks = iter_chunks(sql, params, chunk_size)
+    sheet.write_row(0, 0, next(chunks), header_format)
+    row_num = 1
+    for rows in chunks:
+        for row in rows:
+            # Excel satır sınırı aşılırsa yeni sayfaya devam edilir
+            if row_num >= EXCEL_MAX_ROWS:
+                sheet = workbook.add_worksheet(f"{sheet_name[:25]}_{len(workbook.worksheets()) + 1}")
+                row_num = 0
+            sheet.write_row(row_num, 0, row)
+            row_num += 1
+    return row_num
+
+
+@perf.timed()
+def query_to_excel(sql, params=(), sheet_name='Rapor', chunk_size=CHUNK_SIZE):
+    # constant_memory: her satır yazıldıktan sonra diske aktarılır
+    output = tempfile.TemporaryFile()
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    write_excel_sheet(workbook, sheet_name, sql, params, chunk_size)
+    workbook.close()
+    return read_and_close(output)
+
+
+@perf.timed()
+def query_to_csv(sql, params=(), chunk_size=CHUNK_SIZE):
+    output = tempfile.TemporaryFile()
+    # utf-8-sig: Excel'in Türkçe karakterleri doğru açması için
+    text = io.TextIOWrapper(output, encoding='utf-8-sig', newline='')
+    writer = csv.writer(text)
+    chunks = iter_chunks(sql, params, chunk_size)
+    writer.writerow(next(chunks))
+    for rows in chunks:
+        writer.writerows(rows)
+    text.flush()
+    text.detach()
+    return read_and_close(output)
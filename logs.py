@@ -0,0 +1,185 @@
+import json
+
+import pandas as pd
+
+import analysis_cache
+import db
+import perf
+import progress
+import write_queue
+
+# --- TOPLU KAYIT YAZMA VE İÇE AKTARMA ---
+# Çalışma/deneme kayıtları executemany ile tek transaction'da yazılır (tek commit,
+# tek fsync). Geçmiş kayıtlar CSV/Excel'den doğrulanarak aynı yoldan eklenir.
+# Formlardan gelen kayıtlar (save_*) arka plan yazma kuyruğundan geçer: eşzamanlı
+# kayıtlar grup halinde commit edilir, fonksiyon commit'ten sonra döner.
+
+STUDY_INSERT_SQL = """INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration, is_repeated)
+                      VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"""
+EXAM_INSERT_SQL = """INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration)
+                     VALUES (?, ?, ?, ?, ?, ?, ?)"""
+
+STUDY_COLUMNS = ['student_id', 'subject_id', 'unit_id', 'date', 'q_solved', 'q_wrong', 'q_empty', 'duration', 'is_repeated']
+EXAM_COLUMNS = ['student_id', 'subject_id', 'date', 'q_solved', 'q_wrong', 'q_empty', 'duration']
+
+IMPORT_CHUNK = 5000
+
+
+class ImportReport:
+    def __init__(self):
+        self.total = 0
+        self.valid = 0
+        self.inserted = 0
+        self.errors = []   # (satır no, açıklama)
+
+    @property
+    def rejected(self):
+        return len(self.errors)
+
+    def errors_df(self):
+        return pd.DataFrame(self.errors, columns=['satir', 'hata'])
+
+
+def _insert(conn, sql, rows):
+    conn.executemany(sql, rows)
+    if sql == STUDY_INSERT_SQL:
+        progress.apply(conn, rows)
+    for student_id in {row[0] for row in rows}:
+        analysis_cache.bump(conn, student_id)
+    return len(rows)
+
+
+def insert_study_logs(rows):
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return 0
+    with db.write() as conn:
+        return _insert(conn, STUDY_INSERT_SQL, rows)
+
+
+def insert_exam_logs(rows):
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return 0
+    with db.write() as conn:
+        return _insert(conn, EXAM_INSERT_SQL, rows)
+
+
+def _save(sql, rows, timeout):
+    rows = [tuple(row) for row in rows]
+    if not rows:
+        return 0
+    future = write_queue.get_queue().submit(_insert, sql, rows, weight=len(rows))
+    return future.result(timeout=timeout)
+
+
+# WriteQueueFull: kuyruk dolu (kayıt yazılmadı); TimeoutError: kayıt hâlâ sırada
+def save_study_logs(rows, timeout=write_queue.ACK_TIMEOUT):
+    return _save(STUDY_INSERT_SQL, rows, timeout)
+
+
+def save_exam_logs(rows, timeout=write_queue.ACK_TIMEOUT):
+    return _save(EXAM_INSERT_SQL, rows, timeout)
+
+
+# --- DOSYADAN İÇE AKTARMA ---
+# Beklenen kolonlar (çalışma): unique_id, subject_name, unit_name, date, q_solved,
+# q_wrong, q_empty, duration, is_repeated. Deneme dosyasında unit_name ve is_repeated yoktur.
+# student_id verilirse unique_id kolonu gerekmez, tüm satırlar o öğrenciye yazılır.
+
+def read_table(file, name=None):
+    name = (name or getattr(file, 'name', '') or '').lower()
+    if name.endswith(('.xlsx', '.xls')):
+        return pd.read_excel(file, dtype=str)
+    return pd.read_csv(file, dtype=str, sep=None, engine='python', encoding='utf-8-sig')
+
+
+def _reject(df, report, mask, message):
+    for line in df.index[mask]:
+        report.errors.append((int(line) + 2, message))   # başlık satırı + 1 tabanlı
+    return df[~mask]
+
+
+def validate_logs(df, kind, student_id=None, report=None):
+    report = report or ImportReport()
+    report.total += len(df)
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    required = ['subject_name', 'date', 'q_solved'] + (['unit_name'] if kind == 'study' else [])
+    if student_id is None:
+        required.append('unique_id')
+    missing = [col for col in required if col not in df.columns]
+    if missing:
+        report.errors.append((1, f"Eksik kolon(lar): {', '.join(missing)}"))
+        return pd.DataFrame(columns=STUDY_COLUMNS if kind == 'study' else EXAM_COLUMNS), report
+
+    # Sayısal alanlar
+    numeric = ['q_solved', 'q_wrong', 'q_empty', 'duration'] + (['is_repeated'] if kind == 'study' else [])
+    for col in numeric:
+        if col not in df.columns:
+            df[col] = '0'
+        values = pd.to_numeric(df[col].fillna('0').str.strip().replace('', '0'), errors='coerce')
+        df = _reject(df.assign(**{col: values}), report, values.isna() | (values < 0) | (values % 1 != 0),
+                     f"{col} negatif olmayan tam sayı olmalı")
+        df[col] = df[col].astype('int64')
+    df = _reject(df, report, (df['q_wrong'] + df['q_empty']) > df['q_solved'], "Yanlış + boş, çözülen soru sayısını aşamaz")
+    if kind == 'study':
+        df['is_repeated'] = (df['is_repeated'] > 0).astype('int64')
+
+    # Önce ISO (2024-03-05), olmazsa Türkiye biçimi (05.03.2024)
+    raw_dates = df['date'].str.strip()
+    dates = pd.to_datetime(raw_dates, errors='coerce', format='ISO8601')
+    dates = dates.fillna(pd.to_datetime(raw_dates, errors='coerce', format='mixed', dayfirst=True))
+    df = _reject(df.assign(date=dates), report, dates.isna(), "Geçersiz tarih")
+    df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+
+    # İsimlerden kimliklere (öğrenci başına tek sorgu değil, toplu eşleme)
+    if student_id is None:
+        codes = df['unique_id'].str.strip()
+        students = dict(db.query_all("SELECT unique_id, id FROM users WHERE role='Öğrenci'"))
+        df = df.assign(student_id=codes.map(students))
+        df = _reject(df, report, df['student_id'].isna(), "Öğrenci kodu bulunamadı")
+    else:
+        df = df.assign(student_id=int(student_id))
+    df['student_id'] = df['student_id'].astype('int64')
+    df['subject_name'] = df['subject_name'].str.strip()
+
+    student_ids = json.dumps(sorted(int(x) for x in df['student_id'].unique()))
+    # Sadece öğrencinin aldığı dersler/üniteler kabul edilir
+    subjects = db.query_df("""SELECT ss.subject_id, ss.student_id, s.subject_name FROM student_subjects ss
+                              JOIN subjects s ON ss.subject_id = s.id
+                              WHERE ss.student_id IN (SELECT CAST(value AS INTEGER) FROM json_each(?))""", (student_ids,))
+    df = df.merge(subjects, on=['student_id', 'subject_name'], how='left').set_axis(df.index)
+    df = _reject(df, report, df['subject_id'].isna(), "Ders bulunamadı")
+    df['subject_id'] = df['subject_id'].astype('int64')
+
+    if kind == 'study':
+        df['unit_name'] = df['unit_name'].str.strip()
+        units = db.query_df("""SELECT su.unit_id, su.student_id, su.subject_id, u.unit_name FROM student_units su
+                               JOIN units u ON su.unit_id = u.id
+                               WHERE su.student_id IN (SELECT CAST(value AS INTEGER) FROM json_each(?))""", (student_ids,))
+        df = df.merge(units, on=['student_id', 'subject_id', 'unit_name'], how='left').set_axis(df.index)
+        df = _reject(df, report, df['unit_id'].isna(), "Ünite bulunamadı")
+        df['unit_id'] = df['unit_id'].astype('int64')
+        return df[STUDY_COLUMNS], report
+    return df[EXAM_COLUMNS], report
+
+
+@perf.timed()
+def import_logs(file, kind, student_id=None, dry_run=False, name=None):
+    valid, report = validate_logs(read_table(file, name), kind, student_id)
+    report.valid = len(valid)
+    if dry_run or valid.empty:
+        return report
+    sql = STUDY_INSERT_SQL if kind == 'study' else EXAM_INSERT_SQL
+    # object: numpy tamsayıları sqlite3'e düz Python int olarak gider
+    rows = list(valid.astype(object).itertuples(index=False, name=None))
+    # Tüm dosya tek transaction: ya hepsi yazılır ya hiçbiri
+    with db.write() as conn:
+        for start in range(0, len(rows), IMPORT_CHUNK):
+            conn.executemany(sql, rows[start:start + IMPORT_CHUNK])
+        if kind == 'study':
+            progress.apply(conn, rows)
+        for sid in valid['student_id'].unique():
+            analysis_cache.bump(conn, int(sid))
+    report.inserted = len(rows)
+    return report
@@ -1,116 +1,37 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
-import hashlib
-import random
-import string
-from datetime import datetime
+import os
+import tempfile
+import time
+import zipfile
+from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
-import io
+import db
+import migrations
+import analysis_cache
+import analysis
+import export
+import reports
+import logs
+import auth
+import onboarding
+import curriculum
+import cohort
+import roster
+import downsample
+import perf
+import write_queue
+import paging
+import search
+import progress
+import archive
+import backup
+from concurrent.futures import TimeoutError as WriteTimeout
 
 # --- SAYFA AYARLARI ---
 st.set_page_config(page_title="Öğrenci Takip Sistemi", layout="wide", page_icon="📚")
 
-# --- VERİTABANI BAĞLANTISI VE KURULUMU ---
-def get_db_connection():
-    conn = sqlite3.connect('ogrenci_takip.db', check_same_thread=False)
-    return conn
-
-def init_db():
-    conn = get_db_connection()
-    c = conn.cursor()
-    
-    # Kullanıcılar Tablosu
-    c.execute('''CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    name TEXT,
-                    role TEXT,
-                    email TEXT UNIQUE,
-                    phone TEXT,
-                    password TEXT,
-                    unique_id TEXT UNIQUE
-                )''')
-    
-    # İlişkiler (Öğretmen-Öğrenci, Veli-Öğrenci)
-    c.execute('''CREATE TABLE IF NOT EXISTS relationships (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    supervisor_id INTEGER, -- Öğretmen veya Veli ID
-                    student_id INTEGER,    -- Öğrenci ID
-                    type TEXT              -- 'ogretmen' veya 'veli'
-                )''')
-
-    # Dersler
-    c.execute('''CREATE TABLE IF NOT EXISTS subjects (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER,
-                    subject_name TEXT
-                )''')
-
-    # Üniteler
-    c.execute('''CREATE TABLE IF NOT EXISTS units (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    subject_id INTEGER,
-                    unit_name TEXT,
-                    is_completed INTEGER DEFAULT 0
-                )''')
-
-    # Günlük Çalışma Kayıtları
-    c.execute('''CREATE TABLE IF NOT EXISTS study_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER,
-                    subject_id INTEGER,
-                    unit_id INTEGER,
-                    date TEXT,
-                    q_solved INTEGER,
-                    q_wrong INTEGER,
-                    q_empty INTEGER,
-                    duration INTEGER,
-                    is_repeated INTEGER DEFAULT 0
-                )''')
-
-    # Deneme Sınavı Kayıtları
-    c.execute('''CREATE TABLE IF NOT EXISTS exam_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    student_id INTEGER,
-                    subject_id INTEGER, -- Ders bazlı deneme
-                    date TEXT,
-                    q_solved INTEGER,
-                    q_wrong INTEGER,
-                    q_empty INTEGER,
-                    duration INTEGER
-                )''')
-    
-    # Admin02 Varsayılan Kullanıcı
-    c.execute("SELECT * FROM users WHERE email='admin02'")
-    if not c.fetchone():
-        # Şifre: admin02
-        hashed_pw = hashlib.sha256("admin02".encode()).hexdigest()
-        c.execute("INSERT INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
-                  ("Sistem Yöneticisi", "Yönetici", "admin02", "000", hashed_pw, "ADMIN1"))
-        
-    conn.commit()
-    conn.close()
-
-# --- YARDIMCI FONKSİYONLAR ---
-
-def generate_unique_id():
-    return ''.join(random.choices(string.ascii_uppercase + string.digits, k=6))
-
-def hash_password(password):
-    return hashlib.sha256(password.encode()).hexdigest()
-
-def check_password(password, hashed):
-    return hash_password(password) == hashed
-
-def export_to_excel(df):
-    output = io.BytesIO()
-    writer = pd.ExcelWriter(output, engine='xlsxwriter')
-    df.to_excel(writer, index=False, sheet_name='Rapor')
-    writer.close()
-    processed_data = output.getvalue()
-    return processed_data
-
 # --- OTURUM YÖNETİMİ ---
 
 def login_page():
@@ -121,12 +42,11 @@ def login_page():
     col1, col2 = st.columns(2)
     with col1:
         if st.button("Giriş Yap"):
-            conn = get_db_connection()
-            c = conn.cursor()
-            hashed_pw = hash_password(password)
-            c.execute("SELECT * FROM users WHERE email=? AND password=?", (email, hashed_pw))
-            user = c.fetchone()
-            conn.close()
+            try:
+                user = auth.authenticate(email, password, st.context.ip_address)
+            except (auth.LoginThrottled, auth.KdfBusy) as e:
+                st.error(str(e))
+                return
             
             if user:
                 st.session_state['user_id'] = user[0]
@@ -163,29 +83,28 @@ def register_page():
             st.error("Şifreler uyuşmuyor!")
             return
         
-        conn = get_db_connection()
-        c = conn.cursor()
-        
-        # Email kontrolü
-        c.execute("SELECT * FROM users WHERE email=?", (email,))
-        if c.fetchone():
-            st.error("Bu E-Mail adresi zaten kullanılıyor.")
-            conn.close()
-            return
-        
-        unique_id = generate_unique_id()
-        # Unique ID çakışma kontrolü (basit döngü)
-        while True:
-            c.execute("SELECT * FROM users WHERE unique_id=?", (unique_id,))
-            if not c.fetchone():
-                break
-            unique_id = generate_unique_id()
+        # KDF yazıcı kilidi dışında hesaplanır
+        hashed_pw = auth.hash_password(p1)
+        with db.write() as conn:
+            c = conn.cursor()
+            
+            # Email kontrolü
+            c.execute("SELECT * FROM users WHERE email=?", (email,))
+            if c.fetchone():
+                st.error("Bu E-Mail adresi zaten kullanılıyor.")
+                return
             
-        hashed_pw = hash_password(p1)
-        c.execute("INSERT INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
-                  (name, role, email, phone, hashed_pw, unique_id))
-        conn.commit()
-        conn.close()
+            unique_id = auth.generate_unique_id()
+            # Unique ID çakışma kontrolü (basit döngü)
+            while True:
+                c.execute("SELECT * FROM users WHERE unique_id=?", (unique_id,))
+                if not c.fetchone():
+                    break
+                unique_id = auth.generate_unique_id()
+                
+            c.execute("INSERT INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
+                      (name, role, email, phone, hashed_pw, unique_id))
+        roster.bump()
         st.success("Üyelik başarıyla oluşturuldu! Giriş ekranına yönlendiriliyorsunuz.")
         st.session_state['page'] = 'login'
         st.rerun()
@@ -205,20 +124,14 @@ def forgot_password_page():
             st.error("Şifreler uyuşmuyor.")
             return
         
-        conn = get_db_connection()
-        c = conn.cursor()
-        c.execute("SELECT * FROM users WHERE email=?", (email,))
-        user = c.fetchone()
+        hashed_pw = auth.hash_password(new_p1)
+        updated = db.execute("UPDATE users SET password=? WHERE email=?", (hashed_pw, email)).rowcount
         
-        if user:
-            hashed_pw = hash_password(new_p1)
-            c.execute("UPDATE users SET password=? WHERE email=?", (hashed_pw, email))
-            conn.commit()
+        if updated:
             st.success("Şifreniz güncellendi. Giriş yapabilirsiniz.")
             # Normalde burada e-mail simülasyonu yapılır.
         else:
             st.error("Bu e-mail adresi sistemde kayıtlı değil.")
-        conn.close()
         
     if st.button("Geri Dön"):
         st.session_state['page'] = 'login'
@@ -226,108 +139,240 @@ def forgot_password_page():
 
 # --- ANALİZ VE RAPOR FONKSİYONLARI ---
 
-def get_student_analysis(student_id):
-    conn = get_db_connection()
-    
-    # Çalışma Verileri
-    df_study = pd.read_sql(f"""
-        SELECT s.subject_name, u.unit_name, l.date, l.q_solved, l.q_wrong, l.q_empty, l.duration, l.is_repeated
-        FROM study_logs l
-        JOIN units u ON l.unit_id = u.id
-        JOIN subjects s ON l.subject_id = s.id
-        WHERE l.student_id = {student_id}
-    """, conn)
-    
-    # Deneme Verileri
-    df_exam = pd.read_sql(f"""
-        SELECT s.subject_name, e.date, e.q_solved, e.q_wrong, e.q_empty, e.duration
-        FROM exam_logs e
-        JOIN subjects s ON e.subject_id = s.id
-        WHERE e.student_id = {student_id}
-    """, conn)
-    
-    conn.close()
-    return df_study, df_exam
+def get_student_analysis(student_id, start=None, end=None):
+    # Ham kayıtlar; sadece Excel raporu indirilirken çekilir. Arşiv bölümleri yalnızca
+    # aralık onlara değiyorsa okunur (archive.queries)
+    return analysis.study_rows(student_id, start, end), analysis.exam_rows(student_id, start, end)
+
+def report_start(key):
+    # Rapor aralığı; "Tümü" geçmiş dönem arşivini de okur
+    label = st.segmented_control("Rapor Aralığı", list(downsample.RANGES), default="Tümü", key=key) or "Tümü"
+    days = downsample.RANGES[label]
+    return (datetime.now().date() - timedelta(days=days)).isoformat() if days else None
+
+# --- ANALİZ PANELİ ---
+# Her panel kendi verisini ve grafiğini ayrı önbellek anahtarıyla üretir ve
+# st.fragment içinde çizilir: sadece seçili bölümün panelleri çalışır, panel
+# içindeki bir etkileşim sadece o paneli yeniden çalıştırır.
+
+def build_metrics_panel(student_id):
+    totals = analysis.study_totals(student_id)
+    if totals['has_data']:
+        totals['forecast'] = progress.forecast(student_id)
+    return totals
+
+def build_pie_panel(student_id):
+    return {'fig': px.pie(analysis.subject_totals(student_id), values='q_solved', names='subject_name', title='Ders Bazlı Çözülen Soru')}
+
+def build_unit_panel(student_id):
+    # Çok üniteli öğrencilerde en çok çalışılan üniteler + "Diğer" çubuğu
+    unit_grp = analysis.unit_success(student_id)
+    shown = downsample.top_units(unit_grp)
+    title = 'Ünite Başarı Oranları (%)'
+    if len(shown) < len(unit_grp):
+        title += f' — en çok çalışılan {downsample.MAX_UNITS} ünite'
+    return {'fig': px.bar(shown, x='unit_name', y='success_rate', color='subject_name', title=title)}
+
+TREND_LINES = {'daily_success': 'Dönem başarısı', 'roll_7': '7 günlük', 'roll_30': '30 günlük', 'ema': 'Üstel ortalama'}
+
+def build_trend_panel(student_id, range_days=None, freq=None):
+    # Kayan oranlar ve üstel ortalama saklanan artımlı durumdan okunur (progress.py);
+    # uzun geçmişlerde grafik verisi aralığa göre toplanır ve nokta sayısı sınırlanır
+    series, freq, raw_points = downsample.trend_series(progress.trend(student_id, range_days), range_days, freq)
+    label = downsample.FREQ_LABELS[freq]
+    fig = px.line(series.rename(columns=TREND_LINES), x='date', y=list(TREND_LINES.values()),
+                  title=f'{label} Başarı Grafiği', labels={'value': 'Başarı (%)', 'variable': ''})
+    return {'fig': fig, 'note': f"{raw_points} çalışma günü → {len(series)} nokta ({label})"}
+
+def build_mastery_panel(student_id):
+    # Yakın tarihli çalışmalar ağırlıklı; en çok çalışılan üniteler, en zayıftan güçlüye
+    mastery = progress.unit_mastery(student_id)
+    shown = mastery.nlargest(downsample.MAX_UNITS, 'evidence').sort_values('mastery')
+    title = 'Ünite Hakimiyet Tahmini (%)'
+    if len(shown) < len(mastery):
+        title += f' — en çok çalışılan {downsample.MAX_UNITS} ünite'
+    return {'fig': px.bar(shown, x='unit_name', y='mastery', color='subject_name', title=title,
+                          hover_data={'last_studied': True, 'evidence': ':.0f'},
+                          labels={'mastery': 'Hakimiyet (%)', 'last_studied': 'Son çalışma', 'evidence': 'Ağırlıklı soru'})}
+
+def build_exam_panel(student_id):
+    exam_grp = analysis.exam_nets(student_id)
+    if exam_grp.empty:
+        return {}
+    return {'exam_grp': exam_grp,
+            'fig': px.bar(exam_grp, x='subject_name', y=['q_solved', 'q_wrong', 'q_empty'], 
+                          title="Ders Bazlı Deneme Analizi", barmode='group')}
+
+def run_panel(name, student_id, build, render, kind=None):
+    # Veri (önbellek/hesap) ve çizim süreleri ayrı ölçülür; sadece fragment
+    # yeniden çalıştığında perf kaydı panel adıyla ayrı tutulur
+    with perf.rerun(f"Panel: {name}"):
+        computed = []
+        start = time.perf_counter()
+        data = analysis_cache.get_or_compute(kind or name, student_id, lambda: computed.append(True) or build(student_id))
+        data_ms = (time.perf_counter() - start) * 1000
+        start = time.perf_counter()
+        render(data)
+        render_ms = (time.perf_counter() - start) * 1000
+        perf.record_section(f"{name} (veri)", data_ms / 1000)
+        perf.record_section(f"{name} (çizim)", render_ms / 1000)
+    st.session_state.setdefault('panel_timings', {})[name] = (data_ms, render_ms, bool(computed))
+    if st.session_state.get('show_panel_timings'):
+        st.caption(f"⏱ {name}: veri {data_ms:.1f} ms ({'hesaplandı' if computed else 'önbellek'}) · çizim {render_ms:.1f} ms")
+    return data
+
+@st.fragment
+def metrics_panel(student_id):
+    def render(totals):
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Toplam Soru", totals['total_q'])
+        col2.metric("Toplam Yanlış", totals['total_wrong'])
+        col3.metric("Başarı Oranı", f"%{totals['success_rate']:.2f}")
+        col4.metric("%100 Hedefine Kalan", f"%{totals['gap_to_100']:.2f}")
+        forecast = totals.get('forecast')
+        if forecast and forecast['current'] is None:
+            st.caption(f"📈 {forecast['reason']}")
+        elif forecast:
+            outcome = f"tahmini %100 tarihi: {forecast['eta']:%d.%m.%Y}" if forecast['eta'] else forecast['reason']
+            st.caption(f"📈 Son 30 günlük başarı %{forecast['current']:.1f}, eğilim haftada {forecast['slope'] * 7:+.2f} puan → {outcome}")
+    run_panel('Metrikler', student_id, build_metrics_panel, render)
+
+@st.fragment
+def chart_panel(name, student_id, title, build):
+    st.subheader(title)
+    run_panel(name, student_id, build, lambda data: st.plotly_chart(data['fig'], use_container_width=True))
+
+@st.fragment
+def trend_panel(student_id):
+    st.subheader("Zaman İçinde Başarı Değişimi")
+    col1, col2 = st.columns(2)
+    range_label = col1.segmented_control("Aralık", list(downsample.RANGES), default="Tümü", key="trend_range") or "Tümü"
+    freq_label = col2.segmented_control("Gruplama", list(downsample.FREQUENCIES), default="Otomatik", key="trend_freq") or "Otomatik"
+    range_days, freq = downsample.RANGES[range_label], downsample.FREQUENCIES[freq_label]
+
+    def render(data):
+        st.plotly_chart(data['fig'], use_container_width=True)
+        st.caption(data['note'])
+    # Her aralık/gruplama seçimi ayrı önbellek anahtarında tutulur
+    run_panel('Zaman Grafiği', student_id, lambda sid: build_trend_panel(sid, range_days, freq), render,
+              kind=f"Zaman Grafiği|{range_label}|{freq_label}")
+
+@st.fragment
+def exam_panel(student_id):
+    def render(data):
+        if not data:
+            st.info("Henüz deneme sınavı verisi girilmemiş.")
+            return
+        st.subheader("Deneme Sınavı İstatistikleri")
+        st.dataframe(data['exam_grp'])
+        st.plotly_chart(data['fig'], use_container_width=True)
+    data = run_panel('Deneme', student_id, build_exam_panel, render)
+    if data:
+        start = report_start("exam_report_range")
+        col1, col2 = st.columns(2)
+        col1.download_button(label="📥 Deneme Sınavı Raporunu İndir (Excel)", 
+                             data=lambda: export.query_to_excel(analysis.exam_row_queries(student_id, start)), file_name='deneme_sinavi_raporu.xlsx')
+        col2.download_button(label="📥 Deneme Sınavı Raporunu İndir (CSV)", 
+                             data=lambda: export.query_to_csv(analysis.exam_row_queries(student_id, start)), file_name='deneme_sinavi_raporu.csv')
 
-def display_analysis_dashboard(df_study, df_exam):
+def display_analysis_dashboard(student_id):
     st.write("### 📊 Genel Analiz Paneli")
+    st.sidebar.toggle("⏱ Panel Süreleri", key="show_panel_timings")
+    st.session_state['panel_timings'] = {}
     
-    tab1, tab2 = st.tabs(["Ders/Ünite Analizi", "Deneme Sınavı Analizi"])
+    # st.tabs tüm sekmeleri çalıştırır; seçici ile sadece görünen bölüm çalışır
+    section = st.segmented_control("Bölüm", ["Ders/Ünite Analizi", "Deneme Sınavı Analizi"],
+                                   default="Ders/Ünite Analizi", key="dashboard_section", label_visibility="collapsed")
     
-    with tab1:
-        if df_study.empty:
+    if section == "Deneme Sınavı Analizi":
+        exam_panel(student_id)
+    else:
+        if not analysis_cache.get_or_compute('Metrikler', student_id, lambda: build_metrics_panel(student_id))['has_data']:
             st.info("Henüz çalışma verisi girilmemiş.")
         else:
-            # Temel Metrikler
-            total_q = df_study['q_solved'].sum()
-            total_wrong = df_study['q_wrong'].sum()
-            total_empty = df_study['q_empty'].sum()
-            if total_q > 0:
-                success_rate = ((total_q - total_wrong - total_empty) / total_q) * 100
-                gap_to_100 = 100 - success_rate
-            else:
-                success_rate = 0
-                gap_to_100 = 100
-            
-            col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Toplam Soru", total_q)
-            col2.metric("Toplam Yanlış", total_wrong)
-            col3.metric("Başarı Oranı", f"%{success_rate:.2f}")
-            col4.metric("%100 Hedefine Kalan", f"%{gap_to_100:.2f}")
-            
-            # Grafikler
-            st.subheader("Derslere Göre Soru Dağılımı")
-            fig_pie = px.pie(df_study, values='q_solved', names='subject_name', title='Ders Bazlı Çözülen Soru')
-            st.plotly_chart(fig_pie, use_container_width=True)
-            
-            st.subheader("Ünite Bazlı Başarı Analizi")
-            # Ünite bazlı gruplama
-            unit_grp = df_study.groupby(['subject_name', 'unit_name']).sum().reset_index()
-            unit_grp['success_rate'] = ((unit_grp['q_solved'] - unit_grp['q_wrong'] - unit_grp['q_empty']) / unit_grp['q_solved'] * 100).fillna(0)
-            
-            fig_bar = px.bar(unit_grp, x='unit_name', y='success_rate', color='subject_name', title='Ünite Başarı Oranları (%)')
-            st.plotly_chart(fig_bar, use_container_width=True)
-            
-            # Tarihsel Gelişim (Trend)
-            st.subheader("Zaman İçinde Başarı Değişimi")
-            df_study['date'] = pd.to_datetime(df_study['date'])
-            daily_grp = df_study.groupby('date').sum().reset_index()
-            daily_grp['daily_success'] = ((daily_grp['q_solved'] - daily_grp['q_wrong']) / daily_grp['q_solved'] * 100).fillna(0)
-            fig_line = px.line(daily_grp, x='date', y='daily_success', title='Günlük Başarı Grafiği')
-            st.plotly_chart(fig_line, use_container_width=True)
-            
-            # Excel İndir
-            excel_file = export_to_excel(df_study)
-            st.download_button(label="📥 Ünite Çalışma Raporunu İndir (Excel)", 
-                               data=excel_file, file_name='unite_calisma_raporu.xlsx')
-
-    with tab2:
-        if df_exam.empty:
-            st.info("Henüz deneme sınavı verisi girilmemiş.")
-        else:
-            st.subheader("Deneme Sınavı İstatistikleri")
-            exam_grp = df_exam.groupby('subject_name').sum().reset_index()
-            exam_grp['net'] = exam_grp['q_solved'] - exam_grp['q_wrong'] - (exam_grp['q_wrong'] / 4) # Klasik net hesabı (opsiyonel)
+            metrics_panel(student_id)
+            chart_panel('Ders Dağılımı', student_id, "Derslere Göre Soru Dağılımı", build_pie_panel)
+            chart_panel('Ünite Başarısı', student_id, "Ünite Bazlı Başarı Analizi", build_unit_panel)
+            chart_panel('Ünite Hakimiyeti', student_id, "Ünite Hakimiyeti (Yakın Çalışmalar Ağırlıklı)", build_mastery_panel)
+            trend_panel(student_id)
             
-            st.dataframe(exam_grp)
-            
-            fig_exam = px.bar(exam_grp, x='subject_name', y=['q_solved', 'q_wrong', 'q_empty'], 
-                              title="Ders Bazlı Deneme Analizi", barmode='group')
-            st.plotly_chart(fig_exam, use_container_width=True)
-
-            excel_exam = export_to_excel(df_exam)
-            st.download_button(label="📥 Deneme Sınavı Raporunu İndir (Excel)", 
-                               data=excel_exam, file_name='deneme_sinavi_raporu.xlsx')
+            # Rapor İndir (tıklandığında veritabanından parça parça üretilir)
+            start = report_start("study_report_range")
+            col1, col2 = st.columns(2)
+            col1.download_button(label="📥 Ünite Çalışma Raporunu İndir (Excel)", 
+                                 data=lambda: export.query_to_excel(analysis.study_row_queries(student_id, start)), file_name='unite_calisma_raporu.xlsx')
+            col2.download_button(label="📥 Ünite Çalışma Raporunu İndir (CSV)", 
+                                 data=lambda: export.query_to_csv(analysis.study_row_queries(student_id, start)), file_name='unite_calisma_raporu.csv')
+    
+    if st.session_state.get('show_panel_timings') and st.session_state.get('panel_timings'):
+        timings = pd.DataFrame([(name, data_ms, render_ms, 'hesaplandı' if computed else 'önbellek')
+                                for name, (data_ms, render_ms, computed) in st.session_state['panel_timings'].items()],
+                               columns=['Panel', 'Veri (ms)', 'Çizim (ms)', 'Kaynak'])
+        st.sidebar.dataframe(timings, hide_index=True)
+
+def log_import_section(kind, student_id=None):
+    title = "Geçmiş Çalışma Kayıtlarını İçe Aktar" if kind == 'study' else "Geçmiş Deneme Kayıtlarını İçe Aktar"
+    with st.expander(f"📤 {title} (CSV/Excel)"):
+        columns = "subject_name, unit_name, date, q_solved, q_wrong, q_empty, duration, is_repeated" if kind == 'study' \
+            else "subject_name, date, q_solved, q_wrong, q_empty, duration"
+        if student_id is None:
+            columns = "unique_id, " + columns
+        st.caption(f"Kolonlar: {columns}")
+        uploaded = st.file_uploader("Dosya Seç", type=['csv', 'xlsx'], key=f"import_{kind}")
+        dry_run = st.checkbox("Sadece kontrol et (kaydetme)", key=f"import_dry_{kind}")
+        if uploaded is not None and st.button("İçe Aktar", key=f"import_btn_{kind}"):
+            report = logs.import_logs(uploaded, kind, student_id, dry_run=dry_run, name=uploaded.name)
+            st.info(f"Toplam: {report.total} | Geçerli: {report.valid} | Eklenen: {report.inserted} | Hatalı: {report.rejected}")
+            if report.errors:
+                st.dataframe(report.errors_df())
 
 # --- KULLANICI ARAYÜZLERİ ---
 
+# Sayfalı liste: fetch(after, search, role) -> paging.Page. Her sayfanın başlangıç
+# anahtarı oturumda yığın olarak tutulur; arama/rol değişince ilk sayfaya dönülür
+def paged_browser(key, fetch, search=True, roles=None):
+    text, role = None, None
+    if search or roles:
+        col1, col2 = st.columns([3, 1])
+        if search:
+            text = col1.text_input("Ara (ad veya e-posta başı, ya da 6 haneli ID)", key=f"{key}_search").strip() or None
+        if roles:
+            role = col2.selectbox("Rol", ["Tümü"] + roles, key=f"{key}_role")
+            role = None if role == "Tümü" else role
+    state = st.session_state.setdefault(f"{key}_pages", {'filters': None, 'keys': [None]})
+    if state['filters'] != (text, role):
+        state['filters'], state['keys'] = (text, role), [None]
+
+    page = fetch(state['keys'][-1], text, role)
+    if page.empty:
+        st.info("Kayıt bulunamadı.")
+    else:
+        st.dataframe(page.df, hide_index=True)
+    col1, col2, col3 = st.columns([1, 1, 4])
+    if col1.button("◀ Önceki", key=f"{key}_prev", disabled=len(state['keys']) == 1):
+        state['keys'].pop()
+        st.rerun()
+    if col2.button("Sonraki ▶", key=f"{key}_next", disabled=not page.has_next):
+        state['keys'].append(page.next_key)
+        st.rerun()
+    col3.caption(f"Sayfa {len(state['keys'])} · sayfa başına {paging.PAGE_SIZE} kayıt")
+    return page
+
+# Kuyruk doluysa kayıt alınmaz; onay süresi aşılırsa kayıt sırada kalır ve birazdan yazılır
+def save_logs(save, rows):
+    try:
+        return save(rows)
+    except write_queue.WriteQueueFull as e:
+        st.error(str(e))
+    except WriteTimeout:
+        st.warning("Kaydınız sırada, birkaç saniye içinde listede görünecek.")
+    return None
+
 def student_interface():
     st.sidebar.title(f"Öğrenci: {st.session_state['name']}")
     st.sidebar.info(f"ÖĞRENCİ ID: **{st.session_state['unique_id']}**")
     
     menu = st.sidebar.radio("Menü", ["Öğrenci Bilgisi", "Ders ve Ünite Girişi", "Ünite Takip", "Günlük Giriş", "Deneme Sınavı", "Çalışma Takibi", "Çalışma Analizi"])
-    conn = get_db_connection()
-    c = conn.cursor()
     student_id = st.session_state['user_id']
     
     if menu == "Öğrenci Bilgisi":
@@ -336,29 +381,34 @@ def student_interface():
         st.subheader("Öğretmenini Ekle")
         teacher_code = st.text_input("Öğretmen ID'si (6 Haneli)")
         if st.button("Öğretmeni Kaydet"):
-            c.execute("SELECT id FROM users WHERE unique_id=? AND role='Öğretmen'", (teacher_code,))
-            res = c.fetchone()
-            if res:
-                # Daha önce ekli mi?
-                c.execute("SELECT * FROM relationships WHERE student_id=? AND supervisor_id=?", (student_id, res[0]))
-                if not c.fetchone():
-                    c.execute("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'ogretmen')", (res[0], student_id))
-                    conn.commit()
-                    st.success("Öğretmen başarıyla eklendi.")
+            with db.write() as conn:
+                c = conn.cursor()
+                c.execute("SELECT id FROM users WHERE unique_id=? AND role='Öğretmen'", (teacher_code,))
+                res = c.fetchone()
+                if res:
+                    # Daha önce ekli mi?
+                    c.execute("SELECT * FROM relationships WHERE student_id=? AND supervisor_id=?", (student_id, res[0]))
+                    if not c.fetchone():
+                        c.execute("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'ogretmen')", (res[0], student_id))
+                        roster.bump()
+                        st.success("Öğretmen başarıyla eklendi.")
+                    else:
+                        st.warning("Bu öğretmen zaten ekli.")
                 else:
-                    st.warning("Bu öğretmen zaten ekli.")
-            else:
-                st.error("Geçersiz Öğretmen ID")
+                    st.error("Geçersiz Öğretmen ID")
         
         # Bilgileri Sil
         st.markdown("---")
-        if st.button("TÜM BİLGİLERİMİ SİL (DEMO TEMİZLE)", type="primary"):
-            c.execute("DELETE FROM study_logs WHERE student_id=?", (student_id,))
-            c.execute("DELETE FROM exam_logs WHERE student_id=?", (student_id,))
-            c.execute("DELETE FROM units WHERE subject_id IN (SELECT id FROM subjects WHERE student_id=?)", (student_id,))
-            c.execute("DELETE FROM subjects WHERE student_id=?", (student_id,))
-            conn.commit()
-            st.warning("Tüm verileriniz silindi! Geri getirilemez.")
+        if st.button("TÜM BİLGİLERİMİ SİL (DEMO TEMİZLE)", type="primary") and \
+                snapshot_before(f"{st.session_state['name']} ({student_id}) verilerini silmeden önce"):
+            with db.write() as conn:
+                conn.execute("DELETE FROM study_logs WHERE student_id=?", (student_id,))
+                conn.execute("DELETE FROM exam_logs WHERE student_id=?", (student_id,))
+                curriculum.clear_student(conn, student_id)
+                archive.forget(conn, student_id)
+                progress.invalidate(conn, student_id)
+                analysis_cache.bump(conn, student_id)
+            st.warning("Tüm verileriniz silindi!" + ("" if backup.supported() else " Geri getirilemez."))
 
     elif menu == "Ders ve Ünite Girişi":
         st.title("Ders ve Ünite Yönetimi")
@@ -369,22 +419,21 @@ def student_interface():
             new_subject = st.text_input("Ders Adı Giriniz")
             if st.button("Dersi Ekle"):
                 if new_subject:
-                    c.execute("INSERT INTO subjects (student_id, subject_name) VALUES (?, ?)", (student_id, new_subject))
-                    conn.commit()
+                    curriculum.enroll_subject(student_id, new_subject)
                     st.success(f"{new_subject} eklendi.")
                     st.rerun()
 
         with col2:
             st.subheader("Ünite Ekle")
             # Mevcut dersleri çek
-            df_subs = pd.read_sql(f"SELECT * FROM subjects WHERE student_id={student_id}", conn)
+            df_subs = curriculum.student_subjects(student_id)
             if not df_subs.empty:
-                selected_sub_id = st.selectbox("Ders Seç", df_subs['id'].tolist(), format_func=lambda x: df_subs[df_subs['id']==x]['subject_name'].values[0])
+                sub_names = roster.lookup(df_subs, 'subject_name')
+                selected_sub_id = st.selectbox("Ders Seç", sub_names.ids, format_func=sub_names.label)
                 new_unit = st.text_input("Ünite Adı Giriniz")
                 if st.button("Üniteyi Ekle"):
                     if new_unit:
-                        c.execute("INSERT INTO units (subject_id, unit_name) VALUES (?, ?)", (selected_sub_id, new_unit))
-                        conn.commit()
+                        curriculum.enroll_unit(student_id, selected_sub_id, new_unit)
                         st.success(f"{new_unit} eklendi.")
             else:
                 st.warning("Önce ders eklemelisiniz.")
@@ -392,51 +441,50 @@ def student_interface():
         # Listeleme ve Silme
         st.markdown("---")
         st.subheader("Mevcut Dersler ve Üniteler")
-        df_all = pd.read_sql(f"""
-            SELECT s.subject_name, u.unit_name, u.id as unit_id, s.id as subject_id 
-            FROM subjects s LEFT JOIN units u ON s.id = u.subject_id 
-            WHERE s.student_id={student_id}
-        """, conn)
-        st.dataframe(df_all)
+        paged_browser("units", lambda after, text, role: paging.student_units(student_id, after), search=False)
         
         del_unit_id = st.number_input("Silinecek Ünite ID", min_value=0)
         if st.button("Üniteyi Sil"):
-            c.execute("DELETE FROM units WHERE id=?", (del_unit_id,))
-            conn.commit()
+            # Sadece öğrencinin kendi ünite kaydı silinir, katalog ortak kalır
+            curriculum.drop_unit(student_id, del_unit_id)
             st.rerun()
             
     elif menu == "Ünite Takip":
         st.title("Ünite Tamamlama Durumu")
-        df_subs = pd.read_sql(f"SELECT * FROM subjects WHERE student_id={student_id}", conn)
+        df_subs = curriculum.student_subjects(student_id)
         
         if not df_subs.empty:
-            sel_sub = st.selectbox("Ders Seçiniz", df_subs['id'].tolist(), format_func=lambda x: df_subs[df_subs['id']==x]['subject_name'].values[0])
+            sub_names = roster.lookup(df_subs, 'subject_name')
+            sel_sub = st.selectbox("Ders Seçiniz", sub_names.ids, format_func=sub_names.label)
             
             # Üniteleri getir
-            units = pd.read_sql(f"SELECT * FROM units WHERE subject_id={sel_sub}", conn)
+            units = curriculum.student_units(student_id, sel_sub)
             
             for index, row in units.iterrows():
                 is_done = st.checkbox(f"{row['unit_name']}", value=bool(row['is_completed']), key=f"u_{row['id']}")
                 if is_done != bool(row['is_completed']):
-                    c.execute("UPDATE units SET is_completed=? WHERE id=?", (1 if is_done else 0, row['id']))
-                    conn.commit()
+                    curriculum.set_completed(student_id, int(row['id']), is_done)
             
             # Alt kısımda özet
             st.markdown("---")
             st.write("Ders Durumu:")
-            st.dataframe(pd.read_sql(f"SELECT unit_name, CASE WHEN is_completed=1 THEN 'Bitti' ELSE 'Devam Ediyor' END as Durum FROM units WHERE subject_id={sel_sub}", conn))
+            units = curriculum.student_units(student_id, sel_sub)
+            st.dataframe(pd.DataFrame({'unit_name': units['unit_name'],
+                                       'Durum': units['is_completed'].map({1: 'Bitti', 0: 'Devam Ediyor'})}))
 
     elif menu == "Günlük Giriş":
         st.title("Günlük Çalışma Girişi")
         date = st.date_input("Tarih", datetime.now())
         
-        df_subs = pd.read_sql(f"SELECT * FROM subjects WHERE student_id={student_id}", conn)
+        df_subs = curriculum.student_subjects(student_id)
         if not df_subs.empty:
-            sel_sub = st.selectbox("Ders Seç", df_subs['id'].tolist(), format_func=lambda x: df_subs[df_subs['id']==x]['subject_name'].values[0])
+            sub_names = roster.lookup(df_subs, 'subject_name')
+            sel_sub = st.selectbox("Ders Seç", sub_names.ids, format_func=sub_names.label)
             
             # Üniteler (Multi select)
-            units = pd.read_sql(f"SELECT * FROM units WHERE subject_id={sel_sub}", conn)
-            selected_unit_ids = st.multiselect("Ünite Seçimi (Birden fazla seçilebilir)", units['id'].tolist(), format_func=lambda x: units[units['id']==x]['unit_name'].values[0])
+            units = curriculum.student_units(student_id, sel_sub)
+            unit_names = roster.lookup(units, 'unit_name')
+            selected_unit_ids = st.multiselect("Ünite Seçimi (Birden fazla seçilebilir)", unit_names.ids, format_func=unit_names.label)
             
             col1, col2, col3, col4 = st.columns(4)
             q_solved = col1.number_input("Çözülen Soru", min_value=0)
@@ -446,193 +494,452 @@ def student_interface():
             is_repeated = st.checkbox("Tekrar Yapıldı mı?")
             
             if st.button("Kaydet"):
-                for uid in selected_unit_ids:
-                    c.execute("""INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration, is_repeated) 
-                                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                              (student_id, sel_sub, uid, date, q_solved, q_wrong, q_empty, duration, 1 if is_repeated else 0))
-                conn.commit()
-                st.success("Kayıt Başarılı!")
+                # Seçilen tüm üniteler tek istek: yazma kuyruğunda diğer kayıtlarla birlikte commit edilir
+                saved = save_logs(logs.save_study_logs, [(student_id, sel_sub, uid, str(date), q_solved, q_wrong, q_empty, duration, 1 if is_repeated else 0)
+                                                         for uid in selected_unit_ids])
+                if saved is not None:
+                    st.success("Kayıt Başarılı!")
             
             st.subheader("Bugünün Kayıtları")
-            today_logs = pd.read_sql(f"""
+            today_logs = db.query_df("""
                 SELECT s.subject_name, u.unit_name, l.q_solved, l.q_wrong, l.duration 
                 FROM study_logs l JOIN subjects s ON l.subject_id=s.id JOIN units u ON l.unit_id=u.id 
-                WHERE l.student_id={student_id} AND l.date='{date}'""", conn)
+                WHERE l.student_id=? AND l.date=?""", (student_id, str(date)))
             st.dataframe(today_logs)
+        
+        log_import_section('study', student_id)
 
     elif menu == "Deneme Sınavı":
         st.title("Deneme Sınavı Girişi")
         date = st.date_input("Tarih", datetime.now())
         
-        df_subs = pd.read_sql(f"SELECT * FROM subjects WHERE student_id={student_id}", conn)
-        selected_subs = st.multiselect("Dersleri Seçiniz", df_subs['id'].tolist(), format_func=lambda x: df_subs[df_subs['id']==x]['subject_name'].values[0])
+        df_subs = curriculum.student_subjects(student_id)
+        sub_names = roster.lookup(df_subs, 'subject_name')
+        selected_subs = st.multiselect("Dersleri Seçiniz", sub_names.ids, format_func=sub_names.label)
         
-        for sub_id in selected_subs:
-            st.markdown(f"**{df_subs[df_subs['id']==sub_id]['subject_name'].values[0]}**")
-            c1, c2, c3, c4 = st.columns(4)
-            qs = c1.number_input(f"Soru Sayısı ({sub_id})", min_value=0, key=f"ds_{sub_id}")
-            qw = c2.number_input(f"Yanlış ({sub_id})", min_value=0, key=f"dw_{sub_id}")
-            qe = c3.number_input(f"Boş ({sub_id})", min_value=0, key=f"de_{sub_id}")
-            dur = c4.number_input(f"Süre ({sub_id})", min_value=0, key=f"dt_{sub_id}")
-            
-            if st.button(f"Kaydet ({sub_id})", key=f"btn_{sub_id}"):
-                c.execute("""INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration)
-                             VALUES (?, ?, ?, ?, ?, ?, ?)""", (student_id, sub_id, date, qs, qw, qe, dur))
-                conn.commit()
-                st.success("Ders notu kaydedildi.")
+        if selected_subs:
+            # Tüm dersler tek form, tek gönderim ve tek transaction
+            with st.form("deneme_formu"):
+                exam_rows = []
+                for sub_id in selected_subs:
+                    st.markdown(f"**{sub_names.label(sub_id)}**")
+                    c1, c2, c3, c4 = st.columns(4)
+                    qs = c1.number_input(f"Soru Sayısı ({sub_id})", min_value=0, key=f"ds_{sub_id}")
+                    qw = c2.number_input(f"Yanlış ({sub_id})", min_value=0, key=f"dw_{sub_id}")
+                    qe = c3.number_input(f"Boş ({sub_id})", min_value=0, key=f"de_{sub_id}")
+                    dur = c4.number_input(f"Süre ({sub_id})", min_value=0, key=f"dt_{sub_id}")
+                    exam_rows.append((student_id, sub_id, str(date), qs, qw, qe, dur))
+                
+                if st.form_submit_button("Denemeyi Kaydet"):
+                    if save_logs(logs.save_exam_logs, exam_rows) is not None:
+                        st.success(f"{len(exam_rows)} ders notu kaydedildi.")
+        
+        log_import_section('exam', student_id)
 
     elif menu in ["Çalışma Takibi", "Çalışma Analizi"]:
-        df_study, df_exam = get_student_analysis(student_id)
-        display_analysis_dashboard(df_study, df_exam)
-
-    conn.close()
+        display_analysis_dashboard(student_id)
+
+def display_search(role, user_id):
+    st.title("🔎 Arama")
+    # Sonuçlar rolün görebildikleriyle sınırlı (öğretmen: kendi öğrencileri ve onların ders/üniteleri)
+    text = st.text_input("Öğrenci, ders veya ünite ara", key="search_text", placeholder="ör. ayşe, isik, türev")
+    if not search.words(text):
+        st.caption("Ad, e-posta, 6 haneli ID, ders veya ünite adının başını yazın; Türkçe karakterler gerekmez.")
+        return
+    start = time.perf_counter()
+    results = search.search(text, role, user_id)
+    more = " (ilk sonuçlar; aramayı daraltın)" if len(results) >= search.LIMIT else ""
+    st.caption(f"{len(results)} sonuç{more} · {(time.perf_counter() - start) * 1000:.0f} ms")
+    if results.empty:
+        st.info("Sonuç bulunamadı.")
+        return
+    st.dataframe(results[['type', 'name', 'detail']].rename(columns={'type': 'Tür', 'name': 'Ad', 'detail': 'Ayrıntı'}),
+                 hide_index=True)
+    students = results[(results['kind'] == search.USER) & (results['type'] == 'Öğrenci')]
+    if not students.empty:
+        found = roster.Roster(students)
+        selected = st.selectbox("Analizi Açılacak Öğrenci", found.ids, format_func=found.label)
+        display_analysis_dashboard(selected)
+
+def display_cohort_dashboard(supervisor_id, rel_type='ogretmen'):
+    st.title("📈 Sınıf Özeti")
+    # Tüm öğrenciler sabit sayıda toplu sorguyla gelir (öğrenci başına sorgu yok)
+    data = cohort.class_overview(supervisor_id, rel_type)
+    students = data['students']
+    
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Öğrenci", len(students))
+    col2.metric("Aktif Öğrenci", data['active'])
+    col3.metric("Sınıf Başarı Ortalaması", f"%{data['class_mean']:.2f}")
+    col4.metric("Geride Kalan", len(data['behind']))
+    
+    tab1, tab2, tab3 = st.tabs(["Sıralama", "Ünite Isı Haritası", "Geride Kalanlar"])
+    with tab1:
+        ranked = students.dropna(subset=['rank'])
+        if ranked.empty:
+            st.info("Henüz çalışma verisi girilmemiş.")
+        else:
+            fig = px.bar(ranked, x='success_rate', y='label', orientation='h', color='z_score',
+                         color_continuous_scale='RdYlGn', title='Başarı Oranına Göre Sıralama (%)')
+            fig.update_layout(yaxis={'categoryorder': 'total ascending'}, height=max(400, 22 * len(ranked)))
+            st.plotly_chart(fig, use_container_width=True)
+        st.dataframe(students[['rank', 'name', 'unique_id', 'q_solved', 'success_rate', 'percentile', 'z_score',
+                               'trend', 'exam_net', 'completion_rate', 'last_date']])
+    
+    with tab2:
+        heatmap = data['heatmap']
+        if heatmap.empty:
+            st.info("Henüz çalışma verisi girilmemiş.")
+        else:
+            fig = px.imshow(heatmap, color_continuous_scale='RdYlGn', zmin=0, zmax=100, aspect='auto',
+                            labels={'x': 'Ünite', 'y': 'Öğrenci', 'color': 'Başarı (%)'}, title='Öğrenci × Ünite Başarı (%)')
+            fig.update_layout(height=max(400, 22 * len(heatmap)))
+            st.plotly_chart(fig, use_container_width=True)
+            st.subheader("Sınıfın En Zayıf Üniteleri")
+            st.dataframe(data['units'])
+    
+    with tab3:
+        if data['behind'].empty:
+            st.success("Geride kalan öğrenci yok.")
+        else:
+            st.dataframe(data['behind'][['name', 'unique_id', 'behind_reason', 'success_rate', 'z_score', 'trend', 'days_idle']])
 
 def teacher_interface():
     st.sidebar.title(f"Öğretmen: {st.session_state['name']}")
     st.sidebar.info(f"ÖĞRETMEN ID: **{st.session_state['unique_id']}**")
     
-    menu = st.sidebar.radio("Menü", ["Öğrencilerim", "Öğrenci Çalışma Takibi", "Öğrenci Çalışma Analizi"])
-    conn = get_db_connection()
+    menu = st.sidebar.radio("Menü", ["Öğrencilerim", "Sınıf Özeti", "Öğrenci Çalışma Takibi", "Öğrenci Çalışma Analizi", "Arama"])
     teacher_id = st.session_state['user_id']
     
-    # Bu öğretmene kayıtlı öğrencileri bul
-    students = pd.read_sql(f"""
-        SELECT u.id, u.name, u.unique_id 
-        FROM users u 
-        JOIN relationships r ON u.id = r.student_id 
-        WHERE r.supervisor_id = {teacher_id} AND r.type='ogretmen'
-    """, conn)
+    # Bu öğretmene kayıtlı öğrenciler (oturum önbelleğinden)
+    students = roster.session_cache(st.session_state).students_of(teacher_id, 'ogretmen')
     
     if menu == "Öğrencilerim":
         st.title("Öğrenci Listesi")
         if students.empty:
             st.warning("Henüz ID'nizi girerek size kayıt olan öğrenci yok.")
         else:
-            st.dataframe(students)
+            paged_browser("teacher_students", lambda after, text, role: paging.students_of(teacher_id, 'ogretmen', after, text))
+
+    elif menu == "Sınıf Özeti":
+        if not students.empty:
+            display_cohort_dashboard(teacher_id)
+        else:
+            st.warning("Öğrenci bulunamadı.")
 
     elif menu in ["Öğrenci Çalışma Takibi", "Öğrenci Çalışma Analizi"]:
         st.title("Öğrenci Analizleri")
         if not students.empty:
-            selected_student_id = st.selectbox("Öğrenci Seçiniz", students['id'].tolist(), format_func=lambda x: students[students['id']==x]['name'].values[0])
+            selected_student_id = st.selectbox("Öğrenci Seçiniz", students.ids, format_func=students.label)
             
-            df_study, df_exam = get_student_analysis(selected_student_id)
-            display_analysis_dashboard(df_study, df_exam)
+            display_analysis_dashboard(selected_student_id)
         else:
             st.warning("Öğrenci bulunamadı.")
-            
-    conn.close()
+
+    elif menu == "Arama":
+        display_search('Öğretmen', teacher_id)
 
 def parent_interface():
     st.sidebar.title(f"Veli: {st.session_state['name']}")
     
     menu = st.sidebar.radio("Menü", ["Öğrencilerim", "Öğrenci Çalışma Takibi", "Öğrenci Çalışma Analizi"])
-    conn = get_db_connection()
-    c = conn.cursor()
     parent_id = st.session_state['user_id']
+    rosters = roster.session_cache(st.session_state)
     
     if menu == "Öğrencilerim":
         st.title("Öğrenci Ekleme ve Listeleme")
         std_code = st.text_input("Öğrenci ID (6 Haneli)")
         if st.button("Öğrenciyi Getir ve Kaydet"):
-            c.execute("SELECT id, name FROM users WHERE unique_id=? AND role='Öğrenci'", (std_code,))
-            res = c.fetchone()
-            if res:
-                # İlişki kontrolü
-                c.execute("SELECT * FROM relationships WHERE student_id=? AND supervisor_id=?", (res[0], parent_id))
-                if not c.fetchone():
-                    c.execute("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'veli')", (parent_id, res[0]))
-                    conn.commit()
-                    st.success(f"{res[1]} isimli öğrenci eklendi.")
+            with db.write() as conn:
+                c = conn.cursor()
+                c.execute("SELECT id, name FROM users WHERE unique_id=? AND role='Öğrenci'", (std_code,))
+                res = c.fetchone()
+                if res:
+                    # İlişki kontrolü
+                    c.execute("SELECT * FROM relationships WHERE student_id=? AND supervisor_id=?", (res[0], parent_id))
+                    if not c.fetchone():
+                        c.execute("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'veli')", (parent_id, res[0]))
+                        roster.bump()
+                        st.success(f"{res[1]} isimli öğrenci eklendi.")
+                    else:
+                        st.warning("Bu öğrenci zaten ekli.")
                 else:
-                    st.warning("Bu öğrenci zaten ekli.")
-            else:
-                st.error("Öğrenci bulunamadı.")
+                    st.error("Öğrenci bulunamadı.")
         
         st.subheader("Kayıtlı Öğrenciler")
-        students = pd.read_sql(f"""
-            SELECT u.id, u.name, u.unique_id 
-            FROM users u 
-            JOIN relationships r ON u.id = r.student_id 
-            WHERE r.supervisor_id = {parent_id} AND r.type='veli'
-        """, conn)
-        st.dataframe(students)
+        paged_browser("parent_students", lambda after, text, role: paging.students_of(parent_id, 'veli', after, text))
 
     elif menu in ["Öğrenci Çalışma Takibi", "Öğrenci Çalışma Analizi"]:
-        students = pd.read_sql(f"""
-            SELECT u.id, u.name 
-            FROM users u 
-            JOIN relationships r ON u.id = r.student_id 
-            WHERE r.supervisor_id = {parent_id} AND r.type='veli'
-        """, conn)
+        students = rosters.students_of(parent_id, 'veli')
         
         if not students.empty:
-            selected_student_id = st.selectbox("Öğrenci Seçiniz", students['id'].tolist(), format_func=lambda x: students[students['id']==x]['name'].values[0])
-            df_study, df_exam = get_student_analysis(selected_student_id)
-            display_analysis_dashboard(df_study, df_exam)
+            selected_student_id = st.selectbox("Öğrenci Seçiniz", students.ids, format_func=students.label)
+            display_analysis_dashboard(selected_student_id)
         else:
             st.warning("Önce öğrenci eklemelisiniz.")
-            
-    conn.close()
+
+def archive_section():
+    st.subheader("Geçmiş Dönem Arşivi")
+    st.caption("Eski dönemlerin kayıtları ayrı arşiv dosyalarına taşınır; analiz ve raporlar etkilenmez. "
+               "Ham kayıt raporları arşivi yalnızca aralık gerektirdiğinde okur.")
+    study_count, exam_count = archive.hot_counts()
+    st.write(f"Güncel tablolarda {study_count} çalışma, {exam_count} deneme kaydı var.")
+    parts = archive.summary()
+    if not parts.empty:
+        st.dataframe(parts, hide_index=True)
+    options = archive.cutoff_options()
+    if not options:
+        st.info("Arşivlenecek geçmiş dönem kaydı yok.")
+        return
+    default = archive.default_cutoff()
+    cutoff = st.selectbox("Bu tarihten eski kayıtları arşivle", options,
+                          index=options.index(default) if default in options else len(options) - 1, key="archive_cutoff")
+    if st.button("Arşivle"):
+        with st.spinner("Kayıtlar arşive taşınıyor..."):
+            moved = archive.archive_logs(cutoff)
+        st.success(" · ".join(f"{term}: {counts['study_logs']} çalışma, {counts['exam_logs']} deneme" for term, counts in moved.items())
+                   or "Taşınacak kayıt bulunamadı.")
+        st.caption("Ana dosyayı diskte küçültmek için: python archive.py --vacuum")
+
+def snapshot_before(reason):
+    # Yıkıcı işlemden önce yedek; alınamazsa işlem yapılmaz
+    if not backup.supported():
+        return True
+    try:
+        with st.spinner("Önce yedek alınıyor..."):
+            info = backup.snapshot(reason, kind='silme-oncesi')
+    except Exception as e:
+        st.error(f"Yedek alınamadığı için işlem yapılmadı: {e}")
+        return False
+    st.caption(f"Yedek alındı: {info['name']} (Sistem Ayarları > Yedekler'den geri yüklenebilir)")
+    return True
+
+def backup_section():
+    st.subheader("Yedekler")
+    status = backup.schedule_status()
+    st.caption(f"Uygulama çalışırken alınır, yazmaları durdurmaz. Zamanlı yedek: "
+               f"{'her ' + format(status['interval_hours'], 'g') + ' saatte bir' if status['interval_hours'] > 0 else 'kapalı'}, "
+               f"en yeni {status['keep']} yedek tutulur. Klasör: {backup.backup_dir()}")
+    if status['last_error']:
+        st.warning(f"Son zamanlı yedek alınamadı ({status['last_run']}): {status['last_error']}")
+    if st.button("Şimdi Yedek Al"):
+        with st.spinner("Yedek alınıyor..."):
+            info = backup.snapshot(f"{st.session_state['name']} tarafından elle")
+        st.success(f"{info['name']}: {info['bytes'] / 1024 / 1024:.1f} MB, {info['seconds']} sn, bütünlük {info['integrity']}")
+    parts = backup.summary()
+    if parts.empty:
+        st.info("Henüz yedek yok.")
+        return
+    st.dataframe(parts, hide_index=True)
+    name = st.selectbox("Yedek", parts['Yedek'], key="backup_name")
+    col1, col2 = st.columns(2)
+    if col1.button("Bütünlüğü Kontrol Et"):
+        problems = backup.verify(name)
+        if problems:
+            st.error("\n".join(problems))
+        else:
+            st.success(f"{name} sağlam.")
+    confirm = col2.checkbox("Mevcut veriler bu yedekle değiştirilsin", key="backup_confirm")
+    if col2.button("Geri Yükle", disabled=not confirm):
+        with st.spinner("Geri yükleniyor..."):
+            before = backup.restore(name)
+        st.success(f"{name} geri yüklendi. Önceki durum {before['name']} olarak yedeklendi.")
 
 def admin_interface():
     st.sidebar.title("YÖNETİCİ PANELİ")
-    menu = st.sidebar.radio("Menü", ["Yönetici Girişi", "Öğretmenler", "Veliler", "Tüm Öğrenciler", "Sistem Ayarları"])
-    
-    conn = get_db_connection()
-    c = conn.cursor()
+    menu = st.sidebar.radio("Menü", ["Yönetici Girişi", "Öğretmenler", "Veliler", "Tüm Öğrenciler", "Toplu Kayıt", "Sistem Ayarları", "Performans", "Arama"])
     
     if menu == "Yönetici Girişi":
         st.title("Yönetici Profil")
         st.info(f"Admin: {st.session_state['name']} - {st.session_state['unique_id']}")
         
-        if st.button("Demo Verileri Sil (Veritabanını Sıfırla)"):
+        if st.button("Demo Verileri Sil (Veritabanını Sıfırla)") and snapshot_before("Demo verileri silinmeden önce"):
              # Tabloları drop edip yeniden oluşturmak daha temizdir ama sadece içeriği silelim
-             c.execute("DELETE FROM study_logs")
-             c.execute("DELETE FROM exam_logs")
-             c.execute("DELETE FROM units")
-             c.execute("DELETE FROM subjects")
-             c.execute("DELETE FROM relationships")
-             conn.commit()
+             with db.write() as conn:
+                 conn.execute("DELETE FROM study_logs")
+                 conn.execute("DELETE FROM exam_logs")
+                 conn.execute("DELETE FROM student_units")
+                 conn.execute("DELETE FROM student_subjects")
+                 conn.execute("DELETE FROM units")
+                 conn.execute("DELETE FROM subjects")
+                 conn.execute("DELETE FROM relationships")
+                 archive.forget(conn)
+                 progress.invalidate(conn)
+                 analysis_cache.bump_all(conn)
+             roster.bump()
              st.success("Sistem temizlendi.")
 
+        st.markdown("---")
+        st.subheader("Veritabanı Bağlantı Havuzu")
+        st.json(db.pool_stats())
+        st.subheader("Analiz Önbelleği")
+        st.json(analysis_cache.get_cache().stats())
+        st.subheader("Yazma Kuyruğu")
+        st.json(write_queue.stats())
+
     elif menu == "Öğretmenler":
         st.title("Öğretmen Listesi")
-        teachers = pd.read_sql("SELECT id, name, email, unique_id FROM users WHERE role='Öğretmen'", conn)
-        st.dataframe(teachers)
+        teachers_sql = "SELECT id, name, email, unique_id FROM users WHERE role='Öğretmen'"
+        paged_browser("teachers", lambda after, text, role: paging.users(after, text, 'Öğretmen'))
         
-        if st.button("Listeyi Excel İndir"):
-             st.download_button("İndir", export_to_excel(teachers), "ogretmenler.xlsx")
+        st.download_button("Listeyi Excel İndir", lambda: export.query_to_excel(teachers_sql), "ogretmenler.xlsx")
 
     elif menu == "Veliler":
         st.title("Veli Listesi")
-        parents = pd.read_sql("SELECT id, name, email FROM users WHERE role='Veli'", conn)
-        st.dataframe(parents)
+        paged_browser("parents", lambda after, text, role: paging.users(after, text, 'Veli'))
 
     elif menu == "Tüm Öğrenciler":
         st.title("Öğrenci Analiz (Admin Modu)")
-        all_students = pd.read_sql("SELECT id, name, unique_id FROM users WHERE role='Öğrenci'", conn)
+        # Seçim yalnızca görüntülenen sayfadan yapılır; arama ile daraltılır
+        page = paged_browser("admin_students", lambda after, text, role: paging.users(after, text, 'Öğrenci'))
+        
+        if not page.empty:
+            sel_std = st.selectbox("Analiz Edilecek Öğrenci", page.ids, format_func=page.label)
+            display_analysis_dashboard(sel_std)
+        
+        st.markdown("---")
+        st.subheader("🏫 Okul Geneli Rapor")
+        # Okul geneli toplamalar her yeniden çalıştırmada (öğrenci seçimi, sayfa değiştirme)
+        # değil, istendiğinde hesaplanır; sonuç oturumda saklanır
+        if st.button("Okul Geneli Raporu Hesapla" if 'school_report' not in st.session_state else "Raporu Yenile"):
+            st.session_state['school_report'] = (datetime.now(), reports.school_summary(),
+                                                 curriculum.school_unit_success(), curriculum.completion_overview())
+        if 'school_report' in st.session_state:
+            computed_at, summary, unit_success, completion = st.session_state['school_report']
+            st.caption(f"Hesaplanma: {computed_at:%d.%m.%Y %H:%M}")
+            with st.expander("Tüm öğrencilerin özeti"):
+                st.dataframe(summary)
+            with st.expander("Okul geneli ünite başarısı (en zayıftan)"):
+                st.dataframe(unit_success)
+            with st.expander("Ünite tamamlama oranları"):
+                st.dataframe(completion)
+        st.download_button("📥 Okul Raporunu İndir (Excel)", reports.school_workbook, "okul_raporu.xlsx")
+        
+        if st.button("Öğrenci Başına Raporları Oluştur (ZIP)"):
+            bar = st.progress(0.0, text="Raporlar hazırlanıyor...")
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                paths = reports.write_student_reports(tmp_dir, progress=lambda done, total: bar.progress(done / total if total else 1.0, text=f"{done}/{total} öğrenci"))
+                zip_file = tempfile.TemporaryFile()
+                with zipfile.ZipFile(zip_file, 'w', zipfile.ZIP_DEFLATED) as zf:
+                    for path in paths:
+                        zf.write(path, os.path.basename(path))
+            st.download_button("📥 Öğrenci Raporlarını İndir (ZIP)", export.read_and_close(zip_file), "ogrenci_raporlari.zip")
+    
+    elif menu == "Toplu Kayıt":
+        st.title("Toplu Kullanıcı ve Müfredat Kaydı")
+        st.caption("Sınıf listesi kolonları: name, role (Öğrenci/Öğretmen/Veli), email, phone, password, teacher, parent "
+                   "— teacher/parent: e-mail veya 6 haneli ID. Boş şifreler için rastgele ilk şifre üretilir.")
+        st.caption("Müfredat şablonu kolonları: subject_name, unit_name — listedeki her yeni öğrenciye kopyalanır.")
+        roster_file = st.file_uploader("Sınıf Listesi", type=['csv', 'xlsx'], key="roster_file")
+        curriculum_file = st.file_uploader("Müfredat Şablonu (opsiyonel)", type=['csv', 'xlsx'], key="curriculum_file")
+        dry_run = st.checkbox("Sadece kontrol et (kaydetme)", value=True)
         
-        if not all_students.empty:
-            sel_std = st.selectbox("Analiz Edilecek Öğrenci", all_students['id'].tolist(), format_func=lambda x: all_students[all_students['id']==x]['name'].values[0])
-            df_study, df_exam = get_student_analysis(sel_std)
-            display_analysis_dashboard(df_study, df_exam)
+        if roster_file is not None and st.button("Kaydı Başlat"):
+            roster_df = logs.read_table(roster_file, roster_file.name)
+            template = logs.read_table(curriculum_file, curriculum_file.name) if curriculum_file is not None else None
+            bar = st.progress(0.0, text="Kayıtlar ekleniyor...")
+            report = onboarding.onboard(roster_df, template, dry_run=dry_run,
+                                        progress=lambda done, total: bar.progress(done / total, text=f"{done}/{total} kullanıcı"))
+            bar.empty()
+            st.info(f"{'(Deneme) ' if dry_run else ''}Satır: {report.total} | Hesap: {len(report.created)} | "
+                    f"İlişki: {report.relationships} | Ders: {report.subjects} | Ünite: {report.units} | Hata: {len(report.errors)}")
+            if report.errors:
+                st.dataframe(report.errors_df())
+            if report.created and not dry_run:
+                created = report.created_df()
+                st.dataframe(created)
+                st.download_button("📥 Hesap Listesini İndir (CSV)", created.to_csv(index=False).encode('utf-8-sig'), "yeni_hesaplar.csv")
     
     elif menu == "Sistem Ayarları":
         st.subheader("Yönetici Yetkisi Ver")
-        users = pd.read_sql("SELECT id, name, email, role FROM users", conn)
-        sel_user = st.selectbox("Kullanıcı Seç", users['id'].tolist(), format_func=lambda x: f"{users[users['id']==x]['name'].values[0]} ({users[users['id']==x]['role'].values[0]})")
+        users = paged_browser("admin_users", lambda after, text, role: paging.users(after, text, role),
+                              roles=['Öğrenci', 'Öğretmen', 'Veli', 'Yönetici'])
+        sel_user = st.selectbox("Kullanıcı Seç", users.ids, format_func=users.label)
         
-        if st.button("Bu Kişiyi Yönetici Yap"):
-            c.execute("UPDATE users SET role='Yönetici' WHERE id=?", (sel_user,))
-            conn.commit()
+        if sel_user is not None and st.button("Bu Kişiyi Yönetici Yap"):
+            db.execute("UPDATE users SET role='Yönetici' WHERE id=?", (sel_user,))
+            roster.bump()
             st.success("Yetki verildi.")
-            
-    conn.close()
+        
+        st.markdown("---")
+        st.subheader("Toplu Kayıt İçe Aktarma")
+        log_import_section('study')
+        log_import_section('exam')
+
+        if archive.supported():
+            st.markdown("---")
+            archive_section()
+
+        if backup.supported():
+            st.markdown("---")
+            backup_section()
+
+    elif menu == "Performans":
+        st.title("Performans Ölçümleri")
+        enabled = st.toggle("Ölçüm Açık", value=perf.ENABLED)
+        if enabled != perf.ENABLED:
+            perf.set_enabled(enabled)
+        st.caption(f"Yavaş sorgu eşiği: {perf.SLOW_QUERY_MS:.0f} ms (üstündeki okuma sorgularının planı bir kez kaydedilir)")
+
+        reruns = pd.DataFrame(perf.reruns())
+        if not reruns.empty:
+            col1, col2, col3, col4 = st.columns(4)
+            col1.metric("Çalıştırma", len(reruns))
+            col2.metric("p50 (ms)", f"{reruns['duration_ms'].quantile(0.5):.1f}")
+            col3.metric("p95 (ms)", f"{reruns['duration_ms'].quantile(0.95):.1f}")
+            col4.metric("Ort. Sorgu", f"{reruns['queries'].mean():.1f}")
+
+        tab1, tab2, tab3 = st.tabs(["Çalıştırmalar", "Sorgular", "Bölümler"])
+        with tab1:
+            if reruns.empty:
+                st.info("Henüz kayıt yok.")
+            else:
+                st.dataframe(reruns[['time', 'page', 'duration_ms', 'queries', 'query_ms', 'rss_delta_kb']].iloc[::-1],
+                             hide_index=True)
+        with tab2:
+            queries = pd.DataFrame(perf.query_stats())
+            if queries.empty:
+                st.info("Henüz kayıt yok.")
+            else:
+                queries['avg_ms'] = queries['total_ms'] / queries['count']
+                queries = queries.sort_values('total_ms', ascending=False)
+                st.dataframe(queries[['sql', 'count', 'total_ms', 'avg_ms', 'max_ms']], hide_index=True)
+                st.subheader("Yavaş Sorgu Planları")
+                for _, q in queries[queries['plan'].notna()].iterrows():
+                    with st.expander(f"{q['max_ms']:.1f} ms · {q['sql'][:90]}"):
+                        st.code(q['sql'], language='sql')
+                        st.code("\n".join(q['plan']))
+        with tab3:
+            sections = pd.DataFrame(perf.section_stats())
+            if sections.empty:
+                st.info("Henüz kayıt yok.")
+            else:
+                sections['avg_ms'] = sections['total_ms'] / sections['count']
+                st.dataframe(sections.sort_values('total_ms', ascending=False)[['name', 'count', 'total_ms', 'avg_ms', 'max_ms']],
+                             hide_index=True)
+
+        col1, col2 = st.columns(2)
+        col1.download_button("📥 Ölçümleri İndir (JSON)",
+                             lambda: perf.to_json({'pool': db.pool_stats(), 'cache': analysis_cache.get_cache().stats(),
+                                                   'write_queue': write_queue.stats()}),
+                             f"performans_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", mime="application/json")
+        if col2.button("Ölçümleri Sıfırla"):
+            perf.reset()
+            st.rerun()
+
+    elif menu == "Arama":
+        display_search('Yönetici', st.session_state['user_id'])
 
 # --- ANA UYGULAMA DÖNGÜSÜ ---
 
 def main():
-    init_db()
+    with perf.rerun(st.session_state.get('role') or st.session_state.get('page', 'login')):
+        run_app()
+
+def run_app():
+    with perf.section("ensure_schema"):
+        migrations.ensure_schema()
+    backup.start_schedule()
     
     if 'page' not in st.session_state:
         st.session_state['page'] = 'login'
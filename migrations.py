@@ -0,0 +1,567 @@
+import hashlib
+import logging
+import threading
+from datetime import datetime
+
+import db
+import search
+
+# --- ŞEMA GÖÇLERİ (MIGRATION) ---
+# Her göç sırayla ve yalnızca bir kez uygulanır; uygulanan sürüm schema_version
+# tablosunda tutulur. Yeni tablo, kolon ve indeksler buraya yeni bir göç olarak eklenir.
+
+
+def _m001_base_schema(c):
+    # Kullanıcılar Tablosu
+    c.execute('''CREATE TABLE IF NOT EXISTS users (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT,
+                    role TEXT,
+                    email TEXT UNIQUE,
+                    phone TEXT,
+                    password TEXT,
+                    unique_id TEXT UNIQUE
+                )''')
+
+    # İlişkiler (Öğretmen-Öğrenci, Veli-Öğrenci)
+    c.execute('''CREATE TABLE IF NOT EXISTS relationships (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    supervisor_id INTEGER, -- Öğretmen veya Veli ID
+                    student_id INTEGER,    -- Öğrenci ID
+                    type TEXT              -- 'ogretmen' veya 'veli'
+                )''')
+
+    # Dersler
+    c.execute('''CREATE TABLE IF NOT EXISTS subjects (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id INTEGER,
+                    subject_name TEXT
+                )''')
+
+    # Üniteler
+    c.execute('''CREATE TABLE IF NOT EXISTS units (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    subject_id INTEGER,
+                    unit_name TEXT,
+                    is_completed INTEGER DEFAULT 0
+                )''')
+
+    # Günlük Çalışma Kayıtları
+    c.execute('''CREATE TABLE IF NOT EXISTS study_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id INTEGER,
+                    subject_id INTEGER,
+                    unit_id INTEGER,
+                    date TEXT,
+                    q_solved INTEGER,
+                    q_wrong INTEGER,
+                    q_empty INTEGER,
+                    duration INTEGER,
+                    is_repeated INTEGER DEFAULT 0
+                )''')
+
+    # Deneme Sınavı Kayıtları
+    c.execute('''CREATE TABLE IF NOT EXISTS exam_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    student_id INTEGER,
+                    subject_id INTEGER, -- Ders bazlı deneme
+                    date TEXT,
+                    q_solved INTEGER,
+                    q_wrong INTEGER,
+                    q_empty INTEGER,
+                    duration INTEGER
+                )''')
+
+
+def _m002_default_admin(c):
+    # Admin02 Varsayılan Kullanıcı (Şifre: admin02)
+    hashed_pw = hashlib.sha256("admin02".encode()).hexdigest()
+    c.execute("INSERT OR IGNORE INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
+              ("Sistem Yöneticisi", "Yönetici", "admin02", "000", hashed_pw, "ADMIN1"))
+
+
+def _m003_query_indexes(c):
+    # Analiz sorguları: öğrenci bazlı filtre + JOIN için gereken tüm kolonlar indekste (covering)
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_study_logs_student_date
+                 ON study_logs (student_id, date, subject_id, unit_id, q_solved, q_wrong, q_empty, duration, is_repeated)""")
+    c.execute("""CREATE INDEX IF NOT EXISTS idx_exam_logs_student_date
+                 ON exam_logs (student_id, date, subject_id, q_solved, q_wrong, q_empty, duration)""")
+    # Öğretmen/veli öğrenci listeleri ve tekrar ekleme kontrolü
+    c.execute("CREATE INDEX IF NOT EXISTS idx_relationships_supervisor ON relationships (supervisor_id, type, student_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_relationships_student ON relationships (student_id, supervisor_id)")
+    # Ders/ünite listeleri
+    c.execute("CREATE INDEX IF NOT EXISTS idx_subjects_student ON subjects (student_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_units_subject ON units (subject_id)")
+    # Yönetici rol listeleri
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_role ON users (role, name)")
+    c.execute("ANALYZE")
+
+
+def _m004_student_data_versions(c):
+    # Analiz önbelleğinin geçersiz kılınması için öğrenci başına veri sürümü
+    c.execute('''CREATE TABLE IF NOT EXISTS student_data_versions (
+                    student_id INTEGER PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                )''')
+
+
+def _quarantine(c, table, where, reason):
+    # Eşleşen kayıtlar silinmeden önce quarantine_<tablo> kopyasına taşınır (gerekirse elle
+    # geri alınabilir); sayı göç günlüğüne yazılır
+    count = c.execute(f"SELECT COUNT(*) FROM {table} WHERE {where}").fetchone()[0]
+    if not count:
+        return 0
+    c.execute(f"CREATE TABLE IF NOT EXISTS quarantine_{table} AS "
+              f"SELECT *, '' AS quarantine_reason, '' AS quarantined_at FROM {table} WHERE 0")
+    c.execute(f"INSERT INTO quarantine_{table} SELECT *, ?, ? FROM {table} WHERE {where}",
+              (reason, datetime.now().isoformat(timespec='seconds')))
+    c.execute(f"DELETE FROM {table} WHERE {where}")
+    logging.getLogger(__name__).warning("%s: %d kayıt quarantine_%s tablosuna taşındı (%s)", table, count, table, reason)
+    return count
+
+
+def _m005_rollup_tables(c):
+    # Özet tablolar: öğrenci×ünite, öğrenci×gün (çalışma) ve öğrenci×ders (deneme)
+    c.execute('''CREATE TABLE IF NOT EXISTS study_unit_rollup (
+                    student_id INTEGER,
+                    unit_id INTEGER,
+                    subject_id INTEGER,
+                    q_solved INTEGER NOT NULL DEFAULT 0,
+                    q_wrong INTEGER NOT NULL DEFAULT 0,
+                    q_empty INTEGER NOT NULL DEFAULT 0,
+                    duration INTEGER NOT NULL DEFAULT 0,
+                    is_repeated INTEGER NOT NULL DEFAULT 0,
+                    log_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (student_id, unit_id)
+                ) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS study_daily_rollup (
+                    student_id INTEGER,
+                    date TEXT,
+                    q_solved INTEGER NOT NULL DEFAULT 0,
+                    q_wrong INTEGER NOT NULL DEFAULT 0,
+                    q_empty INTEGER NOT NULL DEFAULT 0,
+                    duration INTEGER NOT NULL DEFAULT 0,
+                    log_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (student_id, date)
+                ) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS exam_subject_rollup (
+                    student_id INTEGER,
+                    subject_id INTEGER,
+                    q_solved INTEGER NOT NULL DEFAULT 0,
+                    q_wrong INTEGER NOT NULL DEFAULT 0,
+                    q_empty INTEGER NOT NULL DEFAULT 0,
+                    duration INTEGER NOT NULL DEFAULT 0,
+                    exam_count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (student_id, subject_id)
+                ) WITHOUT ROWID''')
+
+    # Kayıt ekleme/silme özetleri aynı transaction içinde günceller
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_study_logs_insert AFTER INSERT ON study_logs BEGIN
+                    INSERT INTO study_unit_rollup (student_id, unit_id, subject_id, q_solved, q_wrong, q_empty, duration, is_repeated, log_count)
+                    VALUES (NEW.student_id, NEW.unit_id, NEW.subject_id, COALESCE(NEW.q_solved, 0), COALESCE(NEW.q_wrong, 0),
+                            COALESCE(NEW.q_empty, 0), COALESCE(NEW.duration, 0), COALESCE(NEW.is_repeated, 0), 1)
+                    ON CONFLICT(student_id, unit_id) DO UPDATE SET
+                        q_solved = q_solved + excluded.q_solved, q_wrong = q_wrong + excluded.q_wrong,
+                        q_empty = q_empty + excluded.q_empty, duration = duration + excluded.duration,
+                        is_repeated = is_repeated + excluded.is_repeated, log_count = log_count + 1;
+                    INSERT INTO study_daily_rollup (student_id, date, q_solved, q_wrong, q_empty, duration, log_count)
+                    VALUES (NEW.student_id, NEW.date, COALESCE(NEW.q_solved, 0), COALESCE(NEW.q_wrong, 0),
+                            COALESCE(NEW.q_empty, 0), COALESCE(NEW.duration, 0), 1)
+                    ON CONFLICT(student_id, date) DO UPDATE SET
+                        q_solved = q_solved + excluded.q_solved, q_wrong = q_wrong + excluded.q_wrong,
+                        q_empty = q_empty + excluded.q_empty, duration = duration + excluded.duration,
+                        log_count = log_count + 1;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_study_logs_delete AFTER DELETE ON study_logs BEGIN
+                    UPDATE study_unit_rollup SET
+                        q_solved = q_solved - COALESCE(OLD.q_solved, 0), q_wrong = q_wrong - COALESCE(OLD.q_wrong, 0),
+                        q_empty = q_empty - COALESCE(OLD.q_empty, 0), duration = duration - COALESCE(OLD.duration, 0),
+                        is_repeated = is_repeated - COALESCE(OLD.is_repeated, 0), log_count = log_count - 1
+                    WHERE student_id = OLD.student_id AND unit_id = OLD.unit_id;
+                    DELETE FROM study_unit_rollup WHERE student_id = OLD.student_id AND unit_id = OLD.unit_id AND log_count <= 0;
+                    UPDATE study_daily_rollup SET
+                        q_solved = q_solved - COALESCE(OLD.q_solved, 0), q_wrong = q_wrong - COALESCE(OLD.q_wrong, 0),
+                        q_empty = q_empty - COALESCE(OLD.q_empty, 0), duration = duration - COALESCE(OLD.duration, 0),
+                        log_count = log_count - 1
+                    WHERE student_id = OLD.student_id AND date = OLD.date;
+                    DELETE FROM study_daily_rollup WHERE student_id = OLD.student_id AND date = OLD.date AND log_count <= 0;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_exam_logs_insert AFTER INSERT ON exam_logs BEGIN
+                    INSERT INTO exam_subject_rollup (student_id, subject_id, q_solved, q_wrong, q_empty, duration, exam_count)
+                    VALUES (NEW.student_id, NEW.subject_id, COALESCE(NEW.q_solved, 0), COALESCE(NEW.q_wrong, 0),
+                            COALESCE(NEW.q_empty, 0), COALESCE(NEW.duration, 0), 1)
+                    ON CONFLICT(student_id, subject_id) DO UPDATE SET
+                        q_solved = q_solved + excluded.q_solved, q_wrong = q_wrong + excluded.q_wrong,
+                        q_empty = q_empty + excluded.q_empty, duration = duration + excluded.duration,
+                        exam_count = exam_count + 1;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_exam_logs_delete AFTER DELETE ON exam_logs BEGIN
+                    UPDATE exam_subject_rollup SET
+                        q_solved = q_solved - COALESCE(OLD.q_solved, 0), q_wrong = q_wrong - COALESCE(OLD.q_wrong, 0),
+                        q_empty = q_empty - COALESCE(OLD.q_empty, 0), duration = duration - COALESCE(OLD.duration, 0),
+                        exam_count = exam_count - 1
+                    WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id;
+                    DELETE FROM exam_subject_rollup WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id AND exam_count <= 0;
+                END''')
+
+    # Analiz sorguları ünite/ders ile JOIN yaptığı için silinen ünitenin kayıtları zaten
+    # görünmüyordu; özetlerin aynı sonucu vermesi için bu kayıtlar da silinir
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_units_delete AFTER DELETE ON units BEGIN
+                    DELETE FROM study_logs WHERE unit_id = OLD.id;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_subjects_delete AFTER DELETE ON subjects BEGIN
+                    DELETE FROM study_logs WHERE subject_id = OLD.id;
+                    DELETE FROM exam_logs WHERE subject_id = OLD.id;
+                END''')
+    c.execute("CREATE INDEX IF NOT EXISTS idx_study_logs_unit ON study_logs (unit_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_study_logs_subject ON study_logs (subject_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_exam_logs_subject ON exam_logs (subject_id)")
+
+    # Mevcut kayıtlardan ilk doldurma (görünmeyen, ünitesi silinmiş kayıtlar karantinaya alınır)
+    _quarantine(c, 'study_logs', "unit_id NOT IN (SELECT id FROM units) OR subject_id NOT IN (SELECT id FROM subjects)",
+                "göç 5: ünitesi veya dersi silinmiş")
+    _quarantine(c, 'exam_logs', "subject_id NOT IN (SELECT id FROM subjects)", "göç 5: dersi silinmiş")
+    c.execute("DELETE FROM study_unit_rollup")
+    c.execute("DELETE FROM study_daily_rollup")
+    c.execute("DELETE FROM exam_subject_rollup")
+    c.execute('''INSERT INTO study_unit_rollup (student_id, unit_id, subject_id, q_solved, q_wrong, q_empty, duration, is_repeated, log_count)
+                 SELECT student_id, unit_id, MIN(subject_id), COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0), COALESCE(SUM(q_empty), 0),
+                        COALESCE(SUM(duration), 0), COALESCE(SUM(is_repeated), 0), COUNT(*)
+                 FROM study_logs GROUP BY student_id, unit_id''')
+    c.execute('''INSERT INTO study_daily_rollup (student_id, date, q_solved, q_wrong, q_empty, duration, log_count)
+                 SELECT student_id, date, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0), COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                 FROM study_logs GROUP BY student_id, date''')
+    c.execute('''INSERT INTO exam_subject_rollup (student_id, subject_id, q_solved, q_wrong, q_empty, duration, exam_count)
+                 SELECT student_id, subject_id, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0), COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                 FROM exam_logs GROUP BY student_id, subject_id''')
+
+
+def _m006_shared_curriculum(c):
+    # Ders/ünite adları tek bir ortak katalogda tutulur; öğrencinin aldığı dersler
+    # (student_subjects) ve üniteler + tamamlama durumu (student_units) ayrı tablolarda.
+    # Tablo ve kolon adları korunur; kayıtlar ve özetler katalog kimliklerine taşınır.
+    c.execute("DROP TRIGGER IF EXISTS trg_units_delete")
+    c.execute("DROP TRIGGER IF EXISTS trg_subjects_delete")
+    c.execute('''CREATE TABLE catalog_subjects (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    subject_name TEXT NOT NULL UNIQUE
+                )''')
+    c.execute('''CREATE TABLE catalog_units (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    subject_id INTEGER NOT NULL,
+                    unit_name TEXT NOT NULL,
+                    UNIQUE (subject_id, unit_name)
+                )''')
+    c.execute('''INSERT INTO catalog_subjects (subject_name)
+                 SELECT DISTINCT TRIM(subject_name) FROM subjects WHERE subject_name IS NOT NULL ORDER BY 1''')
+    c.execute('''INSERT INTO catalog_units (subject_id, unit_name)
+                 SELECT DISTINCT cs.id, TRIM(u.unit_name)
+                 FROM units u
+                 JOIN subjects s ON u.subject_id = s.id
+                 JOIN catalog_subjects cs ON cs.subject_name = TRIM(s.subject_name)
+                 WHERE u.unit_name IS NOT NULL
+                 ORDER BY 1, 2''')
+
+    # Eski kimlik -> katalog kimliği eşlemeleri
+    c.execute("CREATE TEMP TABLE subject_map (old_id INTEGER PRIMARY KEY, student_id INTEGER, new_id INTEGER)")
+    c.execute("CREATE TEMP TABLE unit_map (old_id INTEGER PRIMARY KEY, student_id INTEGER, new_subject_id INTEGER, new_id INTEGER, is_completed INTEGER)")
+    c.execute('''INSERT INTO subject_map
+                 SELECT s.id, s.student_id, cs.id
+                 FROM subjects s JOIN catalog_subjects cs ON cs.subject_name = TRIM(s.subject_name)''')
+    c.execute('''INSERT INTO unit_map
+                 SELECT u.id, sm.student_id, cu.subject_id, cu.id, u.is_completed
+                 FROM units u
+                 JOIN subject_map sm ON sm.old_id = u.subject_id
+                 JOIN catalog_units cu ON cu.subject_id = sm.new_id AND cu.unit_name = TRIM(u.unit_name)''')
+
+    c.execute('''CREATE TABLE student_subjects (
+                    student_id INTEGER,
+                    subject_id INTEGER,
+                    PRIMARY KEY (student_id, subject_id)
+                ) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE student_units (
+                    student_id INTEGER,
+                    unit_id INTEGER,
+                    subject_id INTEGER NOT NULL,
+                    is_completed INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (student_id, unit_id)
+                ) WITHOUT ROWID''')
+    c.execute('''INSERT OR IGNORE INTO student_subjects (student_id, subject_id)
+                 SELECT student_id, new_id FROM subject_map WHERE student_id IS NOT NULL''')
+    c.execute('''INSERT INTO student_units (student_id, unit_id, subject_id, is_completed)
+                 SELECT student_id, new_id, new_subject_id, MAX(COALESCE(is_completed, 0))
+                 FROM unit_map WHERE student_id IS NOT NULL
+                 GROUP BY student_id, new_id''')
+
+    # Kataloğa eşlenemeyen (ünite/ders adı boş ya da kaydı yok) kayıtlar, eski kimlikleriyle
+    # karantinaya alınır; kalanlar katalog kimliklerine taşınır (aynı adlı mükerrer dersler birleşir)
+    _quarantine(c, 'study_logs', "NOT EXISTS (SELECT 1 FROM unit_map WHERE old_id = study_logs.unit_id)",
+                "göç 6: kataloğa eşlenemedi")
+    _quarantine(c, 'exam_logs', "NOT EXISTS (SELECT 1 FROM subject_map WHERE old_id = exam_logs.subject_id)",
+                "göç 6: kataloğa eşlenemedi")
+    c.execute('''UPDATE study_logs SET
+                    subject_id = (SELECT new_subject_id FROM unit_map WHERE old_id = study_logs.unit_id),
+                    unit_id = (SELECT new_id FROM unit_map WHERE old_id = study_logs.unit_id)''')
+    c.execute("UPDATE exam_logs SET subject_id = (SELECT new_id FROM subject_map WHERE old_id = exam_logs.subject_id)")
+    c.execute("DROP TABLE subject_map")
+    c.execute("DROP TABLE unit_map")
+
+    c.execute("DROP TABLE units")
+    c.execute("DROP TABLE subjects")
+    c.execute("ALTER TABLE catalog_subjects RENAME TO subjects")
+    c.execute("ALTER TABLE catalog_units RENAME TO units")
+    # Öğrencinin ders bazlı ünite listesi ve okul geneli ünite kıyaslamaları
+    c.execute("CREATE INDEX IF NOT EXISTS idx_student_units_subject ON student_units (student_id, subject_id, unit_id, is_completed)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_student_units_unit ON student_units (unit_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_student_subjects_subject ON student_subjects (subject_id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_study_unit_rollup_unit ON study_unit_rollup (unit_id)")
+
+    # Öğrenci üniteyi/dersi bırakınca sadece kendi kayıtları silinir;
+    # katalogdan silme tüm öğrencilere yayılır
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_student_units_delete AFTER DELETE ON student_units BEGIN
+                    DELETE FROM study_logs WHERE student_id = OLD.student_id AND unit_id = OLD.unit_id;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_student_subjects_delete AFTER DELETE ON student_subjects BEGIN
+                    DELETE FROM student_units WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id;
+                    DELETE FROM study_logs WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id;
+                    DELETE FROM exam_logs WHERE student_id = OLD.student_id AND subject_id = OLD.subject_id;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_units_delete AFTER DELETE ON units BEGIN
+                    DELETE FROM student_units WHERE unit_id = OLD.id;
+                    DELETE FROM study_logs WHERE unit_id = OLD.id;
+                END''')
+    c.execute('''CREATE TRIGGER IF NOT EXISTS trg_subjects_delete AFTER DELETE ON subjects BEGIN
+                    DELETE FROM units WHERE subject_id = OLD.id;
+                    DELETE FROM student_subjects WHERE subject_id = OLD.id;
+                    DELETE FROM exam_logs WHERE subject_id = OLD.id;
+                END''')
+
+    # Birleşen kimlikler nedeniyle özetler yeniden hesaplanır
+    c.execute("DELETE FROM study_unit_rollup")
+    c.execute("DELETE FROM study_daily_rollup")
+    c.execute("DELETE FROM exam_subject_rollup")
+    c.execute('''INSERT INTO study_unit_rollup (student_id, unit_id, subject_id, q_solved, q_wrong, q_empty, duration, is_repeated, log_count)
+                 SELECT student_id, unit_id, MIN(subject_id), COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0), COALESCE(SUM(q_empty), 0),
+                        COALESCE(SUM(duration), 0), COALESCE(SUM(is_repeated), 0), COUNT(*)
+                 FROM study_logs GROUP BY student_id, unit_id''')
+    c.execute('''INSERT INTO study_daily_rollup (student_id, date, q_solved, q_wrong, q_empty, duration, log_count)
+                 SELECT student_id, date, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0), COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                 FROM study_logs GROUP BY student_id, date''')
+    c.execute('''INSERT INTO exam_subject_rollup (student_id, subject_id, q_solved, q_wrong, q_empty, duration, exam_count)
+                 SELECT student_id, subject_id, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0), COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                 FROM exam_logs GROUP BY student_id, subject_id''')
+    c.execute("ANALYZE")
+
+
+def _m007_user_browse_indexes(c):
+    # Sayfalı listeler (paging.py): rol filtresi id sırasıyla, ad/e-posta başına göre
+    # arama büyük/küçük harf duyarsız LIKE ile (LIKE yalnızca NOCASE indeksini kullanabilir)
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_role_id ON users (role, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_name_nocase ON users (name COLLATE NOCASE)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_email_nocase ON users (email COLLATE NOCASE)")
+    c.execute("ANALYZE")
+
+
+# Tam metin arama dizini (search.py): satır kimliği = kaynak id * 4 + tür (1 kullanıcı,
+# 2 ders, 3 ünite); ı/İ -> i katlaması dizinde burada, aramada search.fold() ile yapılır
+SEARCH_SOURCES = (
+    ('users', 1, "COALESCE({0}.name, '') || ' ' || COALESCE({0}.email, '') || ' ' || COALESCE({0}.unique_id, '')",
+     "name, email, unique_id"),
+    ('subjects', 2, "{0}.subject_name", "subject_name"),
+    ('units', 3, "{0}.unit_name", "unit_name"),
+)
+
+
+def _search_text(expr):
+    return f"replace(replace({expr}, 'ı', 'i'), 'İ', 'i')"
+
+
+def _m008_search_index(c):
+    c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS search_index
+                 USING fts5(body, tokenize='unicode61 remove_diacritics 2', prefix='2 3')""")
+    for table, kind, body, columns in SEARCH_SOURCES:
+        new, old = _search_text(body.format('NEW')), _search_text(body.format('OLD'))
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS search_{table}_insert AFTER INSERT ON {table} BEGIN
+                        INSERT INTO search_index (rowid, body) VALUES (NEW.id * 4 + {kind}, {new});
+                      END""")
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS search_{table}_update AFTER UPDATE OF {columns} ON {table} BEGIN
+                        DELETE FROM search_index WHERE rowid = OLD.id * 4 + {kind};
+                        INSERT INTO search_index (rowid, body) VALUES (NEW.id * 4 + {kind}, {new});
+                      END""")
+        c.execute(f"""CREATE TRIGGER IF NOT EXISTS search_{table}_delete AFTER DELETE ON {table} BEGIN
+                        DELETE FROM search_index WHERE rowid = OLD.id * 4 + {kind};
+                      END""")
+        c.execute(f"INSERT INTO search_index (rowid, body) SELECT id * 4 + {kind}, {_search_text(body.format(table))} FROM {table}")
+    c.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+
+
+def _m009_progress_state(c):
+    # Artımlı ilerleme motorunun (progress.py) saklanan durumu; ilk okumada öğrenci başına kurulur
+    c.execute('''CREATE TABLE IF NOT EXISTS study_progress_daily (
+                    student_id INTEGER,
+                    date TEXT,
+                    q_solved INTEGER NOT NULL DEFAULT 0,
+                    q_correct INTEGER NOT NULL DEFAULT 0,
+                    cum_solved INTEGER NOT NULL DEFAULT 0,
+                    cum_correct INTEGER NOT NULL DEFAULT 0,
+                    ema_solved REAL NOT NULL DEFAULT 0,
+                    ema_correct REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (student_id, date)
+                ) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS study_unit_mastery (
+                    student_id INTEGER,
+                    unit_id INTEGER,
+                    ref_date TEXT,
+                    w_solved REAL NOT NULL DEFAULT 0,
+                    w_correct REAL NOT NULL DEFAULT 0,
+                    PRIMARY KEY (student_id, unit_id)
+                ) WITHOUT ROWID''')
+    c.execute('''CREATE TABLE IF NOT EXISTS study_progress_state (
+                    student_id INTEGER PRIMARY KEY,
+                    log_count INTEGER NOT NULL DEFAULT 0,
+                    q_solved INTEGER NOT NULL DEFAULT 0
+                )''')
+
+
+def _m010_archive_catalog(c):
+    # Geçmiş dönem arşiv bölümleri (archive.py); dosya adı arşiv klasörüne göredir
+    c.execute('''CREATE TABLE IF NOT EXISTS archive_partitions (
+                    term TEXT PRIMARY KEY,
+                    file TEXT NOT NULL,
+                    date_from TEXT,
+                    date_to TEXT,
+                    study_rows INTEGER NOT NULL DEFAULT 0,
+                    exam_rows INTEGER NOT NULL DEFAULT 0,
+                    archived_at TEXT
+                )''')
+
+
+def _m011_progress_net_success(c):
+    # İlerleme serisi net başarıya (çözülen - yanlış - boş) geçti; eski tanımla saklanan
+    # durum atılır, progress.ensure ilk okumada öğrenci başına yeniden kurar
+    for table in ('study_progress_daily', 'study_unit_mastery', 'study_progress_state'):
+        c.execute(f"DELETE FROM {table}")
+
+
+def _m012_user_search_keys(c):
+    # Ad/e-posta başı araması Türkçe harflerde de büyük/küçük harf duyarsız olsun: NOCASE
+    # yalnızca ASCII'yi katlar ("IŞIK" ile "ışık" eşleşmez). Katlanmış değer sanal kolonda
+    # hesaplanır (search.fold_key), indekslenen ve LIKE ile aranan odur
+    for column in ('name', 'email'):
+        if not any(row[1] == f'{column}_key' for row in c.execute("PRAGMA table_xinfo(users)")):
+            c.execute(f"ALTER TABLE users ADD COLUMN {column}_key TEXT COLLATE NOCASE "
+                      f"GENERATED ALWAYS AS ({search.fold_key_sql(column)}) VIRTUAL")
+        c.execute(f"DROP INDEX IF EXISTS idx_users_{column}_nocase")
+        c.execute(f"CREATE INDEX IF NOT EXISTS idx_users_{column}_key ON users ({column}_key)")
+    c.execute("ANALYZE users")
+
+
+def _m013_archive_forget_queue(c):
+    # Arşivden silme istekleri (archive.forget): ana transaction commit edilince uygulanır.
+    # student_id NULL: tüm arşiv; unit_id NULL: öğrencinin tüm kayıtları
+    c.execute('''CREATE TABLE IF NOT EXISTS archive_forget_queue (
+                    id INTEGER PRIMARY KEY,
+                    student_id INTEGER,
+                    unit_id INTEGER
+                )''')
+
+
+def _m014_cache_generations(c):
+    # Öğrenciye bağlı olmayan önbellek nesilleri (genel analiz sürümü, kullanıcı listeleri)
+    # student_data_versions'taki 0 / -1 satırlarından kendi tablolarına taşınır
+    c.execute('''CREATE TABLE IF NOT EXISTS cache_generations (
+                    key TEXT PRIMARY KEY,
+                    version INTEGER NOT NULL DEFAULT 0
+                )''')
+    _move_generations(c)
+
+
+def _move_generations(c):
+    for key, student_id in (('analysis', 0), ('roster', -1)):
+        c.execute(f"""INSERT INTO cache_generations (key, version)
+                      SELECT '{key}', version FROM student_data_versions WHERE student_id = {student_id}
+                      ON CONFLICT(key) DO NOTHING""")
+    c.execute("DELETE FROM student_data_versions WHERE student_id IN (0, -1)")
+
+
+# (sürüm, açıklama, fonksiyon) — sıra değiştirilmez, sadece sona eklenir
+MIGRATIONS = [
+    (1, "Temel tablolar", _m001_base_schema),
+    (2, "Varsayılan yönetici", _m002_default_admin),
+    (3, "Sorgu indeksleri", _m003_query_indexes),
+    (4, "Öğrenci veri sürümleri", _m004_student_data_versions),
+    (5, "Özet (rollup) tabloları", _m005_rollup_tables),
+    (6, "Ortak müfredat kataloğu", _m006_shared_curriculum),
+    (7, "Kullanıcı listesi sayfalama indeksleri", _m007_user_browse_indexes),
+    (8, "Tam metin arama dizini", _m008_search_index),
+    (9, "Artımlı ilerleme durumu", _m009_progress_state),
+    (10, "Geçmiş dönem arşiv kataloğu", _m010_archive_catalog),
+    (11, "İlerleme serisi net başarı tanımı", _m011_progress_net_success),
+    (12, "Kullanıcı aramasında Türkçe harf katlama", _m012_user_search_keys),
+    (13, "Arşivden silme kuyruğu", _m013_archive_forget_queue),
+    (14, "Önbellek nesilleri tablosu", _m014_cache_generations),
+]
+
+
+def current_version(conn):
+    if not db.table_exists(conn, 'schema_version'):
+        return 0
+    return conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+
+
+def latest_version():
+    return MIGRATIONS[-1][0]
+
+
+def steps():
+    # PostgreSQL'de ilk göçler tek bir temel şemayla kurulur (postgres.py)
+    if db.get_pool().dialect == 'postgres':
+        import postgres
+        return postgres.migration_steps(MIGRATIONS)
+    return MIGRATIONS
+
+
+def migrate(target=None):
+    target = target or latest_version()
+    # Şema güncelse yazıcı kilidi hiç alınmaz
+    with db.read() as conn:
+        if current_version(conn) >= target:
+            return []
+
+    applied = []
+    with db.write() as conn:
+        c = conn.cursor()
+        c.execute('''CREATE TABLE IF NOT EXISTS schema_version (
+                        version INTEGER PRIMARY KEY,
+                        name TEXT,
+                        applied_at TEXT
+                    )''')
+        version = current_version(conn)
+        for number, name, func in steps():
+            if number <= version or number > target:
+                continue
+            func(c)
+            c.execute("INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                      (number, name, datetime.now().isoformat(timespec='seconds')))
+            applied.append(number)
+    return applied
+
+
+_done = set()
+_lock = threading.Lock()
+
+
+def ensure_schema():
+    # Süreç başına bir kez çalışır; sonraki çağrılar sadece bir set kontrolüdür
+    path = db.get_pool().path
+    if path in _done:
+        return
+    with _lock:
+        if path not in _done:
+            migrate()
+            _done.add(path)
+
+
+if __name__ == "__main__":
+    applied = migrate()
+    print(f"Uygulanan göçler: {applied}" if applied else "Şema güncel.")
@@ -0,0 +1,184 @@
+import argparse
+import json
+
+import pandas as pd
+
+import auth
+import curriculum as curriculum_catalog
+import db
+import logs
+import perf
+import roster
+
+# --- TOPLU KULLANICI VE MÜFREDAT KAYDI ---
+# Sınıf listesi (name, role, email, phone, password, teacher, parent) ve müfredat
+# şablonu (subject_name, unit_name) dosyalardan okunur. Kullanıcılar parça parça
+# transaction'larla eklenir; her parçada öğretmen/veli ilişkileri kurulur ve
+# şablondaki dersler/üniteler ortak katalogdan öğrencilere küme tabanlı SQL ile atanır.
+# teacher/parent kolonları e-mail ya da 6 haneli ID içerebilir.
+
+ROLES = ["Öğrenci", "Öğretmen", "Veli"]
+CHUNK_SIZE = 500
+
+
+class OnboardingReport:
+    def __init__(self):
+        self.total = 0
+        self.created = []       # (ad, rol, e-mail, ID, ilk şifre)
+        self.relationships = 0
+        self.subjects = 0
+        self.units = 0
+        self.errors = []        # (satır no, açıklama)
+        self.dry_run = False
+
+    def created_df(self):
+        return pd.DataFrame(self.created, columns=['name', 'role', 'email', 'unique_id', 'initial_password'])
+
+    def errors_df(self):
+        return pd.DataFrame(self.errors, columns=['satir', 'hata'])
+
+
+def _reject(df, report, mask, message):
+    for line in df.index[mask]:
+        report.errors.append((int(line) + 2, message))
+    return df[~mask]
+
+
+def _clean(df, columns):
+    df = df.rename(columns=lambda c: str(c).strip().lower())
+    for col in columns:
+        if col not in df.columns:
+            df[col] = ''
+        df[col] = df[col].fillna('').astype(str).str.strip()
+    return df
+
+
+def validate_roster(df, report):
+    report.total += len(df)
+    df = _clean(df, ['name', 'role', 'email', 'phone', 'password', 'teacher', 'parent'])
+    df = _reject(df, report, df['name'] == '', "Ad Soyad boş")
+    df = _reject(df, report, ~df['role'].isin(ROLES), f"Rol şunlardan biri olmalı: {', '.join(ROLES)}")
+    df = _reject(df, report, df['email'] == '', "E-Mail boş")
+    df = _reject(df, report, df['email'].duplicated(keep='first'), "E-Mail dosyada tekrar ediyor")
+
+    existing = {row[0] for row in db.query_all("SELECT email FROM users WHERE email IN (SELECT value FROM json_each(?))",
+                                               (json.dumps(df['email'].tolist()),))}
+    df = _reject(df, report, df['email'].isin(existing), "E-Mail zaten kayıtlı")
+    return df
+
+
+def validate_curriculum(df, report):
+    df = _clean(df, ['subject_name', 'unit_name'])
+    df = _reject(df, report, df['subject_name'] == '', "Müfredat: ders adı boş")
+    return df[['subject_name', 'unit_name']].drop_duplicates()
+
+
+def _resolve_supervisors(conn, df):
+    # Dosyadaki teacher/parent değerlerini (e-mail veya ID) tek sorguyla kimliğe çevir
+    refs = sorted((set(df['teacher']) | set(df['parent'])) - {''})
+    lookup = {}
+    for user_id, email, unique_id, role in conn.execute(
+            """SELECT id, email, unique_id, role FROM users
+               WHERE email IN (SELECT value FROM json_each(?)) OR unique_id IN (SELECT value FROM json_each(?))""",
+            (json.dumps(refs), json.dumps(refs))):
+        lookup[(email, role)] = user_id
+        lookup[(unique_id, role)] = user_id
+    return lookup
+
+
+def _insert_chunk(chunk, curriculum, report):
+    with db.write() as conn:
+        conn.executemany("INSERT INTO users (name, role, email, phone, password, unique_id) VALUES (?, ?, ?, ?, ?, ?)",
+                         chunk[['name', 'role', 'email', 'phone', 'password_hash', 'unique_id']].itertuples(index=False, name=None))
+        ids = dict(conn.execute("SELECT email, id FROM users WHERE email IN (SELECT value FROM json_each(?))",
+                                (json.dumps(chunk['email'].tolist()),)).fetchall())
+
+        students = chunk[chunk['role'] == "Öğrenci"]
+        lookup = _resolve_supervisors(conn, students)
+        relationships = []
+        for email, teacher, parent in students[['email', 'teacher', 'parent']].itertuples(index=False, name=None):
+            if teacher and (teacher, "Öğretmen") in lookup:
+                relationships.append((lookup[(teacher, "Öğretmen")], ids[email], 'ogretmen'))
+            if parent and (parent, "Veli") in lookup:
+                relationships.append((lookup[(parent, "Veli")], ids[email], 'veli'))
+        conn.executemany("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, ?)", relationships)
+
+        subjects, units = curriculum_catalog.enroll_curriculum(conn, [ids[e] for e in students['email']], curriculum)
+    roster.bump()
+    report.relationships += len(relationships)
+    report.subjects += subjects
+    report.units += units
+
+
+@perf.timed()
+def onboard(roster_df, curriculum=None, dry_run=False, chunk_size=CHUNK_SIZE, progress=None):
+    report = OnboardingReport()
+    report.dry_run = dry_run
+    df = validate_roster(roster_df, report)
+    if curriculum is not None:
+        curriculum = validate_curriculum(curriculum, report)
+
+    # Öğretmen/veli referansları: bu dosyada ya da veritabanında olmalı
+    students = df['role'] == "Öğrenci"
+    for col, role in (('teacher', "Öğretmen"), ('parent', "Veli")):
+        refs = df.loc[students & (df[col] != ''), col]
+        in_file = set(df.loc[df['role'] == role, 'email'])
+        known = {row[0] for row in db.query_all(
+            "SELECT email FROM users WHERE role=? AND email IN (SELECT value FROM json_each(?)) "
+            "UNION SELECT unique_id FROM users WHERE role=? AND unique_id IN (SELECT value FROM json_each(?))",
+            (role, json.dumps(refs.tolist()), role, json.dumps(refs.tolist())))}
+        unknown = refs.index[~refs.isin(in_file | known)]
+        for line in unknown:
+            report.errors.append((int(line) + 2, f"{role} bulunamadı: {df.at[line, col]}"))
+        df.loc[unknown, col] = ''
+
+    # Kimlikler tek seferde ayrılır, şifresi olmayanlara rastgele ilk şifre verilir
+    taken = {row[0] for row in db.query_all("SELECT unique_id FROM users")}
+    df = df.assign(unique_id=auth.allocate_unique_ids(len(df), taken))
+    generated = df['password'] == ''
+    df.loc[generated, 'password'] = [auth.generate_password() for _ in range(int(generated.sum()))]
+    df['password_hash'] = auth.hash_many(df['password'].tolist()) if not dry_run else ''
+    report.created = [(r.name, r.role, r.email, r.unique_id, r.password if g else '')
+                      for r, g in zip(df.itertuples(), generated)]
+    if dry_run:
+        # Deneme çalıştırmasında oluşturulacak kayıtların tahmini
+        student_count = int(students.sum())
+        report.relationships = int(((df['teacher'] != '') & students).sum() + ((df['parent'] != '') & students).sum())
+        if curriculum is not None:
+            report.subjects = student_count * curriculum['subject_name'].nunique()
+            report.units = student_count * int((curriculum['unit_name'] != '').sum())
+        return report
+    if df.empty:
+        return report
+
+    # Önce öğretmen/veliler, sonra öğrenciler (ilişkiler için)
+    ordered = pd.concat([df[~students], df[students]])
+    total = len(ordered)
+    for start in range(0, total, chunk_size):
+        _insert_chunk(ordered.iloc[start:start + chunk_size], curriculum, report)
+        if progress:
+            progress(min(start + chunk_size, total), total)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Toplu kullanıcı ve müfredat kaydı")
+    parser.add_argument("roster", help="Sınıf listesi (CSV/Excel)")
+    parser.add_argument("--curriculum", help="Müfredat şablonu (CSV/Excel)")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece kontrol et, kaydetme")
+    parser.add_argument("--out", help="Oluşturulan hesaplar ve ilk şifreler için CSV")
+    args = parser.parse_args()
+
+    import migrations
+    migrations.ensure_schema()
+    # Modül adlarını (roster, curriculum) gölgelememek için _df
+    roster_df = logs.read_table(args.roster)
+    curriculum_df = logs.read_table(args.curriculum) if args.curriculum else None
+    report = onboard(roster_df, curriculum_df, args.dry_run)
+    print(f"Satır: {report.total} | Hesap: {len(report.created)} | İlişki: {report.relationships} | "
+          f"Ders: {report.subjects} | Ünite: {report.units} | Hata: {len(report.errors)}"
+          + (" (deneme çalıştırması)" if args.dry_run else ""))
+    for line, message in report.errors:
+        print(f"  satır {line}: {message}")
+    if args.out:
+        report.created_df().to_csv(args.out, index=False, encoding='utf-8-sig')
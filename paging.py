@@ -0,0 +1,85 @@
+import pandas as pd
+
+import db
+import roster
+import search
+
+# --- SUNUCU TARAFLI SAYFALAMA (KEYSET) ---
+# Yönetici, öğretmen, veli ve öğrenci listeleri tabloyu bütün olarak DataFrame'e
+# almaz: her sayfa "son görülen anahtardan büyük ilk N kayıt" sorgusuyla gelir.
+# OFFSET'in aksine ileri sayfalar yavaşlamaz (indeks aralık taraması) ve
+# yeniden çalıştırma başına bellekte yalnızca bir sayfa tutulur.
+# Arama: ad veya e-posta başı (Türkçe harfler dahil katlanmış name_key/email_key
+# indeksleri, büyük/küçük harf duyarsız)
+# ya da 6 haneli ID (tam eşleşme). Filtreler anahtar sırasını bozmaz.
+
+PAGE_SIZE = 50
+
+USER_COLUMNS = "u.id, u.name, u.email, u.unique_id, u.role"
+
+
+class Page(roster.Roster):
+    # Sorgu limit + 1 satır getirir: fazladan satır varsa sonraki sayfa vardır
+    def __init__(self, df, limit, key, labels=None):
+        self.has_next = len(df) > limit
+        df = df.iloc[:limit]
+        super().__init__(df, labels if labels is None else labels[:limit])
+        self.next_key = key(df.iloc[-1]) if self.has_next else None
+
+
+def like_prefix(text):
+    # LIKE joker karakterleri aranan metinde düz karakter olarak kalsın
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+
+
+def _search(text, params):
+    text = (text or '').strip()
+    if not text:
+        return ""
+    prefix = like_prefix(search.fold_key(text))
+    params.extend([prefix, prefix, text.upper()])
+    # Her koşul kendi indeksinden okunur (tek bir OR'da planlayıcı id taramasını seçiyor)
+    return """ AND u.id IN (SELECT id FROM users WHERE name_key LIKE ? ESCAPE '\\'
+                           UNION ALL SELECT id FROM users WHERE email_key LIKE ? ESCAPE '\\'
+                           UNION ALL SELECT id FROM users WHERE unique_id = ?)"""
+
+
+def users(after=None, search=None, role=None, limit=PAGE_SIZE):
+    params = [after or 0]
+    sql = f"SELECT {USER_COLUMNS} FROM users u WHERE u.id > ?"
+    if role:
+        sql += " AND u.role = ?"
+        params.append(role)
+    sql += _search(search, params) + " ORDER BY u.id LIMIT ?"
+    df = db.query_df(sql, params + [limit + 1])
+    return Page(df, limit, lambda row: int(row['id']), (df['name'].fillna('') + " (" + df['role'].fillna('') + ")").tolist())
+
+
+def students_of(supervisor_id, rel_type, after=None, search=None, limit=PAGE_SIZE):
+    # İlişki indeksi (supervisor_id, type, student_id) sırasıyla taranır
+    params = [supervisor_id, rel_type, after or 0]
+    sql = f"""SELECT DISTINCT {USER_COLUMNS} FROM relationships r JOIN users u ON u.id = r.student_id
+              WHERE r.supervisor_id = ? AND r.type = ? AND r.student_id > ?"""
+    sql += _search(search, params) + " ORDER BY r.student_id LIMIT ?"
+    return Page(db.query_df(sql, params + [limit + 1]), limit, lambda row: int(row['id']))
+
+
+def student_units(student_id, after=None, limit=PAGE_SIZE):
+    # Anahtar (ders, ünite); öğrencinin dersleri (student_id, subject_id) sırasıyla, her derse
+    # ünite indeksi (student_id, subject_id, unit_id) ile bağlanır. Ünitesi olmayan ders de
+    # tek satır olarak listelenir: ünite anahtarı 0 (gerçek ünite kimlikleri 1'den başlar)
+    subject_id, unit_id = after or (0, 0)
+    df = db.query_df("""
+        SELECT s.subject_name, u.unit_name, su.unit_id, ss.subject_id
+        FROM student_subjects ss
+        JOIN subjects s ON ss.subject_id = s.id
+        LEFT JOIN student_units su ON su.student_id = ss.student_id AND su.subject_id = ss.subject_id
+        LEFT JOIN units u ON su.unit_id = u.id
+        WHERE ss.student_id = ? AND (ss.subject_id, COALESCE(su.unit_id, 0)) > (?, ?)
+        ORDER BY ss.subject_id, COALESCE(su.unit_id, 0)
+        LIMIT ?
+    """, (int(student_id), subject_id, unit_id, limit + 1))
+    df['unit_id'] = df['unit_id'].astype('Int64')
+    return Page(df.rename(columns={'unit_id': 'id'}), limit,
+                lambda row: (int(row['subject_id']), 0 if pd.isna(row['id']) else int(row['id'])),
+                df['unit_name'].fillna(df['subject_name']).tolist())
@@ -0,0 +1,216 @@
+import functools
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+# --- ÇALIŞMA ZAMANI ÖLÇÜMLERİ ---
+# Yeniden çalıştırma (rerun) başına süre, sorgu sayısı/süresi, işaretli bölümlerin
+# süreleri ve bellek (RSS) farkı toplanır. Sorgular normalleştirilmiş SQL metni
+# başına sayılır; eşik üstündeki okuma sorgularının EXPLAIN QUERY PLAN çıktısı
+# bir kez yakalanır. Veriler süreç içinde tutulur, yönetici "Performans"
+# menüsünden görüntülenir ve JSON olarak indirilir.
+
+ENABLED = os.environ.get('OGRENCI_TAKIP_PROFILE', '1') != '0'
+SLOW_QUERY_MS = float(os.environ.get('OGRENCI_TAKIP_SLOW_QUERY_MS', '50'))
+MAX_RERUNS = int(os.environ.get('OGRENCI_TAKIP_PROFILE_RERUNS', '200'))
+MAX_QUERIES = 500
+
+_local = threading.local()
+_lock = threading.Lock()
+_queries = {}
+_sections = {}
+_reruns = deque(maxlen=MAX_RERUNS)
+_started = datetime.now()
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def set_enabled(enabled):
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def normalize(sql):
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def _rss_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        # /proc yoksa en yüksek RSS (Linux'ta KB, macOS'ta bayt)
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024 if resource else 0
+
+
+def _explain(conn, sql, params):
+    depth = getattr(_local, 'query_depth', 0)
+    _local.query_depth = depth + 1   # planın kendisi sorgu olarak sayılmasın
+    try:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    except Exception as e:
+        return [f"(plan alınamadı: {e})"]
+    finally:
+        _local.query_depth = depth
+    return [row[-1] for row in rows]
+
+
+# --- SORGULAR ---
+
+def record_query(sql, seconds, conn=None, params=()):
+    run = getattr(_local, 'rerun', None)
+    if run is not None:
+        run['queries'] += 1
+        run['query_ms'] += seconds * 1000
+    key = normalize(sql)
+    with _lock:
+        stat = _queries.get(key)
+        if stat is None:
+            if len(_queries) >= MAX_QUERIES:
+                key = '(diğer)'
+                stat = _queries.setdefault(key, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'plan': None})
+            else:
+                stat = _queries[key] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'plan': None}
+        stat['count'] += 1
+        stat['total_ms'] += seconds * 1000
+        stat['max_ms'] = max(stat['max_ms'], seconds * 1000)
+        need_plan = (stat['plan'] is None and seconds * 1000 >= SLOW_QUERY_MS and conn is not None
+                     and key.split(' ', 1)[0].upper() in ('SELECT', 'WITH'))
+    if need_plan:
+        plan = _explain(conn, sql, params)
+        with _lock:
+            stat['plan'] = plan
+
+
+@contextmanager
+def query(sql, conn=None, params=()):
+    # Yardımcı fonksiyonlar (okuma + fetch + DataFrame) tek sorgu olarak ölçülür;
+    # içerideki imleç çağrıları ikinci kez sayılmaz
+    if not ENABLED:
+        yield
+        return
+    depth = getattr(_local, 'query_depth', 0)
+    _local.query_depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _local.query_depth = depth
+        if depth == 0:
+            record_query(sql, time.perf_counter() - start, conn, params)
+
+
+def in_query():
+    return getattr(_local, 'query_depth', 0) > 0
+
+
+# --- BÖLÜMLER ---
+
+def record_section(name, seconds):
+    run = getattr(_local, 'rerun', None)
+    if run is not None:
+        run['sections'][name] = run['sections'].get(name, 0.0) + seconds * 1000
+    with _lock:
+        stat = _sections.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stat['count'] += 1
+        stat['total_ms'] += seconds * 1000
+        stat['max_ms'] = max(stat['max_ms'], seconds * 1000)
+
+
+@contextmanager
+def section(name):
+    if not ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_section(name, time.perf_counter() - start)
+
+
+def timed(name=None):
+    def decorator(func):
+        label = name or f"{func.__module__}.{func.__name__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with section(label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# --- YENİDEN ÇALIŞTIRMALAR ---
+
+@contextmanager
+def rerun(label):
+    # st.rerun()/st.stop() istisnayla çıktığından kayıt finally içinde yapılır
+    if not ENABLED or getattr(_local, 'rerun', None) is not None:
+        yield
+        return
+    run = {'time': datetime.now().isoformat(timespec='seconds'), 'page': label, 'queries': 0,
+           'query_ms': 0.0, 'sections': {}}
+    _local.rerun = run
+    rss = _rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield run
+    finally:
+        run['duration_ms'] = (time.perf_counter() - start) * 1000
+        run['rss_delta_kb'] = (_rss_bytes() - rss) / 1024
+        _local.rerun = None
+        with _lock:
+            _reruns.append(run)
+
+
+# --- RAPOR ---
+
+def reruns():
+    with _lock:
+        return [dict(run, sections=dict(run['sections'])) for run in _reruns]
+
+
+def query_stats():
+    with _lock:
+        return [dict(stat, sql=sql) for sql, stat in _queries.items()]
+
+
+def section_stats():
+    with _lock:
+        return [dict(stat, name=name) for name, stat in _sections.items()]
+
+
+def reset():
+    with _lock:
+        _queries.clear()
+        _sections.clear()
+        _reruns.clear()
+
+
+def snapshot(extra=None):
+    data = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'process_started': _started.isoformat(timespec='seconds'),
+        'slow_query_ms': SLOW_QUERY_MS,
+        'rss_kb': _rss_bytes() / 1024,
+        'reruns': reruns(),
+        'queries': sorted(query_stats(), key=lambda s: s['total_ms'], reverse=True),
+        'sections': sorted(section_stats(), key=lambda s: s['total_ms'], reverse=True),
+    }
+    data.update(extra or {})
+    return data
+
+
+def to_json(extra=None):
+    return json.dumps(snapshot(extra), ensure_ascii=False, indent=2, default=str).encode('utf-8')
@@ -0,0 +1,500 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+
+import db
+import perf
+
+# --- POSTGRESQL DEPOLAMA ARKA UCU (DENEYSEL) ---
+# OGRENCI_TAKIP_DB_URL=postgresql://... ve OGRENCI_TAKIP_EXPERIMENTAL_POSTGRES=1
+# ile seçilir. Özet, sayfalama, arama ve kayıt testleri geçici bir sunucuya karşı da
+# çalışır (tests/conftest.py); diğer modüller yalnızca SQLite'ta sınandığından
+# kurulumdan önce benchmarks/backend_latency.py ile denenmelidir. Birden fazla Streamlit
+# düğümü aynı veritabanını paylaşabilir. Uygulama kodu SQLite söz dizimiyle
+# yazılmaya devam eder: ? parametreleri, INSERT OR IGNORE, julianday(), json_each(?) ve
+# CAST(... AS REAL) burada PostgreSQL karşılıklarına çevrilir; SQLite'ta büyük/küçük
+# harf duyarsız olan LIKE, ILIKE olur. Bağlantılar psycopg_pool ile havuzlanır;
+# okuma/yazma arayüzü db.ConnectionPool ile aynıdır
+# (iç içe write() aynı transaction'ı kullanır). Özet tabloları satır yerine
+# ifade (statement) düzeyinde trigger'larla sunucuda toplanır.
+# Gerekli paketler (isteğe bağlı): psycopg[binary], psycopg_pool
+
+# INSERT sonrası lastrowid için RETURNING id eklenen tablolar
+ID_TABLES = {'users', 'relationships', 'subjects', 'units', 'study_logs', 'exam_logs'}
+
+_INSERT = re.compile(r'^\s*INSERT\s+(OR\s+IGNORE\s+)?INTO\s+(\w+)', re.IGNORECASE)
+_JULIANDAY = re.compile(r'julianday\(([^()]*)\)', re.IGNORECASE)
+_REAL = re.compile(r'\bAS\s+REAL\b', re.IGNORECASE)
+_LIKE = re.compile(r'\bLIKE\b', re.IGNORECASE)
+_EXPLAIN = re.compile(r'^\s*EXPLAIN\s+QUERY\s+PLAN\b', re.IGNORECASE)
+_JSON_EACH = re.compile(r'\bjson_each\(%s\)', re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def translate(sql, many=False):
+    # Döner: (PostgreSQL sorgusu, RETURNING id eklendi mi)
+    text = sql.strip().rstrip(';').replace('%', '%%').replace('?', '%s')
+    text = _EXPLAIN.sub('EXPLAIN', text)
+    text = _JULIANDAY.sub(r'(EXTRACT(EPOCH FROM CAST(\1 AS TIMESTAMP)) / 86400.0)', text)
+    text = _REAL.sub('AS DOUBLE PRECISION', text)
+    # JSON dizisi parametresi: SQLite json_each ile aynı 'value' kolonu (metin; sayı karşılaştırmada CAST edilir)
+    text = _JSON_EACH.sub('json_array_elements_text(CAST(%s AS json))', text)
+    text = _LIKE.sub('ILIKE', text)
+    returning = False
+    match = _INSERT.match(text)
+    if match:
+        if match.group(1):
+            text = text[:match.start(1)] + text[match.end(1):] + " ON CONFLICT DO NOTHING"
+        if not many and match.group(2).lower() in ID_TABLES and 'RETURNING' not in text.upper():
+            text += " RETURNING id"
+            returning = True
+    return text, returning
+
+
+class PgCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.lastrowid = None
+
+    def execute(self, sql, params=()):
+        text, returning = translate(sql)
+        start = time.perf_counter()
+        try:
+            self._cursor.execute(text, tuple(params))
+            if returning:
+                row = self._cursor.fetchone()
+                self.lastrowid = row[0] if row else None
+        finally:
+            if perf.ENABLED and not perf.in_query():
+                perf.record_query(sql, time.perf_counter() - start)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        text, _ = translate(sql, many=True)
+        start = time.perf_counter()
+        try:
+            self._cursor.executemany(text, [tuple(p) for p in seq_of_params])
+        finally:
+            if perf.ENABLED and not perf.in_query():
+                perf.record_query(sql, time.perf_counter() - start)
+        return self
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self._cursor.fetchmany(size)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def close(self):
+        self._cursor.close()
+
+
+class PgConnection:
+    def __init__(self, conn):
+        self.raw = conn
+
+    def cursor(self):
+        return PgCursor(self.raw.cursor())
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+class PostgresPool:
+    dialect = 'postgres'
+
+    def __init__(self, url, size=db.POOL_SIZE, timeout=db.POOL_TIMEOUT):
+        try:
+            from psycopg_pool import ConnectionPool, PoolTimeout
+        except ImportError as e:
+            raise RuntimeError("PostgreSQL için 'psycopg[binary]' ve 'psycopg_pool' paketleri gerekli.") from e
+        self._pool_timeout = PoolTimeout
+        # Havuz anahtarı olarak şifresiz adres (ensure_schema, yönetici ekranı)
+        self.path = re.sub(r'//([^:/@]+):[^@]*@', r'//\1:***@', url)
+        self.size = size
+        self.timeout = timeout
+        self._pool = ConnectionPool(url, min_size=1, max_size=size, timeout=timeout,
+                                    kwargs={'autocommit': True}, open=True)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {'read_checkouts': 0, 'writes': 0, 'rollbacks': 0, 'write_wait_seconds': 0.0}
+
+    @contextmanager
+    def _connection(self):
+        try:
+            with self._pool.connection() as conn:
+                yield PgConnection(conn)
+        except self._pool_timeout:
+            raise db.PoolTimeout(f"{self.timeout} sn içinde boş bağlantı bulunamadı.")
+
+    @contextmanager
+    def read(self):
+        held = getattr(self._local, 'reader', None) or getattr(self._local, 'writer', None)
+        if held is not None:
+            yield held
+            return
+        with self._lock:
+            self._stats['read_checkouts'] += 1
+        with self._connection() as conn:
+            self._local.reader = conn
+            try:
+                yield conn
+            finally:
+                self._local.reader = None
+
+    # SQLite'taki tek yazıcı kilidi yok: her thread kendi bağlantısında transaction
+    # açar, eşzamanlılığı sunucu (satır kilitleri) yönetir. Sunucu commit'i zaten
+    # kalıcı yazdıktan sonra döner (synchronous_commit=on); durable ek bir şey yapmaz.
+    @contextmanager
+    def write(self, durable=False):
+        writer = getattr(self._local, 'writer', None)
+        if writer is not None:
+            yield writer
+            return
+        start = time.perf_counter()
+        with self._connection() as conn:
+            with self._lock:
+                self._stats['write_wait_seconds'] += time.perf_counter() - start
+            conn.raw.execute("BEGIN")
+            self._local.writer = conn
+            self._local.after_commit = []
+            try:
+                yield conn
+            except BaseException:
+                conn.raw.execute("ROLLBACK")
+                with self._lock:
+                    self._stats['rollbacks'] += 1
+                raise
+            finally:
+                self._local.writer = None
+            conn.raw.execute("COMMIT")
+            with self._lock:
+                self._stats['writes'] += 1
+        callbacks, self._local.after_commit = self._local.after_commit, []
+        for func in callbacks:
+            func()
+
+    def after_commit(self, func):
+        if getattr(self._local, 'writer', None) is None:
+            raise RuntimeError("after_commit yalnızca bir yazma transaction'ı içinde kullanılabilir.")
+        self._local.after_commit.append(func)
+
+    def table_exists(self, conn, name):
+        return conn.execute("SELECT 1 FROM information_schema.tables WHERE table_schema = current_schema() AND table_name = ?",
+                            (name,)).fetchone() is not None
+
+    def stats(self):
+        with self._lock:
+            result = dict(self._stats)
+        pool = self._pool.get_stats()
+        result['pool_size'] = self.size
+        result['connections_created'] = pool.get('pool_size', 0)
+        result['idle'] = pool.get('pool_available', 0)
+        result['in_use'] = result['connections_created'] - result['idle']
+        result['read_waits'] = pool.get('requests_waiting', 0)
+        result['backend'] = self.path
+        return result
+
+    def close(self):
+        self._pool.close()
+
+
+# --- ŞEMA ---
+# SQLite göçlerinin (1-BASELINE_VERSION) son hali tek seferde kurulur; sonraki
+# göçlerin PostgreSQL karşılıkları STEPS sözlüğüne eklenir.
+
+BASELINE_VERSION = 6
+
+ROLLUP_FUNCTIONS = '''
+CREATE OR REPLACE FUNCTION study_logs_rollup_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO study_unit_rollup AS r (student_id, unit_id, subject_id, q_solved, q_wrong, q_empty, duration, is_repeated, log_count)
+    SELECT student_id, unit_id, MIN(subject_id), SUM(COALESCE(q_solved, 0)), SUM(COALESCE(q_wrong, 0)), SUM(COALESCE(q_empty, 0)),
+           SUM(COALESCE(duration, 0)), SUM(COALESCE(is_repeated, 0)), COUNT(*)
+    FROM new_rows GROUP BY student_id, unit_id
+    ON CONFLICT (student_id, unit_id) DO UPDATE SET
+        q_solved = r.q_solved + excluded.q_solved, q_wrong = r.q_wrong + excluded.q_wrong,
+        q_empty = r.q_empty + excluded.q_empty, duration = r.duration + excluded.duration,
+        is_repeated = r.is_repeated + excluded.is_repeated, log_count = r.log_count + excluded.log_count;
+    INSERT INTO study_daily_rollup AS r (student_id, date, q_solved, q_wrong, q_empty, duration, log_count)
+    SELECT student_id, date, SUM(COALESCE(q_solved, 0)), SUM(COALESCE(q_wrong, 0)), SUM(COALESCE(q_empty, 0)),
+           SUM(COALESCE(duration, 0)), COUNT(*)
+    FROM new_rows GROUP BY student_id, date
+    ON CONFLICT (student_id, date) DO UPDATE SET
+        q_solved = r.q_solved + excluded.q_solved, q_wrong = r.q_wrong + excluded.q_wrong,
+        q_empty = r.q_empty + excluded.q_empty, duration = r.duration + excluded.duration,
+        log_count = r.log_count + excluded.log_count;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION study_logs_rollup_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE study_unit_rollup r SET
+        q_solved = r.q_solved - o.q_solved, q_wrong = r.q_wrong - o.q_wrong, q_empty = r.q_empty - o.q_empty,
+        duration = r.duration - o.duration, is_repeated = r.is_repeated - o.is_repeated, log_count = r.log_count - o.n
+    FROM (SELECT student_id, unit_id, SUM(COALESCE(q_solved, 0)) AS q_solved, SUM(COALESCE(q_wrong, 0)) AS q_wrong,
+                 SUM(COALESCE(q_empty, 0)) AS q_empty, SUM(COALESCE(duration, 0)) AS duration,
+                 SUM(COALESCE(is_repeated, 0)) AS is_repeated, COUNT(*) AS n
+          FROM old_rows GROUP BY student_id, unit_id) o
+    WHERE r.student_id = o.student_id AND r.unit_id = o.unit_id;
+    DELETE FROM study_unit_rollup WHERE log_count <= 0;
+    UPDATE study_daily_rollup r SET
+        q_solved = r.q_solved - o.q_solved, q_wrong = r.q_wrong - o.q_wrong, q_empty = r.q_empty - o.q_empty,
+        duration = r.duration - o.duration, log_count = r.log_count - o.n
+    FROM (SELECT student_id, date, SUM(COALESCE(q_solved, 0)) AS q_solved, SUM(COALESCE(q_wrong, 0)) AS q_wrong,
+                 SUM(COALESCE(q_empty, 0)) AS q_empty, SUM(COALESCE(duration, 0)) AS duration, COUNT(*) AS n
+          FROM old_rows GROUP BY student_id, date) o
+    WHERE r.student_id = o.student_id AND r.date = o.date;
+    DELETE FROM study_daily_rollup WHERE log_count <= 0;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION exam_logs_rollup_insert() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO exam_subject_rollup AS r (student_id, subject_id, q_solved, q_wrong, q_empty, duration, exam_count)
+    SELECT student_id, subject_id, SUM(COALESCE(q_solved, 0)), SUM(COALESCE(q_wrong, 0)), SUM(COALESCE(q_empty, 0)),
+           SUM(COALESCE(duration, 0)), COUNT(*)
+    FROM new_rows GROUP BY student_id, subject_id
+    ON CONFLICT (student_id, subject_id) DO UPDATE SET
+        q_solved = r.q_solved + excluded.q_solved, q_wrong = r.q_wrong + excluded.q_wrong,
+        q_empty = r.q_empty + excluded.q_empty, duration = r.duration + excluded.duration,
+        exam_count = r.exam_count + excluded.exam_count;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION exam_logs_rollup_delete() RETURNS trigger AS $$
+BEGIN
+    UPDATE exam_subject_rollup r SET
+        q_solved = r.q_solved - o.q_solved, q_wrong = r.q_wrong - o.q_wrong, q_empty = r.q_empty - o.q_empty,
+        duration = r.duration - o.duration, exam_count = r.exam_count - o.n
+    FROM (SELECT student_id, subject_id, SUM(COALESCE(q_solved, 0)) AS q_solved, SUM(COALESCE(q_wrong, 0)) AS q_wrong,
+                 SUM(COALESCE(q_empty, 0)) AS q_empty, SUM(COALESCE(duration, 0)) AS duration, COUNT(*) AS n
+          FROM old_rows GROUP BY student_id, subject_id) o
+    WHERE r.student_id = o.student_id AND r.subject_id = o.subject_id;
+    DELETE FROM exam_subject_rollup WHERE exam_count <= 0;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION student_units_cascade() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM study_logs l USING old_rows o WHERE l.student_id = o.student_id AND l.unit_id = o.unit_id;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION student_subjects_cascade() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM student_units u USING old_rows o WHERE u.student_id = o.student_id AND u.subject_id = o.subject_id;
+    DELETE FROM study_logs l USING old_rows o WHERE l.student_id = o.student_id AND l.subject_id = o.subject_id;
+    DELETE FROM exam_logs e USING old_rows o WHERE e.student_id = o.student_id AND e.subject_id = o.subject_id;
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION units_cascade() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM student_units WHERE unit_id IN (SELECT id FROM old_rows);
+    DELETE FROM study_logs WHERE unit_id IN (SELECT id FROM old_rows);
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION subjects_cascade() RETURNS trigger AS $$
+BEGIN
+    DELETE FROM units WHERE subject_id IN (SELECT id FROM old_rows);
+    DELETE FROM student_subjects WHERE subject_id IN (SELECT id FROM old_rows);
+    DELETE FROM exam_logs WHERE subject_id IN (SELECT id FROM old_rows);
+    RETURN NULL;
+END $$ LANGUAGE plpgsql;
+'''
+
+TRIGGERS = [
+    ('trg_study_logs_insert', 'study_logs', 'INSERT', 'NEW TABLE AS new_rows', 'study_logs_rollup_insert'),
+    ('trg_study_logs_delete', 'study_logs', 'DELETE', 'OLD TABLE AS old_rows', 'study_logs_rollup_delete'),
+    ('trg_exam_logs_insert', 'exam_logs', 'INSERT', 'NEW TABLE AS new_rows', 'exam_logs_rollup_insert'),
+    ('trg_exam_logs_delete', 'exam_logs', 'DELETE', 'OLD TABLE AS old_rows', 'exam_logs_rollup_delete'),
+    ('trg_student_units_delete', 'student_units', 'DELETE', 'OLD TABLE AS old_rows', 'student_units_cascade'),
+    ('trg_student_subjects_delete', 'student_subjects', 'DELETE', 'OLD TABLE AS old_rows', 'student_subjects_cascade'),
+    ('trg_units_delete', 'units', 'DELETE', 'OLD TABLE AS old_rows', 'units_cascade'),
+    ('trg_subjects_delete', 'subjects', 'DELETE', 'OLD TABLE AS old_rows', 'subjects_cascade'),
+]
+
+SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS users (
+           id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+           name TEXT, role TEXT, email TEXT UNIQUE, phone TEXT, password TEXT, unique_id TEXT UNIQUE
+       )''',
+    '''CREATE TABLE IF NOT EXISTS relationships (
+           id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+           supervisor_id INTEGER, student_id INTEGER, type TEXT
+       )''',
+    '''CREATE TABLE IF NOT EXISTS subjects (
+           id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+           subject_name TEXT NOT NULL UNIQUE
+       )''',
+    '''CREATE TABLE IF NOT EXISTS units (
+           id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+           subject_id INTEGER NOT NULL, unit_name TEXT NOT NULL,
+           UNIQUE (subject_id, unit_name)
+       )''',
+    '''CREATE TABLE IF NOT EXISTS student_subjects (
+           student_id INTEGER, subject_id INTEGER, PRIMARY KEY (student_id, subject_id)
+       )''',
+    '''CREATE TABLE IF NOT EXISTS student_units (
+           student_id INTEGER, unit_id INTEGER, subject_id INTEGER NOT NULL,
+           is_completed INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (student_id, unit_id)
+       )''',
+    '''CREATE TABLE IF NOT EXISTS study_logs (
+           id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+           student_id INTEGER, subject_id INTEGER, unit_id INTEGER, date TEXT,
+           q_solved INTEGER, q_wrong INTEGER, q_empty INTEGER, duration INTEGER, is_repeated INTEGER DEFAULT 0
+       )''',
+    '''CREATE TABLE IF NOT EXISTS exam_logs (
+           id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+           student_id INTEGER, subject_id INTEGER, date TEXT,
+           q_solved INTEGER, q_wrong INTEGER, q_empty INTEGER, duration INTEGER
+       )''',
+    '''CREATE TABLE IF NOT EXISTS student_data_versions (
+           student_id INTEGER PRIMARY KEY, version INTEGER NOT NULL DEFAULT 0
+       )''',
+    '''CREATE TABLE IF NOT EXISTS study_unit_rollup (
+           student_id INTEGER, unit_id INTEGER, subject_id INTEGER,
+           q_solved BIGINT NOT NULL DEFAULT 0, q_wrong BIGINT NOT NULL DEFAULT 0, q_empty BIGINT NOT NULL DEFAULT 0,
+           duration BIGINT NOT NULL DEFAULT 0, is_repeated BIGINT NOT NULL DEFAULT 0, log_count BIGINT NOT NULL DEFAULT 0,
+           PRIMARY KEY (student_id, unit_id)
+       )''',
+    '''CREATE TABLE IF NOT EXISTS study_daily_rollup (
+           student_id INTEGER, date TEXT,
+           q_solved BIGINT NOT NULL DEFAULT 0, q_wrong BIGINT NOT NULL DEFAULT 0, q_empty BIGINT NOT NULL DEFAULT 0,
+           duration BIGINT NOT NULL DEFAULT 0, log_count BIGINT NOT NULL DEFAULT 0,
+           PRIMARY KEY (student_id, date)
+       )''',
+    '''CREATE TABLE IF NOT EXISTS exam_subject_rollup (
+           student_id INTEGER, subject_id INTEGER,
+           q_solved BIGINT NOT NULL DEFAULT 0, q_wrong BIGINT NOT NULL DEFAULT 0, q_empty BIGINT NOT NULL DEFAULT 0,
+           duration BIGINT NOT NULL DEFAULT 0, exam_count BIGINT NOT NULL DEFAULT 0,
+           PRIMARY KEY (student_id, subject_id)
+       )''',
+    # SQLite'taki kapsayan (covering) indekslerin karşılığı INCLUDE kolonları
+    '''CREATE INDEX IF NOT EXISTS idx_study_logs_student_date ON study_logs (student_id, date)
+       INCLUDE (subject_id, unit_id, q_solved, q_wrong, q_empty, duration, is_repeated)''',
+    '''CREATE INDEX IF NOT EXISTS idx_exam_logs_student_date ON exam_logs (student_id, date)
+       INCLUDE (subject_id, q_solved, q_wrong, q_empty, duration)''',
+    "CREATE INDEX IF NOT EXISTS idx_study_logs_unit ON study_logs (unit_id)",
+    "CREATE INDEX IF NOT EXISTS idx_study_logs_subject ON study_logs (subject_id)",
+    "CREATE INDEX IF NOT EXISTS idx_exam_logs_subject ON exam_logs (subject_id)",
+    "CREATE INDEX IF NOT EXISTS idx_relationships_supervisor ON relationships (supervisor_id, type, student_id)",
+    "CREATE INDEX IF NOT EXISTS idx_relationships_student ON relationships (student_id, supervisor_id)",
+    "CREATE INDEX IF NOT EXISTS idx_units_subject ON units (subject_id)",
+    "CREATE INDEX IF NOT EXISTS idx_users_role ON users (role, name)",
+    "CREATE INDEX IF NOT EXISTS idx_student_units_subject ON student_units (student_id, subject_id, unit_id, is_completed)",
+    "CREATE INDEX IF NOT EXISTS idx_student_units_unit ON student_units (unit_id)",
+    "CREATE INDEX IF NOT EXISTS idx_student_subjects_subject ON student_subjects (subject_id)",
+    "CREATE INDEX IF NOT EXISTS idx_study_unit_rollup_unit ON study_unit_rollup (unit_id)",
+]
+
+
+def _baseline(c):
+    # c: PgCursor; DDL çevrilmeden doğrudan çalışır ($$ ve % içerir)
+    raw = c._cursor
+    for statement in SCHEMA:
+        raw.execute(statement)
+    raw.execute(ROLLUP_FUNCTIONS)
+    for name, table, event, transition, func in TRIGGERS:
+        raw.execute(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        raw.execute(f"CREATE TRIGGER {name} AFTER {event} ON {table} REFERENCING {transition} "
+                    f"FOR EACH STATEMENT EXECUTE FUNCTION {func}()")
+    import migrations
+    migrations._m002_default_admin(c)
+    raw.execute("ANALYZE")
+
+
+def _skip(c):
+    pass
+
+
+def _user_browse_indexes(c):
+    # ILIKE B-tree indeksi kullanamaz; ad/e-posta araması rol/id taramasına filtre olarak uygulanır
+    c.execute("CREATE INDEX IF NOT EXISTS idx_users_role_id ON users (role, id)")
+    c.execute("ANALYZE users")
+
+
+def _progress_state(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS study_progress_daily (
+                   student_id INTEGER, date TEXT,
+                   q_solved BIGINT NOT NULL DEFAULT 0, q_correct BIGINT NOT NULL DEFAULT 0,
+                   cum_solved BIGINT NOT NULL DEFAULT 0, cum_correct BIGINT NOT NULL DEFAULT 0,
+                   ema_solved DOUBLE PRECISION NOT NULL DEFAULT 0, ema_correct DOUBLE PRECISION NOT NULL DEFAULT 0,
+                   PRIMARY KEY (student_id, date)
+               )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS study_unit_mastery (
+                   student_id INTEGER, unit_id INTEGER, ref_date TEXT,
+                   w_solved DOUBLE PRECISION NOT NULL DEFAULT 0, w_correct DOUBLE PRECISION NOT NULL DEFAULT 0,
+                   PRIMARY KEY (student_id, unit_id)
+               )''')
+    c.execute('''CREATE TABLE IF NOT EXISTS study_progress_state (
+                   student_id INTEGER PRIMARY KEY,
+                   log_count BIGINT NOT NULL DEFAULT 0, q_solved BIGINT NOT NULL DEFAULT 0
+               )''')
+
+
+def _progress_net_success(c):
+    for table in ('study_progress_daily', 'study_unit_mastery', 'study_progress_state'):
+        c.execute(f"DELETE FROM {table}")
+
+
+def _user_search_keys(c):
+    import search
+    for column in ('name', 'email'):
+        c.execute(f"ALTER TABLE users ADD COLUMN IF NOT EXISTS {column}_key TEXT "
+                  f"GENERATED ALWAYS AS ({search.fold_key_sql(column)}) STORED")
+    c.execute("ANALYZE users")
+
+
+def _cache_generations(c):
+    c.execute('''CREATE TABLE IF NOT EXISTS cache_generations (
+                   key TEXT PRIMARY KEY, version BIGINT NOT NULL DEFAULT 0
+               )''')
+    import migrations
+    migrations._move_generations(c)
+
+
+# BASELINE_VERSION sonrası göçlerin PostgreSQL karşılıkları: {sürüm: fonksiyon(c)}
+STEPS = {
+    7: _user_browse_indexes,
+    8: _skip,   # FTS5 yok; search.py PostgreSQL'de ILIKE ile arar
+    9: _progress_state,
+    10: _skip,  # arşiv bölümleri yalnızca dosya tabanlı SQLite'ta (archive.supported)
+    11: _progress_net_success,
+    12: _user_search_keys,   # ILIKE indeks kullanmaz (göç 7); kolon yalnızca katlama için
+    13: _skip,  # arşiv yalnızca dosya tabanlı SQLite'ta
+    14: _cache_generations,
+}
+
+
+def migration_steps(migrations):
+    steps = []
+    for number, name, _ in migrations:
+        if number <= BASELINE_VERSION:
+            steps.append((number, name, _baseline if number == 1 else _skip))
+        elif number in STEPS:
+            steps.append((number, name, STEPS[number]))
+        else:
+            raise RuntimeError(f"{number} numaralı göçün PostgreSQL karşılığı yok.")
+    return steps
@@ -0,0 +1,258 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+import archive
+import db
+
+# --- ARTIMLI İLERLEME MOTORU ---
+# Zaman grafiğinin kayan ortalamaları, üstel ortalama (EMA), ünite hakimiyeti ve
+# hedef tarihi tahmini her çizimde tüm geçmişten yeniden toplanmaz; saklanan
+# çalışan durumdan okunur:
+#   study_progress_daily  öğrenci×gün: gün toplamı, başlangıçtan kümülatif toplam, EMA
+#   study_unit_mastery    öğrenci×ünite: tarihe göre azalan ağırlıklı çözülen/doğru
+#   study_progress_state  öğrenci: durumun kapsadığı kayıt sayısı ve soru toplamı
+# Yeni çalışma kayıtları yazılırken (logs) apply() aynı transaction'da yalnızca
+# etkilenen kısmı günceller: bugünün kaydı tek satır, geçmiş tarihli kayıt o
+# tarihten sonraki günler. Kayıt silme veya bu yoldan geçmeyen yazmalar, durumun
+# özet tablolarla karşılaştırılmasıyla fark edilir ve öğrencinin durumu vektörel
+# olarak baştan kurulur. Kayan 7/30 günlük oranlar kümülatif toplamların farkıdır.
+# Başarı tanımı genel başarı oranı, %100 hedefine kalan ve ünite hakimiyetiyle aynıdır:
+# (çözülen - yanlış - boş) / çözülen. Günlük oran, kayan pencereler, EMA ve tahmin hep bunu kullanır.
+
+WINDOWS = (7, 30)
+EMA_HALF_LIFE = 7          # çalışma günü
+MASTERY_HALF_LIFE = 30     # takvim günü
+PRIOR_CORRECT = 1.0        # hakimiyet ön bilgisi: 2 soruda 1 doğru (%50)
+PRIOR_SOLVED = 2.0
+TARGET = 100.0
+FORECAST_DAYS = 60
+FORECAST_MIN_POINTS = 5
+FORECAST_HORIZON = 730
+
+EMA_ALPHA = 1 - 0.5 ** (1 / EMA_HALF_LIFE)
+MASTERY_DECAY = 0.5 ** (1 / MASTERY_HALF_LIFE)
+
+
+# Yazma tarafı form kaydı başına çalışır: küçük girdilerde pandas kurulum maliyeti
+# işin kendisinden büyük olduğundan burada yalnızca NumPy kullanılır
+EMA_VECTOR_MIN = 64
+
+
+def _days(dates):
+    return np.array(list(dates), dtype='datetime64[D]').astype(np.int64)
+
+
+def _ema(values, previous):
+    # Özyinelemeli EMA (adjust=False); önceki değer varsa seri ondan devam eder.
+    # Uzun geri doldurmalarda pandas'ın derlenmiş ewm'i, kısa kuyrukta düz döngü
+    values = np.asarray(values, dtype=float)
+    if previous is not None:
+        values = np.concatenate(([float(previous)], values))
+    if len(values) >= EMA_VECTOR_MIN:
+        result = pd.Series(values).ewm(alpha=EMA_ALPHA, adjust=False).mean().to_numpy()
+    else:
+        result = values.copy()
+        for i in range(1, len(result)):
+            result[i] = result[i - 1] + EMA_ALPHA * (values[i] - result[i - 1])
+    return result[1:] if previous is not None else result
+
+
+# --- YAZMA TARAFI ---
+
+def _recompute_daily(conn, student_id, since):
+    # since ve sonrası: önceki günün durumundan devam edilir, maliyet etkilenen gün sayısı kadar
+    prior = conn.execute("""SELECT cum_solved, cum_correct, ema_solved, ema_correct FROM study_progress_daily
+                            WHERE student_id = ? AND date < ? ORDER BY date DESC LIMIT 1""", (student_id, since)).fetchone()
+    days = conn.execute("""SELECT date, q_solved, q_solved - q_wrong - q_empty FROM study_daily_rollup
+                           WHERE student_id = ? AND date >= ? ORDER BY date""", (student_id, since)).fetchall()
+    conn.execute("DELETE FROM study_progress_daily WHERE student_id = ? AND date >= ?", (student_id, since))
+    if not days:
+        return
+    dates = [row[0] for row in days]
+    solved = np.array([row[1] for row in days], dtype=np.int64)
+    correct = np.array([row[2] for row in days], dtype=np.int64)
+    cum_solved = np.cumsum(solved) + (prior[0] if prior else 0)
+    cum_correct = np.cumsum(correct) + (prior[1] if prior else 0)
+    ema_solved = _ema(solved, prior[2] if prior else None)
+    ema_correct = _ema(correct, prior[3] if prior else None)
+    conn.executemany("""INSERT INTO study_progress_daily
+                        (student_id, date, q_solved, q_correct, cum_solved, cum_correct, ema_solved, ema_correct)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                     zip([student_id] * len(dates), dates, solved.tolist(), correct.tolist(), cum_solved.tolist(),
+                         cum_correct.tolist(), ema_solved.tolist(), ema_correct.tolist()))
+
+
+def _apply_mastery(conn, student_id, unit_ids, dates, solved, correct):
+    # Ağırlıklar ünitenin referans gününe göre tutulur (w = Σ x·λ^(ref - gün)); sıra
+    # fark etmez, geçmiş tarihli kayıt da baştan hesaplamadan doğrudan eklenir
+    units, inverse = np.unique(np.asarray(unit_ids, dtype=np.int64), return_inverse=True)
+    days = _days(dates)
+    ref = np.full(len(units), np.iinfo(np.int64).min)
+    np.maximum.at(ref, inverse, days)
+    w_solved, w_correct = np.zeros(len(units)), np.zeros(len(units))
+    existing = conn.execute(f"""SELECT unit_id, ref_date, w_solved, w_correct FROM study_unit_mastery
+                                WHERE student_id = ? AND unit_id IN ({', '.join('?' * len(units))})""",
+                            [student_id] + units.tolist()).fetchall()
+    if existing:
+        at = np.searchsorted(units, [row[0] for row in existing])
+        old_ref = _days(row[1] for row in existing)
+        ref[at] = np.maximum(ref[at], old_ref)
+        carry = MASTERY_DECAY ** (ref[at] - old_ref)
+        w_solved[at] = np.array([row[2] for row in existing]) * carry
+        w_correct[at] = np.array([row[3] for row in existing]) * carry
+    weight = MASTERY_DECAY ** (ref[inverse] - days)
+    w_solved += np.bincount(inverse, np.asarray(solved, dtype=float) * weight, minlength=len(units))
+    w_correct += np.bincount(inverse, np.asarray(correct, dtype=float) * weight, minlength=len(units))
+    conn.executemany("""INSERT INTO study_unit_mastery (student_id, unit_id, ref_date, w_solved, w_correct)
+                        VALUES (?, ?, ?, ?, ?)
+                        ON CONFLICT (student_id, unit_id) DO UPDATE SET
+                            ref_date = excluded.ref_date, w_solved = excluded.w_solved, w_correct = excluded.w_correct""",
+                     zip([student_id] * len(units), units.tolist(), ref.astype('datetime64[D]').astype(str).tolist(),
+                         w_solved.tolist(), w_correct.tolist()))
+
+
+def apply(conn, rows):
+    # rows: logs.STUDY_INSERT_SQL sırası (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, ...)
+    by_student = {}
+    for row in rows:
+        by_student.setdefault(int(row[0]), []).append(row)
+    for student_id, part in by_student.items():
+        # Durumu hiç kurulmamış öğrenci ilk okumada baştan kurulur
+        if conn.execute("SELECT 1 FROM study_progress_state WHERE student_id = ?", (student_id,)).fetchone() is None:
+            continue
+        solved = np.array([row[4] or 0 for row in part], dtype=np.int64)
+        correct = solved - np.array([(row[5] or 0) + (row[6] or 0) for row in part], dtype=np.int64)
+        dates = [row[3] for row in part]
+        _recompute_daily(conn, student_id, min(dates))
+        _apply_mastery(conn, student_id, [row[2] for row in part], dates, solved, correct)
+        conn.execute("UPDATE study_progress_state SET log_count = log_count + ?, q_solved = q_solved + ? WHERE student_id = ?",
+                     (len(part), int(solved.sum()), student_id))
+
+
+def rebuild(conn, student_id):
+    conn.execute("DELETE FROM study_unit_mastery WHERE student_id = ?", (student_id,))
+    conn.execute("DELETE FROM study_progress_state WHERE student_id = ?", (student_id,))
+    _recompute_daily(conn, student_id, '')
+    units = conn.execute("""SELECT unit_id, date, COALESCE(SUM(q_solved), 0),
+                                   COALESCE(SUM(COALESCE(q_solved, 0) - COALESCE(q_wrong, 0) - COALESCE(q_empty, 0)), 0)
+                            FROM study_logs WHERE student_id = ? GROUP BY unit_id, date""", (student_id,)).fetchall()
+    # Arşive taşınan dönemler özet tablolarda olduğundan günlük seri onları zaten içerir; hakimiyet ham kayıttan
+    units += archive.unit_day_sums(student_id)
+    if units:
+        _apply_mastery(conn, student_id, *zip(*units))
+    conn.execute("""INSERT INTO study_progress_state (student_id, log_count, q_solved)
+                    SELECT ?, COALESCE(SUM(log_count), 0), COALESCE(SUM(q_solved), 0)
+                    FROM study_unit_rollup WHERE student_id = ?""", (student_id, student_id))
+
+
+def invalidate(conn, student_id=None):
+    # Silme yollarından çağrılır: durum atılır, sonraki okumada baştan kurulur.
+    # (Toplam kontrolü silmeyi zaten fark eder; aynı toplamlı sil-ekle durumu için açıkça atılır.)
+    for table in ('study_progress_daily', 'study_unit_mastery', 'study_progress_state'):
+        if student_id is None:
+            conn.execute(f"DELETE FROM {table}")
+        else:
+            conn.execute(f"DELETE FROM {table} WHERE student_id = ?", (int(student_id),))
+
+
+def _consistent(row):
+    log_count, q_solved, rollup_count, rollup_solved = row
+    return log_count is not None and (log_count, q_solved) == (rollup_count, rollup_solved)
+
+
+def ensure(student_id):
+    # Durum, özet tablodaki kayıt sayısı/soru toplamıyla tutmuyorsa baştan kurulur
+    # (silme, arşivleme veya apply() çağırmayan yazmalar)
+    student_id = int(student_id)
+    check = """SELECT s.log_count, s.q_solved,
+                      (SELECT COALESCE(SUM(log_count), 0) FROM study_unit_rollup WHERE student_id = ?),
+                      (SELECT COALESCE(SUM(q_solved), 0) FROM study_unit_rollup WHERE student_id = ?)
+               FROM (SELECT CAST(? AS INTEGER) AS student_id) k LEFT JOIN study_progress_state s ON s.student_id = k.student_id"""
+    params = (student_id, student_id, student_id)
+    if _consistent(db.query_one(check, params)):
+        return False
+    with db.write() as conn:
+        if not _consistent(conn.execute(check, params).fetchone()):
+            rebuild(conn, student_id)
+    return True
+
+
+# --- OKUMA TARAFI ---
+
+def trend(student_id, range_days=None):
+    # Döner: date, q_solved, q_correct, daily_success, roll_7, roll_30, ema (yüzde). Aralık verilirse
+    # yalnızca aralık ve kayan pencere için gereken önceki günler okunur.
+    ensure(student_id)
+    params = [int(student_id)]
+    sql = """SELECT date, q_solved, q_correct, cum_solved, cum_correct, ema_solved, ema_correct
+             FROM study_progress_daily WHERE student_id = ?"""
+    if range_days:
+        last = db.query_one("SELECT MAX(date) FROM study_progress_daily WHERE student_id = ?", params)[0]
+        if last:
+            sql += " AND date > ?"
+            params.append((date.fromisoformat(last) - timedelta(days=range_days + max(WINDOWS))).isoformat())
+    df = db.query_df(sql + " ORDER BY date", params)
+    df['date'] = pd.to_datetime(df['date'])
+    days = df['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    cum_solved = df['cum_solved'].to_numpy(dtype=float)
+    cum_correct = df['cum_correct'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        solved = df['q_solved'].to_numpy(dtype=float)
+        df['daily_success'] = np.where(solved > 0, df['q_correct'] / solved * 100, 0.0)
+        for window in WINDOWS:
+            # Pencereden önceki son çalışma gününün kümülatif değeri (yoksa 0)
+            before = np.searchsorted(days, days - window, side='right') - 1
+            if range_days and len(df):
+                # Okunan ilk satır öncesi kümülatif değerler de saklı: ilk satırdan geri hesaplanır
+                base_solved, base_correct = cum_solved[0] - solved[0], cum_correct[0] - df['q_correct'].iloc[0]
+            else:
+                base_solved = base_correct = 0.0
+            window_solved = cum_solved - np.where(before >= 0, cum_solved[before], base_solved)
+            window_correct = cum_correct - np.where(before >= 0, cum_correct[before], base_correct)
+            df[f'roll_{window}'] = np.where(window_solved > 0, window_correct / window_solved * 100, np.nan)
+        ema_solved = df['ema_solved'].to_numpy(dtype=float)
+        df['ema'] = np.where(ema_solved > 0, df['ema_correct'] / ema_solved * 100, np.nan)
+    if range_days and len(df):
+        df = df[df['date'] > df['date'].max() - pd.Timedelta(days=range_days)]
+    return df[['date', 'q_solved', 'q_correct', 'daily_success'] + [f'roll_{w}' for w in WINDOWS] + ['ema']].reset_index(drop=True)
+
+
+def unit_mastery(student_id):
+    # Yakın tarihli çalışmalar daha ağırlıklı; az soru çözülen ünite ön bilgiye (%50) yakın kalır
+    ensure(student_id)
+    df = db.query_df("""
+        SELECT s.subject_name, u.unit_name, m.w_solved, m.w_correct, m.ref_date
+        FROM study_unit_mastery m
+        JOIN units u ON m.unit_id = u.id
+        JOIN subjects s ON u.subject_id = s.id
+        WHERE m.student_id = ?
+        ORDER BY s.subject_name, u.unit_name
+    """, (int(student_id),))
+    df['mastery'] = (df['w_correct'] + PRIOR_CORRECT) / (df['w_solved'] + PRIOR_SOLVED) * 100
+    return df.rename(columns={'w_solved': 'evidence', 'ref_date': 'last_studied'})[
+        ['subject_name', 'unit_name', 'mastery', 'evidence', 'last_studied']]
+
+
+def forecast(student_id, target=TARGET):
+    # Son FORECAST_DAYS günün 30 günlük oranına doğru uydurulur; eğim pozitifse
+    # hedefe (varsayılan %100) kalan fark / eğim kadar gün sonrası tahmin edilir
+    series = trend(student_id, FORECAST_DAYS).dropna(subset=['roll_30'])
+    result = {'target': target, 'current': None, 'slope': None, 'eta': None, 'reason': None}
+    if len(series) < FORECAST_MIN_POINTS:
+        result['reason'] = "Tahmin için yeterli çalışma günü yok"
+        return result
+    days = series['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    slope, intercept = np.polyfit(days - days[-1], series['roll_30'].to_numpy(dtype=float), 1)
+    current = float(series['roll_30'].iloc[-1])
+    result.update(current=current, slope=float(slope))
+    if current >= target:
+        result['eta'] = series['date'].iloc[-1].date()
+    elif slope <= 0:
+        result['reason'] = "son eğilim yükselmiyor"
+    elif (target - current) / slope > FORECAST_HORIZON:
+        result['reason'] = "mevcut eğilimle 2 yıldan uzun"
+    else:
+        result['eta'] = series['date'].iloc[-1].date() + timedelta(days=int(np.ceil((target - current) / slope)))
+    return result
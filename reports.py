@@ -0,0 +1,188 @@
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+import xlsxwriter
+
+import db
+import export
+import perf
+
+# --- OKUL GENELİ TOPLU RAPOR ---
+# Tüm öğrencilerin özetleri tek bir set tabanlı sorguyla (öğrenci başına sorgu
+# atmadan) özet tablolardan hesaplanır. Öğrenci başına grafikli Excel dosyaları
+# işlem havuzunda paralel üretilir. Streamlit dışında CLI olarak da çalışır:
+#   python reports.py --out okul_raporu.xlsx --per-student raporlar/ --workers 4
+
+SUMMARY_SQL = """
+    SELECT u.id AS student_id, u.name, u.unique_id,
+           COALESCE(st.q_solved, 0) AS q_solved, COALESCE(st.q_wrong, 0) AS q_wrong,
+           COALESCE(st.q_empty, 0) AS q_empty, COALESCE(st.duration, 0) AS duration,
+           CASE WHEN st.q_solved > 0 THEN CAST(st.q_solved - st.q_wrong - st.q_empty AS REAL) / st.q_solved * 100 ELSE 0 END AS success_rate,
+           COALESCE(ex.exam_count, 0) AS exam_count, COALESCE(ex.net, 0) AS exam_net,
+           COALESCE(un.unit_count, 0) AS unit_count, COALESCE(un.completed, 0) AS completed_units,
+           CASE WHEN un.unit_count > 0 THEN CAST(un.completed AS REAL) / un.unit_count * 100 ELSE 0 END AS completion_rate
+    FROM users u
+    LEFT JOIN (
+        SELECT student_id, SUM(q_solved) AS q_solved, SUM(q_wrong) AS q_wrong, SUM(q_empty) AS q_empty, SUM(duration) AS duration
+        FROM study_unit_rollup GROUP BY student_id
+    ) st ON st.student_id = u.id
+    LEFT JOIN (
+        SELECT student_id, SUM(exam_count) AS exam_count, SUM((q_solved - q_wrong) - (q_wrong / 4.0)) AS net
+        FROM exam_subject_rollup GROUP BY student_id
+    ) ex ON ex.student_id = u.id
+    LEFT JOIN (
+        SELECT student_id, COUNT(*) AS unit_count, SUM(is_completed) AS completed
+        FROM student_units GROUP BY student_id
+    ) un ON un.student_id = u.id
+    WHERE u.role = 'Öğrenci'
+    ORDER BY u.id
+"""
+
+UNIT_SQL = """
+    SELECT r.student_id, s.subject_name, u.unit_name, SUM(r.q_solved) AS q_solved, SUM(r.q_wrong) AS q_wrong,
+           SUM(r.q_empty) AS q_empty, SUM(r.duration) AS duration,
+           COALESCE(CAST(SUM(r.q_solved) - SUM(r.q_wrong) - SUM(r.q_empty) AS REAL) / NULLIF(SUM(r.q_solved), 0) * 100, 0) AS success_rate
+    FROM study_unit_rollup r
+    JOIN units u ON r.unit_id = u.id
+    JOIN subjects s ON u.subject_id = s.id
+    GROUP BY r.student_id, r.unit_id, s.subject_name, u.unit_name
+    ORDER BY r.student_id, s.subject_name, u.unit_name
+"""
+
+EXAM_SQL = """
+    SELECT r.student_id, s.subject_name, SUM(r.q_solved) AS q_solved, SUM(r.q_wrong) AS q_wrong,
+           SUM(r.q_empty) AS q_empty, SUM(r.duration) AS duration,
+           (SUM(r.q_solved) - SUM(r.q_wrong)) - (SUM(r.q_wrong) / 4.0) AS net
+    FROM exam_subject_rollup r
+    JOIN subjects s ON r.subject_id = s.id
+    GROUP BY r.student_id, r.subject_id, s.subject_name
+    ORDER BY r.student_id, s.subject_name
+"""
+
+SUMMARY_HEADERS = ["Öğrenci ID", "Ad Soyad", "Öğrenci Kodu", "Çözülen", "Yanlış", "Boş", "Süre (dk)",
+                   "Başarı (%)", "Deneme Sayısı", "Deneme Neti", "Ünite Sayısı", "Biten Ünite", "Tamamlama (%)"]
+
+
+def school_summary():
+    return db.query_df(SUMMARY_SQL)
+
+
+def write_school_workbook(output):
+    # Tüm okul tek dosyada: özet + ünite ve deneme detayları (sabit bellek)
+    workbook = xlsxwriter.Workbook(output, {'constant_memory': True})
+    export.write_excel_sheet(workbook, "Özet", SUMMARY_SQL)
+    export.write_excel_sheet(workbook, "Ünite Başarı", UNIT_SQL)
+    export.write_excel_sheet(workbook, "Deneme Netleri", EXAM_SQL)
+    workbook.close()
+    return output
+
+
+@perf.timed()
+def school_workbook():
+    output = tempfile.TemporaryFile()
+    write_school_workbook(output)
+    return export.read_and_close(output)
+
+
+def _safe_filename(text):
+    return re.sub(r'[^\w-]+', '_', text, flags=re.UNICODE).strip('_') or 'ogrenci'
+
+
+def _write_student_workbook(task):
+    # İşlem havuzunda çalışır; veritabanına erişmez, sadece hazır veriyi yazar
+    path, summary, unit_rows, exam_rows = task
+    workbook = xlsxwriter.Workbook(path)
+    bold = workbook.add_format({'bold': True})
+
+    sheet = workbook.add_worksheet("Özet")
+    for i, (header, value) in enumerate(zip(SUMMARY_HEADERS, summary)):
+        sheet.write(i, 0, header, bold)
+        sheet.write(i, 1, value)
+    sheet.set_column(0, 0, 18)
+
+    if unit_rows:
+        sheet = workbook.add_worksheet("Üniteler")
+        sheet.write_row(0, 0, ["Ders", "Ünite", "Çözülen", "Yanlış", "Boş", "Süre (dk)", "Başarı (%)"], bold)
+        for i, row in enumerate(unit_rows, 1):
+            sheet.write_row(i, 0, row)
+        chart = workbook.add_chart({'type': 'column'})
+        chart.add_series({'name': 'Başarı (%)', 'categories': ['Üniteler', 1, 1, len(unit_rows), 1],
+                          'values': ['Üniteler', 1, 6, len(unit_rows), 6]})
+        chart.set_title({'name': 'Ünite Başarı Oranları (%)'})
+        sheet.insert_chart('I2', chart)
+
+    if exam_rows:
+        sheet = workbook.add_worksheet("Denemeler")
+        sheet.write_row(0, 0, ["Ders", "Soru", "Yanlış", "Boş", "Süre (dk)", "Net"], bold)
+        for i, row in enumerate(exam_rows, 1):
+            sheet.write_row(i, 0, row)
+        chart = workbook.add_chart({'type': 'column'})
+        for col, name in ((1, 'Soru'), (2, 'Yanlış'), (3, 'Boş')):
+            chart.add_series({'name': name, 'categories': ['Denemeler', 1, 0, len(exam_rows), 0],
+                              'values': ['Denemeler', 1, col, len(exam_rows), col]})
+        chart.set_title({'name': 'Ders Bazlı Deneme Analizi'})
+        sheet.insert_chart('H2', chart)
+
+    workbook.close()
+    return path
+
+
+def _grouped_by_student(sql):
+    rows = db.query_all(sql)
+    return {sid: [row[1:] for row in group] for sid, group in groupby(rows, key=lambda r: r[0])}
+
+
+def student_report_tasks(out_dir):
+    summaries = db.query_all(SUMMARY_SQL)
+    units = _grouped_by_student(UNIT_SQL)
+    exams = _grouped_by_student(EXAM_SQL)
+    for summary in summaries:
+        student_id, name, unique_id = summary[0], summary[1], summary[2]
+        path = os.path.join(out_dir, f"{_safe_filename(unique_id or str(student_id))}_{_safe_filename(name or '')}.xlsx")
+        yield path, tuple(summary), units.get(student_id, []), exams.get(student_id, [])
+
+
+@perf.timed()
+def write_student_reports(out_dir, workers=None, progress=None):
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = list(student_report_tasks(out_dir))
+    total = len(tasks)
+    if progress:
+        progress(0, total)
+    # spawn: Streamlit'in thread'li sürecinden güvenli şekilde işlem açmak için
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        for done, _ in enumerate(pool.map(_write_student_workbook, tasks, chunksize=16), 1):
+            if progress:
+                progress(done, total)
+    return [task[0] for task in tasks]
+
+
+def _print_progress(done, total):
+    sys.stdout.write(f"\rÖğrenci raporları: {done}/{total}")
+    sys.stdout.flush()
+    if done == total:
+        sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Okul geneli toplu rapor")
+    parser.add_argument("--out", default="okul_raporu.xlsx", help="Okul özet çalışma kitabı")
+    parser.add_argument("--per-student", metavar="KLASÖR", help="Öğrenci başına grafikli rapor klasörü")
+    parser.add_argument("--workers", type=int, default=None, help="İşlem havuzu boyutu (varsayılan: CPU sayısı)")
+    args = parser.parse_args()
+
+    import migrations
+    migrations.ensure_schema()
+    with open(args.out, 'wb') as f:
+        write_school_workbook(f)
+    print(f"Okul raporu yazıldı: {args.out}")
+    if args.per_student:
+        paths = write_student_reports(args.per_student, args.workers, _print_progress)
+        print(f"{len(paths)} öğrenci raporu yazıldı: {args.per_student}")
@@ -0,0 +1,108 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+import analysis
+import archive
+import db
+import progress
+
+# --- ÖZET (ROLLUP) TABLOLARI ---
+# study_unit_rollup, study_daily_rollup ve exam_subject_rollup tabloları
+# study_logs/exam_logs üzerindeki trigger'larla aynı transaction içinde güncellenir.
+# Analiz paneli ham kayıtlar yerine bu küçük tabloları okur.
+
+
+def rebuild(conn):
+    conn.execute("DELETE FROM study_unit_rollup")
+    conn.execute("DELETE FROM study_daily_rollup")
+    conn.execute("DELETE FROM exam_subject_rollup")
+    conn.execute('''INSERT INTO study_unit_rollup (student_id, unit_id, subject_id, q_solved, q_wrong, q_empty, duration, is_repeated, log_count)
+                    SELECT student_id, unit_id, MIN(subject_id), COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0),
+                           COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COALESCE(SUM(is_repeated), 0), COUNT(*)
+                    FROM study_logs GROUP BY student_id, unit_id''')
+    conn.execute('''INSERT INTO study_daily_rollup (student_id, date, q_solved, q_wrong, q_empty, duration, log_count)
+                    SELECT student_id, date, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0),
+                           COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                    FROM study_logs GROUP BY student_id, date''')
+    conn.execute('''INSERT INTO exam_subject_rollup (student_id, subject_id, q_solved, q_wrong, q_empty, duration, exam_count)
+                    SELECT student_id, subject_id, COALESCE(SUM(q_solved), 0), COALESCE(SUM(q_wrong), 0),
+                           COALESCE(SUM(q_empty), 0), COALESCE(SUM(duration), 0), COUNT(*)
+                    FROM exam_logs GROUP BY student_id, subject_id''')
+    # Arşive taşınmış dönemlerin toplamları da özetlerde kalır
+    archive.restore_rollups(conn)
+
+
+def verify(student_id):
+    # SQL özet sorgularını ham kayıtlar üzerindeki eski pandas hesabıyla karşılaştırır
+    raw = analysis.study_rows(student_id)
+    raw_exam = analysis.exam_rows(student_id)
+    cols = ['q_solved', 'q_wrong', 'q_empty', 'duration']
+    problems = []
+
+    totals = analysis.study_totals(student_id)
+    if [totals['total_q'], totals['total_wrong'], totals['total_empty'], totals['total_duration']] != raw[cols].sum().tolist():
+        problems.append("genel toplamlar")
+
+    unit_grp = raw.groupby(['subject_name', 'unit_name'])[cols + ['is_repeated']].sum().reset_index()
+    unit_grp['success_rate'] = ((unit_grp['q_solved'] - unit_grp['q_wrong'] - unit_grp['q_empty']) / unit_grp['q_solved'] * 100).fillna(0)
+    if unit_grp.values.tolist() != analysis.unit_success(student_id).values.tolist():
+        problems.append("ünite grupları")
+
+    raw['date'] = pd.to_datetime(raw['date'])
+    daily_grp = raw.groupby('date')[cols].sum().reset_index()
+    daily_grp['correct'] = daily_grp['q_solved'] - daily_grp['q_wrong'] - daily_grp['q_empty']
+    daily_grp['daily_success'] = (daily_grp['correct'] / daily_grp['q_solved'] * 100).fillna(0)
+    if daily_grp.drop(columns='correct').values.tolist() != analysis.daily_trend(student_id).values.tolist():
+        problems.append("günlük gruplar")
+
+    # Artımlı ilerleme durumu (progress.py): ham kayıtlardan tam hesapla karşılaştırılır
+    indexed = daily_grp.set_index('date')[['q_solved', 'correct']]
+    expected = pd.DataFrame({'daily_success': (daily_grp['correct'] / daily_grp['q_solved'] * 100).fillna(0)})
+    for window in progress.WINDOWS:
+        rolled = indexed.rolling(f'{window}D').sum().to_numpy()
+        expected[f'roll_{window}'] = np.where(rolled[:, 0] > 0, rolled[:, 1] / np.where(rolled[:, 0] > 0, rolled[:, 0], 1) * 100, np.nan)
+    ema = indexed.ewm(alpha=progress.EMA_ALPHA, adjust=False).mean().to_numpy()
+    expected['ema'] = np.where(ema[:, 0] > 0, ema[:, 1] / np.where(ema[:, 0] > 0, ema[:, 0], 1) * 100, np.nan)
+    trend = progress.trend(student_id)
+    if len(trend) != len(expected) or not np.allclose(trend[expected.columns].to_numpy(dtype=float),
+                                                      expected.to_numpy(dtype=float), equal_nan=True):
+        problems.append("ilerleme serisi")
+
+    raw['correct'] = raw['q_solved'].fillna(0) - raw['q_wrong'].fillna(0) - raw['q_empty'].fillna(0)
+    raw['age'] = (raw.groupby(['subject_name', 'unit_name'])['date'].transform('max') - raw['date']).dt.days
+    raw['weight'] = progress.MASTERY_DECAY ** raw['age']
+    raw['w_solved'] = raw['q_solved'].fillna(0) * raw['weight']
+    raw['w_correct'] = raw['correct'] * raw['weight']
+    mastery = raw.groupby(['subject_name', 'unit_name'])[['w_solved', 'w_correct']].sum().reset_index()
+    mastery['mastery'] = (mastery['w_correct'] + progress.PRIOR_CORRECT) / (mastery['w_solved'] + progress.PRIOR_SOLVED) * 100
+    stored = progress.unit_mastery(student_id)
+    if len(stored) != len(mastery) or not np.allclose(stored['mastery'].to_numpy(dtype=float), mastery['mastery'].to_numpy(dtype=float)):
+        problems.append("ünite hakimiyeti")
+
+    exam_grp = raw_exam.groupby('subject_name')[cols].sum().reset_index()
+    exam_grp['net'] = exam_grp['q_solved'] - exam_grp['q_wrong'] - (exam_grp['q_wrong'] / 4)
+    if exam_grp.values.tolist() != analysis.exam_nets(student_id).values.tolist():
+        problems.append("deneme grupları")
+    return problems
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Özet tablo bakımı")
+    parser.add_argument("--rebuild", action="store_true", help="Özet tabloları ham kayıtlardan yeniden oluştur")
+    parser.add_argument("--verify", action="store_true", help="Özetleri ham kayıtlarla karşılaştır")
+    args = parser.parse_args()
+
+    import migrations
+    migrations.ensure_schema()
+    if args.rebuild:
+        with db.write() as conn:
+            rebuild(conn)
+        print("Özet tablolar yeniden oluşturuldu.")
+    if args.verify:
+        student_ids = [r[0] for r in db.query_all("SELECT id FROM users WHERE role='Öğrenci'")]
+        failed = {sid: p for sid in student_ids if (p := verify(sid))}
+        for sid, problems in failed.items():
+            print(f"Öğrenci {sid}: uyuşmazlık -> {', '.join(problems)}")
+        print(f"{len(student_ids)} öğrenci kontrol edildi, {len(failed)} uyuşmazlık.")
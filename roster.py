@@ -0,0 +1,70 @@
+import analysis_cache
+import db
+
+# --- OTURUM BAZLI KULLANICI LİSTESİ ÖNBELLEĞİ ---
+# Öğretmen/veli öğrenci seçim listeleri oturum (st.session_state) içinde
+# id -> ad sözlükleriyle tutulur; her yeniden çalıştırmada JOIN tekrar edilmez,
+# selectbox format_func'ları O(1) arama yapar.
+# İlişki veya kullanıcı ekleyen/değiştiren her yol bump() çağırır; nesil
+# numarası veritabanında (cache_generations, ROSTER_KEY satırı) tutulur,
+# böylece aynı veritabanını paylaşan diğer düğümlerdeki oturumlar da listeyi
+# yeniden okur. Kontrol tek satırlık birincil anahtar okumasıdır. Sınırsız
+# büyüyebilen listeler (tüm kullanıcılar) burada değil, paging.py ile sayfalanır.
+
+SESSION_KEY = '_roster_cache'
+ROSTER_KEY = 'roster'
+
+
+def bump():
+    with db.write() as conn:
+        analysis_cache.bump_generation(conn, ROSTER_KEY)
+
+
+def generation():
+    return analysis_cache.generation(ROSTER_KEY)
+
+
+class Roster:
+    def __init__(self, df, labels=None):
+        self.df = df
+        self.ids = df['id'].tolist()
+        self.labels = dict(zip(self.ids, labels if labels is not None else df['name'].tolist()))
+
+    @property
+    def empty(self):
+        return self.df.empty
+
+    def label(self, user_id):
+        return self.labels.get(user_id, str(user_id))
+
+
+class RosterCache:
+    def __init__(self):
+        self.entries = {}
+
+    def _get(self, key, load):
+        current = generation()
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != current:
+            entry = (current, load())
+            self.entries[key] = entry
+        return entry[1]
+
+    def students_of(self, supervisor_id, rel_type):
+        return self._get(('students_of', supervisor_id, rel_type), lambda: Roster(db.query_df("""
+            SELECT DISTINCT u.id, u.name, u.unique_id
+            FROM users u
+            JOIN relationships r ON u.id = r.student_id
+            WHERE r.supervisor_id = ? AND r.type = ?
+        """, (supervisor_id, rel_type))))
+
+
+def session_cache(state):
+    if SESSION_KEY not in state:
+        state[SESSION_KEY] = RosterCache()
+    return state[SESSION_KEY]
+
+
+def lookup(df, column):
+    # Ders/ünite seçimleri için aynı O(1) arama (format_func içinde maske yerine)
+    return Roster(df, df[column].tolist())
@@ -0,0 +1,155 @@
+import re
+
+import pandas as pd
+
+import db
+
+# --- TAM METİN ARAMA ---
+# Kullanıcılar (ad, e-posta, ID), dersler ve üniteler tek bir FTS5 dizininde
+# (search_index, göç 8) tutulur ve trigger'larla güncel kalır. Satır kimliği
+# kaynak id * 4 + tür kodudur; güncelleme/silme birincil anahtarla yapılır.
+# Türkçe harf katlama: unicode61 büyük/küçük harfi ve aksanları (ş/s, ç/c, ğ/g,
+# ö/o, ü/u) katlar, ı/İ ayrıca i'ye çevrilir; böylece "isik" de "IŞIK" da
+# "Işık"ı bulur. Her kelime önek olarak aranır ("ay fiz" -> "Ayşe Fizik...").
+# Sonuçlar rolün görebildikleriyle sınırlanır: yönetici her şeyi, öğretmen/veli
+# kendi öğrencilerini ve onların aldığı ders/üniteleri görür. FTS5 dizini yoksa
+# (PostgreSQL) aynı kapsamla LIKE araması yapılır.
+
+USER, SUBJECT, UNIT = 1, 2, 3
+LIMIT = 30
+RANK_CANDIDATES = 500
+
+_WORDS = re.compile(r'\w+')
+
+
+def fold(text):
+    # Dizindeki katlamanın (migrations._search_text) arama tarafı
+    return text.replace('ı', 'i').replace('İ', 'i')
+
+
+# Sayfalı listelerin ad/e-posta başı araması (paging.py) FTS5 değil B-tree indeksi kullanır:
+# indeksli kolon (users.name_key/email_key, göç 12) aynı katlamanın SQL karşılığıdır.
+# SQLite lower() yalnızca ASCII harfleri küçülttüğünden Türkçe harfler önce ASCII'ye çevrilir.
+_KEY_FROM, _KEY_TO = 'çğöşüÇĞÖŞÜ', 'cgosucgosu'
+_KEY = str.maketrans(_KEY_FROM, _KEY_TO)
+
+
+def fold_key(text):
+    return ''.join(ch.lower() if ch.isascii() else ch for ch in fold(text).translate(_KEY))
+
+
+def fold_key_sql(expr):
+    expr = f"replace(replace({expr}, 'ı', 'i'), 'İ', 'i')"
+    for a, b in zip(_KEY_FROM, _KEY_TO):
+        expr = f"replace({expr}, '{a}', '{b}')"
+    return f"lower({expr})"
+
+
+# LIKE yolu (FTS5 dizini yok): kolon ve aranan kelimeler aynı fold_key katlamasıyla karşılaştırılır
+_LIKE_SOURCES = {
+    USER: ("SELECT id FROM users WHERE name_key LIKE ? ESCAPE '\\' OR email_key LIKE ? ESCAPE '\\' "
+           "OR lower(unique_id) LIKE ? ESCAPE '\\'", 3),
+    SUBJECT: (f"SELECT id FROM subjects WHERE {fold_key_sql('subject_name')} LIKE ? ESCAPE '\\'", 1),
+    UNIT: (f"SELECT id FROM units WHERE {fold_key_sql('unit_name')} LIKE ? ESCAPE '\\'", 1),
+}
+
+
+def words(text):
+    return _WORDS.findall(fold(text or ''))
+
+
+def match_query(text):
+    # Kelimeler tırnak içinde: FTS5 operatörleri (AND, NEAR, -) kullanıcı girdisinden gelmez
+    return ' '.join(f'"{word}"*' for word in words(text))
+
+
+def scope(role, user_id):
+    # Döner: {tür: (görülebilir kimlikleri veren alt sorgu, parametreler)}; None = kısıtsız
+    if role == 'Yönetici':
+        return None
+    if role in ('Öğretmen', 'Veli'):
+        students = "SELECT student_id FROM relationships WHERE supervisor_id = ? AND type = ?"
+        params = (user_id, 'ogretmen' if role == 'Öğretmen' else 'veli')
+        return {
+            USER: (students, params),
+            SUBJECT: (f"SELECT subject_id FROM student_subjects WHERE student_id IN ({students})", params),
+            UNIT: (f"SELECT unit_id FROM student_units WHERE student_id IN ({students})", params),
+        }
+    return {}
+
+
+def _fts_hits(text, visible, limit):
+    sql = "SELECT rowid % 4, rowid / 4, bm25(search_index) FROM search_index WHERE search_index MATCH ?"
+    params = [match_query(text)]
+    if visible is not None:
+        parts = []
+        for kind, (subquery, sub_params) in visible.items():
+            parts.append(f"(rowid % 4 = {kind} AND rowid / 4 IN ({subquery}))")
+            params.extend(sub_params)
+        sql += f" AND ({' OR '.join(parts)})"
+    # ORDER BY rank, kapsam filtresinden önce tüm eşleşmeleri puanlar; bm25 burada yalnızca
+    # dönen satırlar için hesaplanıp Python'da sıralanır. Çok genel aramalarda (tek harf,
+    # "öğrenci") aday sınırı aşılır ve ilk sonuçlar kimlik sırasıyla döner.
+    candidates = db.query_all(sql + " LIMIT ?", params + [RANK_CANDIDATES + 1])
+    if len(candidates) <= RANK_CANDIDATES:
+        candidates = sorted(candidates, key=lambda row: row[2])
+    return [(kind, ref_id) for kind, ref_id, _ in candidates[:limit]]
+
+
+def _like_hits(text, visible, limit):
+    # Kelimelerdeki '_' LIKE jokeri değil, düz karakterdir
+    pattern = '%' + '%'.join(fold_key(word).replace('_', '\\_') for word in words(text)) + '%'
+    parts, params = [], []
+    for kind, (source, count) in _LIKE_SOURCES.items():
+        if visible is not None and kind not in visible:
+            continue
+        sql = f"SELECT {kind} AS kind, id FROM ({source}) hits"
+        params.extend([pattern] * count)
+        if visible is not None:
+            sql += f" WHERE id IN ({visible[kind][0]})"
+            params.extend(visible[kind][1])
+        parts.append(sql)
+    return db.query_all(f"{' UNION ALL '.join(parts)} ORDER BY kind, id LIMIT ?", params + [limit])
+
+
+def _placeholders(ids):
+    return ', '.join('?' * len(ids))
+
+
+def _details(hits):
+    ids = {USER: [], SUBJECT: [], UNIT: []}
+    for kind, ref_id in hits:
+        ids[kind].append(int(ref_id))
+    rows = {}
+    if ids[USER]:
+        for ref_id, name, role, detail in db.query_all(
+                f"""SELECT id, name, role, COALESCE(email, '') || ' · ' || COALESCE(unique_id, '')
+                    FROM users WHERE id IN ({_placeholders(ids[USER])})""", ids[USER]):
+            rows[(USER, ref_id)] = (role, name, detail)
+    if ids[SUBJECT]:
+        for ref_id, name, units in db.query_all(
+                f"""SELECT s.id, s.subject_name, (SELECT COUNT(*) FROM units u WHERE u.subject_id = s.id)
+                    FROM subjects s WHERE s.id IN ({_placeholders(ids[SUBJECT])})""", ids[SUBJECT]):
+            rows[(SUBJECT, ref_id)] = ('Ders', name, f"{units} ünite")
+    if ids[UNIT]:
+        for ref_id, name, subject in db.query_all(
+                f"""SELECT u.id, u.unit_name, s.subject_name FROM units u JOIN subjects s ON u.subject_id = s.id
+                    WHERE u.id IN ({_placeholders(ids[UNIT])})""", ids[UNIT]):
+            rows[(UNIT, ref_id)] = ('Ünite', name, subject)
+    # Sıralama (FTS puanı) korunur
+    records = [(kind, ref_id) + rows[(kind, ref_id)] for kind, ref_id in
+               ((int(k), int(i)) for k, i in hits) if (kind, ref_id) in rows]
+    return pd.DataFrame(records, columns=['kind', 'id', 'type', 'name', 'detail'])
+
+
+def has_index():
+    with db.read() as conn:
+        return db.table_exists(conn, 'search_index')
+
+
+def search(text, role, user_id=None, limit=LIMIT):
+    visible = scope(role, user_id)
+    if not words(text) or visible == {}:
+        return pd.DataFrame(columns=['kind', 'id', 'type', 'name', 'detail'])
+    hits = (_fts_hits if has_index() else _like_hits)(text, visible, limit)
+    return _details(hits)
@@ -0,0 +1,172 @@
+import itertools
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+from datetime import date, timedelta
+from urllib.parse import urlsplit
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Yanlışlıkla çalışma dizinindeki ogrenci_takip.db açılmasın
+os.environ.setdefault('OGRENCI_TAKIP_DB', os.path.join(tempfile.mkdtemp(prefix='ogrenci_takip_test_'), 'bos.db'))
+
+import analysis_cache
+import curriculum
+import db
+import migrations
+import postgres
+
+# --- TEST VERİTABANI ---
+# Her test kendi geçici dosyasında çalışır: database göçleri uygulanmış boş bir
+# veritabanı, school aynı dosyayı sabit tohumlu rastgele okul verisiyle doldurur.
+# db havuzu teste özel açılıp kapatılır; süreç içi analiz önbelleği, farklı
+# dosyalarda aynı öğrenci/sürüm numaraları çakışmasın diye temizlenir.
+#
+# BACKENDS = ('sqlite', 'postgres') tanımlayan test modülleri PostgreSQL'de de
+# çalışır: oturum başına initdb/pg_ctl ile geçici bir küme kurulur (ikili dosyalar
+# PATH'te ya da OGRENCI_TAKIP_TEST_PG_BIN dizininde), göçler bir şablon
+# veritabanına bir kez uygulanır ve her test şablondan kopyalanan kendi
+# veritabanını alır. OGRENCI_TAKIP_TEST_PG_URL verilirse küme kurulmaz, o
+# sunucuda çalışılır. Sunucu kurulamıyorsa (ikili dosya ya da psycopg yok, root
+# kullanıcısı) postgres testleri atlanır.
+
+CURRICULUM = {'Matematik': ['Sayılar', 'Kümeler', 'Fonksiyonlar'], 'Fizik': ['Kuvvet', 'Enerji'], 'Kimya': ['Atom']}
+START = date(2024, 1, 1)
+
+PG_BIN = os.environ.get('OGRENCI_TAKIP_TEST_PG_BIN') or None
+PG_URL = os.environ.get('OGRENCI_TAKIP_TEST_PG_URL', '')
+_pg_names = itertools.count()
+
+
+def pytest_generate_tests(metafunc):
+    if 'backend' in metafunc.fixturenames:
+        metafunc.parametrize('backend', getattr(metafunc.module, 'BACKENDS', ('sqlite',)), indirect=True)
+
+
+@pytest.fixture
+def backend(request):
+    return getattr(request, 'param', 'sqlite')
+
+
+def _pg_url(server, name):
+    return urlsplit(server)._replace(path=f"/{name}").geturl()
+
+
+def _pg_admin(server, *statements):
+    import psycopg
+    with psycopg.connect(server, autocommit=True) as conn:
+        for statement in statements:
+            conn.execute(statement)
+
+
+@pytest.fixture(scope='session')
+def postgres_server(tmp_path_factory):
+    # Döner: sunucunun yönetim veritabanı adresi
+    pytest.importorskip('psycopg')
+    pytest.importorskip('psycopg_pool')
+    if PG_URL:
+        yield PG_URL
+        return
+    initdb, pg_ctl = shutil.which('initdb', path=PG_BIN), shutil.which('pg_ctl', path=PG_BIN)
+    if not (initdb and pg_ctl):
+        pytest.skip("initdb/pg_ctl bulunamadı (PATH ya da OGRENCI_TAKIP_TEST_PG_BIN)")
+    if os.geteuid() == 0:
+        pytest.skip("initdb root olarak çalışmaz; OGRENCI_TAKIP_TEST_PG_URL ile bir sunucu verin")
+    root = tmp_path_factory.mktemp('pg')
+    data = root / 'data'
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    subprocess.run([initdb, '-D', str(data), '-U', 'postgres', '-A', 'trust', '-E', 'UTF8', '--locale=C'],
+                   check=True, capture_output=True)
+    subprocess.run([pg_ctl, '-D', str(data), '-l', str(root / 'sunucu.log'), '-w', 'start',
+                    '-o', f"-p {port} -k {root} -c listen_addresses='' -c fsync=off"], check=True, capture_output=True)
+    try:
+        yield f"postgresql://postgres@/postgres?host={root}&port={port}"
+    finally:
+        subprocess.run([pg_ctl, '-D', str(data), '-m', 'immediate', 'stop'], capture_output=True)
+
+
+@pytest.fixture(scope='session')
+def postgres_template(postgres_server):
+    name = f"ogrenci_takip_sablon_{os.getpid()}"
+    _pg_admin(postgres_server, f"DROP DATABASE IF EXISTS {name}", f"CREATE DATABASE {name} TEMPLATE template0 ENCODING 'UTF8'")
+    previous = db._pool
+    db._pool = postgres.PostgresPool(_pg_url(postgres_server, name))
+    try:
+        migrations.migrate()
+    finally:
+        db._pool.close()
+        db._pool = previous
+    yield name
+    _pg_admin(postgres_server, f"DROP DATABASE IF EXISTS {name}")
+
+
+@pytest.fixture
+def database(request, backend, tmp_path):
+    previous = db._pool
+    if backend == 'postgres':
+        server, template = request.getfixturevalue('postgres_server'), request.getfixturevalue('postgres_template')
+        name = f"{template}_{next(_pg_names)}"
+        _pg_admin(server, f"CREATE DATABASE {name} TEMPLATE {template}")
+        location = _pg_url(server, name)
+        db._pool = postgres.PostgresPool(location)
+    else:
+        location = str(tmp_path / 'ogrenci_takip.db')
+        db._pool = db.ConnectionPool(location)
+    analysis_cache.get_cache().clear()
+    migrations.ensure_schema()
+    yield location
+    db._pool.close()
+    db._pool = previous
+    if backend == 'postgres':
+        _pg_admin(server, f"DROP DATABASE {name}")
+
+
+def build_school(conn, students=6, study_logs=120, exam_logs=12, days=500, seed=7):
+    rng = random.Random(seed)
+    student_ids = []
+    for i in range(students):
+        student_id = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES (?, 'Öğrenci', ?, ?)",
+                                  (f"Öğrenci {i}", f"ogrenci{i}@okul", f"S{i:05d}")).lastrowid
+        units, subjects = [], []
+        for subject_name, unit_names in CURRICULUM.items():
+            subject_id = curriculum.subject_id(conn, subject_name)
+            conn.execute("INSERT INTO student_subjects (student_id, subject_id) VALUES (?, ?)", (student_id, subject_id))
+            subjects.append(subject_id)
+            for unit_name in unit_names:
+                unit_id = curriculum.unit_id(conn, subject_id, unit_name)
+                conn.execute("INSERT INTO student_units (student_id, unit_id, subject_id) VALUES (?, ?, ?)",
+                             (student_id, unit_id, subject_id))
+                units.append((subject_id, unit_id))
+        logs = []
+        for _ in range(study_logs):
+            subject_id, unit_id = rng.choice(units)
+            solved = rng.randint(5, 40)
+            wrong = rng.randint(0, solved // 3)
+            logs.append((student_id, subject_id, unit_id, (START + timedelta(days=rng.randrange(days))).isoformat(),
+                         solved, wrong, rng.randint(0, (solved - wrong) // 4), rng.randint(10, 90), int(rng.random() < 0.2)))
+        conn.executemany("""INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration, is_repeated)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""", logs)
+        exams = []
+        for _ in range(exam_logs):
+            solved = rng.randint(20, 40)
+            wrong = rng.randint(0, solved // 2)
+            exams.append((student_id, rng.choice(subjects), (START + timedelta(days=rng.randrange(days))).isoformat(),
+                          solved, wrong, rng.randint(0, solved - wrong), rng.randint(40, 120)))
+        conn.executemany("""INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration)
+                            VALUES (?, ?, ?, ?, ?, ?, ?)""", exams)
+        student_ids.append(student_id)
+    return student_ids
+
+
+@pytest.fixture
+def school(database):
+    with db.write() as conn:
+        return build_school(conn)
@@ -0,0 +1,82 @@
+import pandas as pd
+
+import analysis_cache
+import db
+
+
+def counting(results):
+    def compute():
+        results.append(len(results) + 1)
+        return pd.DataFrame({'value': [results[-1]]})
+    return compute
+
+
+def cached(student_id, calls):
+    return analysis_cache.get_or_compute('analysis', student_id, counting(calls))['value'].iloc[0]
+
+
+def test_result_is_reused_until_the_student_data_changes(database):
+    calls = []
+    assert cached(1, calls) == 1
+    assert cached(1, calls) == 1
+    assert calls == [1]
+
+    with db.write() as conn:
+        analysis_cache.bump(conn, 1)
+    assert cached(1, calls) == 2
+    assert cached(1, calls) == 2
+
+
+def test_bump_only_invalidates_that_student(database):
+    first, second = [], []
+    cached(1, first)
+    cached(2, second)
+    with db.write() as conn:
+        analysis_cache.bump(conn, 2)
+    cached(1, first)
+    cached(2, second)
+    assert first == [1]
+    assert second == [1, 2]
+
+
+def test_bump_all_invalidates_every_student(database):
+    first, second = [], []
+    cached(1, first)
+    cached(2, second)
+    with db.write() as conn:
+        analysis_cache.bump_all(conn)
+    cached(1, first)
+    cached(2, second)
+    assert first == [1, 2]
+    assert second == [1, 2]
+
+
+def test_rolled_back_write_keeps_the_cached_result(database):
+    calls = []
+    cached(1, calls)
+    try:
+        with db.write() as conn:
+            analysis_cache.bump(conn, 1)
+            raise RuntimeError("kayıt yarıda kesildi")
+    except RuntimeError:
+        pass
+    cached(1, calls)
+    assert calls == [1]
+
+
+def test_expired_and_evicted_entries_are_recomputed():
+    cache = analysis_cache.AnalysisCache(max_bytes=10_000, ttl=60)
+    cache.put(('analysis', 1), (0, 0), b'x' * 4000)
+    cache.put(('analysis', 2), (0, 0), b'y' * 4000)
+    assert cache.get(('analysis', 1), (0, 0)) is not None
+    # 1 en son kullanıldı; yer açmak için 2 atılır
+    cache.put(('analysis', 3), (0, 0), b'z' * 4000)
+    assert cache.get(('analysis', 2), (0, 0)) is None
+    assert cache.get(('analysis', 1), (0, 0)) is not None
+    assert cache.get(('analysis', 1), (0, 1)) is None
+    assert cache.stats()['evictions'] == 1 and cache.stats()['stale'] == 1
+
+    cache.ttl = 0
+    cache.put(('analysis', 4), (0, 0), b'w')
+    assert cache.get(('analysis', 4), (0, 0)) is None
+    assert cache.stats()['expired'] == 1
@@ -0,0 +1,116 @@
+from contextlib import closing
+
+import pytest
+
+import analysis
+import analysis_cache
+import archive
+import db
+import progress
+import rollups
+
+# Eylül 2024 öncesi (2023-2024 dönemi) taşınır, sonrası ana dosyada kalır
+CUTOFF = '2024-09-01'
+
+ROLLUP_TOTALS = """SELECT (SELECT SUM(q_solved) FROM study_unit_rollup), (SELECT SUM(log_count) FROM study_unit_rollup),
+                          (SELECT SUM(q_solved) FROM study_daily_rollup), (SELECT SUM(q_solved) FROM exam_subject_rollup),
+                          (SELECT SUM(exam_count) FROM exam_subject_rollup)"""
+
+
+def students():
+    return [row[0] for row in db.query_all("SELECT id FROM users WHERE role = 'Öğrenci' ORDER BY id")]
+
+
+def raw(student_id):
+    frames = [analysis.study_rows(student_id), analysis.exam_rows(student_id)]
+    return [frame.sort_values(list(frame.columns)).reset_index(drop=True).astype(str) for frame in frames]
+
+
+def delete_student_logs(conn, student_id):
+    # main.py "TÜM BİLGİLERİMİ SİL" ile aynı sıra
+    conn.execute("DELETE FROM study_logs WHERE student_id=?", (student_id,))
+    conn.execute("DELETE FROM exam_logs WHERE student_id=?", (student_id,))
+    archive.forget(conn, student_id)
+    progress.invalidate(conn, student_id)
+    analysis_cache.bump(conn, student_id)
+
+
+def archived_rows(student_id):
+    total = 0
+    for term, file, *_ in archive.partitions():
+        with closing(archive._open(archive._path(file))) as source:
+            total += sum(source.execute(f"SELECT COUNT(*) FROM {table} WHERE student_id = ?", (student_id,)).fetchone()[0]
+                         for table in archive.TABLES)
+    return total
+
+
+@pytest.fixture
+def archived(school):
+    before = {student: raw(student) for student in students()}
+    totals = db.query_one(ROLLUP_TOTALS)
+    hot = archive.hot_counts()
+    moved = archive.archive_logs(CUTOFF)
+    assert list(moved) == ['2023-2024']
+    assert moved['2023-2024']['study_logs'] > 0
+    assert archive.hot_counts()[0] == hot[0] - moved['2023-2024']['study_logs'] > 0
+    assert db.query_one("SELECT COUNT(*) FROM study_logs WHERE date < ?", (CUTOFF,))[0] == 0
+    return before, totals
+
+
+def test_move_keeps_raw_rows_and_totals(archived):
+    before, totals = archived
+    assert db.query_one(ROLLUP_TOTALS) == totals
+    for student, frames in before.items():
+        assert all(a.equals(b) for a, b in zip(raw(student), frames))
+        assert rollups.verify(student) == []
+
+
+def test_forget_removes_archived_rows_and_their_sums(archived):
+    before, _ = archived
+    student, *others = students()
+    assert archived_rows(student) > 0
+    with db.write() as conn:
+        delete_student_logs(conn, student)
+    assert archived_rows(student) == 0
+    assert db.query_one("SELECT COUNT(*) FROM archive_forget_queue")[0] == 0
+    assert db.query_one("SELECT COUNT(*) FROM study_unit_rollup WHERE student_id = ?", (student,))[0] == 0
+    assert db.query_one("SELECT COUNT(*) FROM exam_subject_rollup WHERE student_id = ?", (student,))[0] == 0
+    assert all(frame.empty for frame in raw(student))
+    for other in others:
+        assert all(a.equals(b) for a, b in zip(raw(other), before[other]))
+        assert rollups.verify(other) == []
+    # Katalogdaki kayıt sayıları arşiv dosyalarıyla aynı
+    assert sum(row[4] + row[5] for row in archive.partitions()) == sum(archived_rows(other) for other in others)
+
+
+def test_rolled_back_forget_leaves_archive_and_totals(archived):
+    before, totals = archived
+    student = students()[0]
+    rows = archived_rows(student)
+    with pytest.raises(RuntimeError):
+        with db.write() as conn:
+            delete_student_logs(conn, student)
+            raise RuntimeError("silme yarıda kesildi")
+    assert archived_rows(student) == rows
+    assert db.query_one(ROLLUP_TOTALS) == totals
+    assert db.query_one("SELECT COUNT(*) FROM archive_forget_queue")[0] == 0
+    assert all(a.equals(b) for a, b in zip(raw(student), before[student]))
+    assert rollups.verify(student) == []
+
+
+def test_interrupted_forget_is_completed_before_the_next_one(archived, monkeypatch):
+    first, second = students()[:2]
+    # Commit ile arşivden silme arasında süreç kesilmiş gibi: kuyruk uygulanmaz
+    monkeypatch.setattr(archive, 'purge_forgotten', lambda: 0)
+    with db.write() as conn:
+        delete_student_logs(conn, first)
+    assert archived_rows(first) > 0
+    assert db.query_one("SELECT COUNT(*) FROM archive_forget_queue")[0] == 1
+    monkeypatch.undo()
+
+    with db.write() as conn:
+        delete_student_logs(conn, second)
+    assert archived_rows(first) == archived_rows(second) == 0
+    assert db.query_one("SELECT COUNT(*) FROM archive_forget_queue")[0] == 0
+    for student in students():
+        assert rollups.verify(student) == []
@@ -0,0 +1,141 @@
+import hashlib
+import time
+
+import pytest
+
+import auth
+import db
+
+
+@pytest.fixture(autouse=True)
+def fast_kdf(monkeypatch):
+    # Testlerde düşük maliyet; biçim ve akış aynı
+    monkeypatch.setattr(auth, 'SCRYPT_N', 2 ** 8)
+    monkeypatch.setattr(auth, 'PBKDF2_ITERATIONS', 1000)
+    auth.limiter.clear()
+    yield
+    auth.limiter.clear()
+
+
+def add_user(email, hashed):
+    with db.write() as conn:
+        return conn.execute("INSERT INTO users (name, role, email, password, unique_id) VALUES (?, 'Öğrenci', ?, ?, ?)",
+                            (email, email, hashed, email[:6].upper())).lastrowid
+
+
+def stored(user_id):
+    return db.query_one("SELECT password FROM users WHERE id = ?", (user_id,))[0]
+
+
+def test_hashes_are_salted_and_verified(monkeypatch):
+    first, second = auth.hash_password("gizli"), auth.hash_password("gizli")
+    assert first != second and first.startswith(f"scrypt${2 ** 8}$8$1$")
+    assert auth.check_password("gizli", first) and auth.check_password("gizli", second)
+    assert not auth.check_password("Gizli", first)
+
+    monkeypatch.setattr(auth, 'KDF_SCHEME', 'pbkdf2_sha256')
+    hashed = auth.hash_password("gizli")
+    assert hashed.startswith("pbkdf2_sha256$1000$")
+    assert auth._verify("gizli", hashed) and not auth._verify("gizlı", hashed)
+
+
+def test_legacy_and_malformed_hashes():
+    legacy = hashlib.sha256("eski".encode()).hexdigest()
+    assert auth._verify("eski", legacy)
+    assert not auth._verify("yeni", legacy)
+    assert not auth._verify("eski", None) and not auth._verify("eski", "")
+    assert not auth._verify("eski", "scrypt$abc$8$1$tuz$ozet")
+    assert not auth._verify("eski", "pbkdf2_sha256$1000$***$***")
+
+
+def test_needs_rehash_when_the_format_or_cost_changes(monkeypatch):
+    current = auth.hash_password("gizli")
+    assert not auth.needs_rehash(current)
+    assert auth.needs_rehash(hashlib.sha256(b"gizli").hexdigest())
+    assert auth.needs_rehash(None)
+    monkeypatch.setattr(auth, 'SCRYPT_N', 2 ** 9)
+    assert auth.needs_rehash(current)
+    monkeypatch.setattr(auth, 'KDF_SCHEME', 'pbkdf2_sha256')
+    assert auth.needs_rehash(current)
+    assert not auth.needs_rehash(auth.hash_password("gizli"))
+
+
+def test_login_upgrades_a_legacy_hash(database):
+    legacy = hashlib.sha256("eski-sifre".encode()).hexdigest()
+    user_id = add_user("ali@okul", legacy)
+    assert auth.authenticate("ali@okul", "yanlis") is None
+    assert stored(user_id) == legacy
+
+    user = auth.authenticate("ali@okul", "eski-sifre")
+    assert user[0] == user_id
+    upgraded = stored(user_id)
+    assert upgraded.startswith("scrypt$") and not auth.needs_rehash(upgraded)
+    assert auth.check_password("eski-sifre", upgraded)
+    # Sonraki girişte yeniden özetlenmez
+    assert auth.authenticate("ali@okul", "eski-sifre")[0] == user_id
+    assert stored(user_id) == upgraded
+
+
+def test_account_is_throttled_after_repeated_failures(database):
+    user_id = add_user("ali@okul", auth.hash_password("dogru"))
+    for _ in range(auth.ACCOUNT_ATTEMPTS):
+        assert auth.authenticate("ali@okul", "yanlis", ip="10.0.0.1") is None
+    with pytest.raises(auth.LoginThrottled) as throttled:
+        auth.authenticate("ALI@okul ", "dogru", ip="10.0.0.2")
+    assert 0 < throttled.value.retry_after <= auth.ATTEMPT_WINDOW
+    # Başka hesap aynı IP'den engellenmez
+    add_user("veli@okul", auth.hash_password("dogru"))
+    assert auth.authenticate("veli@okul", "dogru", ip="10.0.0.1") is not None
+
+    auth.limiter.reset(('email', 'ali@okul'))
+    assert auth.authenticate("ali@okul", "dogru")[0] == user_id
+
+
+def test_successful_login_resets_the_account_counter(database):
+    add_user("ali@okul", auth.hash_password("dogru"))
+    for _ in range(auth.ACCOUNT_ATTEMPTS - 1):
+        auth.authenticate("ali@okul", "yanlis")
+    assert auth.authenticate("ali@okul", "dogru") is not None
+    for _ in range(auth.ACCOUNT_ATTEMPTS - 1):
+        auth.authenticate("ali@okul", "yanlis")
+    assert auth.authenticate("ali@okul", "dogru") is not None
+
+
+def test_ip_is_throttled_across_accounts_including_unknown_emails(database, monkeypatch):
+    monkeypatch.setattr(auth, 'IP_ATTEMPTS', 6)
+    add_user("ali@okul", auth.hash_password("dogru"))
+    for i in range(6):
+        assert auth.authenticate(f"yok{i}@okul", "x", ip="10.0.0.9") is None
+    with pytest.raises(auth.LoginThrottled):
+        auth.authenticate("ali@okul", "dogru", ip="10.0.0.9")
+    assert auth.authenticate("ali@okul", "dogru", ip="10.0.0.10") is not None
+
+
+def test_failures_expire_after_the_window():
+    limiter = auth.RateLimiter(window=0.05)
+    for _ in range(3):
+        limiter.fail('k')
+    assert limiter.retry_after('k', 3) > 0
+    assert limiter.retry_after('k', 4) == 0
+    time.sleep(0.06)
+    assert limiter.retry_after('k', 3) == 0
+    assert 'k' not in limiter._failures
+
+
+def test_expired_keys_are_swept_when_other_keys_fail():
+    limiter = auth.RateLimiter(window=0.05)
+    for i in range(100):
+        limiter.fail(('ip', f"10.0.0.{i}"))
+    time.sleep(0.06)
+    limiter.fail(('ip', "10.0.1.1"))
+    assert list(limiter._failures) == [('ip', "10.0.1.1")]
+
+
+def test_tracked_keys_are_capped_dropping_the_least_recent():
+    limiter = auth.RateLimiter(max_keys=3)
+    for key in ('a', 'b', 'c'):
+        limiter.fail(key)
+    limiter.fail('a')
+    limiter.fail('d')
+    assert list(limiter._failures) == ['c', 'a', 'd']
+    assert limiter.retry_after('a', 2) > 0 and limiter.retry_after('b', 1) == 0
@@ -0,0 +1,71 @@
+import analysis
+import analysis_cache
+import archive
+import backup
+import db
+import logs
+import progress
+import rollups
+
+TOTALS = """SELECT (SELECT COUNT(*) FROM users), (SELECT COUNT(*) FROM study_logs), (SELECT COUNT(*) FROM exam_logs),
+                   (SELECT SUM(q_solved) FROM study_unit_rollup), (SELECT SUM(exam_count) FROM exam_subject_rollup),
+                   (SELECT COUNT(*) FROM archive_partitions)"""
+
+
+def students():
+    return [row[0] for row in db.query_all("SELECT id FROM users WHERE role = 'Öğrenci' ORDER BY id")]
+
+
+def state():
+    rows = {}
+    for student in students():
+        frames = [analysis.study_rows(student), analysis.exam_rows(student)]
+        rows[student] = [frame.sort_values(list(frame.columns)).reset_index(drop=True).astype(str) for frame in frames]
+    return db.query_one(TOTALS), rows
+
+
+def same(a, b):
+    return a[0] == b[0] and a[1].keys() == b[1].keys() and \
+        all(x.equals(y) for key in a[1] for x, y in zip(a[1][key], b[1][key]))
+
+
+def test_snapshot_restore_round_trip(school):
+    archive.archive_logs('2024-09-01')
+    info = backup.snapshot("test")
+    assert info['integrity'] == 'ok'
+    before = state()
+
+    first, second = students()[:2]
+    with db.write() as conn:
+        conn.execute("DELETE FROM study_logs WHERE student_id=?", (first,))
+        conn.execute("DELETE FROM exam_logs WHERE student_id=?", (first,))
+        archive.forget(conn, first)
+        progress.invalidate(conn, first)
+        analysis_cache.bump(conn, first)
+    row = db.query_one("SELECT subject_id, unit_id FROM study_logs WHERE student_id = ? LIMIT 1", (second,))
+    logs.save_study_logs([(second, row[0], row[1], '2026-01-05', 30, 3, 2, 40, 0)])
+    changed = analysis_cache.data_version(first)
+    assert not same(state(), before)
+
+    taken = backup.restore(info['name'])
+
+    assert same(state(), before)
+    assert all(rollups.verify(student) == [] for student in students())
+    # Önbellekteki değişiklik sonrası sonuçlar geri yüklemeden sonra kullanılmaz
+    assert analysis_cache.data_version(first)[1] > changed[1]
+    assert taken['kind'] == 'geri-yukleme-oncesi'
+    assert taken['name'] in [snapshot['name'] for snapshot in backup.snapshots()]
+
+
+def test_restore_keeps_the_restored_snapshot_when_pruning(database, monkeypatch):
+    monkeypatch.setattr(backup, 'KEEP', 2)
+    oldest = backup.snapshot("eski")['name']
+    newer = backup.snapshot("yeni")['name']
+
+    taken = backup.restore(oldest)
+
+    names = [snapshot['name'] for snapshot in backup.snapshots()]
+    assert names == [taken['name'], newer, oldest]
+
+    backup.snapshot("sonraki")
+    assert oldest not in [snapshot['name'] for snapshot in backup.snapshots()]
@@ -0,0 +1,90 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+import cohort
+import db
+
+AS_OF = date(2025, 5, 16)
+
+
+@pytest.fixture
+def classroom(school):
+    # Öğretmen: ilk dört öğrenci (biri mükerrer ilişki satırıyla) ve kaydı olmayan yeni bir öğrenci
+    with db.write() as conn:
+        teacher = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Ayşe', 'Öğretmen', 'ayse@okul', 'T00001')").lastrowid
+        parent = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Veli', 'Veli', 'veli@okul', 'P00001')").lastrowid
+        newcomer = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Yeni', 'Öğrenci', 'yeni@okul', 'S09999')").lastrowid
+        members = school[:4] + [newcomer]
+        conn.executemany("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'ogretmen')",
+                         [(teacher, student) for student in members + [school[0]]])
+        conn.execute("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'veli')", (parent, school[5]))
+    return teacher, parent, members, newcomer, school[5]
+
+
+def expected_rates(members):
+    rates = {}
+    for student in members:
+        solved, wrong, empty = db.query_one("SELECT SUM(q_solved), SUM(q_wrong), SUM(q_empty) FROM study_logs WHERE student_id = ?",
+                                            (student,))
+        if solved:
+            rates[student] = (solved - wrong - empty) / solved * 100
+    return rates
+
+
+def expected_slope(student):
+    rows = db.query_all("""SELECT date, SUM(q_solved), SUM(q_wrong), SUM(q_empty) FROM study_logs
+                           WHERE student_id = ? AND date > ? AND date <= ? GROUP BY date""",
+                        (student, (AS_OF - timedelta(days=cohort.TREND_DAYS)).isoformat(), AS_OF.isoformat()))
+    if len(rows) < 2:
+        return np.nan
+    x = [(date.fromisoformat(day) - AS_OF).days for day, *_ in rows]
+    y = [(solved - wrong - empty) / solved * 100 for _, solved, wrong, empty in rows]
+    return np.polyfit(x, y, 1)[0]
+
+
+def test_overview_covers_only_the_supervisors_students(classroom):
+    teacher, parent, members, newcomer, child = classroom
+    overview = cohort.class_overview(teacher, as_of=AS_OF)
+    students = overview['students'].set_index('student_id')
+    assert sorted(students.index) == sorted(members)
+    assert overview['active'] == len(members) - 1
+    assert students.loc[newcomer, 'behind_reason'] == "Çalışma kaydı yok"
+    assert set(overview['heatmap'].index) == set(students.drop(newcomer)['label'])
+
+    assert cohort.class_overview(parent, rel_type='veli', as_of=AS_OF)['students']['student_id'].tolist() == [child]
+    assert cohort.class_overview(parent, as_of=AS_OF)['students'].empty
+
+
+def test_rates_ranks_and_trends_match_a_per_student_reference(classroom):
+    teacher, _, members, _, _ = classroom
+    students = cohort.class_overview(teacher, as_of=AS_OF)['students'].set_index('student_id')
+    rates = expected_rates(members)
+    values = np.array(list(rates.values()))
+    for student, rate in rates.items():
+        row = students.loc[student]
+        assert row['success_rate'] == pytest.approx(rate)
+        assert row['z_score'] == pytest.approx((rate - values.mean()) / values.std())
+        assert row['rank'] == 1 + sum(other > rate for other in values)
+        assert row['percentile'] == pytest.approx(sum(other <= rate for other in values) / len(values) * 100)
+        slope = expected_slope(student)
+        assert (np.isnan(slope) and np.isnan(row['trend'])) or row['trend'] == pytest.approx(slope)
+        assert row['days_idle'] == (AS_OF - date.fromisoformat(
+            db.query_one("SELECT MAX(date) FROM study_logs WHERE student_id = ?", (student,))[0])).days
+
+
+def test_weakest_units_are_class_totals(classroom):
+    teacher, _, members, _, _ = classroom
+    units = cohort.class_overview(teacher, as_of=AS_OF)['units'].set_index(['subject_name', 'unit_name'])
+    placeholders = ', '.join('?' * len(members))
+    expected = db.query_all(f"""SELECT s.subject_name, u.unit_name, SUM(l.q_solved), SUM(l.q_wrong), SUM(l.q_empty),
+                                       COUNT(DISTINCT l.student_id)
+                                FROM study_logs l JOIN units u ON l.unit_id = u.id JOIN subjects s ON u.subject_id = s.id
+                                WHERE l.student_id IN ({placeholders}) GROUP BY s.subject_name, u.unit_name""", members)
+    assert len(units) == len(expected)
+    for subject, unit, solved, wrong, empty, count in expected:
+        row = units.loc[(subject, unit)]
+        assert (row['q_solved'], row['q_wrong'], row['q_empty'], row['students']) == (solved, wrong, empty, count)
+        assert row['success_rate'] == pytest.approx((solved - wrong - empty) / solved * 100)
+    assert units['success_rate'].is_monotonic_increasing
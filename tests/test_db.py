@@ -0,0 +1,18 @@
+import pytest
+
+import db
+
+
+def test_postgres_needs_the_experimental_opt_in(monkeypatch):
+    monkeypatch.setattr(db, 'EXPERIMENTAL_POSTGRES', False)
+    with pytest.raises(ValueError, match="deneysel"):
+        db.open_pool('postgresql://kullanici@localhost/deneme')
+
+
+def test_sqlite_is_selected_without_the_opt_in(monkeypatch, tmp_path):
+    monkeypatch.setattr(db, 'EXPERIMENTAL_POSTGRES', False)
+    pool = db.open_pool(f"sqlite:///{tmp_path / 'yerel.db'}")
+    try:
+        assert pool.dialect == 'sqlite'
+    finally:
+        pool.close()
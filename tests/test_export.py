@@ -0,0 +1,38 @@
+import io
+
+import pandas as pd
+
+import analysis
+import db
+import export
+
+
+def first_student():
+    return db.query_one("SELECT MIN(id) FROM users WHERE role = 'Öğrenci'")[0]
+
+
+def test_csv_has_the_same_rows_as_the_report_query(school):
+    student = first_student()
+    expected = analysis.study_rows(student)
+    csv = pd.read_csv(io.BytesIO(export.query_to_csv(analysis.study_row_queries(student), chunk_size=7)), encoding='utf-8-sig')
+    assert len(expected) > 7
+    assert csv.astype(str).values.tolist() == expected.astype(str).values.tolist()
+    assert list(csv.columns) == list(expected.columns)
+
+
+def test_excel_has_the_same_rows_as_the_report_query(school):
+    student = first_student()
+    expected = analysis.exam_rows(student)
+    excel = pd.read_excel(io.BytesIO(export.query_to_excel(analysis.exam_row_queries(student), chunk_size=5)))
+    assert excel.values.tolist() == expected.values.tolist()
+    assert list(excel.columns) == list(expected.columns)
+
+
+def test_excel_continues_on_a_new_sheet_at_the_row_limit(school, monkeypatch):
+    monkeypatch.setattr(export, 'EXCEL_MAX_ROWS', 50)
+    student = first_student()
+    expected = analysis.study_rows(student)
+    sheets = pd.read_excel(io.BytesIO(export.query_to_excel(analysis.study_row_queries(student))), sheet_name=None, header=None)
+    assert len(sheets) == -(-(len(expected) + 1) // 50)
+    rows = pd.concat(sheets.values()).iloc[1:]
+    assert rows.astype(str).values.tolist() == expected.astype(str).values.tolist()
@@ -0,0 +1,83 @@
+import io
+
+import pandas as pd
+
+import analysis_cache
+import db
+import logs
+
+BACKENDS = ('sqlite', 'postgres')
+
+
+def counts():
+    return db.query_one("SELECT (SELECT COUNT(*) FROM study_logs), (SELECT COUNT(*) FROM exam_logs)")
+
+
+def unit_of(subject_name, unit_name):
+    return db.query_one("""SELECT s.id, u.id FROM units u JOIN subjects s ON u.subject_id = s.id
+                           WHERE s.subject_name = ? AND u.unit_name = ?""", (subject_name, unit_name))
+
+
+def test_batch_insert_bumps_each_student_once(school):
+    first, second = school[:2]
+    before = counts()
+    versions = [analysis_cache.data_version(student)[1] for student in (first, second)]
+    subject, unit = unit_of('Matematik', 'Sayılar')
+    other_subject, other_unit = unit_of('Fizik', 'Enerji')
+    assert logs.insert_study_logs([(first, subject, unit, '2026-01-05', 20, 3, 1, 30, 0),
+                                   (first, subject, unit, '2026-01-06', 10, 1, 0, 15, 1),
+                                   (second, other_subject, other_unit, '2026-01-06', 8, 0, 0, 10, 0)]) == 3
+    assert logs.insert_exam_logs([(first, subject, '2026-01-07', 40, 5, 3, 80)]) == 1
+    assert logs.insert_study_logs([]) == 0
+    assert counts() == (before[0] + 3, before[1] + 1)
+    assert [analysis_cache.data_version(student)[1] for student in (first, second)] == [versions[0] + 2, versions[1] + 1]
+
+
+def test_import_reports_bad_rows_by_line_and_inserts_the_rest(school):
+    table = pd.DataFrame([
+        ['S00000', 'Matematik', 'Sayılar', '2025-03-05', '20', '3', '1', '30', '0'],
+        ['S00001', 'Fizik', 'Kuvvet', '06.03.2025', '15', '', '', '20', '1'],
+        ['S00000', 'Matematik', 'Sayılar', '2025-03-07', '-4', '0', '0', '10', '0'],
+        ['S00000', 'Matematik', 'Sayılar', '2025-03-08', '5', '4', '2', '10', '0'],
+        ['S00000', 'Matematik', 'Sayılar', 'dün', '5', '0', '0', '10', '0'],
+        ['X99999', 'Matematik', 'Sayılar', '2025-03-09', '5', '0', '0', '10', '0'],
+        ['S00000', 'Tarih', 'Sayılar', '2025-03-09', '5', '0', '0', '10', '0'],
+        ['S00000', 'Matematik', 'Türev', '2025-03-09', '5', '0', '0', '10', '0'],
+    ], columns=['unique_id', 'subject_name', 'unit_name', 'date', 'q_solved', 'q_wrong', 'q_empty', 'duration', 'is_repeated'])
+    data = table.to_csv(index=False).encode('utf-8-sig')
+    before = counts()
+
+    dry = logs.import_logs(io.BytesIO(data), 'study', dry_run=True, name='kayit.csv')
+    assert (dry.total, dry.valid, dry.inserted) == (8, 2, 0)
+    assert counts() == before
+
+    report = logs.import_logs(io.BytesIO(data), 'study', name='kayit.csv')
+    assert (report.total, report.valid, report.inserted) == (8, 2, 2)
+    assert sorted(report.errors) == [(4, "q_solved negatif olmayan tam sayı olmalı"),
+                                     (5, "Yanlış + boş, çözülen soru sayısını aşamaz"),
+                                     (6, "Geçersiz tarih"), (7, "Öğrenci kodu bulunamadı"),
+                                     (8, "Ders bulunamadı"), (9, "Ünite bulunamadı")]
+    assert counts() == (before[0] + 2, before[1])
+    # Türkiye biçimli tarih ve boş bırakılan sayılar
+    assert db.query_one("""SELECT q_wrong, q_empty, is_repeated FROM study_logs
+                           WHERE student_id = ? AND date = '2025-03-06' AND q_solved = 15 AND duration = 20""",
+                        (school[1],)) == (0, 0, 1)
+
+
+def test_exam_import_from_excel_for_one_student(school):
+    student = school[2]
+    output = io.BytesIO()
+    pd.DataFrame({'subject_name': ['Kimya', 'Fizik'], 'date': ['2025-04-01', '2025-04-02'], 'q_solved': [30, 25],
+                  'q_wrong': [4, 2], 'q_empty': [1, 0], 'duration': [60, 45]}).to_excel(output, index=False)
+    before = counts()
+    output.seek(0)
+    report = logs.import_logs(output, 'exam', student_id=student, name='deneme.xlsx')
+    assert (report.valid, report.inserted, report.errors) == (2, 2, [])
+    assert counts() == (before[0], before[1] + 2)
+    assert db.query_one("SELECT COUNT(*) FROM exam_logs WHERE student_id = ? AND date LIKE '2025-04-0%'", (student,))[0] == 2
+
+
+def test_missing_columns_reject_the_whole_file(school):
+    report = logs.import_logs(io.BytesIO(b"subject_name,date\nMatematik,2025-01-01\n"), 'study', name='eksik.csv')
+    assert report.inserted == 0
+    assert report.errors == [(1, "Eksik kolon(lar): q_solved, unit_name, unique_id")]
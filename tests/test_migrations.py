@@ -0,0 +1,73 @@
+import pytest
+
+import analysis_cache
+import db
+import migrations
+
+
+@pytest.fixture
+def legacy(tmp_path):
+    # Göç 4'te kalmış eski şema: öğrenciye ait ders/ünite tabloları
+    previous = db._pool
+    db._pool = db.ConnectionPool(str(tmp_path / 'eski.db'))
+    analysis_cache.get_cache().clear()
+    migrations.migrate(target=4)
+    yield
+    db._pool.close()
+    db._pool = previous
+
+
+def test_orphan_logs_are_quarantined_not_deleted(legacy):
+    with db.write() as conn:
+        student = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Ali', 'Öğrenci', 'ali@okul', 'A00001')").lastrowid
+        subject = conn.execute("INSERT INTO subjects (student_id, subject_name) VALUES (?, 'Matematik')", (student,)).lastrowid
+        unit = conn.execute("INSERT INTO units (subject_id, unit_name) VALUES (?, 'Sayılar')", (subject,)).lastrowid
+        log = "INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration) VALUES (?, ?, ?, ?, 10, 2, 1, 20)"
+        conn.execute(log, (student, subject, unit, '2024-01-01'))
+        conn.execute(log, (student, subject, unit + 99, '2024-01-02'))
+        conn.execute(log, (student, subject + 99, unit, '2024-01-03'))
+        conn.execute("INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration) VALUES (?, ?, '2024-01-04', 40, 5, 3, 60)",
+                     (student, subject + 99))
+
+    migrations.migrate(target=5)
+
+    assert db.query_all("SELECT date FROM study_logs") == [('2024-01-01',)]
+    assert db.query_all("SELECT date FROM quarantine_study_logs ORDER BY date") == [('2024-01-02',), ('2024-01-03',)]
+    assert db.query_one("SELECT COUNT(*), MIN(quarantine_reason) FROM quarantine_exam_logs") == (1, "göç 5: dersi silinmiş")
+    assert db.query_one("SELECT SUM(log_count) FROM study_unit_rollup")[0] == 1
+
+
+def test_logs_without_a_catalog_entry_are_quarantined_with_their_old_ids(legacy):
+    migrations.migrate(target=5)
+    with db.write() as conn:
+        student = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Ali', 'Öğrenci', 'ali@okul', 'A00001')").lastrowid
+        subject = conn.execute("INSERT INTO subjects (student_id, subject_name) VALUES (?, 'Matematik')", (student,)).lastrowid
+        unnamed_subject = conn.execute("INSERT INTO subjects (student_id, subject_name) VALUES (?, NULL)", (student,)).lastrowid
+        unit = conn.execute("INSERT INTO units (subject_id, unit_name) VALUES (?, 'Sayılar')", (subject,)).lastrowid
+        unnamed_unit = conn.execute("INSERT INTO units (subject_id, unit_name) VALUES (?, NULL)", (subject,)).lastrowid
+        log = "INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration) VALUES (?, ?, ?, ?, 10, 2, 1, 20)"
+        conn.execute(log, (student, subject, unit, '2024-01-01'))
+        conn.execute(log, (student, subject, unnamed_unit, '2024-01-02'))
+        exam = "INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration) VALUES (?, ?, ?, 40, 5, 3, 60)"
+        conn.execute(exam, (student, subject, '2024-01-03'))
+        conn.execute(exam, (student, unnamed_subject, '2024-01-04'))
+
+    migrations.migrate(target=6)
+
+    assert db.query_all("SELECT date FROM study_logs") == [('2024-01-01',)]
+    assert db.query_all("SELECT date FROM exam_logs") == [('2024-01-03',)]
+    assert db.query_all("SELECT unit_id, quarantine_reason FROM quarantine_study_logs") == [(unnamed_unit, "göç 6: kataloğa eşlenemedi")]
+    assert db.query_all("SELECT subject_id FROM quarantine_exam_logs") == [(unnamed_subject,)]
+    assert db.query_one("SELECT SUM(log_count) FROM study_unit_rollup")[0] == 1
+
+
+def test_cache_generations_move_out_of_student_versions(legacy):
+    migrations.migrate(target=13)
+    with db.write() as conn:
+        conn.executemany("INSERT INTO student_data_versions (student_id, version) VALUES (?, ?)", [(0, 7), (-1, 3), (5, 2)])
+
+    migrations.migrate(target=14)
+
+    assert db.query_all("SELECT key, version FROM cache_generations ORDER BY key") == [('analysis', 7), ('roster', 3)]
+    assert db.query_all("SELECT student_id, version FROM student_data_versions") == [(5, 2)]
+    assert analysis_cache.data_version(5) == (7, 2)
@@ -0,0 +1,48 @@
+import os
+import sqlite3
+import subprocess
+import sys
+
+import pandas as pd
+
+from conftest import ROOT
+
+
+def test_cli_imports_roster_and_writes_initial_passwords(tmp_path):
+    roster_file = tmp_path / 'sinif.csv'
+    pd.DataFrame([
+        {'name': 'Ayşe Öğretmen', 'role': 'Öğretmen', 'email': 'ayse@okul', 'phone': '', 'password': '', 'teacher': '', 'parent': ''},
+        {'name': 'Veli Kaya', 'role': 'Veli', 'email': 'veli@okul', 'phone': '', 'password': 'gizli1', 'teacher': '', 'parent': ''},
+        {'name': 'Ali Kaya', 'role': 'Öğrenci', 'email': 'ali@okul', 'phone': '', 'password': '', 'teacher': 'ayse@okul', 'parent': 'veli@okul'},
+    ]).to_csv(roster_file, index=False)
+    out = tmp_path / 'hesaplar.csv'
+    env = {**os.environ, 'OGRENCI_TAKIP_DB': str(tmp_path / 'cli.db')}
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'onboarding.py'), str(roster_file), '--out', str(out)],
+                            env=env, cwd=tmp_path, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+
+    created = pd.read_csv(out, keep_default_na=False)
+    assert sorted(created['email']) == ['ali@okul', 'ayse@okul', 'veli@okul']
+    # Şifresi boş bırakılanlara üretilen ilk şifre dosyaya yazılır, verilen şifre yazılmaz
+    passwords = dict(zip(created['email'], created['initial_password']))
+    assert passwords['ayse@okul'] and passwords['ali@okul'] and passwords['veli@okul'] == ''
+
+    conn = sqlite3.connect(tmp_path / 'cli.db')
+    emails = {row[0] for row in conn.execute("SELECT email FROM users")}
+    relations = conn.execute("""SELECT s.email, r.type FROM relationships r JOIN users s ON s.id = r.student_id
+                                ORDER BY r.type""").fetchall()
+    conn.close()
+    assert {'ali@okul', 'ayse@okul', 'veli@okul'} <= emails
+    assert relations == [('ali@okul', 'ogretmen'), ('ali@okul', 'veli')]
+
+
+def test_cli_dry_run_writes_nothing(tmp_path):
+    roster_file = tmp_path / 'sinif.csv'
+    pd.DataFrame([{'name': 'Ali', 'role': 'Öğrenci', 'email': 'ali@okul'}]).to_csv(roster_file, index=False)
+    env = {**os.environ, 'OGRENCI_TAKIP_DB': str(tmp_path / 'cli.db')}
+    result = subprocess.run([sys.executable, os.path.join(ROOT, 'onboarding.py'), str(roster_file), '--dry-run'],
+                            env=env, cwd=tmp_path, capture_output=True, text=True, timeout=300)
+    assert result.returncode == 0, result.stderr
+    conn = sqlite3.connect(tmp_path / 'cli.db')
+    assert conn.execute("SELECT COUNT(*) FROM users WHERE email = 'ali@okul'").fetchone()[0] == 0
+    conn.close()
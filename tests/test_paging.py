@@ -0,0 +1,82 @@
+import pytest
+
+import db
+import paging
+
+BACKENDS = ('sqlite', 'postgres')
+
+
+def add_users(names, role='Öğrenci'):
+    with db.write() as conn:
+        start = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        for i, name in enumerate(names, start):
+            conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES (?, ?, ?, ?)",
+                         (name, role, f"{role.lower()}{i}@okul", f"U{i:05d}"))
+
+
+def all_pages(fetch):
+    pages, after = [], None
+    while True:
+        page = fetch(after)
+        pages.append(page)
+        if not page.has_next:
+            return pages
+        after = page.next_key
+
+
+def test_users_keyset_pages_cover_every_row_once_in_id_order(database):
+    add_users([f"Öğrenci {i}" for i in range(23)])
+    add_users([f"Öğretmen {i}" for i in range(4)], role='Öğretmen')
+    pages = all_pages(lambda after: paging.users(after, limit=5))
+    ids = [i for page in pages for i in page.ids]
+    expected = [row[0] for row in db.query_all("SELECT id FROM users ORDER BY id")]
+    assert ids == expected
+    assert all(len(page.ids) == 5 for page in pages[:-1])
+
+    students = [i for page in all_pages(lambda after: paging.users(after, role='Öğrenci', limit=4)) for i in page.ids]
+    assert students == [row[0] for row in db.query_all("SELECT id FROM users WHERE role = 'Öğrenci' ORDER BY id")]
+
+
+def names(text):
+    return paging.users(search=text).df['name'].tolist()
+
+
+def test_search_folds_turkish_case(database):
+    add_users(["IŞIK Yılmaz", "ışıl Çelik", "Ömer Şahin", "Isparta Deneme"])
+    assert names("ışık") == ["IŞIK Yılmaz"]
+    assert names("IŞI") == ["IŞIK Yılmaz", "ışıl Çelik"]
+    assert names("isi") == ["IŞIK Yılmaz", "ışıl Çelik"]
+    assert names("ÖMER") == ["Ömer Şahin"]
+    assert names("öğrenci3@") == ["Ömer Şahin"]
+    assert names("is%") == []
+
+
+def test_search_uses_folded_indexes(database, backend):
+    if backend == 'postgres':
+        pytest.skip("SQLite sorgu planına bakar")
+    add_users([f"Öğrenci {i}" for i in range(50)])
+    with db.write() as conn:
+        conn.execute("ANALYZE users")
+        for column in ('name', 'email'):
+            plan = conn.execute(f"EXPLAIN QUERY PLAN SELECT id FROM users WHERE {column}_key LIKE ? ESCAPE '\\'",
+                                ('isik%',)).fetchall()
+            assert any(f'idx_users_{column}_key' in row[-1] for row in plan)
+
+
+def test_student_units_lists_subjects_without_units_across_pages(database):
+    import curriculum
+    add_users(["Deniz", "Ece"])
+    student, other = [row[0] for row in db.query_all("SELECT id FROM users WHERE name IN ('Deniz', 'Ece') ORDER BY name")]
+    math = curriculum.enroll_subject(student, "Matematik")
+    for name in ("Sayılar", "Kümeler", "Üslü İfadeler"):
+        curriculum.enroll_unit(student, math, name)
+    curriculum.enroll_subject(student, "Fizik")
+    curriculum.enroll_subject(student, "Kimya")
+    curriculum.enroll_subject(other, "Biyoloji")
+
+    pages = all_pages(lambda after: paging.student_units(student, after, limit=2))
+    rows = [(subject, unit if isinstance(unit, str) else None) for page in pages
+            for subject, unit in zip(page.df['subject_name'], page.df['unit_name'])]
+    assert [len(page.ids) for page in pages] == [2, 2, 1]
+    assert sorted(rows, key=str) == sorted([("Matematik", "Sayılar"), ("Matematik", "Kümeler"),
+                                            ("Matematik", "Üslü İfadeler"), ("Fizik", None), ("Kimya", None)], key=str)
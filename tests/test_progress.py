@@ -0,0 +1,134 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import db
+import logs
+import progress
+
+
+def raw_logs(student_id):
+    df = db.query_df("SELECT unit_id, date, q_solved, q_wrong, q_empty FROM study_logs WHERE student_id = ?", (student_id,))
+    df[['q_solved', 'q_wrong', 'q_empty']] = df[['q_solved', 'q_wrong', 'q_empty']].fillna(0)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+def expected_trend(student_id):
+    # Aynı seri doğrudan ham kayıtlardan: günlük oran, takvim günü kayan pencereler ve EMA
+    df = raw_logs(student_id)
+    df['q_correct'] = df['q_solved'] - df['q_wrong'] - df['q_empty']
+    daily = df.groupby('date')[['q_solved', 'q_correct']].sum().astype(float)
+    result = pd.DataFrame({'date': daily.index, 'q_solved': daily['q_solved'].to_numpy()})
+    result['daily_success'] = (daily['q_correct'] / daily['q_solved'] * 100).to_numpy()
+    for window in progress.WINDOWS:
+        rolled = daily.rolling(f'{window}D').sum()
+        result[f'roll_{window}'] = (rolled['q_correct'] / rolled['q_solved'] * 100).to_numpy()
+    ema = daily.ewm(alpha=progress.EMA_ALPHA, adjust=False).mean()
+    result['ema'] = (ema['q_correct'] / ema['q_solved'] * 100).to_numpy()
+    return result
+
+
+def stored_state(student_id):
+    return (db.query_all("SELECT * FROM study_progress_daily WHERE student_id = ? ORDER BY date", (student_id,)),
+            db.query_all("SELECT * FROM study_unit_mastery WHERE student_id = ? ORDER BY unit_id", (student_id,)))
+
+
+def assert_same_state(left, right):
+    for left_rows, right_rows in zip(left, right):
+        assert len(left_rows) == len(right_rows)
+        for a, b in zip(left_rows, right_rows):
+            assert tuple(a) == pytest.approx(tuple(b))
+
+
+def test_trend_matches_a_full_recompute(school):
+    for student in school[:3]:
+        trend = progress.trend(student)
+        expected = expected_trend(student)
+        assert trend['date'].tolist() == expected['date'].tolist()
+        for column in ['q_solved', 'daily_success', 'roll_7', 'roll_30', 'ema']:
+            assert trend[column].to_numpy(dtype=float) == pytest.approx(expected[column].to_numpy(), nan_ok=True)
+
+
+def test_trend_range_reads_only_the_tail(school):
+    full = progress.trend(school[0])
+    last = full['date'].max()
+    tail = full[full['date'] > last - pd.Timedelta(days=90)].reset_index(drop=True)
+    pd.testing.assert_frame_equal(progress.trend(school[0], 90), tail)
+
+
+def test_incremental_apply_equals_a_rebuild(school):
+    student = school[1]
+    progress.trend(student)
+    row = db.query_one("SELECT subject_id, unit_id, MAX(date) FROM study_logs WHERE student_id = ?", (student,))
+    last = date.fromisoformat(row[2])
+    logs.insert_study_logs([
+        (student, row[0], row[1], (last + timedelta(days=1)).isoformat(), 30, 3, 2, 40, 0),
+        (student, row[0], row[1], (last - timedelta(days=120)).isoformat(), 18, 6, 0, 25, 1),
+        (student, row[0], row[1], (last - timedelta(days=400)).isoformat(), 12, None, None, None, 0),
+    ])
+    # apply() durumu güncelledi; toplam kontrolü baştan kurmayı gerektirmemeli
+    assert progress.ensure(student) is False
+    incremental = stored_state(student)
+    with db.write() as conn:
+        progress.rebuild(conn, student)
+    assert_same_state(incremental, stored_state(student))
+
+
+def test_deleted_logs_trigger_a_rebuild(school):
+    student = school[2]
+    progress.trend(student)
+    with db.write() as conn:
+        conn.execute("DELETE FROM study_logs WHERE id IN (SELECT id FROM study_logs WHERE student_id = ? LIMIT 10)", (student,))
+    assert progress.ensure(student) is True
+    trend = progress.trend(student)
+    assert trend['roll_30'].to_numpy(dtype=float) == pytest.approx(expected_trend(student)['roll_30'].to_numpy(), nan_ok=True)
+
+
+def test_unit_mastery_uses_date_decayed_weights(school):
+    student = school[3]
+    df = raw_logs(student)
+    df['q_correct'] = df['q_solved'] - df['q_wrong'] - df['q_empty']
+    ref = df.groupby('unit_id')['date'].transform('max')
+    weight = progress.MASTERY_DECAY ** (ref - df['date']).dt.days
+    df['w_solved'], df['w_correct'] = df['q_solved'] * weight, df['q_correct'] * weight
+    weights = df.groupby('unit_id')[['w_solved', 'w_correct']].sum()
+    names = db.query_df("""SELECT u.id AS unit_id, s.subject_name, u.unit_name FROM units u
+                           JOIN subjects s ON u.subject_id = s.id""").set_index('unit_id')
+    weights = weights.join(names).sort_values(['subject_name', 'unit_name'])
+
+    mastery = progress.unit_mastery(student)
+    assert mastery['unit_name'].tolist() == weights['unit_name'].tolist()
+    assert mastery['evidence'].to_numpy() == pytest.approx(weights['w_solved'].to_numpy())
+    expected = (weights['w_correct'] + progress.PRIOR_CORRECT) / (weights['w_solved'] + progress.PRIOR_SOLVED) * 100
+    assert mastery['mastery'].to_numpy() == pytest.approx(expected.to_numpy())
+
+
+def test_forecast_fits_the_recent_rolling_rate(school):
+    student = school[4]
+    series = progress.trend(student, progress.FORECAST_DAYS).dropna(subset=['roll_30'])
+    days = series['date'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    slope = np.polyfit(days - days[-1], series['roll_30'].to_numpy(dtype=float), 1)[0]
+    result = progress.forecast(student)
+    assert result['current'] == pytest.approx(series['roll_30'].iloc[-1])
+    assert result['slope'] == pytest.approx(slope)
+    if slope > 0 and (100 - result['current']) / slope <= progress.FORECAST_HORIZON:
+        assert result['eta'] == series['date'].iloc[-1].date() + timedelta(days=int(np.ceil((100 - result['current']) / slope)))
+    else:
+        assert result['eta'] is None and result['reason']
+
+
+def test_forecast_needs_enough_days_and_stops_at_the_target(school):
+    student = school[5]
+    row = db.query_one("SELECT subject_id, unit_id FROM study_logs WHERE student_id = ? LIMIT 1", (student,))
+    with db.write() as conn:
+        conn.execute("DELETE FROM study_logs WHERE student_id = ?", (student,))
+    assert progress.forecast(student)['reason'] == "Tahmin için yeterli çalışma günü yok"
+
+    logs.insert_study_logs([(student, row[0], row[1], (date(2025, 3, 1) + timedelta(days=i)).isoformat(), 20, 0, 0, 30, 0)
+                            for i in range(10)])
+    result = progress.forecast(student)
+    assert result['current'] == pytest.approx(100.0)
+    assert result['eta'] == date(2025, 3, 10)
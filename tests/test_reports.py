@@ -0,0 +1,55 @@
+import os
+import tempfile
+
+import pandas as pd
+
+import db
+import reports
+
+
+def raw_totals():
+    study = db.query_df("SELECT student_id, q_solved, q_wrong, q_empty, duration FROM study_logs")
+    exams = db.query_df("SELECT student_id, q_solved, q_wrong FROM exam_logs")
+    totals = study.groupby('student_id').sum()
+    exams['net'] = (exams['q_solved'] - exams['q_wrong']) - exams['q_wrong'] / 4
+    totals['exam_count'] = exams.groupby('student_id').size()
+    totals['exam_net'] = exams.groupby('student_id')['net'].sum()
+    totals['success_rate'] = (totals['q_solved'] - totals['q_wrong'] - totals['q_empty']) / totals['q_solved'] * 100
+    return totals
+
+
+def test_school_summary_matches_raw_logs(school):
+    with db.write() as conn:
+        conn.execute("UPDATE student_units SET is_completed = 1 WHERE unit_id IN (SELECT MIN(id) FROM units GROUP BY subject_id)")
+    summary = reports.school_summary().set_index('student_id')
+    expected = raw_totals()
+    assert list(summary.index) == school
+    columns = ['q_solved', 'q_wrong', 'q_empty', 'duration', 'exam_count']
+    assert summary[columns].values.tolist() == expected.loc[school, columns].values.tolist()
+    assert (summary['success_rate'] - expected.loc[school, 'success_rate']).abs().max() < 1e-9
+    assert (summary['exam_net'] - expected.loc[school, 'exam_net']).abs().max() < 1e-9
+    assert (summary['completion_rate'] == 50.0).all()
+
+
+def test_school_workbook_has_a_sheet_per_report(school):
+    with tempfile.TemporaryFile() as output:
+        reports.write_school_workbook(output)
+        output.seek(0)
+        sheets = pd.read_excel(output, sheet_name=None)
+    assert list(sheets) == ["Özet", "Ünite Başarı", "Deneme Netleri"]
+    assert len(sheets["Özet"]) == len(school)
+    assert len(sheets["Ünite Başarı"]) == len(db.query_all(reports.UNIT_SQL))
+    assert len(sheets["Deneme Netleri"]) == len(db.query_all(reports.EXAM_SQL))
+
+
+def test_student_reports_are_written_one_file_per_student(school, tmp_path):
+    calls = []
+    out = tmp_path / 'raporlar'
+    paths = reports.write_student_reports(str(out), workers=2, progress=lambda done, total: calls.append((done, total)))
+    assert sorted(os.listdir(out)) == sorted(os.path.basename(path) for path in paths)
+    assert len(paths) == len(school) and calls[-1] == (len(school), len(school))
+
+    summary = reports.school_summary().set_index('student_id')
+    first = pd.read_excel(paths[0], sheet_name=None, header=None)
+    assert list(first) == ["Özet", "Üniteler", "Denemeler"]
+    assert dict(zip(first["Özet"][0], first["Özet"][1]))["Çözülen"] == summary.loc[school[0], 'q_solved']
@@ -0,0 +1,51 @@
+import curriculum
+import db
+import rollups
+
+BACKENDS = ('sqlite', 'postgres')
+
+ROLLUPS = {
+    'study_unit_rollup': "student_id, unit_id",
+    'study_daily_rollup': "student_id, date",
+    'exam_subject_rollup': "student_id, subject_id",
+}
+
+
+def students():
+    return [row[0] for row in db.query_all("SELECT id FROM users WHERE role = 'Öğrenci' ORDER BY id")]
+
+
+def stored():
+    return {table: db.query_all(f"SELECT * FROM {table} ORDER BY {keys}") for table, keys in ROLLUPS.items()}
+
+
+def test_rollups_match_raw_aggregates(school):
+    assert {student: rollups.verify(student) for student in students()} == {student: [] for student in students()}
+
+
+def test_trigger_maintained_rollups_equal_a_full_rebuild_after_writes(school):
+    first, second, third = students()[:3]
+    row = db.query_one("SELECT subject_id, unit_id FROM study_logs WHERE student_id = ? LIMIT 1", (first,))
+    unit = db.query_one("SELECT unit_id FROM study_unit_rollup WHERE student_id = ? LIMIT 1", (second,))[0]
+    with db.write() as conn:
+        # Yeni gün, var olan gün ve boş alanlı kayıt
+        conn.executemany("""INSERT INTO study_logs (student_id, subject_id, unit_id, date, q_solved, q_wrong, q_empty, duration, is_repeated)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                         [(first, row[0], row[1], '2026-02-01', 25, 4, 1, 30, 0),
+                          (first, row[0], row[1], '2026-02-01', 10, 0, 0, 15, 1),
+                          (first, row[0], row[1], '2026-02-02', 12, None, None, None, 0)])
+        conn.execute("""INSERT INTO exam_logs (student_id, subject_id, date, q_solved, q_wrong, q_empty, duration)
+                        VALUES (?, ?, '2026-02-03', 40, 6, 2, 90)""", (first, row[0]))
+        conn.execute("DELETE FROM study_logs WHERE id IN (SELECT id FROM study_logs WHERE student_id = ? LIMIT 25)", (third,))
+        conn.execute("DELETE FROM exam_logs WHERE student_id = ?", (third,))
+
+    # Öğrenci üniteyi bırakınca o ünitedeki kayıtları da silinir
+    curriculum.drop_unit(second, unit)
+
+    maintained = stored()
+    with db.write() as conn:
+        rollups.rebuild(conn)
+    assert stored() == maintained
+    assert db.query_one("SELECT COUNT(*) FROM study_logs WHERE student_id = ? AND unit_id = ?", (second, unit))[0] == 0
+    for student in (first, second, third):
+        assert rollups.verify(student) == []
@@ -0,0 +1,44 @@
+import pandas as pd
+
+import db
+import roster
+
+
+def add_student(conn, name, teacher=None):
+    student = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES (?, 'Öğrenci', ?, ?)",
+                           (name, f"{name.lower()}@okul", name[:6].upper())).lastrowid
+    if teacher:
+        conn.execute("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, 'ogretmen')", (teacher, student))
+    return student
+
+
+def test_session_lists_are_reused_until_the_generation_changes(database):
+    with db.write() as conn:
+        teacher = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Ayşe', 'Öğretmen', 'ayse@okul', 'T00001')").lastrowid
+        first = add_student(conn, "Ali", teacher)
+    sessions = [roster.session_cache({}), roster.session_cache({})]
+    cached = [cache.students_of(teacher, 'ogretmen') for cache in sessions]
+    assert [r.ids for r in cached] == [[first], [first]]
+
+    with db.write() as conn:
+        second = add_student(conn, "Deniz", teacher)
+    # Nesil değişmeden aynı liste kullanılır
+    assert all(cache.students_of(teacher, 'ogretmen') is r for cache, r in zip(sessions, cached))
+
+    roster.bump()
+    for cache in sessions:
+        students = cache.students_of(teacher, 'ogretmen')
+        assert sorted(students.ids) == sorted([first, second])
+        assert students.label(second) == "Deniz"
+
+
+def test_session_cache_is_created_once_per_session():
+    state = {}
+    assert roster.session_cache(state) is roster.session_cache(state)
+    assert roster.session_cache({}) is not roster.session_cache(state)
+
+
+def test_lookup_labels_missing_ids_with_the_id():
+    units = roster.lookup(pd.DataFrame({'id': [3, 5], 'unit_name': ['Sayılar', 'Kümeler']}), 'unit_name')
+    assert units.ids == [3, 5]
+    assert units.label(5) == "Kümeler" and units.label(9) == "9"
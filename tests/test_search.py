@@ -0,0 +1,91 @@
+import pytest
+
+import curriculum
+import db
+import search
+
+BACKENDS = ('sqlite', 'postgres')
+
+
+@pytest.fixture(params=['fts', 'like'])
+def path(request, monkeypatch, backend):
+    # like: FTS5 dizini olmayan arka uçlardaki yol
+    if request.param == 'fts' and backend == 'postgres':
+        pytest.skip("PostgreSQL'de FTS5 dizini yok; LIKE yolu zaten sınanıyor")
+    if request.param == 'like':
+        monkeypatch.setattr(search, 'has_index', lambda: False)
+    return request.param
+
+
+@pytest.fixture
+def people(school, path):
+    with db.write() as conn:
+        teacher = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Ayşe Hoca', 'Öğretmen', 'ayse@okul', 'T00001')").lastrowid
+        parent = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Veli Bey', 'Veli', 'veli@okul', 'P00001')").lastrowid
+        conn.executemany("INSERT INTO relationships (supervisor_id, student_id, type) VALUES (?, ?, ?)",
+                         [(teacher, school[0], 'ogretmen'), (teacher, school[1], 'ogretmen'),
+                          (parent, school[2], 'veli'),
+                          # Öğretmenin veli olarak bağlı olduğu öğrenci öğretmen kapsamına girmez
+                          (teacher, school[3], 'veli')])
+    # Sınıf dışındaki öğrencinin aldığı ders ve ünite
+    biology = curriculum.enroll_subject(school[4], "Biyoloji")
+    curriculum.enroll_unit(school[4], biology, "Hücre")
+    return {'teacher': teacher, 'parent': parent, 'students': school}
+
+
+def found(text, role, user_id=None, kind=None):
+    results = search.search(text, role, user_id)
+    if kind is not None:
+        results = results[results['kind'] == kind]
+    return sorted(results['id'].tolist())
+
+
+def test_admin_sees_everyone_and_the_whole_catalog(people):
+    students = people['students']
+    assert set(students) <= set(found("okul", 'Yönetici', kind=search.USER))
+    assert found("biyoloji", 'Yönetici', kind=search.SUBJECT) != []
+    assert found("Hücre", 'Yönetici', kind=search.UNIT) != []
+
+
+def test_teacher_sees_only_own_students_and_their_curriculum(people):
+    teacher, students = people['teacher'], people['students']
+    assert found("okul", 'Öğretmen', teacher, search.USER) == sorted(students[:2])
+    assert found("Öğrenci", 'Öğretmen', teacher, search.USER) == sorted(students[:2])
+    assert found("S00004", 'Öğretmen', teacher) == []
+    assert found("Biyoloji", 'Öğretmen', teacher) == []
+    assert found("Hücre", 'Öğretmen', teacher) == []
+    assert len(found("Matematik", 'Öğretmen', teacher, search.SUBJECT)) == 1
+    assert len(found("Kümeler", 'Öğretmen', teacher, search.UNIT)) == 1
+
+
+def test_parent_sees_only_own_child(people):
+    parent, students = people['parent'], people['students']
+    assert found("okul", 'Veli', parent, search.USER) == [students[2]]
+    assert found("Ayşe", 'Veli', parent) == []
+    assert found("Biyoloji", 'Veli', parent) == []
+    assert len(found("Kuvvet", 'Veli', parent, search.UNIT)) == 1
+
+
+def test_students_and_unknown_roles_get_no_results(people):
+    student = people['students'][0]
+    for role in ('Öğrenci', '', None):
+        assert found("okul", role, student) == []
+        assert found("Matematik", role, student) == []
+
+
+def test_supervisor_without_students_sees_nothing(people):
+    with db.write() as conn:
+        lonely = conn.execute("INSERT INTO users (name, role, email, unique_id) VALUES ('Yeni Hoca', 'Öğretmen', 'yeni@okul', 'T00002')").lastrowid
+    assert found("okul", 'Öğretmen', lonely) == []
+    assert found("Matematik", 'Öğretmen', lonely) == []
+
+
+def test_turkish_letters_are_folded_on_both_paths(people):
+    sayilar = found("Sayılar", 'Yönetici', kind=search.UNIT)
+    assert len(sayilar) == 1
+    for text in ("sayilar", "SAYILAR", "Sayi", "SAYıLAR"):
+        assert found(text, 'Yönetici', kind=search.UNIT) == sayilar
+    assert len(found("hucre", 'Yönetici', kind=search.UNIT)) == 1
+    assert found("AYSE hoca", 'Yönetici', kind=search.USER) == [people['teacher']]
+    assert found("s00004", 'Yönetici', kind=search.USER) == [people['students'][4]]
+    assert found("Say_lar", 'Yönetici') == []
@@ -0,0 +1,122 @@
+import threading
+
+import pytest
+
+import db
+import logs
+import write_queue
+
+
+@pytest.fixture
+def writes(database):
+    queue = write_queue.WriteQueue(durable=False)
+    yield queue
+    queue.close()
+
+
+def note(conn, text):
+    conn.execute("INSERT INTO users (name, role, email) VALUES (?, 'Öğrenci', ?)", (text, f"{text}@okul"))
+    return text
+
+
+def fail(conn, text):
+    note(conn, text)
+    raise ValueError("geçersiz kayıt")
+
+
+def held(queue):
+    # Yazıcı thread'ini ilk isteğin transaction'ı içinde bekletir
+    started, release = threading.Event(), threading.Event()
+
+    def wait(conn):
+        started.set()
+        release.wait(10)
+        return 'ilk'
+    future = queue.submit(wait)
+    assert started.wait(10)
+    return future, release
+
+
+def names():
+    return {row[0] for row in db.query_all("SELECT name FROM users")}
+
+
+def test_requests_waiting_during_a_commit_share_one_transaction(writes):
+    first, release = held(writes)
+    futures = [writes.submit(note, f"ogrenci{i}") for i in range(10)]
+    release.set()
+    assert first.result(10) == 'ilk'
+    assert [future.result(10) for future in futures] == [f"ogrenci{i}" for i in range(10)]
+    stats = writes.stats()
+    assert stats['batches'] == 2 and stats['max_batch_requests'] == 10 and stats['rows'] == 11
+    assert {f"ogrenci{i}" for i in range(10)} <= names()
+
+
+def test_failing_request_is_isolated_by_retrying_one_by_one(writes):
+    _, release = held(writes)
+    good = [writes.submit(note, name) for name in ("ali", "veli")]
+    bad = writes.submit(fail, "hatali")
+    last = writes.submit(note, "deniz")
+    release.set()
+    assert [future.result(10) for future in good + [last]] == ["ali", "veli", "deniz"]
+    with pytest.raises(ValueError):
+        bad.result(10)
+    assert {"ali", "veli", "deniz"} <= names() and "hatali" not in names()
+    stats = writes.stats()
+    assert (stats['retried_batches'], stats['failed']) == (1, 1)
+
+
+def test_full_queue_rejects_instead_of_waiting(database):
+    queue = write_queue.WriteQueue(size=1, durable=False)
+    _, release = held(queue)
+    queued = queue.submit(note, "sirada")
+    with pytest.raises(write_queue.WriteQueueFull):
+        queue.submit(note, "fazla", timeout=0.05)
+    release.set()
+    assert queued.result(10) == "sirada"
+    assert queue.stats()['rejected'] == 1
+    queue.close()
+
+
+def test_close_writes_what_is_still_queued(database):
+    queue = write_queue.WriteQueue(durable=False)
+    _, release = held(queue)
+    futures = [queue.submit(note, f"son{i}") for i in range(3)]
+    threading.Timer(0.05, release.set).start()
+    queue.close()
+    assert [future.result(0) for future in futures] == ["son0", "son1", "son2"]
+    with pytest.raises(RuntimeError):
+        queue.submit(note, "gec")
+
+
+def test_saved_logs_are_committed_before_the_call_returns(school):
+    student = school[0]
+    subject, unit = db.query_one("SELECT subject_id, unit_id FROM student_units WHERE student_id = ? LIMIT 1", (student,))
+    before = db.query_one("SELECT COUNT(*) FROM study_logs WHERE student_id = ?", (student,))[0]
+    assert logs.save_study_logs([(student, subject, unit, '2026-01-05', 20, 3, 1, 30, 0)] * 2) == 2
+    assert db.query_one("SELECT COUNT(*) FROM study_logs WHERE student_id = ?", (student,))[0] == before + 2
+
+
+def test_cancelled_request_is_skipped_and_the_writer_keeps_running(writes):
+    _, release = held(writes)
+    cancelled = writes.submit(note, "iptal")
+    kept = writes.submit(note, "kalan")
+    assert cancelled.cancel()
+    release.set()
+    assert kept.result(10) == "kalan"
+    assert writes.submit(note, "sonraki").result(10) == "sonraki"
+    assert "iptal" not in names()
+
+
+def test_unexpected_error_fails_the_requests_but_not_the_writer(writes):
+    def leave(conn):
+        raise SystemExit("beklenmedik")
+
+    _, release = held(writes)
+    futures = [writes.submit(leave), writes.submit(note, "ayni_grupta")]
+    release.set()
+    for future in futures:
+        with pytest.raises(SystemExit):
+            future.result(10)
+    assert writes.submit(note, "sonraki").result(10) == "sonraki"
+    assert writes.stats()['failed'] == 2
@@ -0,0 +1,195 @@
+import atexit
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import db
+import perf
+
+# --- ARKA PLAN YAZMA KUYRUĞU (GRUP COMMIT) ---
+# Formlardan gelen kayıtlar yazıcı kilidi için tek tek yarışmaz: sınırlı bir
+# kuyruğa bırakılır, tek bir yazıcı thread'i kuyruğu boşaltır ve o anda birikmiş
+# istekleri tek transaction'da yazar. Yoğun saatlerde her kayıt için ayrı kilit
+# ve commit yerine bir grup için tek commit yapılır; eşzamanlılık arttıkça grup
+# büyür, iş hacmi düşmez. Arayan Future üzerinden commit'i bekler: onay, kayıt
+# diske yazıldıktan (synchronous=FULL) sonra gelir. Kuyruk doluysa istek
+# WriteQueueFull ile reddedilir; süreç kapanırken kuyruktaki her şey yazılır.
+
+QUEUE_SIZE = int(os.environ.get('OGRENCI_TAKIP_WRITE_QUEUE', '1000'))
+BATCH_ROWS = int(os.environ.get('OGRENCI_TAKIP_WRITE_BATCH', '500'))
+# Grup, önceki commit sürerken biriken isteklerden oluşur; ek bekleme tek kullanıcıda
+# yalnızca gecikme ekler, bu yüzden varsayılan 0
+GROUP_WAIT = float(os.environ.get('OGRENCI_TAKIP_WRITE_WAIT_MS', '0')) / 1000
+PUT_TIMEOUT = float(os.environ.get('OGRENCI_TAKIP_WRITE_PUT_TIMEOUT', '2'))
+ACK_TIMEOUT = float(os.environ.get('OGRENCI_TAKIP_WRITE_ACK_TIMEOUT', '15'))
+DURABLE = os.environ.get('OGRENCI_TAKIP_WRITE_DURABLE', '1') != '0'
+CLOSE_TIMEOUT = 30
+
+_STOP = object()
+
+
+class WriteQueueFull(Exception):
+    pass
+
+
+class WriteQueue:
+    def __init__(self, size=QUEUE_SIZE, batch_rows=BATCH_ROWS, group_wait=GROUP_WAIT, durable=DURABLE):
+        self.batch_rows = batch_rows
+        self.group_wait = group_wait
+        self.durable = durable
+        self._queue = queue.Queue(maxsize=size)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+        self._stats = {
+            'submitted': 0,
+            'rejected': 0,
+            'batches': 0,
+            'rows': 0,
+            'max_batch_requests': 0,
+            'retried_batches': 0,
+            'failed': 0,
+            'commit_seconds': 0.0,
+        }
+
+    # func(conn, *args) yazıcı thread'inde, gruptaki diğer isteklerle aynı transaction'da çalışır.
+    # weight: grup boyutu sınırı için satır sayısı
+    def submit(self, func, *args, weight=1, timeout=PUT_TIMEOUT):
+        self._start()
+        future = Future()
+        try:
+            self._queue.put((func, args, weight, future), timeout=timeout)
+        except queue.Full:
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise WriteQueueFull("Kayıt kuyruğu dolu, lütfen biraz sonra tekrar deneyin.")
+        with self._lock:
+            self._stats['submitted'] += 1
+        return future
+
+    def _start(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Yazma kuyruğu kapatıldı.")
+            if self._thread is None:
+                # Havuz önce açılsın: atexit ters sırada çalışır, kuyruk havuz kapanmadan boşalır
+                db.get_pool()
+                self._thread = threading.Thread(target=self._run, name='write-queue', daemon=True)
+                self._thread.start()
+                atexit.register(self.close)
+
+    def _collect(self):
+        item = self._queue.get()
+        if item is _STOP:
+            return [], True
+        batch, rows = [item], item[2]
+        deadline = time.monotonic() + self.group_wait
+        while rows < self.batch_rows:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+            rows += item[2]
+        return batch, False
+
+    def _run(self):
+        stop = False
+        while not stop:
+            batch, stop = self._collect()
+            self._flush(batch)
+        # Kapanış sinyalinden sonra kuyruğa girmiş istekler de yazılır
+        rest = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                rest.append(item)
+        self._flush(rest)
+
+    def _write(self, batch):
+        with db.write(durable=self.durable) as conn:
+            return [func(conn, *args) for func, args, _, _ in batch]
+
+    def _flush(self, batch):
+        # İptal edilmiş istekler yazılmaz; kalanların Future'ı bundan sonra iptal edilemez
+        batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            self._commit(batch)
+        except BaseException as e:
+            # Beklenmedik bir hata yazıcı thread'ini düşürmesin: sonuçlanmamış her istek
+            # hatayı alır (beklerken askıda kalmaz), kuyruk sonraki gruplarla devam eder
+            pending = [item for item in batch if not item[3].done()]
+            with self._lock:
+                self._stats['failed'] += len(pending)
+            for item in pending:
+                item[3].set_exception(e)
+
+    def _commit(self, batch):
+        start = time.perf_counter()
+        try:
+            with perf.section("Yazma kuyruğu (grup commit)"):
+                results = self._write(batch)
+        except Exception:
+            # Hatalı tek istek tüm grubu düşürmesin: istekler ayrı transaction'larda yeniden denenir
+            with self._lock:
+                self._stats['retried_batches'] += 1
+            for item in batch:
+                try:
+                    item[3].set_result(self._write([item])[0])
+                except Exception as e:
+                    with self._lock:
+                        self._stats['failed'] += 1
+                    item[3].set_exception(e)
+            return
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['rows'] += sum(item[2] for item in batch)
+            self._stats['max_batch_requests'] = max(self._stats['max_batch_requests'], len(batch))
+            self._stats['commit_seconds'] += time.perf_counter() - start
+        for item, result in zip(batch, results):
+            item[3].set_result(result)
+
+    def stats(self):
+        with self._lock:
+            result = dict(self._stats)
+        result['queued'] = self._queue.qsize()
+        result['capacity'] = self._queue.maxsize
+        result['durable'] = self.durable
+        result['avg_batch_rows'] = result['rows'] / result['batches'] if result['batches'] else 0.0
+        return result
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = WriteQueue()
+    return _queue
+
+
+def stats():
+    return get_queue().stats()